@@ -319,6 +319,24 @@ def sda_index_8(state):
   _run_sda_index_bench(state, 8)
 
 
+@google_benchmark.register
+@google_benchmark.option.arg_names(['num_operands', 'cached'])
+@google_benchmark.option.args_product([[2, 4, 6, 8], [0, 1]])
+def einsum_trace(state):
+  """Benchmarks tracing an einsum over a ring of operands."""
+  from jax._src.numpy import lax_numpy  # pylint: disable=g-import-not-at-top
+  n, cached = state.range(0), state.range(1)
+  names = 'abcdefghijklmnopqrstuvwxyz'
+  subscripts = ','.join(names[i] + names[(i + 1) % n] + 'z' for i in range(n))
+  operands = [jax.ShapeDtypeStruct((8, 8, 4), jnp.float32)] * n
+  f = partial(jnp.einsum, subscripts + '->z')
+  jax.make_jaxpr(f)(*operands)
+  while state:
+    if not cached:
+      lax_numpy._einsum_contract_path.cache_clear()
+    jax.make_jaxpr(f)(*operands)
+
+
 def swap(a, b):
   return b, a
 
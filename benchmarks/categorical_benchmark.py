@@ -0,0 +1,88 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks for sampling from large categorical distributions."""
+import google_benchmark
+import jax
+from jax import random
+import numpy as np
+
+
+_VOCAB_SIZES = [50_000, 200_000, 1_000_000]
+# `categorical` materializes a (samples, vocab) array, so it gets fewer draws.
+_CATEGORICAL_SAMPLES = [16, 256]
+_SAMPLES = [256, 1 << 16]
+
+
+def _logits(vocab):
+  return jax.device_put(
+      np.random.RandomState(0).standard_normal(vocab).astype(np.float32))
+
+
+def _run(state, f, *args):
+  f(*args).block_until_ready()
+  while state:
+    f(*args).block_until_ready()
+
+
+def _count_samples(state, samples):
+  state.counters['samples_per_second'] = google_benchmark.Counter(
+      samples * state.iterations, google_benchmark.Counter.kIsRate)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['vocab', 'samples'])
+@google_benchmark.option.args_product([_VOCAB_SIZES, _CATEGORICAL_SAMPLES])
+def categorical(state):
+  vocab, samples = state.range(0), state.range(1)
+  f = jax.jit(lambda key, logits: random.categorical(
+      key, logits, shape=(samples,)))
+  _run(state, f, random.PRNGKey(0), _logits(vocab))
+  _count_samples(state, samples)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['vocab', 'samples'])
+@google_benchmark.option.args_product([_VOCAB_SIZES, _SAMPLES])
+def choice_with_p(state):
+  vocab, samples = state.range(0), state.range(1)
+  p = jax.nn.softmax(_logits(vocab))
+  f = jax.jit(lambda key, p: random.choice(key, vocab, (samples,), p=p))
+  _run(state, f, random.PRNGKey(0), p)
+  _count_samples(state, samples)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['vocab'])
+@google_benchmark.option.args_product([_VOCAB_SIZES])
+def alias_table(state):
+  f = jax.jit(lambda logits: random.alias_table(logits=logits))
+  logits = _logits(state.range(0))
+  f(logits).prob.block_until_ready()
+  while state:
+    f(logits).prob.block_until_ready()
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['vocab', 'samples'])
+@google_benchmark.option.args_product([_VOCAB_SIZES, _SAMPLES])
+def alias_sample(state):
+  vocab, samples = state.range(0), state.range(1)
+  table = random.alias_table(logits=_logits(vocab))
+  f = jax.jit(lambda key, table: random.alias_sample(key, table, (samples,)))
+  _run(state, f, random.PRNGKey(0), table)
+  _count_samples(state, samples)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,61 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for resizing batches of 4K images with jax.image.resize."""
+from unittest import mock
+
+import google_benchmark
+import jax
+from jax._src.image import scale
+import numpy as np
+
+
+_METHODS = ['linear', 'cubic', 'lanczos3', 'lanczos5']
+# Output heights for a 3840x2160 input: 1080p, 720p and 8K.
+_TARGETS = [1080, 720, 4320]
+
+
+def _benchmark_resize(state, banded):
+  method = _METHODS[state.range(0)]
+  height = state.range(1)
+  batch = state.range(2)
+  x = jax.device_put(np.random.RandomState(0).rand(batch, 2160, 3840, 3)
+                     .astype(np.float32))
+  shape = (batch, height, height * 16 // 9, 3)
+  max_density = scale._BANDED_RESIZE_MAX_DENSITY if banded else 0
+  with mock.patch.object(scale, '_BANDED_RESIZE_MAX_DENSITY', max_density):
+    scale._resize_weight_plan.cache_clear()
+    f = jax.jit(lambda x: jax.image.resize(x, shape, method))
+    f(x).block_until_ready()
+  while state:
+    f(x).block_until_ready()
+  scale._resize_weight_plan.cache_clear()
+  state.items_processed = state.iterations * batch
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['method', 'height', 'batch'])
+@google_benchmark.option.args_product([range(len(_METHODS)), _TARGETS, [1, 4]])
+def resize_4k_dense(state):
+  _benchmark_resize(state, banded=False)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['method', 'height', 'batch'])
+@google_benchmark.option.args_product([range(len(_METHODS)), _TARGETS, [1, 4]])
+def resize_4k_banded(state):
+  _benchmark_resize(state, banded=True)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,189 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for batched matrix decompositions.
+
+The `*_python` benchmarks time the recursive blocked factorizations used by
+backends without a library implementation, on whichever backend is present,
+against the backend's own `lax.linalg` factorizations and the rolled LU loop
+they replace. On backends that lower Cholesky decompositions through XLA, the
+`cholesky_large_*` and `cholesky_compile_*` benchmarks compare the run and
+compile times of the Python and XLA decompositions of larger matrices. The
+`*_jacobi` benchmarks time the Jacobi eigh and SVD used for tiny matrices
+against the backend's default decompositions.
+"""
+import functools
+from unittest import mock
+
+import google_benchmark
+import jax
+from jax import lax
+import jax.numpy as jnp
+from jax._src.lax import linalg as lax_linalg
+from jax.lib import xla_bridge
+import numpy as np
+
+
+partial = functools.partial
+
+_BATCHES = [1, 64, 4096]
+_SIZES = [4, 8, 16, 32, 64, 128]
+_BLOCK_SIZES = [16, 32, 64]
+_LARGE_BATCHES = [1, 8]
+_LARGE_SIZES = [256, 512, 1024, 2048, 4096]
+_COMPILE_SIZES = [32, 64, 128, 256, 512, 1024, 2048, 4096]
+_JACOBI_BATCHES = [10**3, 10**4, 10**5, 10**6]
+_JACOBI_SIZES = [3, 4, 8]
+
+
+def _matrices(state, spd=False):
+  batch, n = state.range(0), state.range(1)
+  x = np.random.RandomState(0).randn(batch, n, n).astype(np.float32)
+  if spd:
+    x = np.matmul(x, np.swapaxes(x, -1, -2)) + n * np.eye(n, dtype=np.float32)
+  return jax.device_put(x)
+
+
+def _run(state, f, x):
+  jax.tree_util.tree_map(lambda y: y.block_until_ready(), f(x))
+  while state:
+    jax.tree_util.tree_map(lambda y: y.block_until_ready(), f(x))
+  state.items_processed = state.iterations * x.shape[0]
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_BATCHES, _SIZES])
+def lu_library(state):
+  _run(state, jax.jit(lax.linalg.lu), _matrices(state))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_BATCHES, _SIZES])
+def lu_rolled(state):
+  _run(state, jax.jit(jax.vmap(lax_linalg._lu_unblocked)), _matrices(state))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n', 'block_size'])
+@google_benchmark.option.args_product([_BATCHES, _SIZES, _BLOCK_SIZES])
+def lu_python(state):
+  f = jax.jit(partial(lax_linalg._lu_python, block_size=state.range(2)))
+  _run(state, f, _matrices(state))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_BATCHES, _SIZES])
+def cholesky_library(state):
+  _run(state, jax.jit(lax.linalg.cholesky), _matrices(state, spd=True))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n', 'block_size'])
+@google_benchmark.option.args_product([_BATCHES, _SIZES, _BLOCK_SIZES])
+def cholesky_python(state):
+  f = jax.jit(partial(lax_linalg._cholesky_python, block_size=state.range(2)))
+  _run(state, f, _matrices(state, spd=True))
+
+
+def _cholesky_lowering(python):
+  # Lowers Cholesky decompositions of all sizes to one of the two algorithms.
+  max_size = np.inf if python else 0
+  return mock.patch.object(lax_linalg, '_CHOLESKY_PYTHON_MAX_SIZE', max_size)
+
+
+def _benchmark_cholesky_large(state, python):
+  x = _matrices(state, spd=True)
+  with _cholesky_lowering(python):
+    # A fresh function, so that neither variant reuses the other's executable.
+    _run(state, jax.jit(lambda x: lax.linalg.cholesky(x)), x)
+
+
+def _benchmark_cholesky_compile(state, python):
+  x = np.zeros((state.range(0), state.range(1), state.range(1)), np.float32)
+  with _cholesky_lowering(python):
+    computation = jax.xla_computation(lax.linalg.cholesky)(x)
+  backend = xla_bridge.get_backend()
+  while state:
+    backend.compile(computation)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_LARGE_BATCHES, _LARGE_SIZES])
+def cholesky_large_xla(state):
+  _benchmark_cholesky_large(state, python=False)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_LARGE_BATCHES, _LARGE_SIZES])
+def cholesky_large_python(state):
+  _benchmark_cholesky_large(state, python=True)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([[1], _COMPILE_SIZES])
+def cholesky_compile_xla(state):
+  _benchmark_cholesky_compile(state, python=False)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([[1], _COMPILE_SIZES])
+def cholesky_compile_python(state):
+  _benchmark_cholesky_compile(state, python=True)
+
+
+def _benchmark_jacobi(state, f, jacobi):
+  x = _matrices(state)
+  x = (x + x.swapaxes(-1, -2)) / 2
+  max_size = lax_linalg._JACOBI_MAX_SIZE if jacobi else 0
+  with mock.patch.object(lax_linalg, '_JACOBI_MAX_SIZE', max_size):
+    # A fresh function, so that neither variant reuses the other's executable.
+    _run(state, jax.jit(lambda x: f(x)), x)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_JACOBI_BATCHES, _JACOBI_SIZES])
+def eigh_default(state):
+  _benchmark_jacobi(state, jnp.linalg.eigh, jacobi=False)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_JACOBI_BATCHES, _JACOBI_SIZES])
+def eigh_jacobi(state):
+  _benchmark_jacobi(state, jnp.linalg.eigh, jacobi=True)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_JACOBI_BATCHES, _JACOBI_SIZES])
+def svd_default(state):
+  _benchmark_jacobi(state, jnp.linalg.svd, jacobi=False)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([_JACOBI_BATCHES, _JACOBI_SIZES])
+def svd_jacobi(state):
+  _benchmark_jacobi(state, jnp.linalg.svd, jacobi=True)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,149 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for iterative linear solvers in jax.scipy.sparse.linalg."""
+import functools
+
+import google_benchmark
+import jax
+from jax.experimental import sparse
+import jax.numpy as jnp
+import jax.scipy.sparse.linalg as jsla
+import numpy as np
+import scipy.sparse
+
+
+partial = functools.partial
+
+
+def _heterogeneous_spd_systems(batch, n, seed=0):
+  """SPD systems whose condition numbers range over several decades."""
+  rng = np.random.RandomState(seed)
+  q, _ = np.linalg.qr(rng.randn(batch, n, n))
+  conds = np.logspace(0, 4, batch)
+  eigs = np.stack([np.logspace(0, np.log10(c), n) for c in conds])
+  A = np.einsum('bij,bj,bkj->bik', q, eigs, q).astype(np.float32)
+  b = rng.randn(batch, n).astype(np.float32)
+  return jax.device_put(A), jax.device_put(b)
+
+
+def _run(state, f, *args):
+  jax.tree_util.tree_map(lambda x: x.block_until_ready(), f(*args))
+  while state:
+    jax.tree_util.tree_map(lambda x: x.block_until_ready(), f(*args))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n'])
+@google_benchmark.option.args_product([[1000, 10000], [8, 32]])
+def cg_vmap(state):
+  A, b = _heterogeneous_spd_systems(state.range(0), state.range(1))
+  f = jax.jit(jax.vmap(lambda A, b: jsla.cg(A, b, maxiter=1000)[0]))
+  _run(state, f, A, b)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'n', 'compact_every'])
+@google_benchmark.option.args_product([[1000, 10000], [8, 32], [0, 1, 10]])
+def cg_batched(state):
+  A, b = _heterogeneous_spd_systems(state.range(0), state.range(1))
+  compact_every = state.range(2) or None
+  f = jax.jit(partial(jsla.cg_batched, maxiter=1000,
+                      compact_every=compact_every))
+  _run(state, f, A, b)
+  _, info = f(A, b)
+  state.counters['mean_iters'] = float(jnp.mean(info.num_iters))
+  state.counters['max_iters'] = float(jnp.max(info.num_iters))
+
+
+def _poisson_2d(n):
+  T = scipy.sparse.diags([-1, 2, -1], [-1, 0, 1], shape=(n, n),
+                         dtype=np.float32)
+  I = scipy.sparse.identity(n, dtype=np.float32)
+  return sparse.BCOO.from_scipy_sparse(
+      scipy.sparse.kron(I, T) + scipy.sparse.kron(T, I))
+
+
+_PRECONDITIONERS = {
+    0: lambda A: None,
+    1: sparse.preconditioners.jacobi,
+    2: partial(sparse.preconditioners.block_jacobi, block_size=16),
+    3: sparse.preconditioners.ilu0,
+    4: partial(sparse.preconditioners.chebyshev, degree=4),
+}
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['grid', 'preconditioner'])
+@google_benchmark.option.args_product([[32, 128], list(_PRECONDITIONERS)])
+def cg_poisson_preconditioned(state):
+  """Preconditioned CG on a 2D Poisson problem.
+
+  Preconditioners are 0: none, 1: Jacobi, 2: block-Jacobi, 3: ILU(0),
+  4: Chebyshev.
+  """
+  A = _poisson_2d(state.range(0))
+  b = jnp.ones(A.shape[0], np.float32)
+  M = _PRECONDITIONERS[state.range(1)](A)
+  f = jax.jit(lambda A, b, M: jsla.cg(A.__matmul__, b, M=M)[0])
+  _run(state, f, A, b, M)
+  _, info = jsla.cg_batched(A.__matmul__, b[None], M=M)
+  state.counters['iters'] = float(info.num_iters[0])
+
+
+def _nonsymmetric_system(n, dtype, seed=0):
+  rng = np.random.RandomState(seed)
+  A = np.diag(np.logspace(0, 3, n)) + rng.randn(n, n) / np.sqrt(n)
+  b = rng.randn(n)
+  return jax.device_put(A.astype(dtype)), jax.device_put(b.astype(dtype))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'mixed_precision'])
+@google_benchmark.option.args_product([[1000, 4000], [0, 1]])
+def gmres_float64(state):
+  if not jax.config.x64_enabled:
+    state.skip_with_error("requires x64 mode")
+    return
+  A, b = _nonsymmetric_system(state.range(0), np.float64)
+  inner_dtype = np.float32 if state.range(1) else None
+  f = jax.jit(lambda A, b: jsla.gmres(A, b, tol=1e-10, restart=50,
+                                      inner_dtype=inner_dtype)[0])
+  _run(state, f, A, b)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'recycle'])
+@google_benchmark.option.args_product([[1000, 4000], [0, 1]])
+def gcrotmk_newton_sequence(state):
+  """A sequence of 10 slowly-changing systems, as in a Newton iteration."""
+  A, b = _nonsymmetric_system(state.range(0), np.float32)
+  shifts = jnp.linspace(0, 0.1, 10)
+  use_recycle = bool(state.range(1))
+
+  @jax.jit
+  def solve_sequence(A, b):
+    recycle = None
+    xs = []
+    for shift in shifts:
+      x, _, new_recycle = jsla.gcrotmk(A + shift * jnp.eye(A.shape[0]), b,
+                                       m=20, k=10, recycle=recycle)
+      recycle = new_recycle if use_recycle else None
+      xs.append(x)
+    return jnp.stack(xs)
+
+  _run(state, solve_sequence, A, b)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,81 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for resampling 3-D volumes with jax.scipy.ndimage."""
+import google_benchmark
+import jax
+import jax.scipy.ndimage as jsp_ndimage
+import numpy as np
+
+
+_SIZES = [32, 64, 128]
+
+
+def _run(state, f, *args):
+  f(*args).block_until_ready()
+  while state:
+    f(*args).block_until_ready()
+  state.items_processed = state.iterations * args[0].size
+
+
+def _rotated_grid(n, angle=0.3):
+  # Coordinates of an n**3 volume rotated about its first axis.
+  grid = np.stack(np.meshgrid(*[np.arange(n, dtype=np.float32)] * 3,
+                              indexing='ij')) - (n - 1) / 2
+  c, s = np.cos(angle), np.sin(angle)
+  rotation = np.array([[1, 0, 0], [0, c, -s], [0, s, c]], np.float32)
+  return jax.device_put(np.einsum('ij,j...->i...', rotation, grid) + (n - 1) / 2)
+
+
+def _benchmark_resample(state, order, prefilter):
+  n = state.range(0)
+  volume = jax.device_put(np.random.RandomState(0).randn(n, n, n).astype(np.float32))
+  if not prefilter:
+    volume = jsp_ndimage.spline_filter(volume, order) if order > 1 else volume
+  f = jax.jit(lambda volume, coords: jsp_ndimage.map_coordinates(
+      volume, list(coords), order=order, mode='mirror', prefilter=prefilter))
+  _run(state, f, volume, _rotated_grid(n))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def map_coordinates_linear(state):
+  _benchmark_resample(state, order=1, prefilter=True)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def map_coordinates_cubic(state):
+  _benchmark_resample(state, order=3, prefilter=True)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def map_coordinates_cubic_precomputed(state):
+  _benchmark_resample(state, order=3, prefilter=False)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def spline_filter(state):
+  n = state.range(0)
+  volume = jax.device_put(np.random.RandomState(0).randn(n, n, n).astype(np.float32))
+  _run(state, jax.jit(jsp_ndimage.spline_filter), volume)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
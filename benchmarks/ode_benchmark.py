@@ -0,0 +1,115 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for integrating and differentiating ODEs.
+
+The ``peak_rss_mb`` counters report the peak resident memory of the process,
+so compare them across runs of a single benchmark each, selected with
+``--benchmark_filter``.
+"""
+import resource
+
+import google_benchmark
+import jax
+import jax.numpy as jnp
+from jax.experimental import ode
+import numpy as np
+
+
+_METHODS = ['dopri5', 'tsit5', 'rosenbrock23']
+
+
+def _van_der_pol(y, t, mu):
+  x, v = y
+  return jnp.array([v, mu * (1 - x ** 2) * v - x])
+
+
+def _ensemble(batch):
+  # Stiffness grows with mu, so trajectories need very different step counts.
+  rng = np.random.RandomState(0)
+  y0 = np.stack([2 + rng.rand(batch), np.zeros(batch)], axis=1)
+  mu = 10. ** rng.uniform(-1, 1, batch)
+  return jax.device_put(y0.astype(np.float32)), jax.device_put(
+      mu.astype(np.float32))
+
+
+def _run(state, f, *args):
+  jax.tree_util.tree_map(lambda x: x.block_until_ready(), f(*args))
+  while state:
+    jax.tree_util.tree_map(lambda x: x.block_until_ready(), f(*args))
+  state.items_processed = state.iterations * args[0].shape[0]
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['method', 'batch'])
+@google_benchmark.option.args_product([range(len(_METHODS)), [100, 10000]])
+def odeint_vmap(state):
+  method = _METHODS[state.range(0)]
+  y0, mu = _ensemble(state.range(1))
+  ts = jnp.linspace(0., 10., 11)
+  f = jax.jit(jax.vmap(
+      lambda y0, mu: ode.odeint(_van_der_pol, y0, ts, mu, rtol=1e-4,
+                                atol=1e-6, method=method)))
+  _run(state, f, y0, mu)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['method', 'batch'])
+@google_benchmark.option.args_product([range(len(_METHODS)), [100, 10000]])
+def odeint_batched(state):
+  method = _METHODS[state.range(0)]
+  y0, mu = _ensemble(state.range(1))
+  ts = jnp.linspace(0., 10., 11)
+  f = jax.jit(
+      lambda y0, mu: ode.odeint_batched(_van_der_pol, y0, ts, mu, rtol=1e-4,
+                                        atol=1e-6, method=method, in_axes=0))
+  _run(state, f, y0, mu)
+
+
+def _lorenz(y, t, sigma, rho, beta):
+  x, y, z = y
+  return jnp.array([sigma * (y - x), x * (rho - y) - z, x * y - beta * z])
+
+
+_LORENZ_ARGS = (10., 28., 8. / 3.)
+_ADJOINTS = [('backsolve', 1), ('backsolve', 16), ('discrete', 1),
+             ('discrete', 16)]
+
+
+def _lorenz_loss(y0, args, **kwargs):
+  ys = ode.odeint(_lorenz, y0, jnp.linspace(0., 2., 3), *args, rtol=1e-6,
+                  atol=1e-6, **kwargs)
+  return jnp.sum(ys[-1] ** 2)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['adjoint'])
+@google_benchmark.option.args_product([range(len(_ADJOINTS))])
+def odeint_lorenz_grad(state):
+  adjoint, checkpoints = _ADJOINTS[state.range(0)]
+  y0 = jnp.array([1., 1., 1.])
+  f = jax.jit(jax.grad(lambda args: _lorenz_loss(
+      y0, args, mxstep=4096, adjoint=adjoint, checkpoints=checkpoints)))
+  _run(state, f, jnp.array(_LORENZ_ARGS))
+  # The discrete adjoint is the exact gradient of the computed solution.
+  reference = jax.grad(lambda args: _lorenz_loss(
+      y0, args, mxstep=4096, adjoint='discrete'))(jnp.array(_LORENZ_ARGS))
+  grads = f(jnp.array(_LORENZ_ARGS))
+  state.counters['grad_rel_error'] = float(
+      jnp.linalg.norm(grads - reference) / jnp.linalg.norm(reference))
+  state.counters['peak_rss_mb'] = (
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,113 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks for jax.scipy.optimize minimizers."""
+import google_benchmark
+import jax
+import jax.numpy as jnp
+import jax.scipy.optimize
+import numpy as np
+
+
+_METHODS = ['BFGS', 'l-bfgs-experimental-do-not-rely-on-this']
+_BATCHED_METHODS = ['BFGS', 'L-BFGS']
+_NUM_SAMPLES = 100
+_NUM_FEATURES = 20
+
+
+def _logistic_loss(w, X, y):
+  z = X @ w
+  return jnp.mean(jnp.logaddexp(0., z) - y * z) + 1e-3 * jnp.sum(w ** 2)
+
+
+def _problems(batch):
+  rng = np.random.RandomState(0)
+  X = rng.randn(batch, _NUM_SAMPLES, _NUM_FEATURES).astype(np.float32)
+  w = rng.randn(batch, _NUM_FEATURES, 1).astype(np.float32)
+  # Scale the true weights per problem so the problems converge at
+  # different rates.
+  w *= 10. ** rng.uniform(-1, 1, (batch, 1, 1))
+  p = 1 / (1 + np.exp(-(X @ w)[..., 0]))
+  y = (rng.rand(batch, _NUM_SAMPLES) < p).astype(np.float32)
+  x0 = np.zeros((batch, _NUM_FEATURES), np.float32)
+  return jax.device_put(x0), jax.device_put(X), jax.device_put(y)
+
+
+def _run(state, f, *args):
+  f(*args).x.block_until_ready()
+  while state:
+    f(*args).x.block_until_ready()
+  state.items_processed = state.iterations * args[0].shape[0]
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['method', 'batch'])
+@google_benchmark.option.args_product([range(len(_METHODS)), [100, 10000]])
+def minimize_vmap(state):
+  method = _METHODS[state.range(0)]
+  f = jax.jit(jax.vmap(lambda x0, X, y: jax.scipy.optimize.minimize(
+      _logistic_loss, x0, (X, y), method=method)))
+  _run(state, f, *_problems(state.range(1)))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['method', 'batch'])
+@google_benchmark.option.args_product([range(len(_BATCHED_METHODS)),
+                                       [100, 10000]])
+def minimize_batched(state):
+  method = _BATCHED_METHODS[state.range(0)]
+  f = jax.jit(lambda x0, X, y: jax.scipy.optimize.minimize_batched(
+      _logistic_loss, x0, (X, y), method=method))
+  _run(state, f, *_problems(state.range(1)))
+
+
+def _rosenbrock(x):
+  return jnp.sum(100. * jnp.diff(x) ** 2 + (1. - x[:-1]) ** 2)
+
+
+def _benchmark_minimize(state, method):
+  n = state.range(0)
+  x0 = jax.device_put(np.zeros(n, np.float32))
+  f = jax.jit(lambda x0: jax.scipy.optimize.minimize(
+      _rosenbrock, x0, method=method, options=dict(maxiter=1000)))
+  results = f(x0)
+  _run(state, f, x0)
+  state.counters['nit'] = int(results.nit)
+  state.counters['nfev'] = int(results.nfev)
+  state.counters['nhev'] = int(results.nhev)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([[10**3, 10**4]])
+def minimize_bfgs_rosenbrock(state):
+  # The dense inverse Hessian rules out larger problems.
+  _benchmark_minimize(state, 'BFGS')
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([[10**3, 10**4, 10**5, 10**6]])
+def minimize_newton_cg_rosenbrock(state):
+  _benchmark_minimize(state, 'Newton-CG')
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([[10**3, 10**4, 10**5, 10**6]])
+def minimize_trust_ncg_rosenbrock(state):
+  _benchmark_minimize(state, 'trust-ncg')
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,151 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Throughput and memory benchmarks for random number generation.
+
+The ``peak_rss_mb`` counters report the peak resident memory of the process,
+so compare them across runs of a single benchmark each, selected with
+``--benchmark_filter``.
+"""
+import resource
+from unittest import mock
+
+import google_benchmark
+import jax
+from jax import prng
+from jax import random
+import numpy as np
+
+
+_IMPLS = {
+    0: prng.threefry_prng_impl,
+    1: prng.philox_prng_impl,
+    2: prng.philox_fast_prng_impl,
+    3: prng.rbg_prng_impl,
+}
+_IMPL_NAMES = 'impl(0=threefry,1=philox,2=philox_fast,3=rbg)'
+_SIZES = [1 << 20, 1 << 24, 1 << 27]
+
+
+def _run(state, f, key):
+  f(key).block_until_ready()
+  while state:
+    f(key).block_until_ready()
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names([_IMPL_NAMES, 'n'])
+@google_benchmark.option.args_product([list(_IMPLS), _SIZES])
+def random_bits(state):
+  key = prng.seed_with_impl(_IMPLS[state.range(0)], 0)
+  n = state.range(1)
+  _run(state, jax.jit(lambda key: key._random_bits(32, (n,))), key)
+  state.counters['bits_per_second'] = google_benchmark.Counter(
+      32 * n * state.iterations, google_benchmark.Counter.kIsRate)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names([_IMPL_NAMES, 'n'])
+@google_benchmark.option.args_product([list(_IMPLS), _SIZES])
+def dropout_mask(state):
+  key = prng.seed_with_impl(_IMPLS[state.range(0)], 0)
+  n = state.range(1)
+  _run(state, jax.jit(lambda key: random.bernoulli(key, 0.9, (n,))), key)
+  state.counters['items_per_second'] = google_benchmark.Counter(
+      n * state.iterations, google_benchmark.Counter.kIsRate)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names([_IMPL_NAMES, 'num'])
+@google_benchmark.option.args_product([list(_IMPLS), [2, 1 << 10]])
+def split(state):
+  key = prng.seed_with_impl(_IMPLS[state.range(0)], 0)
+  num = state.range(1)
+  _run(state, jax.jit(lambda key: random.split(key, num).keys), key)
+
+
+def _peak_rss_mb():
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+_LARGE_SIZES = [1 << 24, 1 << 27, 10**9]
+
+
+def _run_sampler(state, sampler):
+  """Runs ``sampler(key, n)`` with or without blocked sampling."""
+  n = state.range(0)
+  min_size = jax._src.random._BLOCKED_SAMPLING_MIN_SIZE if state.range(1) else (
+      np.iinfo(np.int64).max)
+  with mock.patch.object(jax._src.random, '_BLOCKED_SAMPLING_MIN_SIZE',
+                         min_size):
+    f = jax.jit(lambda key: sampler(key, n))
+    _run(state, f, random.PRNGKey(0))
+  state.counters['items_per_second'] = google_benchmark.Counter(
+      n * state.iterations, google_benchmark.Counter.kIsRate)
+  state.counters['peak_rss_mb'] = _peak_rss_mb()
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'blocked'])
+@google_benchmark.option.args_product([_LARGE_SIZES, [0, 1]])
+def uniform_large(state):
+  _run_sampler(state, lambda key, n: random.uniform(key, (n,)))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'blocked'])
+@google_benchmark.option.args_product([_LARGE_SIZES, [0, 1]])
+def bernoulli_large(state):
+  _run_sampler(state, lambda key, n: random.bernoulli(key, 0.9, (n,)))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'precision'])
+@google_benchmark.option.args_product([_LARGE_SIZES, [8, 16, 24]])
+def bernoulli_packed_large(state):
+  n, precision = state.range(0), state.range(1)
+  f = jax.jit(lambda key: random.bernoulli_packed(key, 0.9, (n,), precision))
+  _run(state, f, random.PRNGKey(0))
+  state.counters['items_per_second'] = google_benchmark.Counter(
+      n * state.iterations, google_benchmark.Counter.kIsRate)
+  state.counters['peak_rss_mb'] = _peak_rss_mb()
+
+
+
+_PERMUTATION_METHODS = ['sort', 'feistel']
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'method(0=sort,1=feistel)'])
+@google_benchmark.option.args_product([[1 << 20, 1 << 24, 10**8], [0, 1]])
+def permutation(state):
+  n, method = state.range(0), _PERMUTATION_METHODS[state.range(1)]
+  f = jax.jit(lambda key: random.permutation(key, n, method=method))
+  _run(state, f, random.PRNGKey(0))
+  state.counters['items_per_second'] = google_benchmark.Counter(
+      n * state.iterations, google_benchmark.Counter.kIsRate)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'batch'])
+@google_benchmark.option.args_product([[10**6, 10**9], [1 << 10, 1 << 20]])
+def permutation_index(state):
+  n, batch = state.range(0), state.range(1)
+  index = jax.device_put(np.arange(batch, dtype=np.int32))
+  f = jax.jit(lambda key: random.permutation_index(key, index, n))
+  _run(state, f, random.PRNGKey(0))
+  state.counters['items_per_second'] = google_benchmark.Counter(
+      batch * state.iterations, google_benchmark.Counter.kIsRate)
+
+if __name__ == "__main__":
+  google_benchmark.main()
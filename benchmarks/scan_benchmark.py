@@ -0,0 +1,89 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for cumulative reductions and associative scans."""
+import functools
+
+import google_benchmark
+import jax
+from jax import lax
+import numpy as np
+
+
+partial = functools.partial
+
+_SIZES = [10**7, 3 * 10**7, 10**8]
+
+
+def _run(state, f, x):
+  f(x).block_until_ready()
+  while state:
+    f(x).block_until_ready()
+  state.items_processed = state.iterations * x.size
+
+
+def _benchmark_cumulative(state, op):
+  x = jax.device_put(np.ones(state.range(0), np.float32))
+  _run(state, jax.jit(op), x)
+
+
+def _benchmark_associative_scan(state, block_size):
+  x = jax.device_put(np.ones(state.range(0), np.float32))
+  f = jax.jit(partial(lax.associative_scan, lax.add, block_size=block_size))
+  _run(state, f, x)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def cumsum(state):
+  _benchmark_cumulative(state, lax.cumsum)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def cumprod(state):
+  _benchmark_cumulative(state, lax.cumprod)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def cummax(state):
+  _benchmark_cumulative(state, lax.cummax)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def cummin(state):
+  _benchmark_cumulative(state, lax.cummin)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def associative_scan_unblocked(state):
+  _benchmark_associative_scan(state, None)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'block_size'])
+@google_benchmark.option.args_product([_SIZES, [1 << 10, 1 << 12, 1 << 14]])
+def associative_scan_blocked(state):
+  _benchmark_associative_scan(state, state.range(1))
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
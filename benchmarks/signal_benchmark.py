@@ -0,0 +1,72 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for jax.scipy.signal convolutions."""
+import functools
+
+import google_benchmark
+import jax
+import jax.scipy.signal as jsp_signal
+import numpy as np
+
+
+partial = functools.partial
+
+_SIGNAL_SIZE = 1 << 17
+_KERNEL_SIZES = [8, 64, 512, 4096, 1 << 15]
+
+
+def _run(state, f, *args):
+  f(*args).block_until_ready()
+  while state:
+    f(*args).block_until_ready()
+  state.items_processed = state.iterations * args[0].size
+
+
+def _benchmark_convolve(state, f):
+  rng = np.random.RandomState(0)
+  x = jax.device_put(rng.randn(_SIGNAL_SIZE).astype(np.float32))
+  k = jax.device_put(rng.randn(state.range(0)).astype(np.float32))
+  _run(state, jax.jit(f), x, k)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['kernel_size'])
+@google_benchmark.option.args_product([_KERNEL_SIZES])
+def convolve_direct(state):
+  _benchmark_convolve(state, partial(jsp_signal.convolve, method='direct'))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['kernel_size'])
+@google_benchmark.option.args_product([_KERNEL_SIZES])
+def convolve_fft(state):
+  _benchmark_convolve(state, partial(jsp_signal.convolve, method='fft'))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['kernel_size'])
+@google_benchmark.option.args_product([_KERNEL_SIZES])
+def convolve_auto(state):
+  _benchmark_convolve(state, partial(jsp_signal.convolve, method='auto'))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['kernel_size'])
+@google_benchmark.option.args_product([_KERNEL_SIZES])
+def oaconvolve(state):
+  _benchmark_convolve(state, jsp_signal.oaconvolve)
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
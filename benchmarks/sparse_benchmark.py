@@ -0,0 +1,172 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Microbenchmarks for sparse matrix products in jax.experimental.sparse."""
+from unittest import mock
+
+import google_benchmark
+import jax
+from jax.experimental import sparse
+import numpy as np
+
+
+_DENSITIES = [1, 10, 100]  # per mille
+
+
+def _run(state, f, *args):
+  f(*args).block_until_ready()
+  while state:
+    f(*args).block_until_ready()
+
+
+def _random_sparse(shape, density, seed=0):
+  rng = np.random.RandomState(seed)
+  x = rng.standard_normal(shape).astype(np.float32)
+  x[rng.uniform(size=shape) >= density] = 0
+  return x
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['batch', 'density_permille', 'fused'])
+@google_benchmark.option.args_product([[1, 8, 64], _DENSITIES, [0, 1]])
+def bcoo_dot_general(state):
+  batch, density, fused = state.range(0), state.range(1) / 1000, state.range(2)
+  n = 4096 // int(np.sqrt(batch))
+  lhs = _random_sparse((batch, n, n), density)
+  data, indices = sparse.bcoo_fromdense(lhs, n_batch=1)
+  rhs = jax.device_put(np.ones((batch, n, 16), np.float32))
+  max_segments = sparse.bcoo._BCOO_DOT_GENERAL_MAX_SEGMENTS if fused else 0
+  with mock.patch.object(sparse.bcoo, '_BCOO_DOT_GENERAL_MAX_SEGMENTS',
+                         max_segments):
+    f = jax.jit(lambda data, indices, rhs: sparse.bcoo_dot_general(
+        data, indices, rhs, lhs_shape=lhs.shape,
+        dimension_numbers=(([2], [1]), ([0], [0]))))
+    _run(state, f, data, indices, rhs)
+  state.counters['nse'] = data.shape[1]
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['hotness', 'sorted'])
+@google_benchmark.option.args_product([[1, 8, 64], [0, 1]])
+def bcoo_embedding_lookup(state):
+  # Multi-hot embedding lookup, as in recommender models: each row of the
+  # sparse matrix holds the (unique) item ids of one example.
+  hotness, indices_sorted = state.range(0), bool(state.range(1))
+  batch, n_items, dim = 4096, 1 << 18, 64
+  rng = np.random.RandomState(0)
+  items = np.stack([rng.choice(n_items, hotness, replace=False) for _ in range(batch)])
+  items.sort(axis=1)
+  rows = np.repeat(np.arange(batch), hotness)
+  indices = jax.device_put(np.column_stack([rows, items.ravel()]).astype(np.int32))
+  data = jax.device_put(np.ones(batch * hotness, np.float32))
+  table = jax.device_put(rng.standard_normal((n_items, dim)).astype(np.float32))
+  f = jax.jit(lambda data, indices, table: sparse.bcoo_dot_general(
+      data, indices, table, lhs_shape=(batch, n_items),
+      dimension_numbers=(([1], [0]), ([], [])), indices_sorted=indices_sorted))
+  _run(state, f, data, indices, table)
+  state.counters['items_per_second'] = google_benchmark.Counter(
+      state.iterations * batch * hotness, google_benchmark.Counter.kIsRate)
+
+
+_FORMATS = ['dense', 'csr', 'coo', 'bcoo']
+
+
+def _sparse_product(state, ncols):
+  fmt = _FORMATS[state.range(0)]
+  n = 4096
+  dense = _random_sparse((n, n), state.range(1) / 1000)
+  mat = {'dense': jax.device_put, 'csr': sparse.CSR.fromdense,
+         'coo': sparse.COO.fromdense, 'bcoo': sparse.BCOO.fromdense}[fmt](dense)
+  rhs = jax.device_put(np.ones((n, ncols) if ncols else (n,), np.float32))
+  _run(state, jax.jit(lambda mat, rhs: mat @ rhs), mat, rhs)
+  state.counters['nse'] = np.count_nonzero(dense)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['format', 'density_permille'])
+@google_benchmark.option.args_product([range(len(_FORMATS)), _DENSITIES])
+def sparse_matvec(state):
+  _sparse_product(state, 0)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['format', 'density_permille'])
+@google_benchmark.option.args_product([range(len(_FORMATS)), _DENSITIES])
+def sparse_matmat(state):
+  _sparse_product(state, 64)
+
+
+def _power_law_graph(n, avg_degree, exponent=2.5, seed=0):
+  """Adjacency matrix indices of a Chung-Lu graph with power-law degrees."""
+  rng = np.random.RandomState(seed)
+  weights = (1 + np.arange(n)) ** (-1 / (exponent - 1))
+  p = weights / weights.sum()
+  m = n * avg_degree
+  indices = np.column_stack([rng.choice(n, m, p=p), rng.choice(n, m, p=p)])
+  return np.unique(indices, axis=0).astype(np.int32)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'avg_degree'])
+@google_benchmark.option.args_product([[1 << 12, 1 << 14], [4, 16]])
+def bcoo_spgemm_sizes(state):
+  indices = jax.device_put(_power_law_graph(state.range(0), state.range(1)))
+  shape = (state.range(0), state.range(0))
+  f = lambda indices: sparse.bcoo_spgemm_sizes(indices, indices, lhs_shape=shape,
+                                               rhs_shape=shape)
+  f(indices)
+  while state:
+    f(indices)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'avg_degree'])
+@google_benchmark.option.args_product([[1 << 12, 1 << 14], [4, 16]])
+def bcoo_spgemm(state):
+  # A @ A on the adjacency matrix of a power-law graph.
+  indices = jax.device_put(_power_law_graph(state.range(0), state.range(1)))
+  data = jax.device_put(np.ones(indices.shape[0], np.float32))
+  shape = (state.range(0), state.range(0))
+  n_products, nse = sparse.bcoo_spgemm_sizes(indices, indices, lhs_shape=shape,
+                                             rhs_shape=shape)
+  f = jax.jit(lambda data, indices: sparse.bcoo_spgemm(
+      data, indices, data, indices, lhs_shape=shape, rhs_shape=shape, nse=nse,
+      n_products=n_products)[0])
+  _run(state, f, data, indices)
+  state.counters['nse_in'] = indices.shape[0]
+  state.counters['nse_out'] = nse
+  state.counters['products'] = n_products
+
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['blocksize', 'sparsity_percent', 'bsr'])
+@google_benchmark.option.args_product([[16, 32], [50, 75, 90, 95], [0, 1]])
+def bsr_matmat(state):
+  # A block-pruned weight matrix applied to a batch of activations.
+  blocksize, sparsity, bsr = state.range(0), state.range(1) / 100, state.range(2)
+  n = 2048
+  rng = np.random.RandomState(0)
+  mask = rng.uniform(size=(n // blocksize, n // blocksize)) >= sparsity
+  W = rng.standard_normal((n, n)).astype(np.float32)
+  W *= np.kron(mask, np.ones((blocksize, blocksize), np.float32))
+  x = jax.device_put(np.ones((n, 256), np.float32))
+  if bsr:
+    W = sparse.BSR.fromdense(W, blocksize=(blocksize, blocksize))
+    state.counters['nse'] = W.nse
+    _run(state, jax.jit(lambda W, x: W @ x), W, x)
+  else:
+    _run(state, jax.jit(lambda W, x: W @ x), jax.device_put(W), x)
+
+if __name__ == "__main__":
+  google_benchmark.main()
@@ -0,0 +1,103 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks for matrix-free eigensolvers and trace estimators.
+
+The operator is the Hessian of a least squares loss, applied with
+forward-over-reverse differentiation, and the dense benchmarks materialize it.
+"""
+import google_benchmark
+import jax
+import jax.numpy as jnp
+import jax.scipy.sparse.linalg as jsla
+import numpy as np
+
+
+_SIZES = [1000, 4000]
+_K = 8
+
+
+def _hessian_operator(n, seed=0):
+  rng = np.random.RandomState(seed)
+  X = jax.device_put(rng.randn(2 * n, n).astype(np.float32) / np.sqrt(n))
+  loss = lambda w: 0.5 * jnp.sum(jnp.tanh(X @ w) ** 2) + 0.5 * jnp.sum(w ** 2)
+  w0 = jnp.ones(n, jnp.float32)
+  hvp = lambda v: jax.jvp(jax.grad(loss), (w0,), (v,))[1]
+  return hvp, w0
+
+
+def _run(state, f, *args):
+  jax.tree_util.tree_map(lambda x: x.block_until_ready(), f(*args))
+  while state:
+    jax.tree_util.tree_map(lambda x: x.block_until_ready(), f(*args))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def top_k_dense_eigh(state):
+  hvp, w0 = _hessian_operator(state.range(0))
+  f = jax.jit(lambda: jnp.linalg.eigh(jax.vmap(hvp)(jnp.eye(w0.size)))[0][-_K:])
+  _run(state, f)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def top_k_eigsh(state):
+  hvp, w0 = _hessian_operator(state.range(0))
+  f = jax.jit(lambda: jsla.eigsh(hvp, _K, v0=w0, which='LA')[0])
+  _run(state, f)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def top_k_lobpcg(state):
+  hvp, w0 = _hessian_operator(state.range(0))
+  X = jax.random.normal(jax.random.PRNGKey(0), (w0.size, _K))
+  f = jax.jit(lambda X: jsla.lobpcg(hvp, X)[0])
+  _run(state, f, X)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n'])
+@google_benchmark.option.args_product([_SIZES])
+def logdet_dense(state):
+  hvp, w0 = _hessian_operator(state.range(0))
+  f = jax.jit(lambda: jnp.linalg.slogdet(jax.vmap(hvp)(jnp.eye(w0.size)))[1])
+  _run(state, f)
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'hutch++'])
+@google_benchmark.option.args_product([_SIZES, [0, 1]])
+def logdet_estimate(state):
+  hvp, w0 = _hessian_operator(state.range(0))
+  method = 'hutch++' if state.range(1) else 'hutchinson'
+  f = jax.jit(lambda key: jsla.logdet_estimate(hvp, w0, key, method=method))
+  _run(state, f, jax.random.PRNGKey(0))
+
+
+@google_benchmark.register
+@google_benchmark.option.arg_names(['n', 'hutch++'])
+@google_benchmark.option.args_product([_SIZES, [0, 1]])
+def trace_estimate(state):
+  hvp, w0 = _hessian_operator(state.range(0))
+  method = 'hutch++' if state.range(1) else 'hutchinson'
+  f = jax.jit(lambda key: jsla.trace_estimate(hvp, w0, key, method=method))
+  _run(state, f, jax.random.PRNGKey(0))
+
+
+if __name__ == "__main__":
+  google_benchmark.main()
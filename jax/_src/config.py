@@ -522,6 +522,14 @@ hlo_source_file_canonicalization_regex = config.define_string_state(
           'persistent compilation cache, which includes HLO metadata in the '
           'cache key.'))
 
+einsum_path_cache_file = config.define_string_state(
+    name='jax_einsum_path_cache_file',
+    default=None,
+    help=('Path of a file in which `jax.numpy.einsum` persists the contraction '
+          'paths it computes, so that other processes can reuse them instead '
+          'of repeating the path search. Paths are always cached in memory; '
+          'this option additionally shares them across processes.'))
+
 def _update_x64_global(val):
   lib.jax_jit.global_state().enable_x64 = val
 
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from functools import partial
+from functools import lru_cache, partial
 import enum
 from typing import Callable, Sequence, Union
 
@@ -20,6 +20,7 @@ from jax import core
 from jax import jit
 from jax import lax
 from jax import numpy as jnp
+from jax.config import config
 import numpy as np
 
 
@@ -247,7 +248,6 @@ def _resize(image, shape: Sequence[int], method: Union[str, ResizeMethod],
   if method == ResizeMethod.NEAREST:
     return _resize_nearest(image, shape)
   assert isinstance(method, ResizeMethod)
-  kernel = _kernels[method]
 
   if not jnp.issubdtype(image.dtype, jnp.inexact):
     image = lax.convert_element_type(image, jnp.result_type(image, jnp.float32))
@@ -255,11 +255,58 @@ def _resize(image, shape: Sequence[int], method: Union[str, ResizeMethod],
   # since all of the current resize methods (kernels) are interpolating, so the
   # output = input under an identity warp.
   spatial_dims = tuple(np.nonzero(np.not_equal(image.shape, shape))[0])
-  scale = [1.0 if shape[d] == 0 else float(shape[d]) / image.shape[d]
-           for d in spatial_dims]
-  return _scale_and_translate(image, shape, spatial_dims,
-                              scale, [0.] * len(spatial_dims), kernel,
-                              antialias, precision)
+  for d in spatial_dims:
+    indices, weights = _resize_weight_plan(image.shape[d], shape[d], method,
+                                           antialias, config.x64_enabled)
+    weights = weights.astype(image.dtype)
+    if indices is None:
+      in_indices = list(range(image.ndim))
+      out_indices = in_indices[:d] + [image.ndim] + in_indices[d + 1:]
+      image = jnp.einsum(image, in_indices, weights, [d, image.ndim],
+                         out_indices, precision=precision)
+    else:
+      # Gather the (output_size, taps) window of input pixels that each output
+      # pixel depends on, and sum it against the weights.
+      window = jnp.take(image, indices, axis=d)
+      weights_shape = (1,) * d + weights.shape + (1,) * (image.ndim - d - 1)
+      image = jnp.sum(window * weights.reshape(weights_shape), axis=d + 1)
+  return image
+
+
+# Resize applies the weights of a dimension by gathering the input pixels in
+# the support of each output pixel, rather than by a dense contraction, if that
+# support spans at most this fraction of the input.
+_BANDED_RESIZE_MAX_DENSITY = 0.25
+
+@lru_cache(maxsize=64)
+def _resize_weight_plan(input_size: int, output_size: int, method: ResizeMethod,
+                        antialias: bool, x64: bool):
+  """Computes the weights that resize one dimension.
+
+  Returns:
+    Either ``(None, weights)`` with a dense ``[input_size, output_size]`` weight
+    matrix, or ``(indices, weights)``, both of shape ``[output_size, taps]``,
+    where output pixel ``j`` is the sum of ``weights[j]`` times the input pixels
+    at ``indices[j]``.
+  """
+  del x64  # Only part of the cache key; sets the dtype of the weights.
+  scale = 1.0 if output_size == 0 else float(output_size) / input_size
+  with core.eval_context():
+    weights = np.asarray(compute_weight_mat(input_size, output_size, scale, 0.,
+                                            _kernels[method], antialias))
+  nonzero = weights != 0
+  if not nonzero.any():
+    return None, weights
+  first = np.argmax(nonzero, axis=0)
+  last = input_size - 1 - np.argmax(nonzero[::-1], axis=0)
+  taps = int(np.max(np.where(nonzero.any(axis=0), last - first + 1, 0)))
+  if taps > _BANDED_RESIZE_MAX_DENSITY * input_size:
+    return None, weights
+  # Shift windows that would extend past the end of the input; the weights of
+  # the extra pixels are zero.
+  starts = np.minimum(first, input_size - taps)
+  indices = starts[:, np.newaxis] + np.arange(taps)
+  return indices.astype(np.int32), np.take_along_axis(weights.T, indices, axis=1)
 
 
 def resize(image, shape: Sequence[int], method: Union[str, ResizeMethod],
@@ -2482,11 +2482,19 @@ def _interleave(a, b, axis):
             lax.pad(b, lax._const(b, 0), b_pad))
 
 @api_boundary
-def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
+def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0,
+                     block_size: Optional[int] = None):
   """Performs a scan with an associative binary operation, in parallel.
 
   For an introduction to associative scans, see [BLE1990]_.
 
+  If ``block_size`` is given, a two-level blocked algorithm is used: the
+  ``axis`` dimension is split into blocks of ``block_size`` elements which are
+  scanned independently (in parallel with each other), then the block totals
+  are scanned, and finally each block is combined with the total of all
+  preceding blocks. This keeps the working set of each step small, which is
+  considerably faster for very long sequences on CPU.
+
   Args:
     fn: A Python callable implementing an associative binary operation with
       signature ``r = fn(a, b)``. Function `fn` must be associative, i.e., it
@@ -2506,6 +2514,11 @@ def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
     reverse: A boolean stating if the scan should be reversed with respect to
       the ``axis`` dimension.
     axis: an integer identifying the axis over which the scan should occur.
+    block_size: optional positive integer; if given, use the blocked algorithm
+      described above with blocks of this many elements. In that case ``fn`` is
+      also applied to arrays carrying an extra block dimension next to
+      ``axis``, so it must act elementwise over every dimension of its inputs
+      (as e.g. ``lax.add`` and ``lax.max`` do).
 
   Returns:
     A (possibly nested Python tree structure of) array(s) of the same shape
@@ -2555,6 +2568,13 @@ def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
     raise ValueError('Array inputs to associative_scan must have the same '
                      'first dimension. (saw: {})'
                      .format([elem.shape for elem in elems_flat]))
+  if block_size is not None:
+    block_size = core.concrete_or_error(
+        operator.index, block_size,
+        "The block_size argument of associative_scan must be static.")
+    if block_size < 1:
+      raise ValueError("associative_scan block_size must be positive, got "
+                       f"{block_size}")
 
 
   # Summary of algorithm:
@@ -2572,7 +2592,7 @@ def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
   # For the base case of the recursion we return the first element
   # of `elems` followed by the sum of the first two elements computed as
   # a (small two-down-to-one) reduction step.
-  def _scan(elems):
+  def _scan(elems, axis=axis):
     """Perform scan on `elems`."""
 
     num_elems = elems[0].shape[axis]
@@ -2586,7 +2606,7 @@ def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
       [lax.slice_in_dim(elem, 1, None, stride=2, axis=axis) for elem in elems])
 
     # Recursively compute scan for partially reduced tensors.
-    odd_elems = _scan(reduced_elems)
+    odd_elems = _scan(reduced_elems, axis=axis)
 
     if num_elems % 2 == 0:
       even_elems = combine(
@@ -2605,7 +2625,74 @@ def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
       for (elem, result) in zip(elems, even_elems)]
     return list(_map(partial(_interleave, axis=axis), even_elems, odd_elems))
 
-  scans = _scan(elems_flat)
+  # Summary of the blocked algorithm:
+  #
+  # The leading `num_blocks * block_size` elements are reshaped so that each
+  # block gets its own dimension (at `axis + 1`), and every block is scanned
+  # independently. The last element of each scanned block is that block's
+  # total; scanning the totals gives, for every block, the combination of all
+  # elements up to and including it. Blocks other than the first are then fixed
+  # up by combining them with the scanned total of the preceding block. Any
+  # trailing elements that do not fill a whole block are scanned on their own
+  # and fixed up with the total of all blocks.
+  def _blocked_scan(elems):
+    """Perform a two-level blocked scan on `elems`."""
+
+    num_elems = elems[0].shape[axis]
+    num_blocks = num_elems // block_size
+
+    if num_blocks < 2:
+      return _scan(elems)
+
+    num_full = num_blocks * block_size
+    blocks = [
+      lax.reshape(lax.slice_in_dim(e, 0, num_full, axis=axis),
+                  e.shape[:axis] + (num_blocks, block_size) + e.shape[axis+1:])
+      for e in elems]
+
+    # Scan within each block, independently.
+    blocks = _scan(blocks, axis=axis + 1)
+
+    # Scan over the block totals.
+    totals = _scan([lax.index_in_dim(b, block_size - 1, axis + 1, keepdims=False)
+                    for b in blocks])
+
+    # Combine every block but the first with the total of its predecessors.
+    def _broadcast_to_block(x, shape):
+      dims = tuple(d for d in range(len(shape)) if d != axis + 1)
+      return lax.broadcast_in_dim(x, shape, dims)
+
+    prefixes = [_broadcast_to_block(lax.slice_in_dim(t, 0, num_blocks - 1,
+                                                     axis=axis),
+                                    b.shape[:axis] + (num_blocks - 1,)
+                                    + b.shape[axis+1:])
+                for t, b in zip(totals, blocks)]
+    fixed = combine(prefixes,
+                    [lax.slice_in_dim(b, 1, None, axis=axis) for b in blocks])
+    blocks = [lax.concatenate([lax.slice_in_dim(b, 0, 1, axis=axis), f],
+                              dimension=axis)
+              for b, f in zip(blocks, fixed)]
+    scans = [lax.reshape(b, e.shape[:axis] + (num_full,) + e.shape[axis+1:])
+             for b, e in zip(blocks, elems)]
+
+    if num_full == num_elems:
+      return scans
+
+    # Scan the trailing partial block and prepend the total of all blocks.
+    tail = _scan([lax.slice_in_dim(e, num_full, None, axis=axis)
+                  for e in elems])
+    last = [lax.broadcast_in_dim(
+                lax.index_in_dim(t, num_blocks - 1, axis, keepdims=False),
+                x.shape, tuple(d for d in range(x.ndim) if d != axis))
+            for t, x in zip(totals, tail)]
+    tail = combine(last, tail)
+    return [lax.concatenate([s, x], dimension=axis)
+            for s, x in zip(scans, tail)]
+
+  if block_size is None:
+    scans = _scan(elems_flat)
+  else:
+    scans = _blocked_scan(elems_flat)
 
   if reverse:
     scans = [lax.rev(scanned, [axis]) for scanned in scans]
@@ -2656,6 +2743,21 @@ def _cumred_tpu_translation_rule(window_reduce: Callable, x, *,
   window_dims[axis] = n
   return window_reduce(x, window_dims, strides, padding)
 
+# Sequences at least this long use the blocked associative scan on CPU.
+_CUMRED_CPU_BLOCKED_MIN_SIZE = 1 << 16
+_CUMRED_CPU_BLOCK_SIZE = 1 << 12
+
+def _cumred_cpu_translation_rule(reduce_fn: Callable, x, *, axis: int,
+                                 reverse: bool):
+  # On CPU, the recursive parallel prefix scan strides over the whole array at
+  # every level of the recursion, which thrashes the cache for long inputs.
+  # Scanning fixed-size blocks first keeps each pass cache-resident.
+  n = x.shape[axis]
+  block_size = (_CUMRED_CPU_BLOCK_SIZE if n >= _CUMRED_CPU_BLOCKED_MIN_SIZE
+                else None)
+  return associative_scan(reduce_fn, x, reverse=reverse, axis=axis,
+                          block_size=block_size)
+
 def _cumred_batch_rule(prim, batched_args, batch_dims, *, axis: int,
                        reverse: bool):
   operand, = batched_args
@@ -2681,6 +2783,9 @@ def _cumulative_reduction_primitive(name,
   xla.backend_specific_translations['tpu'][reducer_p] = xla.lower_fun(
     partial(_cumred_tpu_translation_rule, tpu_reduce_window_fn),
     multiple_results=False)
+  xla.backend_specific_translations['cpu'][reducer_p] = xla.lower_fun(
+    partial(_cumred_cpu_translation_rule, reduce_fn),
+    multiple_results=False)
   batching.primitive_batchers[reducer_p] = partial(_cumred_batch_rule, reducer_p)
   return reducer_p
 
@@ -46,6 +46,26 @@ from jax._src.lib import version as jaxlib_version
 
 xops = xla_client.ops
 
+# Tuning parameters of the Python factorizations used by backends without a
+# library implementation. Matrices, and the leaves of the recursive algorithms,
+# with at most _SMALL_MATRIX_UNROLL_SIZE columns are factored by fully unrolled
+# loops, which batch well under vmap; the recursions stop at the block sizes.
+_SMALL_MATRIX_UNROLL_SIZE = 32
+_LU_BLOCK_SIZE = 32
+_CHOLESKY_BLOCK_SIZE = 32
+_TRIANGULAR_SOLVE_BLOCK_SIZE = 32
+# The unrolled leaves make the HLO grow with the matrix size, so the leaves of
+# LU decompositions of matrices larger than this are rolled loops.
+_LU_UNROLL_MAX_SIZE = 128
+# The unrolled kernels make the HLO of the Python Cholesky decomposition grow
+# with the matrix size, so larger matrices use XLA's own Cholesky decomposition.
+_CHOLESKY_PYTHON_MAX_SIZE = 128
+# Real symmetric eigendecompositions and SVDs of matrices with at most
+# _JACOBI_MAX_SIZE rows and columns use Jacobi sweeps made of elementwise lax
+# operations, which vectorize over large batches of tiny matrices.
+_JACOBI_MAX_SIZE = 8
+_JACOBI_MAX_SWEEPS = 12
+
 
 # traceables
 
@@ -371,6 +391,81 @@ if rocsolver is not None:
   xla.backend_specific_translations['gpu'][cholesky_p] = partial(
     _cholesky_cpu_gpu_translation_rule, rocsolver.potrf)
 
+# Computes the lower Cholesky factor in the lower triangle of the result. Only
+# the lower triangle of the input is read; the upper triangle of the result is
+# left as scratch space, and is zeroed by _cholesky_python.
+
+def _cholesky_unrolled(a):
+  """Right-looking Cholesky decomposition, as an unrolled loop."""
+  n = a.shape[-1]
+  for k in range(n):
+    d = jnp.sqrt(jnp.real(a[k, k])).astype(a.dtype)
+    col = a[k+1:, k] / d
+    a = a.at[k, k].set(d)
+    a = a.at[k+1:, k].set(col)
+    a = a.at[k+1:, k+1:].add(-jnp.outer(col, jnp.conj(col)))
+  return a
+
+def _cholesky_unblocked(a):
+  """Right-looking Cholesky decomposition, as a rolled loop."""
+  n = a.shape[-1]
+  idx = jnp.arange(n)
+  def body(k, a):
+    d = jnp.sqrt(jnp.real(a[k, k])).astype(a.dtype)
+    col = jnp.where(idx > k, a[:, k] / d, jnp.where(idx == k, d, a[:, k]))
+    a = a.at[:, k].set(col)
+    # a[k+1:, k+1:] -= jnp.outer(a[k+1:, k], a[k+1:, k].conj()), adapted for
+    # loop-invariant shapes
+    below = jnp.where(idx > k, col, jnp.zeros_like(col))
+    return a - jnp.outer(below, jnp.conj(below))
+  return lax.fori_loop(0, n, body, a)
+
+def _cholesky_recursive(a, block_size):
+  """Recursive blocked Cholesky decomposition."""
+  n = a.shape[-1]
+  if n <= _SMALL_MATRIX_UNROLL_SIZE:
+    return _cholesky_unrolled(a)
+  if n <= block_size:
+    return _cholesky_unblocked(a)
+  n1 = _split_block(n, block_size)
+  l11 = _cholesky_recursive(a[:n1, :n1], block_size)
+  # l21 = a21 @ inv(l11)^H
+  l21 = _H(_triangular_solve_python(l11, _H(a[n1:, :n1]), lower=True))
+  a22 = a[n1:, n1:] - lax.dot(l21, _H(l21), precision=lax.Precision.HIGHEST)
+  l22 = _cholesky_recursive(a22, block_size)
+  return jnp.block([[l11, jnp.zeros((n1, n - n1), a.dtype)], [l21, l22]])
+
+def _cholesky_python(x, block_size=None):
+  """Default Cholesky decomposition in Python, where no better version exists.
+
+  Matrices that are not positive definite are filled with NaNs.
+  """
+  block_size = block_size or _CHOLESKY_BLOCK_SIZE
+  n = x.shape[-1]
+  batch_dims = x.shape[:-2]
+  nan = np.nan * (1 + 1j) if jnp.iscomplexobj(x) else np.nan
+
+  def factor(a):
+    l = jnp.tril(_cholesky_recursive(a, block_size))
+    ok = jnp.all(jnp.real(jnp.diagonal(l)) > 0)
+    return jnp.where(ok, l, jnp.full_like(l, nan))
+
+  if len(batch_dims) > 0:
+    batch_size = np.prod(batch_dims, dtype=np.int64)
+    l = api.vmap(factor)(lax.reshape(x, (batch_size, n, n)))
+    return lax.reshape(l, x.shape)
+  return factor(x)
+
+_cholesky_python_translation_rule = xla.lower_fun(_cholesky_python,
+                                                  multiple_results=False)
+
+def _cholesky_translation_rule(c, operand):
+  if c.get_shape(operand).dimensions()[-1] > _CHOLESKY_PYTHON_MAX_SIZE:
+    return xops.Cholesky(operand, lower=True)
+  return _cholesky_python_translation_rule(c, operand)
+
+xla.translations[cholesky_p] = _cholesky_translation_rule
+
 # Asymmetric eigendecomposition
 
 def eig_impl(operand, *, compute_left_eigenvectors, compute_right_eigenvectors):
@@ -475,7 +570,74 @@ def eigh_impl(operand, lower):
   v, w = xla.apply_primitive(eigh_p, operand, lower=lower)
   return v, w
 
+def _use_jacobi(c, operand):
+  shape = c.get_shape(operand)
+  m, n = shape.dimensions()[-2:]
+  return (0 < min(m, n) and max(m, n) <= _JACOBI_MAX_SIZE and
+          np.issubdtype(shape.element_type(), np.floating))
+
+def _jacobi_rotation(app, aqq, apq):
+  """Returns the rotation ``(c, s)`` that annihilates ``apq``.
+
+  The rotation acts on the symmetric 2x2 matrix ``[[app, apq], [apq, aqq]]``.
+  """
+  nonzero = apq != 0
+  tau = (aqq - app) / (2 * jnp.where(nonzero, apq, jnp.ones_like(apq)))
+  sign = jnp.where(tau >= 0, jnp.ones_like(tau), -jnp.ones_like(tau))
+  t = sign / (jnp.abs(tau) + jnp.sqrt(1 + tau * tau))
+  t = jnp.where(nonzero, t, jnp.zeros_like(t))
+  c = lax.rsqrt(1 + t * t)
+  return c, t * c
+
+def _jacobi_rotate(x, p, q, c, s, axis):
+  """Rotates the rows (axis=0) or columns (axis=1) `p` and `q` of `x`."""
+  xp = lax.index_in_dim(x, p, axis)
+  xq = lax.index_in_dim(x, q, axis)
+  idx = lax.broadcasted_iota(np.int32, x.shape, axis)
+  return jnp.where(idx == p, c * xp - s * xq,
+                   jnp.where(idx == q, s * xp + c * xq, x))
+
+def _eigh_jacobi(a, *, lower):
+  """Cyclic Jacobi eigendecomposition of a small real symmetric matrix."""
+  n = a.shape[-1]
+  if lower:
+    a = jnp.tril(a) + _T(jnp.tril(a, -1))
+  else:
+    a = jnp.triu(a) + _T(jnp.triu(a, 1))
+  finite = jnp.all(jnp.isfinite(a))
+  off_diagonal = ~jnp.eye(n, dtype=bool)
+  tol = (jnp.finfo(a.dtype).eps ** 2) * jnp.sum(a * a)
+
+  def cond_fun(state):
+    a, _, sweep = state
+    off = jnp.sum(jnp.where(off_diagonal, a * a, jnp.zeros_like(a)))
+    return (sweep < _JACOBI_MAX_SWEEPS) & (off > tol)
+
+  def body_fun(state):
+    a, v, sweep = state
+    for p in range(n - 1):
+      for q in range(p + 1, n):
+        c, s = _jacobi_rotation(a[p, p], a[q, q], a[p, q])
+        a = _jacobi_rotate(_jacobi_rotate(a, p, q, c, s, 1), p, q, c, s, 0)
+        v = _jacobi_rotate(v, p, q, c, s, 1)
+    return a, v, sweep + 1
+
+  a, v, _ = lax.while_loop(cond_fun, body_fun,
+                           (a, jnp.eye(n, dtype=a.dtype), 0))
+  w = jnp.diagonal(a)
+  order = jnp.argsort(w)
+  v, w = v[:, order], w[order]
+  return (jnp.where(finite, v, jnp.full_like(v, np.nan)),
+          jnp.where(finite, w, jnp.full_like(w, np.nan)))
+
+def _eigh_jacobi_translation_rule(c, operand, lower):
+  eigh_jacobi = vectorize(partial(_eigh_jacobi, lower=lower),
+                          signature='(n,n)->(n,n),(n)')
+  return xla.lower_fun(eigh_jacobi, multiple_results=True)(c, operand)
+
 def eigh_translation_rule(c, operand, lower):
+  if _use_jacobi(c, operand):
+    return _eigh_jacobi_translation_rule(c, operand, lower)
   shape = c.get_shape(operand)
   dims = shape.dimensions()
   if dims[-1] == 0:
@@ -499,6 +661,8 @@ def eigh_abstract_eval(operand, lower):
   return v, w
 
 def _eigh_cpu_gpu_translation_rule(syevd_impl, c, operand, lower):
+  if _use_jacobi(c, operand):
+    return _eigh_jacobi_translation_rule(c, operand, lower)
   shape = c.get_shape(operand)
   batch_dims = shape.dimensions()[:-2]
   v, w, info = syevd_impl(c, operand, lower=lower)
@@ -709,6 +873,53 @@ def _triangular_solve_cpu_translation_rule(
 xla.backend_specific_translations['cpu'][triangular_solve_p] = \
   _triangular_solve_cpu_translation_rule
 
+
+def _split_block(n, block_size):
+  """Splits `n` columns in two at a multiple of `block_size` near the middle."""
+  num_blocks = -(-n // block_size)
+  return block_size * (num_blocks // 2)
+
+def _triangular_solve_unrolled(a, b, *, lower, unit_diagonal):
+  """Solves a @ x = b by substitution, as an unrolled loop."""
+  n = a.shape[-1]
+  x = b
+  for i in (range(n) if lower else reversed(range(n))):
+    x_i = x[i] if unit_diagonal else x[i] / a[i, i]
+    x = x.at[i].set(x_i)
+    if lower:
+      x = x.at[i+1:].add(-jnp.outer(a[i+1:, i], x_i))
+    else:
+      x = x.at[:i].add(-jnp.outer(a[:i, i], x_i))
+  return x
+
+def _triangular_solve_python(a, b, *, lower, unit_diagonal=False,
+                             block_size=None, unroll=True):
+  """Recursive blocked solve of a @ x = b for triangular `a`.
+
+  `a` has shape ``[n, n]`` and `b` has shape ``[n, k]``. If `unroll` is False,
+  the leaves use the `triangular_solve` primitive rather than unrolled loops.
+  """
+  block_size = block_size or _TRIANGULAR_SOLVE_BLOCK_SIZE
+  n = a.shape[-1]
+  if unroll and n <= _SMALL_MATRIX_UNROLL_SIZE:
+    return _triangular_solve_unrolled(a, b, lower=lower,
+                                      unit_diagonal=unit_diagonal)
+  if n <= block_size:
+    return triangular_solve(a, b, left_side=True, lower=lower,
+                            unit_diagonal=unit_diagonal)
+  n1 = _split_block(n, block_size)
+  solve = partial(_triangular_solve_python, lower=lower,
+                  unit_diagonal=unit_diagonal, block_size=block_size,
+                  unroll=unroll)
+  dot = partial(lax.dot, precision=lax.Precision.HIGHEST)
+  if lower:
+    x1 = solve(a[:n1, :n1], b[:n1])
+    x2 = solve(a[n1:, n1:], b[n1:] - dot(a[n1:, :n1], x1))
+  else:
+    x2 = solve(a[n1:, n1:], b[n1:])
+    x1 = solve(a[:n1, :n1], b[:n1] - dot(a[:n1, n1:], x2))
+  return jnp.concatenate([x1, x2], axis=0)
+
 def _triangular_solve_gpu_translation_rule(trsm_impl,
     c, a, b, left_side, lower, transpose_a, conjugate_a, unit_diagonal):
   shape = c.get_shape(a)
@@ -876,41 +1087,73 @@ def _lu_unblocked(a):
   return lax.fori_loop(0, min(m, n), body, (pivot, perm, a))
 
 
-def _lu_blocked(a, block_size=128):
-  """Blocked LU decomposition, as an unrolled loop."""
+def _lu_unrolled(a):
+  """Unblocked LU decomposition, as an unrolled loop."""
   m, n = a.shape
   r = min(m, n)
-  pivot = jnp.zeros((r,), dtype=jnp.int32)
+  pivot = []
   perm = jnp.arange(m, dtype=jnp.int32)
-  for k in range(0, r, block_size):
-    b = min(r - k, block_size)
-    block_pivot, block_perm, lu_block = _lu_unblocked(a[k:, k:k+b])
-
-    pivot = pivot.at[k:k+b].set(block_pivot + k)
-    perm = perm.at[k:].set(perm[block_perm + k])
-    a = a.at[k:, :].set(a[block_perm + k, :])
-    a = a.at[k:, k:k+b].set(lu_block)
-
-    if k + b < n:
-      a = a.at[k:k+b, k+b:].set(
-        triangular_solve(a[k:k+b, k:k+b], a[k:k+b, k+b:], left_side=True,
-                         lower=True, unit_diagonal=True))
-      a = a.at[k+b:, k+b:].add(-lax.dot(a[k+b:, k:k+b], a[k:k+b, k+b:],
-                                        precision=lax.Precision.HIGHEST))
-  return a, pivot, perm
-
-def _lu_python(x):
+  for k in range(r):
+    if jnp.issubdtype(a.dtype, jnp.complexfloating):
+      t = a[k:, k]
+      magnitude = jnp.abs(jnp.real(t)) + jnp.abs(jnp.imag(t))
+    else:
+      magnitude = jnp.abs(a[k:, k])
+    i = (jnp.argmax(magnitude) + k).astype(jnp.int32)
+    pivot.append(i)
+    a = a.at[[k, i],].set(a[[i, k],])
+    perm = perm.at[[i, k],].set(perm[[k, i],])
+
+    a = a.at[k+1:, k].divide(a[k, k])
+    a = a.at[k+1:, k+1:].add(-jnp.outer(a[k+1:, k], a[k, k+1:]))
+  pivot = jnp.stack(pivot) if pivot else jnp.zeros((0,), dtype=jnp.int32)
+  return pivot, perm, a
+
+
+def _lu_recursive(a, block_size=None, unroll=True):
+  """Recursive blocked LU decomposition.
+
+  Factors the left half of the columns, updates the right half, and factors
+  its trailing block, down to panels of at most `block_size` columns. If
+  `unroll` is False, the leaves are rolled loops.
+  """
+  block_size = block_size or _LU_BLOCK_SIZE
+  m, n = a.shape
+  r = min(m, n)
+  if r <= block_size:
+    if unroll and r <= _SMALL_MATRIX_UNROLL_SIZE:
+      pivot, perm, a = _lu_unrolled(a)
+    else:
+      pivot, perm, a = _lu_unblocked(a)
+    return a, pivot, perm
+
+  n1 = _split_block(r, block_size)
+  left, pivot1, perm1 = _lu_recursive(a[:, :n1], block_size, unroll)
+  right = a[perm1, n1:]
+  a12 = _triangular_solve_python(left[:n1], right[:n1], lower=True,
+                                 unit_diagonal=True, unroll=unroll)
+  a22 = right[n1:] - lax.dot(left[n1:], a12, precision=lax.Precision.HIGHEST)
+  a22, pivot2, perm2 = _lu_recursive(a22, block_size, unroll)
+
+  lu = jnp.block([[left[:n1], a12], [left[n1:][perm2], a22]])
+  pivot = jnp.concatenate([pivot1, pivot2 + n1])
+  perm = jnp.concatenate([perm1[:n1], perm1[n1:][perm2]])
+  return lu, pivot, perm
+
+def _lu_python(x, block_size=None):
   """Default LU decomposition in Python, where no better version exists."""
   m, n = x.shape[-2:]
   batch_dims = x.shape[:-2]
+  lu_recursive = partial(_lu_recursive, block_size=block_size,
+                         unroll=min(m, n) <= _LU_UNROLL_MAX_SIZE)
   if len(batch_dims) > 0:
     batch_size = np.prod(batch_dims, dtype=np.int64)
-    lu, pivot, perm = api.vmap(_lu_blocked)(lax.reshape(x, (batch_size, m, n)))
+    lu, pivot, perm = api.vmap(lu_recursive)(lax.reshape(x, (batch_size, m, n)))
     lu = lax.reshape(lu, batch_dims + (m, n))
     pivot = lax.reshape(pivot, batch_dims + (min(m, n),))
     perm = lax.reshape(perm, batch_dims + (m,))
   else:
-    lu, pivot, perm = _lu_blocked(x)
+    lu, pivot, perm = lu_recursive(x)
   return lu, pivot, perm
 
 def _lu_impl(operand):
@@ -1203,6 +1446,8 @@ def svd_translation_rule(c, operand, full_matrices, compute_uv):
   if m == 0 or n == 0:
     return xla.lower_fun(_empty_svd, multiple_results=True)(
       c, operand, full_matrices=full_matrices, compute_uv=compute_uv)
+  if _use_jacobi(c, operand):
+    return _svd_jacobi_translation_rule(c, operand, full_matrices, compute_uv)
 
   u, s, v = xops.SVD(operand)
   permutation = list(range(len(shape)))
@@ -1292,6 +1537,88 @@ def _empty_svd(a, *, full_matrices, compute_uv):
     u, v = v, u
   return s, u, v
 
+def _complete_orthonormal(u, ok):
+  """Replaces the columns of `u` where `ok` is False, to make `u` orthonormal.
+
+  The replaced columns must follow the retained ones.
+  """
+  m, k = u.shape
+  eye = jnp.eye(m, dtype=u.dtype)
+  for i in range(k):
+    prev = jnp.where(jnp.arange(k) < i, u, jnp.zeros_like(u))
+    # The columns of the projector onto the complement of the first i columns;
+    # the longest is at least 1 / sqrt(m) long.
+    r = eye - lax.dot(prev, _T(prev), precision=lax.Precision.HIGHEST)
+    norms = jnp.sum(r * r, axis=0)
+    j = jnp.argmax(norms)
+    u = u.at[:, i].set(jnp.where(ok[i], u[:, i], r[:, j] * lax.rsqrt(norms[j])))
+  return u
+
+def _svd_jacobi(a, *, full_matrices, compute_uv):
+  """One-sided Jacobi SVD of a small real matrix."""
+  m, n = a.shape
+  if m < n:
+    result = _svd_jacobi(_T(a), full_matrices=full_matrices,
+                         compute_uv=compute_uv)
+    if not compute_uv:
+      return result
+    s, u, vt = result
+    return s, _T(vt), _T(u)
+
+  finite = jnp.all(jnp.isfinite(a))
+  tol = m * jnp.finfo(a.dtype).eps
+
+  def cond_fun(state):
+    a, _, sweep = state
+    g = lax.dot(_T(a), a, precision=lax.Precision.HIGHEST)
+    d = jnp.sqrt(jnp.diagonal(g))
+    off = jnp.abs(g) - tol * d[:, None] * d[None, :]
+    off = jnp.where(jnp.eye(n, dtype=bool), -jnp.ones_like(off), off)
+    return (sweep < _JACOBI_MAX_SWEEPS) & jnp.any(off > 0)
+
+  def body_fun(state):
+    a, v, sweep = state
+    for p in range(n - 1):
+      for q in range(p + 1, n):
+        ap, aq = a[:, p], a[:, q]
+        c, s = _jacobi_rotation(jnp.sum(ap * ap), jnp.sum(aq * aq),
+                                jnp.sum(ap * aq))
+        a = _jacobi_rotate(a, p, q, c, s, 1)
+        if v is not None:
+          v = _jacobi_rotate(v, p, q, c, s, 1)
+    return a, v, sweep + 1
+
+  v = jnp.eye(n, dtype=a.dtype) if compute_uv else None
+  a, v, _ = lax.while_loop(cond_fun, body_fun, (a, v, 0))
+  s = jnp.sqrt(jnp.sum(a * a, axis=0))
+  order = jnp.argsort(-s)
+  s = jnp.where(finite, s[order], jnp.full_like(s, np.nan))
+  if not compute_uv:
+    return s
+
+  # The orthogonalized columns of a are u * s. Columns of u for zero singular
+  # values, and for the rows beyond n when full_matrices is set, are completed
+  # to an orthonormal basis.
+  ok = s > 0
+  u = a[:, order] / jnp.where(ok, s, jnp.ones_like(s))
+  if full_matrices and m > n:
+    u = jnp.pad(u, ((0, 0), (0, m - n)))
+    ok = jnp.concatenate([ok, jnp.zeros((m - n,), bool)])
+  u = _complete_orthonormal(u, ok)
+  vt = _T(v[:, order])
+  return (s, jnp.where(finite, u, jnp.full_like(u, np.nan)),
+          jnp.where(finite, vt, jnp.full_like(vt, np.nan)))
+
+def _svd_jacobi_translation_rule(c, operand, full_matrices, compute_uv):
+  svd_jacobi = partial(_svd_jacobi, full_matrices=full_matrices,
+                       compute_uv=compute_uv)
+  if not compute_uv:
+    svd_jacobi = vectorize(svd_jacobi, signature='(m,n)->(k)')
+    return xla.lower_fun(lambda x: (svd_jacobi(x),), multiple_results=True)(
+        c, operand)
+  svd_jacobi = vectorize(svd_jacobi, signature='(m,n)->(k),(m,i),(j,n)')
+  return xla.lower_fun(svd_jacobi, multiple_results=True)(c, operand)
+
 def _svd_cpu_gpu_translation_rule(gesvd_impl, c, operand, full_matrices, compute_uv):
   shape = c.get_shape(operand).dimensions()
   m, n = shape[-2:]
@@ -1300,6 +1627,8 @@ def _svd_cpu_gpu_translation_rule(gesvd_impl, c, operand, full_matrices, compute
   if m == 0 or n == 0:
     return xla.lower_fun(_empty_svd, multiple_results=True)(
       c, operand, full_matrices=full_matrices, compute_uv=compute_uv)
+  if _use_jacobi(c, operand):
+    return _svd_jacobi_translation_rule(c, operand, full_matrices, compute_uv)
 
   s, u, vt, info = gesvd_impl(c, operand,
                               full_matrices=full_matrices,
@@ -27,7 +27,9 @@ rules for the underlying :code:`lax` primitives.
 import abc
 import builtins
 import collections
+import functools
 from functools import partial
+import json
 import operator
 import types
 from typing import Sequence, FrozenSet, Optional, Tuple, Union
@@ -4882,8 +4884,18 @@ def tensordot(a, b, axes=2, *, precision=None):
                          precision=precision)
 
 
-@_wraps(np.einsum, lax_description=_PRECISION_DOC, skip_params=['out'])
-def einsum(*operands, out=None, optimize='optimal', precision=None,
+_EINSUM_OPTIMIZE_DOC = """\
+By default (``optimize='auto'``) the contraction order is found with
+``opt_einsum``'s ``'optimal'`` search for up to four operands, with its ``'dp'``
+search for up to sixteen operands, and greedily beyond that. Contraction paths
+are cached by subscripts, operand shapes and ``optimize`` so that retracing does
+not repeat the search; set ``jax_einsum_path_cache_file`` to share the cache
+between processes.
+"""
+
+@_wraps(np.einsum, lax_description=_PRECISION_DOC + "\n" + _EINSUM_OPTIMIZE_DOC,
+        skip_params=['out'])
+def einsum(*operands, out=None, optimize='auto', precision=None,
            _use_xeinsum=False):
   if out is not None:
     raise NotImplementedError("The 'out' argument to jnp.einsum is not supported.")
@@ -4893,7 +4905,6 @@ def einsum(*operands, out=None, optimize='optimal', precision=None,
     return lax.xeinsum(*operands)
 
   optimize = 'optimal' if optimize is True else optimize
-  # using einsum_call=True here is an internal api for opt_einsum
 
   # Allow handling of shape polymorphism
   non_constant_dim_types = {
@@ -4901,19 +4912,105 @@ def einsum(*operands, out=None, optimize='optimal', precision=None,
       for d in np.shape(op) if not core.is_constant_dim(d)
   }
   if not non_constant_dim_types:
-    einsum_contract_path_fn = opt_einsum.contract_path
+    input_subscripts, output_subscript, operands = (
+        opt_einsum.parser.parse_einsum_input(operands))
+    if optimize == 'auto':
+      optimize = _einsum_default_optimize(len(operands))
+    elif isinstance(optimize, list):  # An explicit contraction path.
+      optimize = tuple(p if isinstance(p, str) else tuple(p) for p in optimize)
+    subscripts = f"{input_subscripts}->{output_subscript}"
+    shapes = tuple(tuple(np.shape(op)) for op in operands)
+    # Only paths found by a named search are written to the persistent cache.
+    persist = config.jax_einsum_path_cache_file if isinstance(optimize, str) else None
+    try:
+      contractions = _einsum_contract_path(subscripts, shapes, optimize, persist)
+    except TypeError:  # e.g. an unhashable opt_einsum PathOptimizer.
+      contractions = _einsum_contract_path.__wrapped__(subscripts, shapes, optimize, None)
   else:
+    if optimize == 'auto':
+      # Either a subscripts string followed by the operands, or the operands
+      # interleaved with their subscript lists and an optional output list.
+      num_operands = (len(operands) - 1 if isinstance(operands[0], str)
+                      else len(operands) // 2)
+      optimize = _einsum_default_optimize(num_operands)
     einsum_contract_path_fn = _polymorphic_einsum_contract_path_handlers[next(iter(non_constant_dim_types))]
-  operands, contractions = einsum_contract_path_fn(
-        *operands, einsum_call=True, use_blas=True, optimize=optimize)
-
-  contractions = tuple((a, frozenset(b), c) for a, b, c, *_ in contractions)
+    # using einsum_call=True here is an internal api for opt_einsum
+    operands, contractions = einsum_contract_path_fn(
+          *operands, einsum_call=True, use_blas=True, optimize=optimize)
+    contractions = tuple((a, frozenset(b), c) for a, b, c, *_ in contractions)
   return _einsum(operands, contractions, precision)
 
 # Enable other modules to override einsum_contact_path.
 # Indexed by the type of the non constant dimension
 _polymorphic_einsum_contract_path_handlers = {}  # type: ignore
 
+# Largest number of operands for which einsum searches for the optimal
+# contraction order by default, and for which it uses dynamic programming.
+_EINSUM_OPTIMAL_MAX_OPERANDS = 4
+_EINSUM_DP_MAX_OPERANDS = 16
+
+# Number of contraction paths kept in memory.
+_EINSUM_PATH_CACHE_SIZE = 4096
+
+def _einsum_default_optimize(num_operands):
+  if num_operands <= _EINSUM_OPTIMAL_MAX_OPERANDS:
+    return 'optimal'
+  elif num_operands <= _EINSUM_DP_MAX_OPERANDS:
+    return 'dp'
+  else:
+    return 'greedy'
+
+@functools.lru_cache(maxsize=_EINSUM_PATH_CACHE_SIZE)
+def _einsum_contract_path(subscripts, shapes, optimize, persist):
+  key = (subscripts, shapes, optimize)
+  if persist:
+    contractions = _einsum_path_file(persist).get(key)
+    if contractions is not None:
+      return contractions
+  # opt_einsum only looks at the shapes of the operands.
+  _, contractions = opt_einsum.contract_path(
+      subscripts, *(ShapedArray(shape, np.float32) for shape in shapes),
+      einsum_call=True, use_blas=True,
+      optimize=list(optimize) if isinstance(optimize, tuple) else optimize)
+  contractions = tuple((tuple(a), frozenset(b), c) for a, b, c, *_ in contractions)
+  if persist:
+    _einsum_path_file_append(persist, key, contractions)
+  return contractions
+
+# Contents of persistent contraction path files, indexed by file name.
+_einsum_path_files = {}  # type: ignore
+
+def _einsum_path_file(fname):
+  if fname not in _einsum_path_files:
+    paths = _einsum_path_files[fname] = {}
+    try:
+      with open(fname) as f:
+        for line in f:
+          try:
+            entry = json.loads(line)
+            key = (entry['subscripts'], tuple(map(tuple, entry['shapes'])),
+                   entry['optimize'])
+            paths[key] = tuple((tuple(a), frozenset(b), c)
+                               for a, b, c in entry['contractions'])
+          except (ValueError, KeyError, TypeError):
+            continue  # e.g. a line truncated by a concurrent writer.
+    except FileNotFoundError:
+      pass
+    except OSError as e:
+      warnings.warn(f"Could not read einsum path cache file {fname}: {e}")
+  return _einsum_path_files[fname]
+
+def _einsum_path_file_append(fname, key, contractions):
+  _einsum_path_file(fname)[key] = contractions
+  subscripts, shapes, optimize = key
+  entry = {'subscripts': subscripts, 'shapes': shapes, 'optimize': optimize,
+           'contractions': [(a, ''.join(sorted(b)), c) for a, b, c in contractions]}
+  try:
+    with open(fname, 'a') as f:
+      f.write(json.dumps(entry) + '\n')
+  except OSError as e:
+    warnings.warn(f"Could not write einsum path cache file {fname}: {e}")
+
 @_wraps(np.einsum_path)
 def einsum_path(subscripts, *operands, optimize='greedy'):
   # using einsum_call=True here is an internal api for opt_einsum
@@ -27,7 +27,7 @@ from jax.config import config
 from jax.dtypes import float0
 from jax.interpreters import batching
 from jax.interpreters import xla
-from jax._src.api import jit, vmap
+from jax._src.api import eval_shape, jit, vmap, ShapeDtypeStruct
 from jax._src.lib import xla_bridge
 from jax._src.lib import xla_client
 from jax._src.lib import cuda_prng
@@ -463,6 +463,13 @@ def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
     last = threefry_2x32(last_key, lax.iota(np.uint32, rem))
     bits = lax.concatenate([blocks.ravel(), last], 0)
 
+  bits = _convert_random_bits(bits, bit_width, max_count, size)
+  return lax.reshape(bits, shape)
+
+
+def _convert_random_bits(bits, bit_width, max_count, size):
+  """Converts ``max_count`` random uint32 words to ``size`` values of
+  ``bit_width`` bits."""
   dtype = UINT_DTYPES[bit_width]
   if bit_width == 64:
     bits = [lax.convert_element_type(x, dtype) for x in jnp.split(bits, 2)]
@@ -481,7 +488,60 @@ def threefry_random_bits(key: jnp.ndarray, bit_width, shape):
     )
     bits = lax.reshape(bits, (np.uint32(max_count * 32 // bit_width),), (1, 0))
     bits = lax.convert_element_type(bits, dtype)[:size]
-  return lax.reshape(bits, shape)
+  return bits
+
+
+def threefry_random_bits_blocked(key: jnp.ndarray, bit_width, size, transform,
+                                 block_size):
+  """Computes ``transform(threefry_random_bits(key, bit_width, (size,)))``
+  block by block.
+
+  ``transform`` must be elementwise. Only ``2 * block_size`` random words are
+  live at a time, rather than all of them, and the result is identical to the
+  unblocked computation. Supports bit widths of 32 and 64, and sizes for which
+  ``threefry_random_bits`` hashes all counts with a single key.
+  """
+  if not _is_threefry_prng_key(key):
+    raise TypeError("threefry_random_bits_blocked got invalid prng key.")
+  if bit_width not in (32, 64):
+    raise TypeError("requires 32- or 64-bit field width.")
+  if bit_width * size // 32 >= jnp.iinfo(np.uint32).max:
+    raise ValueError(f"size {size} is too large for a single hash block.")
+  dtype = UINT_DTYPES[bit_width]
+  if bit_width == 32:
+    # threefry_2x32 hashes count j together with count j + half, and returns
+    # the two outputs as elements j and j + half. For odd sizes, the last count
+    # is paired with a zero.
+    half = (size + 1) // 2
+  else:
+    # The two outputs for counts j and j + size are the high and low words of
+    # element j.
+    half = size
+  block_size = min(block_size, half)
+  num_blocks = -(-half // block_size)
+  out_dtype = eval_shape(transform, ShapeDtypeStruct((block_size,), dtype)).dtype
+
+  def body_fun(i, out):
+    # The last block overlaps with the previous one, rather than being padded.
+    start = lax.min(i * block_size, half - block_size)
+    j = lax.convert_element_type(start, np.uint32) + lax.iota(np.uint32,
+                                                              block_size)
+    if bit_width == 32:
+      paired = j + np.uint32(half)
+      paired = jnp.where(paired < np.uint32(size), paired, np.uint32(0))
+      bits = threefry_2x32(key, lax.concatenate([j, paired], 0))
+      values = lax.reshape(transform(bits), (2, block_size))
+      return lax.dynamic_update_slice(out, values, (0, start))
+    else:
+      bits = threefry_2x32(key, lax.concatenate([j, j + np.uint32(size)], 0))
+      hi, lo = [lax.convert_element_type(x, dtype) for x in jnp.split(bits, 2)]
+      values = transform(lax.shift_left(hi, dtype(32)) | lo)
+      return lax.dynamic_update_slice(out, values, (start,))
+
+  out_shape = (2, half) if bit_width == 32 else (half,)
+  out = lax.fori_loop(0, num_blocks, body_fun, jnp.zeros(out_shape, out_dtype))
+  out = lax.reshape(out, (out.size,))
+  return out[:size] if out.size != size else out
 
 
 threefry_prng_impl = PRNGImpl(
@@ -492,6 +552,212 @@ threefry_prng_impl = PRNGImpl(
     fold_in=threefry_fold_in)
 
 
+# -- philox4x32 PRNG implementation --
+
+# Philox-4x32 (Salmon et al., "Parallel random numbers: as easy as 1, 2, 3",
+# SC 2011) is a counter-based generator like threefry, but a single evaluation
+# produces four 32-bit words from ten rounds built on two 32x32->64 bit
+# multiplications. Its lowering is fully unrolled elementwise arithmetic, which
+# XLA fuses into a single vectorized loop on every backend, rather than the
+# rolled loop used to lower threefry on CPU.
+
+_PHILOX_MULTIPLIERS = (0xD2511F53, 0xCD9E8D57)
+_PHILOX_KEY_INCREMENTS = (np.uint32(0x9E3779B9), np.uint32(0xBB67AE85))
+
+# Tags stored in the last counter word, so that bits, split keys and folded-in
+# keys are drawn from disjoint counter ranges.
+_PHILOX_RANDOM_BITS, _PHILOX_SPLIT, _PHILOX_FOLD_IN = 0, 1, 2
+
+
+def _mulhilo32(a, b):
+  """Returns the high and low words of the 64-bit product ``a * b``.
+
+  ``a`` is a Python integer constant and ``b`` an array of dtype uint32. The
+  high word is assembled from 16-bit limbs, so that no 64-bit integers are
+  needed.
+  """
+  a_lo, a_hi = np.uint32(a & 0xFFFF), np.uint32(a >> 16)
+  mask, shift = np.uint32(0xFFFF), np.uint32(16)
+  b_lo = jnp.bitwise_and(b, mask)
+  b_hi = jnp.right_shift(b, shift)
+  lh = a_lo * b_hi
+  hl = a_hi * b_lo
+  mid = (jnp.right_shift(a_lo * b_lo, shift) + jnp.bitwise_and(lh, mask) +
+         jnp.bitwise_and(hl, mask))
+  hi = (a_hi * b_hi + jnp.right_shift(lh, shift) + jnp.right_shift(hl, shift) +
+        jnp.right_shift(mid, shift))
+  return hi, np.uint32(a) * b
+
+
+def _philox4x32_abstract_eval(*args, rounds):
+  if any(a.dtype != jnp.uint32 for a in args):
+    raise TypeError("Arguments to philox4x32 must have uint32 type, got {}"
+                    .format(args))
+  if all(isinstance(arg, core.ShapedArray) for arg in args):
+    shape = lax._broadcasting_shape_rule('philox4x32', *args)
+    named_shape = core.join_named_shapes(*(a.named_shape for a in args))
+    aval = core.ShapedArray(shape, jnp.dtype(jnp.uint32), named_shape=named_shape)
+  else:
+    aval = core.UnshapedArray(jnp.dtype(jnp.uint32))
+  return (aval,) * 4
+
+
+def _philox4x32_lowering(key1, key2, x1, x2, x3, x4, *, rounds):
+  """Apply ``rounds`` rounds of the Philox 4x32 bijection.
+
+  Args:
+    key1, key2: the two 32-bit words of the key.
+    x1, x2, x3, x4: arrays of dtype uint32 holding the four counter words.
+
+  Returns:
+    A tuple of four uint32 arrays, with the broadcast shape of the arguments.
+  """
+  shape = lax.broadcast_shapes(
+      *(np.shape(a) for a in (key1, key2, x1, x2, x3, x4)))
+  x = [jnp.broadcast_to(a, shape) for a in (x1, x2, x3, x4)]
+  ks = [key1, key2]
+  for i in range(rounds):
+    if i:
+      ks = [ks[0] + _PHILOX_KEY_INCREMENTS[0], ks[1] + _PHILOX_KEY_INCREMENTS[1]]
+    hi0, lo0 = _mulhilo32(_PHILOX_MULTIPLIERS[0], x[0])
+    hi1, lo1 = _mulhilo32(_PHILOX_MULTIPLIERS[1], x[2])
+    x = [hi1 ^ x[1] ^ ks[0], lo1, hi0 ^ x[3] ^ ks[1], lo0]
+  return tuple(x)
+
+
+philox4x32_p = core.Primitive("philox4x32")
+philox4x32_p.multiple_results = True
+philox4x32_p.def_impl(partial(xla.apply_primitive, philox4x32_p))
+philox4x32_p.def_abstract_eval(_philox4x32_abstract_eval)
+batching.defbroadcasting(philox4x32_p)
+xla.translations[philox4x32_p] = xla.lower_fun(
+    _philox4x32_lowering, multiple_results=True)
+
+
+@partial(jit, static_argnums=(2,), inline=True)
+def philox_4x32(keypair, count, rounds=10):
+  """Apply the Philox 4x32 bijection.
+
+  Args:
+    keypair: a pair of 32bit unsigned integers used for the key.
+    count: an array of dtype uint32 and shape ``(..., 4)`` used for the counts.
+    rounds: the number of rounds, 10 by default.
+
+  Returns:
+    An array of dtype uint32 with the same shape as `count`.
+  """
+  key1, key2 = keypair
+  if not lax.dtype(key1) == lax.dtype(key2) == lax.dtype(count) == np.uint32:
+    msg = "philox_4x32 requires uint32 arguments, got {}"
+    raise TypeError(msg.format([lax.dtype(x) for x in [key1, key2, count]]))
+  if count.shape[-1:] != (4,):
+    raise TypeError(f"philox_4x32 requires counts of shape (..., 4), got "
+                    f"{count.shape}")
+  x = philox4x32_p.bind(key1, key2, *(count[..., i] for i in range(4)),
+                        rounds=rounds)
+  return jnp.stack(x, axis=-1)
+
+
+def _philox_words(rounds, key, x1, x2, tag):
+  """Returns the four output words for counters ``(x1, x2, 0, tag)``."""
+  x1, x2 = jnp.broadcast_arrays(x1, x2)
+  zero = lax.full(x1.shape, 0, np.uint32)
+  tag = lax.full(x1.shape, tag, np.uint32)
+  return philox4x32_p.bind(key[0], key[1], x1, x2, zero, tag, rounds=rounds)
+
+
+def _is_philox_prng_key(key: jnp.ndarray) -> bool:
+  try:
+    return key.shape == (2,) and key.dtype == np.uint32
+  except AttributeError:
+    return False
+
+
+def philox_split(rounds: int, key: jnp.ndarray, num: int) -> jnp.ndarray:
+  return _philox_split(rounds, key, int(num))  # type: ignore
+
+@partial(jit, static_argnums=(0, 2), inline=True)
+def _philox_split(rounds, key, num) -> jnp.ndarray:
+  counts = lax.iota(np.uint32, num)
+  x = _philox_words(rounds, key, counts, np.uint32(0), _PHILOX_SPLIT)
+  return jnp.stack(x[:2], axis=1)
+
+
+def philox_fold_in(rounds: int, key: jnp.ndarray, data: int) -> jnp.ndarray:
+  return _philox_fold_in(rounds, key, jnp.uint32(data))
+
+@partial(jit, static_argnums=(0,), inline=True)
+def _philox_fold_in(rounds, key, data):
+  x = _philox_words(rounds, key, data, np.uint32(0), _PHILOX_FOLD_IN)
+  return jnp.stack(x[:2])
+
+
+@partial(jit, static_argnums=(0, 2, 3), inline=True)
+def philox_random_bits(rounds: int, key: jnp.ndarray, bit_width, shape):
+  """Sample uniform random bits of given width and shape using PRNG key."""
+  if not _is_philox_prng_key(key):
+    raise TypeError("philox_random_bits got invalid prng key.")
+  if bit_width not in (8, 16, 32, 64):
+    raise TypeError("requires 8-, 16-, 32- or 64-bit field width.")
+  shape = core.as_named_shape(shape)
+  for name, size in shape.named_items:
+    real_size = lax.psum(1, name)
+    if real_size != size:
+      raise ValueError(f"The shape of axis {name} was specified as {size}, "
+                       f"but it really is {real_size}")
+    axis_index = lax.axis_index(name)
+    key = philox_fold_in(rounds, key, axis_index)
+  size = prod(shape.positional)
+  max_count, r = divmod(bit_width * size, 32)
+  if r > 0:
+    max_count += 1
+  # Each evaluation produces four words. The second counter word holds the high
+  # part of the block index, for outputs of more than 2**32 blocks.
+  num_blocks, r = divmod(max_count, 4)
+  if r > 0:
+    num_blocks += 1
+
+  if core.is_constant_dim(num_blocks):
+    nhigh, rem = divmod(num_blocks, jnp.iinfo(np.uint32).max)
+  else:
+    nhigh, rem = 0, num_blocks
+
+  x = _philox_words(rounds, key, lax.iota(np.uint32, rem), np.uint32(nhigh),
+                    _PHILOX_RANDOM_BITS)
+  bits = jnp.stack(x, axis=1).ravel()
+  if nhigh:
+    block_shape = (nhigh, jnp.iinfo(np.uint32).max)
+    x = _philox_words(rounds, key,
+                      lax.broadcasted_iota(np.uint32, block_shape, 1),
+                      lax.broadcasted_iota(np.uint32, block_shape, 0),
+                      _PHILOX_RANDOM_BITS)
+    bits = lax.concatenate([jnp.stack(x, axis=2).ravel(), bits], 0)
+  if r > 0:
+    bits = bits[:max_count]
+
+  bits = _convert_random_bits(bits, bit_width, max_count, size)
+  return lax.reshape(bits, shape)
+
+
+philox_prng_impl = PRNGImpl(
+    key_shape=(2,),
+    seed=threefry_seed,
+    split=partial(philox_split, 10),
+    random_bits=partial(philox_random_bits, 10),
+    fold_in=partial(philox_fold_in, 10))
+
+# A faster variant that generates random bits with seven rounds, which still
+# pass the BigCrush test battery, but with a smaller safety margin. Keys
+# derived by split and fold_in use all ten rounds, so splitting is as safe as
+# with philox_prng_impl.
+philox_fast_prng_impl = PRNGImpl(
+    key_shape=(2,),
+    seed=threefry_seed,
+    split=partial(philox_split, 10),
+    random_bits=partial(philox_random_bits, 7),
+    fold_in=partial(philox_fold_in, 10))
+
+
 # -- RngBitGenerator PRNG implementation --
 
 # This code is experimental!
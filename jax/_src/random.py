@@ -14,7 +14,7 @@
 
 
 from functools import partial
-from typing import Any, Optional, Sequence, Union
+from typing import Any, NamedTuple, Optional, Sequence, Union
 import warnings
 
 import numpy as np
@@ -88,6 +88,33 @@ def _random_bits(key: prng.PRNGKeyArray, bit_width, shape) -> jnp.ndarray:
   return key._random_bits(bit_width, shape)
 
 
+# Samples with at least this many elements are generated block by block, with
+# the sampler's transformation of the random bits applied to each block, so
+# that the full array of random bits is never materialized.
+_BLOCKED_SAMPLING_MIN_SIZE = 1 << 24
+_BLOCKED_SAMPLING_BLOCK_SIZE = 1 << 20
+
+def _use_blocked_sampling(key: prng.PRNGKeyArray, bit_width,
+                          shape: NamedShape) -> bool:
+  if (key.impl is not prng.threefry_prng_impl or bit_width not in (32, 64) or
+      shape.named_rank or
+      not all(core.is_constant_dim(d) for d in shape.positional)):
+    return False
+  return _BLOCKED_SAMPLING_MIN_SIZE <= prod(shape.positional) < 2 ** 31
+
+def _blocked_sample(key: prng.PRNGKeyArray, bit_width, shape: NamedShape,
+                    transform) -> jnp.ndarray:
+  """Computes ``transform(_random_bits(key, bit_width, shape))`` blockwise.
+
+  ``transform`` must be elementwise. The result is identical to the unblocked
+  computation.
+  """
+  out = prng.threefry_random_bits_blocked(
+      key.keys, bit_width, prod(shape.positional), transform,
+      _BLOCKED_SAMPLING_BLOCK_SIZE)
+  return lax.reshape(out, shape.positional)
+
+
 ### key operations
 
 
@@ -193,17 +220,26 @@ def _uniform(key, shape, dtype, minval, maxval) -> jnp.ndarray:
 
   minval = lax.convert_element_type(minval, dtype)
   maxval = lax.convert_element_type(maxval, dtype)
-  minval = lax.broadcast_to_rank(minval, shape.positional_rank)
-  maxval = lax.broadcast_to_rank(maxval, shape.positional_rank)
-
-  finfo = jnp.finfo(dtype)
-  nbits, nmant = finfo.bits, finfo.nmant
 
+  nbits = jnp.finfo(dtype).bits
   if nbits not in (16, 32, 64):
     raise TypeError("uniform only accepts 32- or 64-bit dtypes.")
 
+  if (_use_blocked_sampling(key, nbits, shape) and not np.shape(minval) and
+      not np.shape(maxval)):
+    return _blocked_sample(
+        key, nbits, shape,
+        partial(_bits_to_uniform, dtype=dtype, minval=minval, maxval=maxval))
+
+  minval = lax.broadcast_to_rank(minval, shape.positional_rank)
+  maxval = lax.broadcast_to_rank(maxval, shape.positional_rank)
   bits = _random_bits(key, nbits, shape)
+  return _bits_to_uniform(lax.reshape(bits, shape.positional), dtype, minval,
+                          maxval)
 
+def _bits_to_uniform(bits, dtype, minval, maxval):
+  finfo = jnp.finfo(dtype)
+  nbits, nmant = finfo.bits, finfo.nmant
   # The strategy here is to randomize only the mantissa bits with an exponent of
   # 1 (after applying the bias), then shift and scale to the desired range. The
   # bit-level transformation we use relies on Numpy and XLA having bit-for-bit
@@ -212,9 +248,7 @@ def _uniform(key, shape, dtype, minval, maxval) -> jnp.ndarray:
       lax.shift_right_logical(bits, np.array(nbits - nmant, lax.dtype(bits))),
       np.array(1., dtype).view(UINT_DTYPES[nbits]))
   floats = lax.bitcast_convert_type(float_bits, dtype) - np.array(1., dtype)
-  return lax.max(
-      minval,
-      lax.reshape(floats * (maxval - minval) + minval, shape.positional))
+  return lax.max(minval, floats * (maxval - minval) + minval)
 
 
 def randint(key: KeyArray,
@@ -323,7 +357,8 @@ def shuffle(key: KeyArray, x: Array, axis: int = 0) -> jnp.ndarray:
   return _shuffle(key, x, axis)  # type: ignore
 
 
-def permutation(key: KeyArray, x: Array) -> jnp.ndarray:
+def permutation(key: KeyArray, x: Array,
+                method: Optional[str] = None) -> jnp.ndarray:
   """
   Permute elements of an array along its first axis or return a permuted range.
 
@@ -333,6 +368,15 @@ def permutation(key: KeyArray, x: Array) -> jnp.ndarray:
   Args:n
     key: a PRNG key used as the random key.
     x: the array or integer range to be shuffled.
+    method: optional, the algorithm used to draw the permutation. ``'sort'``
+      sorts by random keys, which takes ``O(n log n)`` time. ``'feistel'``
+      enumerates a keyed Feistel network over the indices, which takes
+      ``O(n)`` time and is faster on CPU for large ``n``, but is measurably
+      non-uniform for ``n`` below a few hundred. The two methods draw
+      different permutations for the same key. The default (None) uses
+      ``'feistel'`` on CPU for at least 2**20 elements, and ``'sort'``
+      otherwise; pass a method explicitly for results that do not depend on
+      the backend.
 
   Returns:
     A shuffled version of x or array range
@@ -343,7 +387,11 @@ def permutation(key: KeyArray, x: Array) -> jnp.ndarray:
     if not np.issubdtype(lax.dtype(x), np.integer):
       raise TypeError("x must be an integer or at least 1-dimensional")
     x = int(x)  # type: ignore[assignment]
+    if _permutation_method(method, x) == 'feistel':
+      return _feistel_permutation(key, x)
     return _shuffle(key, jnp.arange(x), 0)
+  elif _permutation_method(method, np.shape(x)[0]) == 'feistel':
+    return jnp.asarray(x)[_feistel_permutation(key, np.shape(x)[0])]
   elif np.ndim(x) == 1:
     return _shuffle(key, x, 0)
   else:
@@ -352,6 +400,114 @@ def permutation(key: KeyArray, x: Array) -> jnp.ndarray:
     return x[ind]
 
 
+# Four rounds with a strong round function make the Feistel network a
+# pseudorandom permutation once its halves are a few bits wide; for small
+# domains the permutations it can reach are too few to be close to uniform.
+_FEISTEL_PERMUTATION_MIN_SIZE = 1 << 20
+_FEISTEL_ROUNDS = 4
+
+def _permutation_method(method: Optional[str], n: int) -> str:
+  if method is None:
+    if (_FEISTEL_PERMUTATION_MIN_SIZE <= n < 2 ** 31 and
+        xla_bridge.get_backend().platform == 'cpu'):
+      return 'feistel'
+    return 'sort'
+  if method not in ('sort', 'feistel'):
+    raise ValueError(f"permutation method must be 'sort' or 'feistel', got "
+                     f"{method!r}.")
+  if method == 'feistel' and n >= 2 ** 31:
+    raise ValueError("the 'feistel' permutation method supports at most "
+                     f"2**31 - 1 elements, got {n}.")
+  return method
+
+
+def _feistel(round_keys, x, bits: int):
+  """Applies a keyed bijection of ``[0, 2**bits)`` to the uint32 array ``x``.
+
+  Each round of the Feistel network hashes the low half of the bits with
+  ``threefry2x32`` under its own key pair and XORs the result into the high
+  half, then swaps the halves. For an odd number of bits the halves differ in
+  width by one, and alternate between rounds.
+  """
+  hi_bits, lo_bits = bits // 2, bits - bits // 2
+  for i in range(round_keys.shape[0]):
+    lo = lax.bitwise_and(x, np.uint32((1 << lo_bits) - 1))
+    hi = lax.shift_right_logical(x, np.uint32(lo_bits))
+    f, _ = prng.threefry2x32_p.bind(round_keys[i, 0], round_keys[i, 1], lo,
+                                    np.uint32(0))
+    hi = lax.bitwise_and(lax.bitwise_xor(hi, f), np.uint32((1 << hi_bits) - 1))
+    x = lax.bitwise_or(lax.shift_left(lo, np.uint32(hi_bits)), hi)
+    hi_bits, lo_bits = lo_bits, hi_bits
+  return x
+
+@partial(jit, static_argnums=(1,), inline=True)
+def _feistel_permutation(key, n) -> jnp.ndarray:
+  # Enumerate the bijection of the smallest power-of-two domain holding
+  # [0, n), which is less than twice as large, and keep the values below n in
+  # the order they appear.
+  bits = max(2, (n - 1).bit_length())
+  round_keys = _random_bits(key, 32, (_FEISTEL_ROUNDS, 2))
+  y = _feistel(round_keys, lax.iota(np.uint32, 1 << bits), bits)
+  keep = y < np.uint32(n)
+  pos = jnp.where(keep, jnp.cumsum(keep, dtype=np.int32) - 1, n)
+  out = jnp.zeros(n + 1, np.uint32).at[pos].set(y)[:n]
+  return lax.convert_element_type(out, dtypes.canonicalize_dtype(jnp.int_))
+
+
+def permutation_index(key: KeyArray, index: IntegerArray, n: int) -> jnp.ndarray:
+  """Maps indices through a random permutation of ``range(n)`` one at a time.
+
+  Unlike :func:`permutation`, the permutation is never materialized: each
+  index is mapped independently, in constant memory and expected constant
+  time, by cycle-walking a keyed Feistel network built on ``threefry_2x32``.
+  The result for an index depends only on ``key``, ``n`` and the index, so
+  shards of an epoch can be drawn separately, e.g. on different hosts, and
+  together cover every index exactly once.
+
+  The permutation is not the one drawn by :func:`permutation` for the same
+  key.
+
+  Args:
+    key: a PRNG key used as the random key.
+    index: an integer array of indices in ``[0, n)``. The result for indices
+      outside this range is unspecified.
+    n: a concrete positive integer of at most 2**32, the size of the permuted
+      range.
+
+  Returns:
+    An array of the same shape and dtype as ``index`` holding the image of
+    each index under the permutation.
+  """
+  key, _ = _check_prng_key(key)
+  _check_arraylike("permutation_index", index)
+  n = core.concrete_or_error(
+      int, n, "The n argument of jax.random.permutation_index().")
+  if not 1 <= n <= 2 ** 32:
+    raise ValueError(f"permutation_index requires 1 <= n <= 2**32, got {n}.")
+  dtype = dtypes.canonicalize_dtype(lax.dtype(index))
+  if not jnp.issubdtype(dtype, np.integer):
+    raise TypeError(f"permutation_index requires integer indices, got {dtype}.")
+  if n - 1 > jnp.iinfo(dtype).max:
+    raise ValueError(f"permutation_index can not represent the indices of a "
+                     f"range of size {n} with dtype {dtype}.")
+  return _permutation_index(key, index, n)
+
+@partial(jit, static_argnums=(2,), inline=True)
+def _permutation_index(key, index, n) -> jnp.ndarray:
+  # The network permutes the smallest power-of-two domain holding [0, n).
+  # Applying it again to values that land outside [0, n) until they do not
+  # yields a bijection of [0, n), and takes fewer than two steps on average.
+  bits = max(2, (n - 1).bit_length())
+  round_keys = _random_bits(key, 32, (_FEISTEL_ROUNDS, 2))
+  feistel = lambda y: _feistel(round_keys, y, bits)
+  y = feistel(lax.convert_element_type(index, np.uint32))
+  if n < 2 ** bits:
+    outside = lambda y: y >= np.uint32(n)
+    y = lax.while_loop(lambda y: jnp.any(outside(y)),
+                       lambda y: jnp.where(outside(y), feistel(y), y), y)
+  return lax.convert_element_type(y, lax.dtype(index))
+
+
 @partial(jit, static_argnums=(2,), inline=True)
 def _shuffle(key, x, axis) -> jnp.ndarray:
   # On parallel architectures, Fisher-Yates is more expensive than doing
@@ -399,7 +555,9 @@ def choice(key: KeyArray,
       default is True.
     p : 1-D array-like, The probabilities associated with each entry in a.
       If not given the sample assumes a uniform distribution over all
-      entries in a.
+      entries in a. When drawing repeatedly with replacement from the same
+      probabilities, an :class:`AliasTable` built from them with
+      :func:`alias_table` may be passed instead.
 
   Returns:
     An array of shape `shape` containing samples from `a`.
@@ -430,6 +588,13 @@ def choice(key: KeyArray,
       result = ind if np.ndim(a) == 0 else a[ind]  # type: ignore[index]
     else:
       result = permutation(key, a)[:n_draws]
+  elif isinstance(p, AliasTable):
+    if not replace:
+      raise ValueError("choice with an AliasTable p requires replace=True")
+    if p.prob.shape != (n_inputs,):
+      raise ValueError("p must be None or match the shape of a")
+    ind = alias_sample(key, p, shape)
+    result = ind if np.ndim(a) == 0 else a[ind]  # type: ignore[index]
   else:
     if p.shape != (n_inputs,):
       raise ValueError("p must be None or match the shape of a")
@@ -653,7 +818,89 @@ def _bernoulli(key, p, shape) -> jnp.ndarray:
   else:
     _check_shape("bernoulli", shape, np.shape(p))
 
-  return uniform(key, shape, lax.dtype(p)) < p
+  dtype = lax.dtype(p)
+  nbits = jnp.finfo(dtype).bits
+  shape = core.as_named_shape(shape)
+  if _use_blocked_sampling(key, nbits, shape) and not np.shape(p):
+    zero, one = np.array(0., dtype), np.array(1., dtype)
+    return _blocked_sample(
+        key, nbits, shape, lambda bits: _bits_to_uniform(bits, dtype, zero, one) < p)
+  return uniform(key, shape, dtype) < p
+
+
+def bernoulli_packed(key: KeyArray,
+                     p: RealArray = np.float32(0.5),
+                     shape: Sequence[int] = (8,),
+                     precision: int = 16) -> jnp.ndarray:
+  """Sample Bernoulli random values packed into bits.
+
+  Produces the same distribution as ``bernoulli``, with ``p`` rounded down to
+  a multiple of ``2 ** -precision``, but packs eight samples into each byte
+  along the last axis. Rather than comparing a uniform sample with ``p`` for
+  each element, each bit of ``p`` is combined with a random byte using bitwise
+  operations, so that only ``precision / 8`` random bytes are generated per
+  sample, and the largest intermediate array is of the size of the result.
+
+  Args:
+    key: a PRNG key used as the random key.
+    p: optional, a scalar float for the mean of the random variables.
+      Default 0.5.
+    shape: optional, a tuple of nonnegative integers representing the shape of
+      the unpacked samples. Must have at least one dimension. Default (8,).
+    precision: optional, the number of bits of ``p`` that are used, between 1
+      and 24. Default 16.
+
+  Returns:
+    A random array with dtype uint8 and shape ``shape[:-1] + (ceil(shape[-1] /
+    8),)``. Unpack it with
+    ``jnp.unpackbits(x, axis=-1, count=shape[-1], bitorder='little')``. Padding
+    bits in the last byte are zero.
+  """
+  key, _ = _check_prng_key(key)
+  shape = core.canonicalize_shape(shape)
+  if not shape:
+    raise ValueError("bernoulli_packed requires a shape with at least one "
+                     "dimension.")
+  if np.shape(p):
+    raise ValueError(f"bernoulli_packed requires a scalar p, got shape "
+                     f"{np.shape(p)}.")
+  precision = core.concrete_or_error(
+      int, precision, "The precision argument of bernoulli_packed.")
+  if not 1 <= precision <= 24:
+    raise ValueError(f"precision must be between 1 and 24, got {precision}.")
+  dtype = dtypes.canonicalize_dtype(lax.dtype(p))
+  if not jnp.issubdtype(dtype, np.floating):
+    msg = "bernoulli probability `p` must have a floating dtype, got {}."
+    raise TypeError(msg.format(dtype))
+  p = lax.convert_element_type(p, np.float32)
+  return _bernoulli_packed(key, p, shape, precision)  # type: ignore
+
+@partial(jit, static_argnums=(2, 3), inline=True)
+def _bernoulli_packed(key, p, shape, precision) -> jnp.ndarray:
+  packed_shape = (*shape[:-1], -(-shape[-1] // 8))
+  # The probability that the result is one is q / 2**precision.
+  q = lax.convert_element_type(
+      lax.floor(lax.clamp(np.float32(0), p, np.float32(1)) * 2 ** precision),
+      np.uint32)
+
+  # Processing the bits of q from the least significant one, the probability
+  # that a bit of the result is one is halved if the bit of q is zero, and is
+  # halved and increased by 1/2 if it is one.
+  def body_fun(i, out):
+    bits = _random_bits(_fold_in(key, i), 8, packed_shape)
+    q_bit = lax.bitwise_and(lax.shift_right_logical(q, i), np.uint32(1))
+    return lax.select(lax.broadcast(q_bit == 1, packed_shape),
+                      lax.bitwise_or(out, bits), lax.bitwise_and(out, bits))
+
+  out = lax.fori_loop(np.uint32(0), np.uint32(precision), body_fun,
+                      jnp.zeros(packed_shape, np.uint8))
+  out = jnp.where(q == np.uint32(2 ** precision), np.uint8(0xFF), out)
+  if shape[-1] % 8:
+    # Clear the padding bits of the last byte.
+    last = lax.broadcasted_iota(np.int32, packed_shape, len(shape) - 1)
+    mask = np.uint8((1 << (shape[-1] % 8)) - 1)
+    out = jnp.where(last == packed_shape[-1] - 1, out & mask, out)
+  return out
 
 
 def beta(key: KeyArray,
@@ -1151,6 +1398,156 @@ def categorical(key: KeyArray,
       axis=axis)
 
 
+class AliasTable(NamedTuple):
+  """A table for sampling from a fixed categorical distribution.
+
+  Built by :func:`alias_table` and consumed by :func:`alias_sample` (or by
+  :func:`choice` as its ``p`` argument). The table is a pytree, so it can be
+  passed through ``jit``, stacked with ``vmap``, or stored alongside model
+  parameters.
+
+  Attributes:
+    prob: integer array of shape ``(n,)``. Bucket ``i`` keeps outcome ``i``
+      with probability ``prob[i] / scale`` and otherwise yields
+      ``alias[i]``, where ``scale`` is determined by ``n`` and the dtype of
+      ``prob`` (see :func:`alias_table`).
+    alias: int32 array of shape ``(n,)``, the outcome that shares bucket
+      ``i``.
+  """
+  prob: Array
+  alias: Array
+
+
+def _alias_scale(n: int, dtype) -> int:
+  # Leave a factor of two of headroom so that the sum of the quantized
+  # weights can not overflow before it is corrected.
+  return (int(np.iinfo(dtype).max) // 2) // n
+
+
+def alias_table(p: Optional[RealArray] = None, *,
+                logits: Optional[RealArray] = None) -> AliasTable:
+  """Builds an alias table for sampling from a categorical distribution.
+
+  Construction costs ``O(n log n)`` and is done once; every draw from the table
+  with :func:`alias_sample` then costs ``O(1)`` regardless of ``n``, compared
+  to ``O(n)`` per draw for :func:`categorical` and ``O(log n)`` for
+  :func:`choice` with probabilities.
+
+  The probabilities are quantized to integer multiples of ``1 / (n * scale)``,
+  with ``scale = (iinfo(int_).max // 2) // n``, which is about ``1 / 2**30``
+  without 64-bit mode. The table is built with prefix sums and binary
+  searches (a parallel form of Vose's method), so building it is jittable and
+  vmappable, and exact: sampling from the table follows the quantized
+  distribution exactly.
+
+  Args:
+    p: 1-D array of nonnegative, possibly unnormalized probabilities.
+    logits: 1-D array of unnormalized log probabilities, so that
+      ``softmax(logits)`` gives the probabilities. Exactly one of ``p`` and
+      ``logits`` must be given.
+
+  Returns:
+    An :class:`AliasTable` for the distribution.
+  """
+  if (p is None) == (logits is None):
+    raise ValueError("alias_table requires exactly one of p and logits.")
+  name = "p" if logits is None else "logits"
+  x = p if logits is None else logits
+  _check_arraylike("alias_table", x)
+  if np.ndim(x) != 1:
+    raise ValueError(f"alias_table requires a 1-dimensional {name}, got shape "
+                     f"{np.shape(x)}.")
+  if np.shape(x)[0] == 0:
+    raise ValueError(f"alias_table requires a non-empty {name}.")
+  dtype = dtypes.canonicalize_dtype(lax.dtype(x))
+  if not jnp.issubdtype(dtype, np.floating):
+    dtype = dtypes.canonicalize_dtype(dtypes.float_)
+  x = lax.convert_element_type(x, dtype)
+  if logits is not None:
+    x = lax.exp(x - jnp.max(x))
+  return _alias_table(x)
+
+@jit
+def _alias_table(p) -> AliasTable:
+  n, = p.shape
+  int_dtype = dtypes.canonicalize_dtype(jnp.int_)
+  scale = _alias_scale(n, int_dtype)
+  total = n * scale
+
+  # Quantize the weights so that they sum to exactly `total`, by rounding
+  # the ones with the largest fractional parts up (or, if rounding errors in
+  # the normalization overshoot, the ones with the smallest down).
+  w = p / jnp.sum(p) * total
+  w_floor = jnp.floor(w)
+  frac = w - w_floor
+  w = w_floor.astype(int_dtype)
+  residual = total - jnp.sum(w)
+  rank = lambda x: jnp.argsort(jnp.argsort(x))
+  w = (w + (rank(-frac) < residual).astype(int_dtype)
+       - (rank(jnp.where(w > 0, frac, jnp.inf)) < -residual).astype(int_dtype))
+
+  # Buckets hold `scale` units each. Light outcomes (w <= scale) keep their
+  # own weight and need `scale - w` more; heavy ones have `w - scale` to give.
+  # Laying the deficits and the excesses out on a line in index order, Vose's
+  # sweep fills each light bucket from the heavy outcome whose excess covers
+  # the start of its deficit. A heavy outcome whose excess runs out part way
+  # through a deficit covers the rest of it from its own bucket, which is then
+  # topped up by the next heavy outcome.
+  light = w <= scale
+  deficit = jnp.where(light, scale - w, 0)
+  excess = jnp.where(light, 0, w - scale)
+  deficit_end = jnp.cumsum(deficit)
+  excess_end = jnp.cumsum(excess)
+  light_alias = jnp.searchsorted(excess_end, deficit_end - deficit, side='right')
+  overdraft = deficit_end[jnp.minimum(
+      jnp.searchsorted(deficit_end, excess_end, side='left'), n - 1)] - excess_end
+  heavy_alias = jnp.searchsorted(excess_end, excess_end, side='right')
+  prob = jnp.where(light, w, jnp.clip(scale - overdraft, 0, scale))
+  alias = jnp.minimum(jnp.where(light, light_alias, heavy_alias), n - 1)
+  return AliasTable(prob, alias.astype(np.int32))
+
+
+def alias_sample(key: KeyArray,
+                 table: AliasTable,
+                 shape: Sequence[int] = ()) -> jnp.ndarray:
+  """Samples from the categorical distribution of an alias table.
+
+  Each draw takes one random integer and two gathers from the table, so that
+  sampling ``m`` values costs ``O(m)`` independently of the number of
+  outcomes.
+
+  Args:
+    key: a PRNG key used as the random key.
+    table: an :class:`AliasTable` from :func:`alias_table`.
+    shape: optional, a tuple of nonnegative integers representing the result
+      shape. Default ().
+
+  Returns:
+    A random array with int32 dtype and shape ``shape`` of indices into the
+    probabilities the table was built from.
+  """
+  key, _ = _check_prng_key(key)
+  if not isinstance(table, AliasTable):
+    raise TypeError("alias_sample requires an AliasTable built by "
+                    f"alias_table, got {type(table)}.")
+  shape = core.canonicalize_shape(shape)
+  return _alias_sample(key, table, shape)
+
+@partial(jit, static_argnums=(2,), inline=True)
+def _alias_sample(key, table, shape) -> jnp.ndarray:
+  prob, alias = table
+  if prob.ndim != 1 or alias.shape != prob.shape:
+    raise ValueError("alias_sample requires a table built from 1-dimensional "
+                     f"probabilities, got shapes {prob.shape} and {alias.shape}.")
+  n, = prob.shape
+  scale = _alias_scale(n, prob.dtype)
+  # A single uniform integer chooses both the bucket and the outcome within it.
+  r = randint(key, shape, 0, n * scale, prob.dtype)
+  bucket = lax.div(r, prob.dtype.type(scale))
+  keep = lax.rem(r, prob.dtype.type(scale)) < prob[bucket]
+  return jnp.where(keep, bucket.astype(np.int32), alias[bucket])
+
+
 def laplace(key: KeyArray,
             shape: Sequence[int] = (),
             dtype: DTypeLikeFloat = dtypes.float_) -> jnp.ndarray:
@@ -14,21 +14,21 @@
 
 
 import functools
-import itertools
 import operator
 import textwrap
 
+import numpy as np
 import scipy.ndimage
 
 from jax._src import api
 from jax import lax
 from jax._src.numpy import lax_numpy as jnp
+from jax._src.numpy.lax_numpy import _promote_dtypes_inexact
 from jax._src.numpy.util import _wraps
-from jax._src.util import safe_zip as zip
+from jax._src.util import canonicalize_axis, safe_zip as zip
 
 
 _nonempty_prod = functools.partial(functools.reduce, operator.mul)
-_nonempty_sum = functools.partial(functools.reduce, operator.add)
 
 
 def _mirror_index_fixer(index, size):
@@ -55,8 +55,8 @@ def _round_half_away_from_zero(a):
 
 def _nearest_indices_and_weights(coordinate):
   index = _round_half_away_from_zero(coordinate).astype(jnp.int32)
-  weight = coordinate.dtype.type(1)
-  return [(index, weight)]
+  weight = jnp.ones_like(coordinate, dtype=jnp._to_inexact_dtype(coordinate.dtype))
+  return index[None], weight[None]
 
 
 def _linear_indices_and_weights(coordinate):
@@ -64,11 +64,29 @@ def _linear_indices_and_weights(coordinate):
   upper_weight = coordinate - lower
   lower_weight = 1 - upper_weight
   index = lower.astype(jnp.int32)
-  return [(index, lower_weight), (index + 1, upper_weight)]
+  return jnp.stack([index, index + 1]), jnp.stack([lower_weight, upper_weight])
 
 
-@functools.partial(api.jit, static_argnums=(2, 3, 4))
-def _map_coordinates(input, coordinates, order, mode, cval):
+def _cubic_indices_and_weights(coordinate):
+  lower = jnp.floor(coordinate)
+  t = coordinate - lower
+  t2, t3 = t * t, t * t * t
+  # Cubic B-spline weights of the four nodes around the coordinate.
+  weights = jnp.stack([(1 - t) ** 3, 4 - 6 * t2 + 3 * t3,
+                       1 + 3 * t + 3 * t2 - 3 * t3, t3]) / 6
+  offsets = jnp.arange(-1, 3, dtype=jnp.int32).reshape((4,) + (1,) * t.ndim)
+  return lower.astype(jnp.int32) + offsets, weights
+
+
+_INTERPOLATIONS = {
+    0: _nearest_indices_and_weights,
+    1: _linear_indices_and_weights,
+    3: _cubic_indices_and_weights,
+}
+
+
+@functools.partial(api.jit, static_argnums=(2, 3, 4, 5))
+def _map_coordinates(input, coordinates, order, mode, cval, prefilter):
   input = jnp.asarray(input)
   coordinates = [jnp.asarray(c) for c in coordinates]
   cval = jnp.asarray(cval, input.dtype)
@@ -88,49 +106,119 @@ def _map_coordinates(input, coordinates, order, mode, cval):
   else:
     is_valid = lambda index, size: True
 
-  if order == 0:
-    interp_fun = _nearest_indices_and_weights
-  elif order == 1:
-    interp_fun = _linear_indices_and_weights
-  else:
+  interp_fun = _INTERPOLATIONS.get(order)
+  if interp_fun is None:
     raise NotImplementedError(
-        'jax.scipy.ndimage.map_coordinates currently requires order<=1')
-
-  valid_1d_interpolations = []
-  for coordinate, size in zip(coordinates, input.shape):
-    interp_nodes = interp_fun(coordinate)
-    valid_interp = []
-    for index, weight in interp_nodes:
-      fixed_index = index_fixer(index, size)
-      valid = is_valid(index, size)
-      valid_interp.append((fixed_index, valid, weight))
-    valid_1d_interpolations.append(valid_interp)
-
-  outputs = []
-  for items in itertools.product(*valid_1d_interpolations):
-    indices, validities, weights = zip(*items)
-    if all(valid is True for valid in validities):
-      # fast path
-      contribution = input[indices]
-    else:
-      all_valid = functools.reduce(operator.and_, validities)
-      contribution = jnp.where(all_valid, input[indices], cval)
-    outputs.append(_nonempty_prod(weights) * contribution)
-  result = _nonempty_sum(outputs)
+        'jax.scipy.ndimage.map_coordinates currently requires order<=1 or '
+        'order=3')
+
+  coefficients = spline_filter(input, order) if prefilter and order > 1 else input
+
+  # Gather all (order + 1) ** ndim nodes of every coordinate at once: the nodes
+  # along dimension i are laid out along axis i of a (order + 1,) * ndim grid.
+  ndim = input.ndim
+  indices, validities, weights = [], [], []
+  for i, (coordinate, size) in enumerate(zip(coordinates, input.shape)):
+    index, weight = interp_fun(coordinate)
+    shape = (1,) * i + (index.shape[0],) + (1,) * (ndim - i - 1) + index.shape[1:]
+    indices.append(index_fixer(index, size).reshape(shape))
+    valid = is_valid(index, size)
+    validities.append(valid if valid is True else valid.reshape(shape))
+    weights.append(weight.reshape(shape))
+
+  contribution = coefficients[tuple(indices)]
+  if not all(valid is True for valid in validities):
+    all_valid = functools.reduce(operator.and_, validities)
+    contribution = jnp.where(all_valid, contribution, cval)
+  result = jnp.sum(_nonempty_prod(weights) * contribution, axis=tuple(range(ndim)))
   if jnp.issubdtype(input.dtype, jnp.integer):
     result = _round_half_away_from_zero(result)
   return result.astype(input.dtype)
 
 
 @_wraps(scipy.ndimage.map_coordinates, lax_description=textwrap.dedent("""\
-    Only nearest neighbor (``order=0``), linear interpolation (``order=1``) and
+    Only nearest neighbor (``order=0``), linear interpolation (``order=1``),
+    cubic spline interpolation (``order=3``) and
     modes ``'constant'``, ``'nearest'``, ``'wrap'`` ``'mirror'`` and ``'reflect'`` are currently supported.
     Note that interpolation near boundaries differs from the scipy function,
     because we fixed an outstanding bug (https://github.com/scipy/scipy/issues/2640);
     this function interprets the ``mode`` argument as documented by SciPy, but
     not as implemented by SciPy.
+
+    For ``order=3``, the spline coefficients are always computed with
+    ``mode='mirror'`` boundary conditions. To interpolate the same input at many
+    sets of coordinates, compute the coefficients once with :func:`spline_filter`
+    and pass them with ``prefilter=False``.
     """))
 def map_coordinates(
-    input, coordinates, order, mode='constant', cval=0.0,
+    input, coordinates, order, mode='constant', cval=0.0, prefilter=True,
 ):
-  return _map_coordinates(input, coordinates, order, mode, cval)
+  return _map_coordinates(input, coordinates, order, mode, cval, bool(prefilter))
+
+
+# Pole of the cubic B-spline interpolation filter.
+_CUBIC_SPLINE_POLE = float(np.sqrt(3) - 2)
+
+
+def _linear_recurrence(x, z, reverse=False):
+  """Computes y[k] = x[k] + z * y[k - 1] along the last axis of x.
+
+  If reverse is True, computes y[k] = x[k] + z * y[k + 1] instead.
+  """
+  def combine(a, b):
+    (za, ya), (zb, yb) = a, b
+    return za * zb, zb * ya + yb
+  _, y = lax.associative_scan(combine, (jnp.full_like(x, z), x),
+                              reverse=reverse, axis=x.ndim - 1)
+  return y
+
+
+def _cubic_spline_filter_last_axis(x):
+  n = x.shape[-1]
+  if n == 1:
+    return x
+  z = _CUBIC_SPLINE_POLE
+  # The causal filter starts from the infinite sum of the mirror-symmetric
+  # extension of x, which is periodic with period 2n - 2.
+  k = np.arange(n)
+  init = z ** k + z ** (2 * n - 2 - k)
+  init[0], init[-1] = 1, z ** (n - 1)
+  init /= 1 - z ** (2 * n - 2)
+  x = x.at[..., 0].set(jnp.dot(x, init.astype(x.dtype), precision=lax.Precision.HIGHEST))
+  causal = _linear_recurrence(x, z)
+  last = z / (z * z - 1) * (causal[..., -1] + z * causal[..., -2])
+  anticausal = _linear_recurrence((-z * causal).at[..., -1].set(last), z, reverse=True)
+  return 6 * anticausal
+
+
+@_wraps(scipy.ndimage.spline_filter1d, lax_description=textwrap.dedent("""\
+    Only ``order=3`` (as well as the trivial ``order=0`` and ``order=1``) and
+    ``mode='mirror'`` are currently supported.
+    """))
+def spline_filter1d(input, order=3, axis=-1, mode='mirror'):
+  input = jnp.asarray(input)
+  if order not in _INTERPOLATIONS:
+    raise NotImplementedError(
+        'jax.scipy.ndimage.spline_filter1d currently requires order<=1 or '
+        'order=3')
+  if mode != 'mirror':
+    raise NotImplementedError(
+        "jax.scipy.ndimage.spline_filter1d only supports mode='mirror'")
+  x, = _promote_dtypes_inexact(input)
+  if order <= 1:
+    return x
+  axis = canonicalize_axis(axis, input.ndim)
+  x = jnp.moveaxis(x, axis, -1)
+  return jnp.moveaxis(_cubic_spline_filter_last_axis(x), -1, axis)
+
+
+@_wraps(scipy.ndimage.spline_filter, lax_description=textwrap.dedent("""\
+    Only ``order=3`` (as well as the trivial ``order=0`` and ``order=1``) and
+    ``mode='mirror'`` are currently supported.
+    """))
+def spline_filter(input, order=3, mode='mirror'):
+  input = jnp.asarray(input)
+  x, = _promote_dtypes_inexact(input)
+  for axis in range(input.ndim):
+    x = spline_filter1d(x, order, axis=axis, mode=mode)
+  return x
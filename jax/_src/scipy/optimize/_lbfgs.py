@@ -183,9 +183,9 @@ def _minimize_lbfgs(
       x_k=x_kp1,
       f_k=f_kp1,
       g_k=g_kp1,
-      s_history=_update_history_vectors(history=state.s_history, new=s_k),
-      y_history=_update_history_vectors(history=state.y_history, new=y_k),
-      rho_history=_update_history_scalars(history=state.rho_history, new=rho_k),
+      s_history=state.s_history.at[state.k % maxcor].set(s_k),
+      y_history=state.y_history.at[state.k % maxcor].set(y_k),
+      rho_history=state.rho_history.at[state.k % maxcor].set(rho_k),
       gamma=gamma,
       status=jnp.where(converged, 0, status),
       ls_status=ls_results.status,
@@ -197,37 +197,34 @@ def _minimize_lbfgs(
 
 
 def _two_loop_recursion(state: LBFGSResults):
-  his_size = len(state.rho_history)
-  curr_size = jnp.where(state.k < his_size, state.k, his_size)
-  q = -jnp.conj(state.g_k)
-  a_his = jnp.zeros_like(state.rho_history)
+  return _two_loop(state.g_k, state.s_history, state.y_history,
+                   state.rho_history, state.gamma, state.k)
+
+
+def _two_loop(g, s_history, y_history, rho_history, gamma, num_updates):
+  # The histories are ring buffers: update `i` is stored in slot
+  # `i % his_size`, so the newest is in slot `(num_updates - 1) % his_size`.
+  his_size = len(rho_history)
+  curr_size = jnp.minimum(num_updates, his_size)
+  q = -jnp.conj(g)
+  a_his = jnp.zeros_like(rho_history)
 
   def body_fun1(j, carry):
-    i = his_size - 1 - j
+    i = (num_updates - 1 - j) % his_size
     _q, _a_his = carry
-    a_i = state.rho_history[i] * jnp.real(_dot(jnp.conj(state.s_history[i]), _q))
+    a_i = rho_history[i] * jnp.real(_dot(jnp.conj(s_history[i]), _q))
     _a_his = _a_his.at[i].set(a_i)
-    _q = _q - a_i * jnp.conj(state.y_history[i])
+    _q = _q - a_i * jnp.conj(y_history[i])
     return _q, _a_his
 
   q, a_his = lax.fori_loop(0, curr_size, body_fun1, (q, a_his))
-  q = state.gamma * q
+  q = gamma * q
 
   def body_fun2(j, _q):
-    i = his_size - curr_size + j
-    b_i = state.rho_history[i] * jnp.real(_dot(state.y_history[i], _q))
-    _q = _q + (a_his[i] - b_i) * state.s_history[i]
+    i = (num_updates - curr_size + j) % his_size
+    b_i = rho_history[i] * jnp.real(_dot(y_history[i], _q))
+    _q = _q + (a_his[i] - b_i) * s_history[i]
     return _q
 
   q = lax.fori_loop(0, curr_size, body_fun2, q)
   return q
-
-
-def _update_history_vectors(history, new):
-  # TODO(Jakob-Unfried) use rolling buffer instead? See #6053
-  return jnp.roll(history, -1, axis=0).at[-1, :].set(new)
-
-
-def _update_history_scalars(history, new):
-  # TODO(Jakob-Unfried) use rolling buffer instead? See #6053
-  return jnp.roll(history, -1, axis=0).at[-1].set(new)
@@ -0,0 +1,254 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""BFGS and L-BFGS minimization of a batch of independent problems."""
+from functools import partial
+from typing import Any, Callable, NamedTuple, Optional, Tuple, Union
+
+import jax
+import jax.numpy as jnp
+from jax import lax
+from jax.tree_util import tree_map
+from ._lbfgs import _two_loop
+
+_dot = partial(jnp.dot, precision=lax.Precision.HIGHEST)
+_einsum = partial(jnp.einsum, precision=lax.Precision.HIGHEST)
+
+
+Array = Any
+
+
+class _BatchedResults(NamedTuple):
+  """Results from batched BFGS or L-BFGS optimization.
+
+  Every field has a leading batch axis.
+
+  Parameters:
+    done: True if the problem has stopped iterating.
+    converged: True if minimization converged.
+    failed: True if the line search failed.
+    k: integer the number of iterations of the quasi-Newton update.
+    nfev: integer total number of objective and gradient evaluations.
+    x_k: array containing the last argument value found during the search.
+    f_k: array containing the value of the objective function at `x_k`.
+    g_k: array containing the gradient of the objective function at `x_k`.
+    p_k: array containing the current search direction.
+    dphi_0: the directional derivative of the objective along `p_k`.
+    a: the step length of the next line search trial.
+    a_lo, a_hi: the bracket of step lengths of the current line search.
+    ls_iter: integer the number of trials of the current line search.
+    hess: the inverse Hessian estimate: a matrix for BFGS, or the ring-buffered
+      L-BFGS histories.
+    status: int describing end state.
+  """
+  done: Union[bool, Array]
+  converged: Union[bool, Array]
+  failed: Union[bool, Array]
+  k: Union[int, Array]
+  nfev: Union[int, Array]
+  x_k: Array
+  f_k: Array
+  g_k: Array
+  p_k: Array
+  dphi_0: Array
+  a: Array
+  a_lo: Array
+  a_hi: Array
+  ls_iter: Union[int, Array]
+  hess: Any
+  status: Union[int, Array]
+
+
+class _QuasiNewton(NamedTuple):
+  init: Callable
+  direction: Callable
+  update: Callable
+
+
+def _bfgs(d, dtype):
+  def update(H, s, y):
+    rho = jnp.reciprocal(_dot(y, s))
+    w = jnp.eye(d, dtype=dtype) - rho * s[:, jnp.newaxis] * y[jnp.newaxis, :]
+    H_new = (_einsum('ij,jk,lk', w, H, w)
+             + rho * s[:, jnp.newaxis] * s[jnp.newaxis, :])
+    return jnp.where(jnp.isfinite(rho) & (rho > 0), H_new, H)
+
+  return _QuasiNewton(init=lambda: jnp.eye(d, dtype=dtype),
+                      direction=lambda H, g: -_dot(H, g),
+                      update=update)
+
+
+def _lbfgs(d, dtype, maxcor):
+  def init():
+    return (jnp.zeros((maxcor, d), dtype), jnp.zeros((maxcor, d), dtype),
+            jnp.zeros((maxcor,), dtype), jnp.ones((), dtype),
+            jnp.zeros((), jnp.int32))
+
+  def direction(hess, g):
+    return _two_loop(g, *hess)
+
+  def update(hess, s, y):
+    s_history, y_history, rho_history, gamma, num_updates = hess
+    ys = _dot(y, s)
+    # Each update overwrites the oldest slot of the ring buffer in place.
+    i = num_updates % maxcor
+    new = (s_history.at[i].set(s), y_history.at[i].set(y),
+           rho_history.at[i].set(jnp.reciprocal(ys)), ys / _dot(y, y),
+           num_updates + 1)
+    return tree_map(partial(jnp.where, ys > 0), new, hess)
+
+  return _QuasiNewton(init=init, direction=direction, update=update)
+
+
+def minimize_batched_quasi_newton(
+    fun: Callable,
+    x0: Array,
+    args: Tuple = (),
+    method: str = 'bfgs',
+    maxiter: Optional[int] = None,
+    norm=jnp.inf,
+    gtol: float = 1e-5,
+    maxcor: int = 10,
+    maxls: int = 20,
+    c1: float = 1e-4,
+    c2: float = 0.9,
+) -> _BatchedResults:
+  """Minimize a batch of independent functions using BFGS or L-BFGS.
+
+  Every iteration of the loop makes a single evaluation of the objective and
+  its gradient for every problem, at the current line search trial of that
+  problem, so problems advance through their line searches and quasi-Newton
+  updates independently. The line search is the bracketing bisection of Lewis
+  and Overton for the weak Wolfe conditions, which guarantee the curvature
+  condition required by the updates. Problems that have converged or failed
+  are frozen, and the loop exits once every problem has stopped.
+
+  Args:
+    fun: function of the form f(x, *args) where x is a flat ndarray and returns
+      a real scalar, for a single problem. The function should be composed of
+      operations with vjp defined.
+    x0: initial guesses, with shape ``(batch, n)``.
+    args: tuple of extra arguments for `fun`, each with a leading batch axis.
+    method: ``'bfgs'``, which keeps a dense inverse Hessian per problem, or
+      ``'l-bfgs'``, which keeps the last `maxcor` updates in a ring buffer.
+    maxiter: maximum number of iterations.
+    norm: order of norm for convergence check. Default inf.
+    gtol: terminates minimization when |grad|_norm < g_tol.
+    maxcor: maximum number of metric corrections for L-BFGS.
+    maxls: maximum number of trials per line search.
+    c1, c2: Wolfe criteria constants.
+
+  Returns:
+    Optimization results, with a leading batch axis.
+  """
+  _, d = x0.shape
+  dtype = x0.dtype
+  if maxiter is None:
+    maxiter = d * 200
+  if method == 'bfgs':
+    quasi_newton = _bfgs(d, dtype)
+  elif method == 'l-bfgs':
+    quasi_newton = _lbfgs(d, dtype, maxcor)
+  else:
+    raise ValueError(f"Method {method} not recognized")
+  value_and_grad = jax.value_and_grad(fun)
+
+  def init_lane(x0, args):
+    f_0, g_0 = value_and_grad(x0, *args)
+    hess = quasi_newton.init()
+    p_0 = quasi_newton.direction(hess, g_0)
+    converged = jnp.linalg.norm(g_0, ord=norm) < gtol
+    return _BatchedResults(
+        done=converged | (maxiter <= 0),
+        converged=converged,
+        failed=jnp.array(False),
+        k=jnp.array(0),
+        nfev=jnp.array(1),
+        x_k=x0,
+        f_k=f_0,
+        g_k=g_0,
+        p_k=p_0,
+        dphi_0=_dot(g_0, p_0),
+        # The first trial step is at most of unit length, as the initial
+        # inverse Hessian has no information about the scale of the problem.
+        a=jnp.minimum(1., 1. / jnp.linalg.norm(g_0)).astype(dtype),
+        a_lo=jnp.zeros((), dtype),
+        a_hi=jnp.full((), jnp.inf, dtype),
+        ls_iter=jnp.array(0),
+        hess=hess,
+        status=jnp.array(0),
+    )
+
+  def step_lane(state, args):
+    x_t = state.x_k + state.a * state.p_k
+    f_t, g_t = value_and_grad(x_t, *args)
+    dphi_t = _dot(g_t, state.p_k)
+    armijo = f_t <= state.f_k + c1 * state.a * state.dphi_0
+    curvature = dphi_t >= c2 * state.dphi_0
+
+    # Rejected trial: shrink the bracket, then bisect it, or extrapolate while
+    # the bracket is unbounded above.
+    a_lo = jnp.where(armijo, state.a, state.a_lo)
+    a_hi = jnp.where(armijo, state.a_hi, state.a)
+    ls_iter = state.ls_iter + 1
+    rejected = state._replace(
+        failed=ls_iter >= maxls,
+        a=jnp.where(jnp.isinf(a_hi), 2 * state.a, (a_lo + a_hi) / 2),
+        a_lo=a_lo,
+        a_hi=a_hi,
+        ls_iter=ls_iter,
+    )
+
+    # Accepted trial: update the inverse Hessian and start a new line search.
+    hess = quasi_newton.update(state.hess, x_t - state.x_k, g_t - state.g_k)
+    p_t = quasi_newton.direction(hess, g_t)
+    descent = _dot(g_t, p_t) < 0
+    p_t = jnp.where(descent, p_t, -g_t)
+    accepted = state._replace(
+        converged=jnp.linalg.norm(g_t, ord=norm) < gtol,
+        k=state.k + 1,
+        x_k=x_t,
+        f_k=f_t,
+        g_k=g_t,
+        p_k=p_t,
+        dphi_0=_dot(g_t, p_t),
+        a=jnp.ones_like(state.a),
+        a_lo=jnp.zeros_like(state.a_lo),
+        a_hi=jnp.full_like(state.a_hi, jnp.inf),
+        ls_iter=jnp.zeros_like(state.ls_iter),
+        hess=hess,
+    )
+
+    new = tree_map(partial(jnp.where, armijo & curvature), accepted, rejected)
+    new = new._replace(nfev=state.nfev + 1,
+                       done=new.converged | new.failed | (new.k >= maxiter))
+    return tree_map(partial(jnp.where, state.done), state, new)
+
+  state = jax.vmap(init_lane)(x0, args)
+  state = lax.while_loop(lambda state: ~jnp.all(state.done),
+                         lambda state: jax.vmap(step_lane)(state, args),
+                         state)
+  status = jnp.where(
+      state.converged,
+      0,  # converged
+      jnp.where(
+          state.k >= maxiter,
+          1,  # max iters reached
+          jnp.where(
+              state.failed,
+              5,  # max line search iters reached
+              -1,  # undefined
+          )
+      )
+  )
+  return state._replace(status=status)
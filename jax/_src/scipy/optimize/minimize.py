@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from typing import Any, Callable, Mapping, Optional, Tuple, Union
+from .batched import minimize_batched_quasi_newton
 from .bfgs import minimize_bfgs
+from .newton_cg import minimize_newton_cg, minimize_trust_ncg
 from ._lbfgs import _minimize_lbfgs
 from typing import NamedTuple
 import jax.numpy as jnp
@@ -25,7 +27,8 @@ class OptimizeResults(NamedTuple):
     x: final solution.
     success: ``True`` if optimization succeeded.
     status: integer solver specific return code. 0 means converged (nominal),
-      1=max BFGS iters reached, 3=zoom failed, 4=saddle point reached,
+      1=max BFGS iters reached, 2=trust region model failed to predict a
+      decrease, 3=zoom failed, 4=saddle point reached,
       5=max line search iters reached, -1=undefined
     fun: final function value.
     jac: final jacobian array.
@@ -33,6 +36,7 @@ class OptimizeResults(NamedTuple):
     nfev: integer number of funcation calls used.
     njev: integer number of gradient evaluations.
     nit: integer number of iterations of the optimization algorithm.
+    nhev: integer number of Hessian-vector product evaluations.
   """
   x: jnp.ndarray
   success: Union[bool, jnp.ndarray]
@@ -43,6 +47,7 @@ class OptimizeResults(NamedTuple):
   nfev: Union[int, jnp.ndarray]
   njev: Union[int, jnp.ndarray]
   nit: Union[int, jnp.ndarray]
+  nhev: Union[int, jnp.ndarray] = 0
 
 
 def minimize(
@@ -78,7 +83,9 @@ def minimize(
     x0: initial guess. Array of real elements of size ``(n,)``, where ``n`` is
       the number of independent variables.
     args: extra arguments passed to the objective function.
-    method: solver type. Currently only ``"BFGS"`` is supported.
+    method: solver type. Either ``"BFGS"``, or one of the matrix-free
+      second-order methods ``"Newton-CG"`` and ``"trust-ncg"``, which apply
+      the Hessian of ``fun`` as Hessian-vector products.
     tol: tolerance for termination. For detailed control, use solver-specific
       options.
     options: a dictionary of solver options. All methods accept the following
@@ -87,6 +94,11 @@ def minimize(
       - maxiter (int): Maximum number of iterations to perform. Depending on the
         method each iteration may use several function evaluations.
 
+      ``"Newton-CG"`` and ``"trust-ncg"`` also accept ``cg_maxiter`` (int), the
+      maximum number of conjugate gradient iterations per Newton system, and
+      ``"trust-ncg"`` accepts ``initial_trust_radius``, ``max_trust_radius``
+      and ``eta``, as in SciPy.
+
   Returns:
     An :class:`OptimizeResults` object.
   """
@@ -112,6 +124,23 @@ def minimize(
                            njev=results.ngev,
                            nit=results.k)
 
+  if method.lower() in ('newton-cg', 'trust-ncg'):
+    if method.lower() == 'newton-cg':
+      results = minimize_newton_cg(fun_with_args, x0, **options)
+    else:
+      results = minimize_trust_ncg(fun_with_args, x0, **options)
+    success = results.converged & jnp.logical_not(results.failed)
+    return OptimizeResults(x=results.x_k,
+                           success=success,
+                           status=results.status,
+                           fun=results.f_k,
+                           jac=results.g_k,
+                           hess_inv=None,
+                           nfev=results.nfev,
+                           njev=results.ngev,
+                           nit=results.k,
+                           nhev=results.nhev)
+
   if method.lower() == 'l-bfgs-experimental-do-not-rely-on-this':
     results = _minimize_lbfgs(fun_with_args, x0, **options)
     success = results.converged & (~results.failed)
@@ -126,3 +155,78 @@ def minimize(
                            nit=results.k)
 
   raise ValueError("Method {} not recognized".format(method))
+
+
+def minimize_batched(
+    fun: Callable,
+    x0: jnp.ndarray,
+    args: Tuple = (),
+    *,
+    method: str,
+    tol: Optional[float] = None,
+    options: Optional[Mapping[str, Any]] = None,
+) -> OptimizeResults:
+  """Minimization of a batch of independent scalar functions.
+
+  Equivalent to ``jax.vmap`` of :func:`minimize` over the leading axis of
+  ``x0`` and ``args``, but each problem advances through its line searches
+  independently: every iteration evaluates the objective once per problem,
+  and problems that have converged or failed stop updating. Under ``vmap``,
+  every problem instead waits for the slowest line search of each iteration.
+
+  Args:
+    fun: the objective function to be minimized, ``fun(x, *args) -> float``,
+      for a single problem, where ``x`` is a 1-D array with shape ``(n,)``.
+      ``fun`` must support differentiation.
+    x0: initial guesses. Array of real elements of size ``(batch, n)``.
+    args: extra arguments passed to the objective function, each with a
+      leading batch axis of size ``batch``.
+    method: solver type. Either ``"BFGS"``, which keeps a dense ``(n, n)``
+      inverse Hessian estimate per problem, or ``"L-BFGS"``, which keeps the
+      last ``maxcor`` updates per problem in a ring buffer.
+    tol: tolerance for termination, used as the default ``gtol``.
+    options: a dictionary of solver options:
+
+      - maxiter (int): Maximum number of iterations to perform.
+      - gtol (float): Terminates when the gradient norm is below ``gtol``.
+      - norm: Order of the norm used for the convergence check.
+      - maxls (int): Maximum number of line search trials per iteration.
+      - maxcor (int): Number of stored updates for ``"L-BFGS"``.
+
+  Returns:
+    An :class:`OptimizeResults` object, in which every field has a leading
+    batch axis. ``nfev`` and ``njev`` count evaluations of the objective and
+    its gradient, which are always made together.
+  """
+  if options is None:
+    options = {}
+
+  if not isinstance(args, tuple):
+    msg = ("args argument to jax.scipy.optimize.minimize_batched must be a "
+           "tuple, got {}")
+    raise TypeError(msg.format(args))
+
+  if jnp.ndim(x0) != 2:
+    msg = ("x0 argument to jax.scipy.optimize.minimize_batched must have shape "
+           "(batch, n), got shape {}")
+    raise ValueError(msg.format(jnp.shape(x0)))
+
+  if method.lower() not in ('bfgs', 'l-bfgs'):
+    raise ValueError("Method {} not recognized".format(method))
+
+  if tol is not None:
+    options = dict(options)
+    options.setdefault('gtol', tol)
+
+  results = minimize_batched_quasi_newton(fun, x0, args, method=method.lower(),
+                                          **options)
+  return OptimizeResults(x=results.x_k,
+                         success=results.converged,
+                         status=results.status,
+                         fun=results.f_k,
+                         jac=results.g_k,
+                         hess_inv=(results.hess if method.lower() == 'bfgs'
+                                   else None),
+                         nfev=results.nfev,
+                         njev=results.nfev,
+                         nit=results.k)
@@ -0,0 +1,335 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Newton conjugate gradient minimization with Hessian-vector products."""
+from functools import partial
+from typing import Callable, NamedTuple, Optional, Union
+
+import jax
+import jax.numpy as jnp
+from jax import lax
+from jax._src.scipy.sparse.linalg import _cg_solve
+from .line_search import line_search
+
+
+class _NewtonCGResults(NamedTuple):
+  """Results from Newton-CG or trust-region Newton-CG optimization.
+
+  Parameters:
+    converged: True if minimization converged.
+    failed: True if the line search failed, or the trust region model failed
+      to predict a decrease of the objective.
+    k: integer the number of iterations.
+    nfev: integer total number of objective evaluations performed.
+    ngev: integer total number of jacobian evaluations.
+    nhev: integer total number of Hessian-vector product evaluations.
+    x_k: array containing the last argument value found during the search. If
+      the search converged, then this value is the argmin of the objective
+      function.
+    f_k: array containing the value of the objective function at `x_k`. If the
+      search converged, then this is the (local) minimum of the objective
+      function.
+    g_k: array containing the gradient of the objective function at `x_k`. If
+      the search converged the l2-norm of this tensor should be below the
+      tolerance.
+    trust_radius: the radius of the trust region, or ``inf`` for Newton-CG.
+    status: int describing end state.
+    line_search_status: int describing line search end state (only means
+      something if line search fails).
+  """
+  converged: Union[bool, jnp.ndarray]
+  failed: Union[bool, jnp.ndarray]
+  k: Union[int, jnp.ndarray]
+  nfev: Union[int, jnp.ndarray]
+  ngev: Union[int, jnp.ndarray]
+  nhev: Union[int, jnp.ndarray]
+  x_k: jnp.ndarray
+  f_k: jnp.ndarray
+  g_k: jnp.ndarray
+  trust_radius: Union[float, jnp.ndarray]
+  status: Union[int, jnp.ndarray]
+  line_search_status: Union[int, jnp.ndarray]
+
+
+_dot = partial(jnp.dot, precision=lax.Precision.HIGHEST)
+
+
+def _hvp(fun, x):
+  # Forward-over-reverse Hessian-vector product at `x`.
+  grad = jax.grad(fun)
+  return lambda v: jax.jvp(grad, (x,), (v,))[1]
+
+
+def _forcing_tol(g):
+  # Superlinear forcing sequence for the inner solve, as in Nocedal and
+  # Wright, 'Numerical Optimization', 1999, pg. 168.
+  return jnp.minimum(0.5, jnp.sqrt(jnp.linalg.norm(g)))
+
+
+def _init_results(fun, x0, norm, gtol, trust_radius):
+  f_0, g_0 = jax.value_and_grad(fun)(x0)
+  return _NewtonCGResults(
+      converged=jnp.linalg.norm(g_0, ord=norm) < gtol,
+      failed=False,
+      k=0,
+      nfev=1,
+      ngev=1,
+      nhev=0,
+      x_k=x0,
+      f_k=f_0,
+      g_k=g_0,
+      trust_radius=jnp.asarray(trust_radius, dtype=f_0.dtype),
+      status=0,
+      line_search_status=0,
+  )
+
+
+def _final_status(state, maxiter, failed_status):
+  return state._replace(status=jnp.where(
+      state.converged,
+      0,  # converged
+      jnp.where(
+          state.k == maxiter,
+          1,  # max iters reached
+          jnp.where(
+              state.failed,
+              failed_status,
+              -1,  # undefined
+          )
+      )
+  ))
+
+
+def minimize_newton_cg(
+    fun: Callable,
+    x0: jnp.ndarray,
+    maxiter: Optional[int] = None,
+    norm=jnp.inf,
+    gtol: float = 1e-5,
+    cg_maxiter: Optional[int] = None,
+    line_search_maxiter: int = 10,
+) -> _NewtonCGResults:
+  """Minimize a function using the line search Newton-CG method.
+
+  Implements Algorithm 7.1 from Wright and Nocedal, 'Numerical Optimization',
+  1999, pg. 169. Each Newton system is solved inexactly with the conjugate
+  gradient method of ``jax.scipy.sparse.linalg.cg``, applying the Hessian as
+  Hessian-vector products, so the Hessian is never formed. The solve stops at
+  the first direction of non-positive curvature, keeping the iterate found so
+  far, or the steepest descent direction if there is none.
+
+  Args:
+    fun: function of the form f(x) where x is a flat ndarray and returns a real
+      scalar. The function should be twice differentiable.
+    x0: initial guess.
+    maxiter: maximum number of iterations.
+    norm: order of norm for convergence check. Default inf.
+    gtol: terminates minimization when |grad|_norm < g_tol.
+    cg_maxiter: maximum number of conjugate gradient iterations per Newton
+      system.
+    line_search_maxiter: maximum number of linesearch iterations.
+
+  Returns:
+    Optimization result.
+  """
+  d = x0.shape[0]
+  if maxiter is None:
+    maxiter = d * 200
+  if cg_maxiter is None:
+    cg_maxiter = d * 20
+
+  state = _init_results(fun, x0, norm, gtol, jnp.inf)
+
+  def cond_fun(state):
+    return (jnp.logical_not(state.converged)
+            & jnp.logical_not(state.failed)
+            & (state.k < maxiter))
+
+  def body_fun(state):
+    p_k, cg_iters = _cg_solve(
+        _hvp(fun, state.x_k), -state.g_k, jnp.zeros_like(state.g_k),
+        maxiter=cg_maxiter, tol=_forcing_tol(state.g_k), return_num_iters=True,
+        stop_on_negative_curvature=True)
+    # The solve stops before any step when the Hessian has non-positive
+    # curvature along the gradient, leaving p_k = 0.
+    p_k = jnp.where(_dot(p_k, state.g_k) < 0, p_k, -state.g_k)
+    line_search_results = line_search(
+        fun,
+        state.x_k,
+        p_k,
+        old_fval=state.f_k,
+        gfk=state.g_k,
+        maxiter=line_search_maxiter,
+    )
+    return state._replace(
+        converged=jnp.linalg.norm(line_search_results.g_k, ord=norm) < gtol,
+        failed=line_search_results.failed,
+        k=state.k + 1,
+        nfev=state.nfev + line_search_results.nfev,
+        ngev=state.ngev + line_search_results.ngev,
+        # The residual of the initial guess costs one more product.
+        nhev=state.nhev + cg_iters + 1,
+        x_k=state.x_k + line_search_results.a_k * p_k,
+        f_k=line_search_results.f_k,
+        g_k=line_search_results.g_k,
+        line_search_status=line_search_results.status,
+    )
+
+  state = lax.while_loop(cond_fun, body_fun, state)
+  return _final_status(state, maxiter, 2 + state.line_search_status)
+
+
+def _steihaug(hvp, g, trust_radius, tol, maxiter):
+  """Approximately minimizes the quadratic model within the trust region.
+
+  Implements the CG-Steihaug method, Algorithm 7.2 from Wright and Nocedal,
+  'Numerical Optimization', 1999, pg. 171, which minimizes
+  ``g.p + p.H.p / 2`` subject to ``|p| <= trust_radius`` with conjugate
+  gradient iterations, stopping where an iterate leaves the trust region or
+  a direction of negative curvature is found.
+
+  Returns:
+    The step ``p``, the product ``H.p``, whether ``p`` lies on the boundary of
+    the trust region, and the number of Hessian-vector products.
+  """
+  def model(p, Bp):
+    return _dot(g, p) + 0.5 * _dot(p, Bp)
+
+  def boundary_steps(z, d):
+    # The two step lengths ta <= tb with |z + t d| = trust_radius.
+    a = _dot(d, d)
+    b = 2 * _dot(z, d)
+    c = _dot(z, z) - trust_radius ** 2
+    sqrt_discriminant = jnp.sqrt(jnp.maximum(b * b - 4 * a * c, 0.))
+    return (-b - sqrt_discriminant) / (2 * a), (-b + sqrt_discriminant) / (2 * a)
+
+  def cond_fun(state):
+    j, done, *_ = state
+    return jnp.logical_not(done) & (j < maxiter)
+
+  def body_fun(state):
+    # We use boolean arithmetic rather than jax.cond to select the exit.
+    j, _, _, z, Bz, r, d = state
+    Bd = hvp(d)
+    dBd = _dot(d, Bd)
+    negative_curvature = dBd <= 0
+    alpha = _dot(r, r) / dBd
+    z_next = z + alpha * d
+    leaves_region = jnp.logical_not(negative_curvature) & (
+        jnp.linalg.norm(z_next) >= trust_radius)
+
+    # With negative curvature, move to whichever boundary point has the lower
+    # model value; otherwise to the boundary point along the direction of d.
+    ta, tb = boundary_steps(z, d)
+    ta_better = model(z + ta * d, Bz + ta * Bd) < model(z + tb * d, Bz + tb * Bd)
+    tau = jnp.where(negative_curvature & ta_better, ta, tb)
+    on_boundary = negative_curvature | leaves_region
+
+    r_next = r + alpha * Bd
+    beta = _dot(r_next, r_next) / _dot(r, r)
+    return (j + 1,
+            on_boundary | (jnp.linalg.norm(r_next) < tol),
+            on_boundary,
+            jnp.where(on_boundary, z + tau * d, z_next),
+            jnp.where(on_boundary, Bz + tau * Bd, Bz + alpha * Bd),
+            r_next,
+            -r_next + beta * d)
+
+  z = jnp.zeros_like(g)
+  state = (0, jnp.linalg.norm(g) < tol, False, z, z, g, -g)
+  num_hvps, _, on_boundary, p, Bp, *_ = lax.while_loop(cond_fun, body_fun,
+                                                       state)
+  return p, Bp, on_boundary, num_hvps
+
+
+def minimize_trust_ncg(
+    fun: Callable,
+    x0: jnp.ndarray,
+    maxiter: Optional[int] = None,
+    norm=jnp.inf,
+    gtol: float = 1e-5,
+    cg_maxiter: Optional[int] = None,
+    initial_trust_radius: float = 1.0,
+    max_trust_radius: float = 1000.0,
+    eta: float = 0.15,
+) -> _NewtonCGResults:
+  """Minimize a function using the trust-region Newton-CG method.
+
+  Implements the trust region Algorithm 4.1 from Wright and Nocedal,
+  'Numerical Optimization', 1999, pg. 68, with the CG-Steihaug subproblem
+  solver, applying the Hessian as Hessian-vector products so the Hessian is
+  never formed.
+
+  Args:
+    fun: function of the form f(x) where x is a flat ndarray and returns a real
+      scalar. The function should be twice differentiable.
+    x0: initial guess.
+    maxiter: maximum number of iterations.
+    norm: order of norm for convergence check. Default inf.
+    gtol: terminates minimization when |grad|_norm < g_tol.
+    cg_maxiter: maximum number of conjugate gradient iterations per
+      subproblem.
+    initial_trust_radius: initial radius of the trust region.
+    max_trust_radius: maximum radius of the trust region.
+    eta: steps are accepted when the actual decrease of the objective is at
+      least ``eta`` times the decrease predicted by the quadratic model.
+
+  Returns:
+    Optimization result.
+  """
+  d = x0.shape[0]
+  if maxiter is None:
+    maxiter = d * 200
+  if cg_maxiter is None:
+    cg_maxiter = d * 20
+
+  state = _init_results(fun, x0, norm, gtol, initial_trust_radius)
+
+  def cond_fun(state):
+    return (jnp.logical_not(state.converged)
+            & jnp.logical_not(state.failed)
+            & (state.k < maxiter))
+
+  def body_fun(state):
+    p_k, Bp_k, on_boundary, num_hvps = _steihaug(
+        _hvp(fun, state.x_k), state.g_k, state.trust_radius,
+        _forcing_tol(state.g_k) * jnp.linalg.norm(state.g_k), cg_maxiter)
+    predicted_reduction = -(_dot(state.g_k, p_k) + 0.5 * _dot(p_k, Bp_k))
+    x_kp1 = state.x_k + p_k
+    f_kp1, g_kp1 = jax.value_and_grad(fun)(x_kp1)
+    rho = (state.f_k - f_kp1) / predicted_reduction
+    rho = jnp.where(jnp.isnan(rho), -jnp.inf, rho)
+
+    trust_radius = jnp.where(
+        rho < 0.25,
+        0.25 * state.trust_radius,
+        jnp.where((rho > 0.75) & on_boundary,
+                  jnp.minimum(2 * state.trust_radius, max_trust_radius),
+                  state.trust_radius))
+    accept = rho > eta
+    return state._replace(
+        converged=accept & (jnp.linalg.norm(g_kp1, ord=norm) < gtol),
+        failed=predicted_reduction <= 0,
+        k=state.k + 1,
+        nfev=state.nfev + 1,
+        ngev=state.ngev + 1,
+        nhev=state.nhev + num_hvps,
+        x_k=jnp.where(accept, x_kp1, state.x_k),
+        f_k=jnp.where(accept, f_kp1, state.f_k),
+        g_k=jnp.where(accept, g_kp1, state.g_k),
+        trust_radius=trust_radius,
+    )
+
+  state = lax.while_loop(cond_fun, body_fun, state)
+  # 2 = the model failed to predict a decrease of the objective.
+  return _final_status(state, maxiter, 2)
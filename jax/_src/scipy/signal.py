@@ -12,28 +12,37 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import math
+
+import scipy
 import scipy.signal as osp_signal
-import warnings
 
 import numpy as np
 
 from jax import lax
+from jax._src.numpy import fft as jnp_fft
 from jax._src.numpy import lax_numpy as jnp
 from jax._src.numpy import linalg
 from jax._src.numpy.lax_numpy import _promote_dtypes_inexact
 from jax._src.numpy.util import _wraps
+from jax._src.util import prod
+
+scipy_version = tuple(map(int, scipy.version.version.split('.')[:2]))
 
 
 # Note: we do not re-use the code from jax.numpy.convolve here, because the handling
 # of padding differs slightly between the two implementations (particularly for
 # mode='same').
-def _convolve_nd(in1, in2, mode, *, precision):
+def _convolve_nd(in1, in2, mode, *, precision, method='direct'):
   if mode not in ["full", "same", "valid"]:
     raise ValueError("mode must be one of ['full', 'same', 'valid']")
   if in1.ndim != in2.ndim:
     raise ValueError("in1 and in2 must have the same number of dimensions")
   if in1.size == 0 or in2.size == 0:
     raise ValueError(f"zero-size arrays not supported in convolutions, got shapes {in1.shape} and {in2.shape}.")
+  # The FFT path rounds; integer inputs get exact results from the direct one.
+  exact = not (jnp.issubdtype(in1.dtype, np.inexact) or
+               jnp.issubdtype(in2.dtype, np.inexact))
   in1, in2 = _promote_dtypes_inexact(in1, in2)
 
   no_swap = all(s1 >= s2 for s1, s2 in zip(in1.shape, in2.shape))
@@ -41,6 +50,33 @@ def _convolve_nd(in1, in2, mode, *, precision):
   if not (no_swap or swap):
     raise ValueError("One input must be smaller than the other in every dimension.")
 
+  if method == 'auto':
+    # Only the direct convolution honors `precision`.
+    if precision is not None or exact:
+      method = 'direct'
+    else:
+      method = _choose_convolve_method(in1.shape, in2.shape, mode, in1.dtype)
+  if method in ['fft', 'oa']:
+    if in1.ndim > 3:
+      raise ValueError(f"method='{method}' only supports inputs with up to 3 "
+                       f"dimensions, got shapes {in1.shape} and {in2.shape}.")
+    dtype = in1.dtype
+    if not jnp.issubdtype(dtype, np.complexfloating):
+      # FFTs are only implemented in single and double precision.
+      fft_dtype = jnp.promote_types(dtype, np.float32)
+      in1, in2 = in1.astype(fft_dtype), in2.astype(fft_dtype)
+    if swap:
+      big, small = in2, in1
+    else:
+      big, small = in1, in2
+    if method == 'fft':
+      full = _fftconvolve_full(big, small)
+    else:
+      full = _oaconvolve_full(big, small)
+    return _crop_convolve_output(full, in1.shape, in2.shape, mode).astype(dtype)
+  elif method != 'direct':
+    raise ValueError("Acceptable method flags are 'auto', 'direct', or 'fft'.")
+
   shape_o = in2.shape
   if swap:
     in1, in2 = in2, in1
@@ -61,12 +97,161 @@ def _convolve_nd(in1, in2, mode, *, precision):
   return result[0, 0]
 
 
-@_wraps(osp_signal.convolve)
+# Estimated cost of a length-n FFT convolution relative to n * log2(n)
+# multiply-adds of a direct convolution; covers the three transforms and the
+# complex arithmetic.
+_FFT_CONVOLVE_COST = 8
+
+def _choose_convolve_method(shape1, shape2, mode, dtype):
+  """Chooses the cheaper of a direct and an FFT convolution."""
+  if len(shape1) > 3 or dtype not in (np.float32, np.float64, np.complex64,
+                                      np.complex128):
+    return 'direct'
+  kernel_size = min(prod(shape1), prod(shape2))
+  if mode == 'full':
+    out_shape = [s1 + s2 - 1 for s1, s2 in zip(shape1, shape2)]
+  elif mode == 'same':
+    out_shape = shape1
+  else:
+    out_shape = [abs(s1 - s2) + 1 for s1, s2 in zip(shape1, shape2)]
+  direct_cost = prod(out_shape) * kernel_size
+  n = prod(_next_fast_len(s1 + s2 - 1) for s1, s2 in zip(shape1, shape2))
+  fft_cost = _FFT_CONVOLVE_COST * n * math.log2(max(n, 2))
+  return 'fft' if fft_cost < direct_cost else 'direct'
+
+
+def _next_fast_len(n):
+  """Returns the smallest integer >= n whose only prime factors are 2, 3 and 5."""
+  best = 1 << (n - 1).bit_length() if n > 1 else 1
+  p5 = 1
+  while p5 < best:
+    p35 = p5
+    while p35 < best:
+      p = p35
+      while p < n:
+        p *= 2
+      best = min(best, p)
+      p35 *= 3
+    p5 *= 5
+  return best
+
+
+def _fft_product(x, y, s):
+  """Inverse FFT of the product of the size-s FFTs of x and y."""
+  if jnp.issubdtype(x.dtype, np.complexfloating):
+    return jnp_fft.ifftn(jnp_fft.fftn(x, s) * jnp_fft.fftn(y, s), s)
+  else:
+    return jnp_fft.irfftn(jnp_fft.rfftn(x, s) * jnp_fft.rfftn(y, s), s)
+
+
+def _fftconvolve_full(in1, in2):
+  full_shape = [s1 + s2 - 1 for s1, s2 in zip(in1.shape, in2.shape)]
+  result = _fft_product(in1, in2, [_next_fast_len(s) for s in full_shape])
+  return result[tuple(slice(s) for s in full_shape)]
+
+
+def _oaconvolve_full(in1, in2):
+  """Overlap-add convolution, for in1 larger than in2 in every dimension.
+
+  in1 is split into blocks of shape `block` that are convolved with in2 by FFTs
+  of a fast size; the overlapping tails of the block outputs are then added.
+  """
+  block, fft_shape = [], []
+  for s1, s2 in zip(in1.shape, in2.shape):
+    n = _next_fast_len(s1 + s2 - 1)
+    if s2 > 1 and n > 8 * s2:
+      # Each block costs O(n log n) but contributes only n - s2 + 1 outputs;
+      # blocks of a few times the kernel size balance the two.
+      n = _next_fast_len(4 * s2)
+      block.append(n - s2 + 1)
+    else:
+      block.append(s1)
+    fft_shape.append(n)
+
+  # Lay the blocks out as (num_blocks_0, block_0, num_blocks_1, block_1, ...).
+  num_blocks = [-(-s1 // b) for s1, b in zip(in1.shape, block)]
+  x = jnp.pad(in1, [(0, nb * b - s1) for s1, nb, b in zip(in1.shape, num_blocks, block)])
+  x = x.reshape([d for nb, b in zip(num_blocks, block) for d in (nb, b)])
+  fft_axes = tuple(range(1, 2 * in1.ndim, 2))
+  if jnp.issubdtype(x.dtype, np.complexfloating):
+    fft, ifft = jnp_fft.fftn, jnp_fft.ifftn
+  else:
+    fft, ifft = jnp_fft.rfftn, jnp_fft.irfftn
+  kernel = fft(in2, fft_shape)
+  kernel = kernel.reshape([d for k in kernel.shape for d in (1, k)])
+  y = ifft(fft(x, fft_shape, fft_axes) * kernel, fft_shape, fft_axes)
+
+  # Overlap-add one dimension at a time; dimension i is at axes (i, i + 1) once
+  # the previous dimensions have been merged.
+  for i, (s1, s2, nb, b) in enumerate(zip(in1.shape, in2.shape, num_blocks, block)):
+    head = lax.slice_in_dim(y, 0, b, axis=i + 1)
+    tail = lax.slice_in_dim(y, b, b + s2 - 1, axis=i + 1)
+    if nb > 1:
+      # The tail of each block is added to the head of the next one.
+      head_pad = [(0, 0)] * y.ndim
+      head_pad[i] = (0, 1)
+      tail_pad = [(0, 0)] * y.ndim
+      tail_pad[i], tail_pad[i + 1] = (1, 0), (0, b - s2 + 1)
+      y = jnp.pad(head, head_pad) + jnp.pad(tail, tail_pad)
+      y = y.reshape(y.shape[:i] + ((nb + 1) * b,) + y.shape[i + 2:])
+    else:
+      y = jnp.concatenate([head, tail], axis=i + 1).reshape(
+          y.shape[:i] + (b + s2 - 1,) + y.shape[i + 2:])
+    y = lax.slice_in_dim(y, 0, s1 + s2 - 1, axis=i)
+  return y
+
+
+def _crop_convolve_output(full, shape1, shape2, mode):
+  if mode == 'full':
+    return full
+  elif mode == 'same':
+    out_shape = shape1
+  else:
+    out_shape = [abs(s1 - s2) + 1 for s1, s2 in zip(shape1, shape2)]
+  start = [(s - s_o) // 2 for s, s_o in zip(full.shape, out_shape)]
+  return lax.slice(full, start, [i + s_o for i, s_o in zip(start, out_shape)])
+
+
+_CONVOLVE_METHOD_DOC = """\
+``method='fft'`` computes the convolution with FFTs padded to sizes whose only
+prime factors are 2, 3 and 5, and ignores ``precision``. ``method='auto'``
+chooses between ``'direct'`` and ``'fft'`` with a cost model of the operation
+counts for the input shapes, so its results may differ from those of
+``'direct'`` by FFT rounding errors. It always chooses ``'direct'`` when
+``precision`` is given or both inputs are integers or booleans.
+"""
+
+@_wraps(osp_signal.convolve, lax_description=_CONVOLVE_METHOD_DOC)
 def convolve(in1, in2, mode='full', method='auto',
              precision=None):
-  if method != 'auto':
-    warnings.warn("convolve() ignores method argument")
-  return _convolve_nd(in1, in2, mode, precision=precision)
+  if method not in ['auto', 'direct', 'fft']:
+    raise ValueError("Acceptable method flags are 'auto', 'direct', or 'fft'.")
+  return _convolve_nd(in1, in2, mode, precision=precision, method=method)
+
+
+@_wraps(osp_signal.fftconvolve, skip_params=['axes'])
+def fftconvolve(in1, in2, mode='full', axes=None):
+  if axes is not None:
+    raise NotImplementedError("fftconvolve() does not support the axes argument.")
+  return _convolve_nd(jnp.asarray(in1), jnp.asarray(in2), mode, precision=None,
+                      method='fft')
+
+
+def oaconvolve(in1, in2, mode='full', axes=None):
+  """Convolve two N-dimensional arrays using the overlap-add method.
+
+  The larger input is split into blocks that are each convolved with the smaller
+  input by FFTs of a few times the size of the smaller input, which is cheaper
+  than one large FFT when the inputs differ greatly in size.
+  """
+  if axes is not None:
+    raise NotImplementedError("oaconvolve() does not support the axes argument.")
+  return _convolve_nd(jnp.asarray(in1), jnp.asarray(in2), mode, precision=None,
+                      method='oa')
+
+# oaconvolve was added in scipy 1.4.0
+if scipy_version >= (1, 4):
+  oaconvolve = _wraps(osp_signal.oaconvolve, skip_params=['axes'])(oaconvolve)
 
 
 @_wraps(osp_signal.convolve2d)
@@ -79,12 +264,13 @@ def convolve2d(in1, in2, mode='full', boundary='fill', fillvalue=0,
   return _convolve_nd(in1, in2, mode, precision=precision)
 
 
-@_wraps(osp_signal.correlate)
+@_wraps(osp_signal.correlate, lax_description=_CONVOLVE_METHOD_DOC)
 def correlate(in1, in2, mode='full', method='auto',
               precision=None):
-  if method != 'auto':
-    warnings.warn("correlate() ignores method argument")
-  return _convolve_nd(in1, jnp.flip(in2.conj()), mode, precision=precision)
+  if method not in ['auto', 'direct', 'fft']:
+    raise ValueError("Acceptable method flags are 'auto', 'direct', or 'fft'.")
+  return _convolve_nd(in1, jnp.flip(in2.conj()), mode, precision=precision,
+                      method=method)
 
 
 @_wraps(osp_signal.correlate2d)
@@ -132,7 +318,8 @@ def detrend(data, axis=-1, type='linear', bp=0, overwrite_data=None):
     # bp is static, so we use np operations to avoid pushing to device.
     bp = np.sort(np.unique(np.r_[0, bp, N]))
     if bp[0] < 0 or bp[-1] > N:
-      raise ValueError("Breakpoints must be non-negative and less than length of data along given axis.")
+      raise ValueError("Breakpoints must be non-negative and less than length "
+                       "of data along given axis.")
     data = jnp.moveaxis(data, axis, 0)
     shape = data.shape
     data = data.reshape(N, -1)
@@ -15,13 +15,15 @@
 
 from functools import partial
 import operator
+from typing import NamedTuple
 
 import numpy as np
 import jax.numpy as jnp
 from jax import scipy as jsp
-from jax import lax, device_put
-from jax.tree_util import (tree_leaves, tree_map, tree_multimap, tree_structure,
-                           tree_reduce, Partial)
+from jax import lax, device_put, random, vmap
+from jax.flatten_util import ravel_pytree
+from jax.tree_util import (tree_flatten, tree_leaves, tree_map, tree_multimap,
+                           tree_structure, tree_reduce, tree_unflatten, Partial)
 from jax._src.util import safe_map as map
 
 
@@ -94,7 +96,8 @@ def _normalize_matvec(f):
         f'linear operator must be either a function or ndarray: {f}')
 
 
-def _cg_solve(A, b, x0=None, *, maxiter, tol=1e-5, atol=0.0, M=_identity):
+def _cg_solve(A, b, x0=None, *, maxiter, tol=1e-5, atol=0.0, M=_identity,
+              return_num_iters=False, stop_on_negative_curvature=False):
 
   # tolerance handling uses the "non-legacy" behavior of scipy.sparse.linalg.cg
   bs = _vdot_real_tree(b, b)
@@ -103,29 +106,39 @@ def _cg_solve(A, b, x0=None, *, maxiter, tol=1e-5, atol=0.0, M=_identity):
   # https://en.wikipedia.org/wiki/Conjugate_gradient_method#The_preconditioned_conjugate_gradient_method
 
   def cond_fun(value):
-    _, r, gamma, _, k = value
+    _, r, gamma, _, k, stop = value
     rs = gamma if M is _identity else _vdot_real_tree(r, r)
-    return (rs > atol2) & (k < maxiter)
+    return (rs > atol2) & (k < maxiter) & jnp.logical_not(stop)
 
   def body_fun(value):
-    x, r, gamma, p, k = value
+    x, r, gamma, p, k, _ = value
     Ap = A(p)
-    alpha = gamma / _vdot_real_tree(p, Ap)
+    pAp = _vdot_real_tree(p, Ap)
+    alpha = gamma / pAp
     x_ = _add(x, _mul(alpha, p))
     r_ = _sub(r, _mul(alpha, Ap))
     z_ = M(r_)
     gamma_ = _vdot_real_tree(r_, z_)
     beta_ = gamma_ / gamma
     p_ = _add(z_, _mul(beta_, p))
-    return x_, r_, gamma_, p_, k + 1
+    if stop_on_negative_curvature:
+      # As in Newton-CG, keep the iterate from before a direction of
+      # non-positive curvature, along which the quadratic is unbounded below.
+      stop = pAp <= 0
+      x_ = tree_multimap(partial(jnp.where, stop), x, x_)
+    else:
+      stop = False
+    return x_, r_, gamma_, p_, k + 1, stop
 
   r0 = _sub(b, A(x0))
   p0 = z0 = M(r0)
   gamma0 = _vdot_real_tree(r0, z0)
-  initial_value = (x0, r0, gamma0, p0, 0)
+  initial_value = (x0, r0, gamma0, p0, 0, False)
 
-  x_final, *_ = lax.while_loop(cond_fun, body_fun, initial_value)
+  x_final, *_, num_iters, _ = lax.while_loop(cond_fun, body_fun, initial_value)
 
+  if return_num_iters:
+    return x_final, num_iters
   return x_final
 
 
@@ -543,6 +556,43 @@ def _gmres_batched(A, b, x0, unit_residual, residual_norm, ptol, restart, M):
   return x, unit_residual, residual_norm
 
 
+def _mixed_precision_gmres(gmres_func, inner_dtype):
+  """
+  Wraps a function performing a single GMRES restart so that the Arnoldi
+  process and the least squares solve run in ``inner_dtype``. Each restart
+  solves for a correction to the current solution from the residual computed
+  in full precision, i.e., performs a step of iterative refinement.
+  """
+  def func(A, b, x0, unit_residual, residual_norm, ptol, restart, M):
+    dtype = jnp.result_type(*tree_leaves(b))
+    real_dtype = jnp.finfo(inner_dtype).dtype
+    low = partial(tree_map, lambda v: v.astype(inner_dtype))
+    high = partial(tree_map, lambda v: v.astype(dtype))
+    A_low = lambda v: low(A(high(v)))
+    M_low = lambda v: low(M(high(v)))
+    r = _sub(b, A(x0))
+    dx, _, _ = gmres_func(
+        A_low, low(r), tree_map(jnp.zeros_like, low(r)), low(unit_residual),
+        residual_norm.astype(real_dtype), ptol.astype(real_dtype), restart,
+        M_low)
+    x = _add(x0, high(dx))
+    residual = M(_sub(b, A(x)))
+    unit_residual, residual_norm = _safe_normalize(residual)
+    return x, unit_residual, residual_norm
+  return func
+
+
+def _inner_dtype(inner_dtype, b):
+  if inner_dtype is None:
+    return None
+  inner_dtype = jnp.dtype(inner_dtype)
+  if any(map(jnp.iscomplexobj, tree_leaves(b))):
+    inner_dtype = jnp.result_type(inner_dtype, jnp.complex64)
+  if inner_dtype == jnp.result_type(*tree_leaves(b)):
+    return None
+  return inner_dtype
+
+
 def _gmres_solve(A, b, x0, atol, ptol, restart, maxiter, M, gmres_func):
   """
   The main function call wrapped by custom_linear_solve. Repeatedly calls GMRES
@@ -577,7 +627,7 @@ def _gmres_solve(A, b, x0, atol, ptol, restart, maxiter, M, gmres_func):
 
 
 def gmres(A, b, x0=None, *, tol=1e-5, atol=0.0, restart=20, maxiter=None,
-          M=None, solve_method='batched'):
+          M=None, solve_method='batched', inner_dtype=None):
   """
   GMRES solves the linear system A x = b for x, given A and b.
 
@@ -639,6 +689,13 @@ def gmres(A, b, x0=None, *, tol=1e-5, atol=0.0, restart=20, maxiter=None,
       In contrast, the 'batched' solve method solves the least squares problem
       from scratch at the end of each GMRES iteration. It does not allow for
       early termination, but has much less overhead on GPUs.
+  inner_dtype : dtype, optional
+      If given, the Arnoldi process and least squares solve within each restart
+      run in this (typically lower) precision, and only the residual and
+      solution updates between restarts use the precision of ``b``. This is a
+      form of iterative refinement: the attainable accuracy is that of ``b``'s
+      dtype, but convergence may take more restarts. The linear operator ``A``
+      and preconditioner ``M`` are still applied in the precision of ``b``.
 
   See also
   --------
@@ -680,6 +737,10 @@ def gmres(A, b, x0=None, *, tol=1e-5, atol=0.0, restart=20, maxiter=None,
     raise ValueError(f"invalid solve_method {solve_method}, must be either "
                      "'incremental' or 'batched'")
 
+  inner_dtype = _inner_dtype(inner_dtype, b)
+  if inner_dtype is not None:
+    gmres_func = _mixed_precision_gmres(gmres_func, inner_dtype)
+
   def _solve(A, b):
     return _gmres_solve(A, b, x0, atol, ptol, restart, maxiter, M, gmres_func)
   x = lax.custom_linear_solve(A, b, solve=_solve, transpose_solve=_solve)
@@ -689,6 +750,219 @@ def gmres(A, b, x0=None, *, tol=1e-5, atol=0.0, restart=20, maxiter=None,
   return x, info
 
 
+def _gcrotmk_project(A, M, U, k):
+  """
+  Recomputes ``C = M(A(U))`` for the recycled vectors ``U``, and orthonormalizes
+  ``C`` by modified Gram-Schmidt, applying the same transformation to ``U`` so
+  that ``C = M(A(U))`` still holds. Vectors that become numerically zero are
+  dropped (set to zero).
+  """
+  C = vmap(lambda u: M(A(u)), in_axes=1, out_axes=1)(U)
+  for j in range(k):
+    c, u = C[:, j], U[:, j]
+    for i in range(j):
+      h = _vdot(C[:, i], c)
+      c = c - h * C[:, i]
+      u = u - h * U[:, i]
+    c, c_norm = _safe_normalize(c)
+    u = jnp.where(c_norm > 0, u / jnp.where(c_norm > 0, c_norm, 1), 0)
+    C = C.at[:, j].set(c)
+    U = U.at[:, j].set(u)
+  return C, U
+
+
+def _gcrotmk_arnoldi(A, M, C, r, m):
+  """
+  Builds an orthonormal basis V of the order-``m`` Krylov space of
+  ``(I - C C^H) M A`` starting from ``r``, together with the Hessenberg matrix
+  H (stored transposed, as in ``_kth_arnoldi_iteration``) and
+  ``B = C^H M A V``. The process stops at a breakdown, leaving the remaining
+  rows of H as in the identity, so that the least squares problem stays
+  nonsingular.
+  """
+  dtype = r.dtype
+  unit_r, _ = _safe_normalize(r)
+  V = jnp.pad(unit_r[:, None], ((0, 0), (0, m)))
+  H = jnp.eye(m, m + 1, dtype=dtype)
+  B = jnp.zeros((C.shape[1], m), dtype=dtype)
+  eps = jnp.finfo(dtype).eps
+
+  def loop_cond(carry):
+    _, _, _, breakdown, k = carry
+    return jnp.logical_and(k < m, jnp.logical_not(breakdown))
+
+  def arnoldi_step(carry):
+    V, H, B, _, k = carry
+    v = M(A(V[:, k]))
+    bc = _dot(C.T.conj(), v)
+    v = v - _dot(C, bc)
+    _, v_norm_0 = _safe_normalize(v)
+    v, h = _iterative_classical_gram_schmidt(V, v, v_norm_0, max_iterations=2)
+    unit_v, v_norm_1 = _safe_normalize(v, thresh=eps * v_norm_0)
+    V = V.at[:, k + 1].set(unit_v)
+    H = H.at[k, :].set(h.at[k + 1].set(v_norm_1))
+    B = B.at[:, k].set(bc)
+    return V, H, B, v_norm_1 == 0, k + 1
+
+  V, H, B, _, _ = lax.while_loop(loop_cond, arnoldi_step,
+                                 (V, H, B, False, 0))
+  return V, H, B
+
+
+def _gcrotmk_solve(A, b, x0, U, ptol, m, k, maxiter, M):
+  """
+  The main function call wrapped by custom_linear_solve; works on flat
+  vectors. ``U`` holds the ``k`` recycled vectors as columns, from the oldest
+  to the newest.
+
+  Returns: The solution and the updated recycled vectors.
+  """
+  C, U = _gcrotmk_project(A, M, U, k)
+  r = M(_sub(b, A(x0)))
+  y = _dot(C.T.conj(), r)
+  x = x0 + _dot(U, y)
+  r = r - _dot(C, y)
+
+  def cond_fun(value):
+    _, r, _, _, j = value
+    return (_norm(r) > ptol) & (j < maxiter)
+
+  def body_fun(value):
+    x, r, C, U, j = value
+    beta = _norm(r)
+    V, H, B = _gcrotmk_arnoldi(A, M, C, r, m)
+    beta_vec = jnp.zeros((m + 1,), dtype=r.dtype).at[0].set(beta)
+    y = _lstsq(H.T, beta_vec)
+    # The minimal residual correction in span(U, V[:, :m]) is ux, and
+    # M(A(ux)) = cx, with C^H cx = 0.
+    ux = _dot(V[:, :-1], y) - _dot(U, _dot(B, y))
+    cx = _dot(V, _dot(H.T, y))
+    cx, cx_norm = _safe_normalize(cx)
+    ux = jnp.where(cx_norm > 0, ux / jnp.where(cx_norm > 0, cx_norm, 1), 0)
+    gamma = _vdot(cx, r)
+    r = r - gamma * cx
+    x = x + gamma * ux
+    # Replace the oldest recycled vector; the columns are replaced in turn.
+    C = C.at[:, j % k].set(cx)
+    U = U.at[:, j % k].set(ux)
+    return x, r, C, U, j + 1
+
+  x, _, _, U, j = lax.while_loop(cond_fun, body_fun, (x, r, C, U, 0))
+  # Order the recycled vectors from the oldest, so that the next solve that
+  # recycles them starts by replacing the oldest one.
+  return x, jnp.roll(U, -(j % k), axis=1)
+
+
+def gcrotmk(A, b, x0=None, *, tol=1e-5, atol=0.0, maxiter=None, M=None,
+            m=20, k=None, recycle=None):
+  """
+  Solve ``A x = b`` with the GCROT(m,k) method, recycling a Krylov subspace.
+
+  GCROT(m,k) is a restarted GMRES variant that, instead of discarding the
+  Krylov subspace at each restart, retains the ``k`` most recent correction
+  directions and keeps the residual orthogonal to their images. The retained
+  subspace is returned, and can be passed to a subsequent call solving a
+  related system (e.g., the next step of a Newton iteration) to speed up its
+  convergence. In contrast to SciPy, this is done functionally: the ``recycle``
+  argument is not modified in place.
+
+  Parameters
+  ----------
+  A: ndarray or function
+      2D array or function that calculates the linear map (matrix-vector
+      product) ``Ax`` when called like ``A(x)``. ``A`` must return array(s) with
+      the same structure and shape as its argument.
+  b : array or tree of arrays
+      Right hand side of the linear system representing a single vector. Can be
+      stored as an array or Python container of array(s) with any shape.
+
+  Returns
+  -------
+  x : array or tree of arrays
+      The converged solution. Has the same structure as ``b``.
+  info : int
+      0 on success, and -1 if the solution contains NaNs.
+  recycle : array
+      Array of shape ``(size, k)`` holding the recycled subspace, where
+      ``size`` is the total number of elements in ``b``, with the oldest vector
+      first. Pass it as ``recycle`` to a subsequent call with the same ``k``.
+
+  Other Parameters
+  ----------------
+  x0 : array, optional
+      Starting guess for the solution. Must have the same structure as ``b``.
+      If this is unspecified, zeroes are used.
+  tol, atol : float, optional
+      Tolerances for convergence, ``norm(residual) <= max(tol*norm(b), atol)``.
+  maxiter : integer
+      Maximum number of outer iterations. Default is ``10 * size``.
+  M : ndarray or function
+      Preconditioner for A.  The preconditioner should approximate the
+      inverse of A.
+  m : integer, optional
+      Number of inner GMRES iterations per outer iteration. Default is 20.
+  k : integer, optional
+      Number of vectors to recycle. Default is ``m``.
+  recycle : array, optional
+      Recycled subspace returned by a previous call. The images of these
+      vectors are recomputed, so it remains valid if ``A`` or ``M`` changed.
+
+  See also
+  --------
+  scipy.sparse.linalg.gcrotmk
+  jax.scipy.sparse.linalg.gmres
+  """
+  if x0 is None:
+    x0 = tree_map(jnp.zeros_like, b)
+  if M is None:
+    M = _identity
+  A = _normalize_matvec(A)
+  M = _normalize_matvec(M)
+
+  b, x0 = device_put((b, x0))
+
+  if tree_structure(x0) != tree_structure(b):
+    raise ValueError(
+        'x0 and b must have matching tree structure: '
+        f'{tree_structure(x0)} vs {tree_structure(b)}')
+
+  b_flat, unravel = ravel_pytree(b)
+  x0_flat, _ = ravel_pytree(x0)
+  size = b_flat.shape[0]
+  if maxiter is None:
+    maxiter = 10 * size  # copied from scipy
+  m = min(m, size)
+  k = m if k is None else k
+  if k < 1:
+    raise ValueError(f"k must be positive, got {k}")
+  if recycle is None:
+    recycle = jnp.zeros((size, k), b_flat.dtype)
+  elif jnp.shape(recycle) != (size, k):
+    raise ValueError(f"recycle must have shape {(size, k)}, got "
+                     f"{jnp.shape(recycle)}")
+
+  b_norm = _norm(b)
+  atol = jnp.maximum(tol * b_norm, atol)
+  Mb_norm = _norm(M(b))
+  ptol = Mb_norm * jnp.minimum(1.0, atol / b_norm)
+
+  def flat(f):
+    return lambda v: ravel_pytree(f(unravel(v)))[0]
+
+  def _solve(A, b):
+    x, U = _gcrotmk_solve(flat(A), ravel_pytree(b)[0], x0_flat,
+                          recycle.astype(b_flat.dtype), ptol, m, k, maxiter,
+                          flat(M))
+    return unravel(x), U
+
+  x, recycle = lax.custom_linear_solve(A, b, solve=_solve,
+                                       transpose_solve=_solve, has_aux=True)
+
+  failed = jnp.isnan(_norm(x))
+  info = jnp.where(failed, x=-1, y=0)
+  return x, info, recycle
+
+
 def bicgstab(A, b, x0=None, *, tol=1e-5, atol=0.0, maxiter=None, M=None):
   """Use Bi-Conjugate Gradient Stable iteration to solve ``Ax = b``.
 
@@ -747,3 +1021,897 @@ def bicgstab(A, b, x0=None, *, tol=1e-5, atol=0.0, maxiter=None, M=None):
   return _isolve(_bicgstab_solve,
                  A=A, b=b, x0=x0, tol=tol, atol=atol,
                  maxiter=maxiter, M=M)
+
+
+# Batched solvers.
+#
+# These solve many independent systems at once. Rather than vmapping a single
+# system solver (whose while loop would keep iterating every system until the
+# slowest one converges), the loop runs over the whole batch and each system
+# stops being updated as soon as it converges. Optionally, the still-active
+# systems are periodically gathered into a smaller batch so converged systems
+# stop costing matvecs at all.
+
+class BatchedSolveInfo(NamedTuple):
+  """Convergence information for each system of a batched iterative solve.
+
+  Parameters:
+    converged: boolean array of shape ``(batch,)``, True for systems whose
+      residual reached the requested tolerance.
+    num_iters: integer array of shape ``(batch,)`` with the number of
+      iterations run for each system.
+  """
+  converged: jnp.ndarray
+  num_iters: jnp.ndarray
+
+
+# Compaction stops once the active set would be smaller than this.
+_MIN_COMPACTION_SIZE = 8
+
+
+def _normalize_batched_matvec(f, index):
+  """Normalize an argument for computing batched matrix-vector products.
+
+  Returns a function computing the product for a single system, given that
+  system's slice of the batched operands, and the batched operand for ``f``
+  itself (``None`` unless ``f`` is an array).
+  """
+  if callable(f):
+    return (lambda x, operands: f(x, *operands[2])), None
+  elif isinstance(f, (np.ndarray, jnp.ndarray)):
+    if f.ndim != 3 or f.shape[1] != f.shape[2]:
+      raise ValueError(
+          'batched linear operator must be a stack of square matrices, but has '
+          f'shape: {f.shape}')
+    return (lambda x, operands: _dot(operands[index], x)), f
+  else:
+    raise TypeError(
+        f'linear operator must be either a function or ndarray: {f}')
+
+
+def _batch_size(tree):
+  sizes = {jnp.shape(leaf)[0] if jnp.ndim(leaf) else None
+           for leaf in tree_leaves(tree)}
+  if len(sizes) != 1 or None in sizes:
+    raise ValueError(
+        'all arrays in b must have the same leading batch dimension, got '
+        f'shapes {_shapes(tree)}')
+  size, = sizes
+  return size
+
+
+def _masked_batched_loop(lane_step, lane_done, state, operands, compact_every):
+  """Iterates ``lane_step`` over each lane of ``state`` until ``lane_done``.
+
+  Lanes that are done are left unchanged. If ``compact_every`` is not None,
+  every ``compact_every`` iterations the loop checks whether at most half of
+  the lanes are still active, in which case those are gathered into a batch of
+  half the size, which is solved recursively and then scattered back.
+  """
+  step = vmap(lane_step)
+  done = vmap(lane_done)
+
+  def where_active(active, new, old):
+    def select(x, y):
+      return jnp.where(active.reshape(active.shape + (1,) * (x.ndim - 1)), x, y)
+    return tree_multimap(select, new, old)
+
+  def run(state, operands, min_active):
+    def cond_fun(value):
+      state, i = value
+      num_active = jnp.sum(~done(state))
+      if not min_active:
+        return num_active > 0
+      return (num_active > 0) & ((num_active > min_active)
+                                 | (i % compact_every != 0))
+
+    def body_fun(value):
+      state, i = value
+      active = ~done(state)
+      return where_active(active, step(state, operands), state), i + 1
+
+    state, _ = lax.while_loop(cond_fun, body_fun, (state, 0))
+    return state
+
+  def solve(state, operands, capacity):
+    half = capacity // 2
+    if compact_every is None or half < _MIN_COMPACTION_SIZE:
+      return run(state, operands, 0)
+    state = run(state, operands, half)
+    # Active lanes sort first; done lanes that get gathered stay unchanged.
+    idx = jnp.argsort(done(state).astype(np.int32))[:half]
+    take = partial(tree_map, lambda x: x[idx])
+    sub_state = solve(take(state), take(operands), half)
+    return tree_multimap(lambda x, y: x.at[idx].set(y), state, sub_state)
+
+  return solve(state, operands, _batch_size(state))
+
+
+def _batched_isolve(init_fun, lane_step, lane_done, lane_converged, A, b,
+                    x0=None, *, tol=1e-5, atol=0.0, maxiter=None, M=None,
+                    args=(), compact_every=None):
+  if x0 is None:
+    x0 = tree_map(jnp.zeros_like, b)
+
+  b, x0, args = device_put((b, x0, args))
+  batch_size = _batch_size(b)
+
+  if maxiter is None:
+    size = sum(int(np.prod(bi.shape[1:])) for bi in tree_leaves(b))
+    maxiter = 10 * size  # copied from scipy
+
+  if compact_every is not None and compact_every < 1:
+    raise ValueError(f'compact_every must be positive, got {compact_every}')
+
+  A, A_mat = _normalize_batched_matvec(A, 0)
+  if M is None:
+    M, M_mat = (lambda x, operands: x), None
+  else:
+    M, M_mat = _normalize_batched_matvec(M, 1)
+
+  if tree_structure(x0) != tree_structure(b):
+    raise ValueError(
+        'x0 and b must have matching tree structure: '
+        f'{tree_structure(x0)} vs {tree_structure(b)}')
+
+  if _shapes(x0) != _shapes(b):
+    raise ValueError(
+        'arrays in x0 and b must have matching shapes: '
+        f'{_shapes(x0)} vs {_shapes(b)}')
+
+  if tree_leaves(args) and _batch_size(args) != batch_size:
+    raise ValueError(
+        'arrays in args must have the same leading batch dimension as b: '
+        f'{_shapes(args)} vs {_shapes(b)}')
+
+  operands = (A_mat, M_mat, args)
+  state = vmap(partial(init_fun, A, M, tol=tol, atol=atol))(b, x0, operands)
+  state = _masked_batched_loop(
+      partial(lane_step, A, M), partial(lane_done, maxiter=maxiter), state,
+      operands, compact_every)
+  x, *_, k = state
+  info = BatchedSolveInfo(converged=vmap(lane_converged)(state), num_iters=k)
+  return x, info
+
+
+def _atol2(b, tol, atol):
+  bs = _vdot_real_tree(b, b)
+  return jnp.maximum(jnp.square(tol) * bs, jnp.square(atol))
+
+
+# Lane states of the batched solvers start with the solution x and end with the
+# iteration count k.
+
+# Lane state for CG is (x, r, gamma, p, rs, atol2, k), where rs is the squared
+# residual norm.
+
+def _cg_batched_init(A, M, b, x0, operands, *, tol, atol):
+  r0 = _sub(b, A(x0, operands))
+  p0 = z0 = M(r0, operands)
+  gamma0 = _vdot_real_tree(r0, z0)
+  return (x0, r0, gamma0, p0, _vdot_real_tree(r0, r0), _atol2(b, tol, atol), 0)
+
+
+def _cg_batched_step(A, M, state, operands):
+  x, r, gamma, p, _, atol2, k = state
+  Ap = A(p, operands)
+  alpha = gamma / _vdot_real_tree(p, Ap)
+  x_ = _add(x, _mul(alpha, p))
+  r_ = _sub(r, _mul(alpha, Ap))
+  z_ = M(r_, operands)
+  gamma_ = _vdot_real_tree(r_, z_)
+  beta_ = gamma_ / gamma
+  p_ = _add(z_, _mul(beta_, p))
+  return x_, r_, gamma_, p_, _vdot_real_tree(r_, r_), atol2, k + 1
+
+
+def _cg_batched_converged(state):
+  *_, rs, atol2, _ = state
+  return rs <= atol2
+
+
+def _cg_batched_done(state, *, maxiter):
+  *_, k = state
+  return _cg_batched_converged(state) | (k >= maxiter)
+
+
+def cg_batched(A, b, x0=None, *, tol=1e-5, atol=0.0, maxiter=None, M=None,
+               args=(), compact_every=None):
+  """Use Conjugate Gradient iteration to solve a batch of systems ``Ax = b``.
+
+  Each system is iterated only until it converges, unlike ``vmap(cg)``, which
+  iterates all systems until the slowest one has converged. Optionally, the
+  systems that have not yet converged are periodically compacted into a smaller
+  batch, so that converged systems no longer cost matrix-vector products.
+
+  Unlike ``cg``, derivatives of ``cg_batched`` are not defined.
+
+  Parameters
+  ----------
+  A: ndarray or function
+      3D array of shape ``(batch, n, n)``, or function that calculates the
+      linear map (matrix-vector product) ``Ax`` of a single system when called
+      like ``A(x, *args)``, where ``args`` are that system's slices of
+      ``args``. Each system must be hermitian and positive definite.
+  b : array or tree of arrays
+      Right hand sides of the linear systems, stacked along a leading batch
+      dimension.
+
+  Returns
+  -------
+  x : array or tree of arrays
+      The converged solutions. Has the same structure as ``b``.
+  info : BatchedSolveInfo
+      Per-system convergence flags and iteration counts.
+
+  Other Parameters
+  ----------------
+  x0 : array or tree of arrays
+      Starting guesses for the solutions. Must have the same structure as ``b``.
+  tol, atol : float, optional
+      Tolerances for convergence of each system,
+      ``norm(residual) <= max(tol*norm(b), atol)``.
+  maxiter : integer
+      Maximum number of iterations per system.
+  M : ndarray or function
+      Preconditioner for A, given in the same form as ``A``.
+  args : tuple of arrays or trees of arrays
+      Extra per-system arguments to ``A`` and ``M``, stacked along a leading
+      batch dimension.
+  compact_every : integer, optional
+      If given, every ``compact_every`` iterations the systems that are still
+      active are gathered into a batch of half the size once at most half of
+      the systems remain active.
+
+  See also
+  --------
+  jax.scipy.sparse.linalg.cg
+  """
+  return _batched_isolve(
+      _cg_batched_init, _cg_batched_step, _cg_batched_done,
+      _cg_batched_converged, A, b, x0, tol=tol, atol=atol, maxiter=maxiter,
+      M=M, args=args, compact_every=compact_every)
+
+
+# Lane state for BiCGSTAB is
+# (x, r, rhat, alpha, omega, rho, p, q, rs, breakdown, atol2, k).
+
+def _bicgstab_batched_init(A, M, b, x0, operands, *, tol, atol):
+  r0 = _sub(b, A(x0, operands))
+  rho0 = alpha0 = omega0 = jnp.ones(1, dtype=jnp.result_type(*tree_leaves(b)))[0]
+  return (x0, r0, r0, alpha0, omega0, rho0, r0, r0, _vdot_real_tree(r0, r0),
+          False, _atol2(b, tol, atol), 0)
+
+
+def _bicgstab_batched_step(A, M, state, operands):
+  x, r, rhat, alpha, omega, rho, p, q, _, _, atol2, k = state
+  rho_ = _vdot_tree(rhat, r)
+  beta = rho_ / rho * alpha / omega
+  p_ = _add(r, _mul(beta, _sub(p, _mul(omega, q))))
+  phat = M(p_, operands)
+  q_ = A(phat, operands)
+  alpha_ = rho_ / _vdot_tree(rhat, q_)
+  s = _sub(r, _mul(alpha_, q_))
+  exit_early = _vdot_real_tree(s, s) < atol2
+  shat = M(s, operands)
+  t = A(shat, operands)
+  omega_ = _vdot_tree(t, s) / _vdot_tree(t, t)
+  x_ = tree_multimap(partial(jnp.where, exit_early),
+                     _add(x, _mul(alpha_, phat)),
+                     _add(x, _add(_mul(alpha_, phat), _mul(omega_, shat))))
+  r_ = tree_multimap(partial(jnp.where, exit_early),
+                     s, _sub(s, _mul(omega_, t)))
+  breakdown = (omega_ == 0) | (alpha_ == 0) | (rho_ == 0)
+  return (x_, r_, rhat, alpha_, omega_, rho_, p_, q_, _vdot_real_tree(r_, r_),
+          breakdown, atol2, k + 1)
+
+
+def _bicgstab_batched_converged(state):
+  *_, rs, _, atol2, _ = state
+  return rs <= atol2
+
+
+def _bicgstab_batched_done(state, *, maxiter):
+  *_, breakdown, _, k = state
+  return _bicgstab_batched_converged(state) | breakdown | (k >= maxiter)
+
+
+def bicgstab_batched(A, b, x0=None, *, tol=1e-5, atol=0.0, maxiter=None,
+                     M=None, args=(), compact_every=None):
+  """Use BiCGSTAB iteration to solve a batch of systems ``Ax = b``.
+
+  See ``cg_batched`` for how systems are batched; the parameters are the same,
+  except that each system in ``A`` can be any general (nonsymmetric) linear
+  operator.
+
+  See also
+  --------
+  jax.scipy.sparse.linalg.bicgstab
+  jax.scipy.sparse.linalg.cg_batched
+  """
+  return _batched_isolve(
+      _bicgstab_batched_init, _bicgstab_batched_step, _bicgstab_batched_done,
+      _bicgstab_batched_converged, A, b, x0, tol=tol, atol=atol,
+      maxiter=maxiter, M=M, args=args, compact_every=compact_every)
+
+
+# Lane state for GMRES is (x, unit_residual, residual_norm, b, atol, ptol, k),
+# where one iteration is a full restart cycle.
+
+def _gmres_batched_init(A, M, b, x0, operands, *, tol, atol):
+  b_norm = _norm(b)
+  atol = jnp.maximum(tol * b_norm, atol)
+  Mb_norm = _norm(M(b, operands))
+  ptol = Mb_norm * jnp.minimum(1.0, atol / b_norm)
+  residual = M(_sub(b, A(x0, operands)), operands)
+  unit_residual, residual_norm = _safe_normalize(residual)
+  return x0, unit_residual, residual_norm, b, atol, ptol, 0
+
+
+def _gmres_batched_step(gmres_func, restart, A, M, state, operands):
+  x, unit_residual, residual_norm, b, atol, ptol, k = state
+  x, unit_residual, residual_norm = gmres_func(
+      partial(A, operands=operands), b, x, unit_residual, residual_norm, ptol,
+      restart, partial(M, operands=operands))
+  return x, unit_residual, residual_norm, b, atol, ptol, k + 1
+
+
+def _gmres_batched_converged(state):
+  _, _, residual_norm, _, atol, _, _ = state
+  return residual_norm <= atol
+
+
+def _gmres_batched_done(state, *, maxiter):
+  _, _, residual_norm, _, _, _, k = state
+  return (_gmres_batched_converged(state) | (k >= maxiter)
+          | jnp.isnan(residual_norm))
+
+
+def gmres_batched(A, b, x0=None, *, tol=1e-5, atol=0.0, restart=20,
+                  maxiter=None, M=None, args=(), solve_method='batched',
+                  compact_every=None):
+  """Use GMRES to solve a batch of systems ``Ax = b``.
+
+  See ``cg_batched`` for how systems are batched; the other parameters are the
+  same as for ``gmres``. Convergence is checked, and iterations are counted,
+  once per restart cycle.
+
+  See also
+  --------
+  jax.scipy.sparse.linalg.gmres
+  jax.scipy.sparse.linalg.cg_batched
+  """
+  size = sum(int(np.prod(jnp.shape(bi)[1:])) for bi in tree_leaves(b))
+  restart = min(restart, size)
+
+  if solve_method == 'incremental':
+    gmres_func = _gmres_incremental
+  elif solve_method == 'batched':
+    gmres_func = _gmres_batched
+  else:
+    raise ValueError(f"invalid solve_method {solve_method}, must be either "
+                     "'incremental' or 'batched'")
+
+  return _batched_isolve(
+      _gmres_batched_init, partial(_gmres_batched_step, gmres_func, restart),
+      _gmres_batched_done, _gmres_batched_converged, A, b, x0, tol=tol,
+      atol=atol, maxiter=maxiter, M=M, args=args,
+      compact_every=compact_every)
+
+
+# Matrix-free eigensolvers and trace estimators. These access the operator only
+# through matrix-vector products, so their cost is dominated by the number of
+# products rather than by the O(n^3) cost of a dense decomposition.
+
+def _flat_matvec(A, unravel):
+  return lambda v: ravel_pytree(A(unravel(v)))[0]
+
+
+def _flatten_columns(X):
+  """Flattens a tree whose leaves have a trailing axis into an (n, k) array."""
+  _, unravel = ravel_pytree(tree_map(lambda x: x[..., 0], X))
+  X_flat = vmap(lambda x: ravel_pytree(x)[0], in_axes=-1, out_axes=1)(X)
+  return X_flat, unravel
+
+
+def _unflatten_columns(unravel, X):
+  return vmap(unravel, in_axes=1, out_axes=-1)(X)
+
+
+def _breakdown_normalize(w, Aw):
+  """Normalizes ``w``, or returns zero if it vanished relative to ``Aw``."""
+  eps = jnp.finfo(jnp.result_type(*tree_leaves(w))).eps
+  return _safe_normalize(w, thresh=eps * _norm(Aw))
+
+
+def _ritz_order(theta, which):
+  if which == 'LA':
+    return jnp.argsort(-theta)
+  elif which == 'SA':
+    return jnp.argsort(theta)
+  else:  # 'LM'
+    return jnp.argsort(-jnp.abs(theta))
+
+
+def _thick_restart_lanczos(A, v0, k, ncv, which, tol, maxiter):
+  """Thick-restart Lanczos with full reorthogonalization.
+
+  The basis ``V`` has ``ncv + 1`` columns; columns that have not been computed
+  yet are zero, so full reorthogonalization needs no masking. After every
+  cycle the ``p`` best Ritz vectors are kept as the first columns of ``V``, and
+  ``T`` is the (diagonal) projection of ``A`` onto them.
+
+  After a breakdown, when the basis spans an invariant subspace, the process
+  continues from a random vector orthogonal to the basis. ``T`` then splits
+  into blocks, each of whose Ritz values are eigenvalues of ``A``, instead of
+  having spurious zero rows and columns.
+  """
+  n = v0.shape[0]
+  dtype = v0.dtype
+  theta_dtype = jnp.finfo(dtype).dtype
+  p = k + (ncv - k) // 2
+
+  def orthogonalize(V, w):
+    h = _dot(V.T.conj(), w)
+    w = w - _dot(V, h)
+    h2 = _dot(V.T.conj(), w)
+    return w - _dot(V, h2), h + h2
+
+  def random_restart(j, V):
+    key = random.fold_in(random.PRNGKey(0), j)
+    w = random.normal(key, (n,), theta_dtype).astype(dtype)
+    w, _ = orthogonalize(V, w)
+    v, _ = _safe_normalize(w)
+    return v
+
+  def lanczos_step(j, carry):
+    V, T, _ = carry
+    w = Aw = A(V[:, j])
+    w, h = orthogonalize(V, w)
+    v, beta = _breakdown_normalize(w, Aw)
+    v = lax.cond(beta == 0, lambda _: random_restart(j, V), lambda _: v, None)
+    V = V.at[:, j + 1].set(v)
+    T = T.at[:, j].set(h[:ncv])
+    return V, T, beta
+
+  def cond_fun(value):
+    *_, converged, i = value
+    return ~converged & (i < maxiter)
+
+  def body_fun(value):
+    V, T, start, _, i = value
+    V, T, beta = lax.fori_loop(start, ncv, lanczos_step,
+                               (V, T, jnp.zeros((), theta_dtype)))
+    # Only the upper triangle of T is computed by the Lanczos steps.
+    T = jnp.triu(T) + jnp.triu(T, 1).T.conj()
+    theta, S = jnp.linalg.eigh(T)
+    order = _ritz_order(theta, which)[:p]
+    theta, S = theta[order], S[:, order]
+    residuals = jnp.abs(beta * S[-1, :k])
+    converged = jnp.all(residuals <= tol * jnp.max(jnp.abs(theta[:k])))
+    V = (jnp.zeros_like(V)
+         .at[:, :p].set(_dot(V[:, :ncv], S))
+         .at[:, p].set(V[:, ncv]))
+    T = jnp.zeros_like(T).at[jnp.arange(p), jnp.arange(p)].set(theta)
+    return V, T, p, converged, i + 1
+
+  V = jnp.zeros((n, ncv + 1), dtype).at[:, 0].set(v0 / _norm(v0))
+  T = jnp.zeros((ncv, ncv), dtype)
+  V, T, *_ = lax.while_loop(cond_fun, body_fun, (V, T, 0, False, 0))
+  theta = jnp.diagonal(T)[:k].real
+  order = jnp.argsort(theta)
+  return theta[order], V[:, :k][:, order]
+
+
+def eigsh(A, k=6, *, v0=None, which='LM', ncv=None, maxiter=None, tol=1e-5):
+  """Find ``k`` eigenvalues and eigenvectors of a Hermitian linear operator.
+
+  Uses the thick-restart Lanczos method with full reorthogonalization, which
+  only accesses ``A`` through matrix-vector products. Each restart cycle costs
+  at most ``ncv`` products and ``O(size * ncv**2)`` additional work.
+
+  Derivatives of ``eigsh`` are not defined.
+
+  Parameters
+  ----------
+  A: ndarray or function
+      2D array or function that calculates the linear map (matrix-vector
+      product) ``Ax`` when called like ``A(x)``. ``A`` must represent a
+      hermitian operator, and must return array(s) with the same structure and
+      shape as its argument.
+  k : integer, optional
+      The number of eigenvalues and eigenvectors to compute. Must be smaller
+      than the size of the operator.
+
+  Returns
+  -------
+  w : array
+      Array of ``k`` eigenvalues, in ascending order.
+  v : array or tree of arrays
+      The corresponding eigenvectors. Has the same structure as ``v0``, with an
+      additional trailing axis of size ``k``.
+
+  Other Parameters
+  ----------------
+  v0 : array or tree of arrays
+      Starting vector for the iteration. Required if ``A`` is a function. If
+      ``A`` is an array, a fixed pseudo-random vector is used by default.
+  which : {'LM', 'LA', 'SA'}, optional
+      Which eigenvalues to find: largest in magnitude, largest algebraic, or
+      smallest algebraic. Default is 'LM'.
+  ncv : integer, optional
+      Number of Lanczos vectors generated in each restart cycle. Must satisfy
+      ``k < ncv <= size``. Default is ``min(size, max(2*k + 1, 20))``.
+  maxiter : integer, optional
+      Maximum number of restart cycles. Default is ``10 * size // ncv``.
+  tol : float, optional
+      Relative tolerance for the residual norms of the Ritz pairs,
+      ``norm(A v - w v) <= tol * max(abs(w))``.
+
+  See also
+  --------
+  scipy.sparse.linalg.eigsh
+  jax.scipy.sparse.linalg.lobpcg
+  """
+  if which not in ('LM', 'LA', 'SA'):
+    raise ValueError(f"invalid which {which}, must be one of 'LM', 'LA' or "
+                     "'SA'")
+  if v0 is None:
+    if callable(A):
+      raise ValueError("v0 must be provided if A is a function")
+    v0 = random.normal(random.PRNGKey(0), jnp.shape(A)[:1]).astype(A.dtype)
+  A = _normalize_matvec(A)
+  v0 = device_put(v0)
+
+  v0_flat, unravel = ravel_pytree(v0)
+  size = v0_flat.shape[0]
+  if not 0 < k < size:
+    raise ValueError(f"k must satisfy 0 < k < {size}, got {k}")
+  if ncv is None:
+    ncv = min(size, max(2 * k + 1, 20))
+  if not k < ncv <= size:
+    raise ValueError(f"ncv must satisfy {k} < ncv <= {size}, got {ncv}")
+  if maxiter is None:
+    maxiter = 10 * size // ncv
+
+  w, v = _thick_restart_lanczos(_flat_matvec(A, unravel), v0_flat, k, ncv,
+                                which, tol, maxiter)
+  return w, _unflatten_columns(unravel, v)
+
+
+def _lobpcg_rayleigh_ritz(S, AS, k, largest):
+  theta, C = jnp.linalg.eigh(_dot(S.T.conj(), AS))
+  if largest:
+    theta, C = theta[::-1], C[:, ::-1]
+  return theta[:k], C[:, :k]
+
+
+def _lobpcg_orthonormalize(X, Z):
+  """Orthonormalizes the columns of ``Z`` against orthonormal ``X``."""
+  for _ in range(2):
+    Z = Z - _dot(X, _dot(X.T.conj(), Z))
+    Z, _ = jnp.linalg.qr(Z)
+  return Z
+
+
+def _lobpcg_residual(X, AX, theta):
+  R = AX - X * theta[None, :]
+  norms = jnp.linalg.norm(R, axis=0)
+  return R, norms
+
+
+def _lobpcg(A, M, X, tol, maxiter, largest):
+  k = X.shape[1]
+
+  def step(X, AX, R, P):
+    # P is None in the first, steepest descent, step.
+    W = M(R)
+    Z = W if P is None else jnp.concatenate([W, P], axis=1)
+    Z = _lobpcg_orthonormalize(X, Z)
+    AZ = A(Z)
+    S = jnp.concatenate([X, Z], axis=1)
+    AS = jnp.concatenate([AX, AZ], axis=1)
+    theta, C = _lobpcg_rayleigh_ritz(S, AS, k, largest)
+    X = _dot(S, C)
+    AX = _dot(AS, C)
+    P = _dot(Z, C[k:])
+    R, norms = _lobpcg_residual(X, AX, theta)
+    converged = jnp.all(norms <= tol * jnp.max(jnp.abs(theta)))
+    return X, AX, R, P, theta, converged
+
+  def cond_fun(value):
+    *_, converged, i = value
+    return ~converged & (i < maxiter)
+
+  def body_fun(value):
+    X, AX, R, P, _, _, i = value
+    return (*step(X, AX, R, P), i + 1)
+
+  X, _ = jnp.linalg.qr(X)
+  AX = A(X)
+  theta, C = _lobpcg_rayleigh_ritz(X, AX, k, largest)
+  X, AX = _dot(X, C), _dot(AX, C)
+  R, _ = _lobpcg_residual(X, AX, theta)
+  value = (*step(X, AX, R, None), 1)
+  X, _, _, _, theta, _, _ = lax.while_loop(cond_fun, body_fun, value)
+  order = jnp.argsort(theta)
+  return theta[order], X[:, order]
+
+
+def lobpcg(A, X, *, M=None, tol=1e-5, maxiter=100, largest=True):
+  """Find extreme eigenvalues of a Hermitian linear operator with LOBPCG.
+
+  The Locally Optimal Block Preconditioned Conjugate Gradient method iterates a
+  block of ``k`` vectors. Each iteration costs ``2 * k`` matrix-vector
+  products, which are computed by vectorizing ``A`` over the block with
+  ``vmap``, and ``O(size * k**2)`` additional work.
+
+  Derivatives of ``lobpcg`` are not defined.
+
+  Parameters
+  ----------
+  A: ndarray or function
+      2D array or function that calculates the linear map (matrix-vector
+      product) ``Ax`` when called like ``A(x)``. ``A`` must represent a
+      hermitian operator, and must return array(s) with the same structure and
+      shape as its argument.
+  X : array or tree of arrays
+      Initial approximation to the eigenvectors. Leaves have the shape of the
+      argument of ``A`` with an additional trailing axis of size ``k``, the
+      number of eigenpairs to compute.
+
+  Returns
+  -------
+  w : array
+      Array of ``k`` eigenvalues, in ascending order.
+  v : array or tree of arrays
+      The corresponding eigenvectors, with the same structure and shapes as
+      ``X``.
+
+  Other Parameters
+  ----------------
+  M : ndarray or function
+      Preconditioner for ``A``.  The preconditioner should approximate the
+      inverse of ``A``.
+  tol : float, optional
+      Relative tolerance for the residual norms of the Ritz pairs,
+      ``norm(A v - w v) <= tol * max(abs(w))``.
+  maxiter : integer, optional
+      Maximum number of iterations. Default is 100.
+  largest : bool, optional
+      Whether to find the largest (default) or smallest eigenvalues.
+
+  See also
+  --------
+  scipy.sparse.linalg.lobpcg
+  jax.scipy.sparse.linalg.eigsh
+  """
+  if M is None:
+    M = _identity
+  A = _normalize_matvec(A)
+  M = _normalize_matvec(M)
+  X = device_put(X)
+
+  X_flat, unravel = _flatten_columns(X)
+  size, k = X_flat.shape
+  if not 0 < 3 * k <= size:
+    raise ValueError(f"the number of eigenpairs must satisfy "
+                     f"0 < 3 * k <= {size}, got k={k}")
+
+  def block(f):
+    return vmap(_flat_matvec(f, unravel), in_axes=1, out_axes=1)
+
+  w, v = _lobpcg(block(A), block(M), X_flat, tol, maxiter, largest)
+  return w, _unflatten_columns(unravel, v)
+
+
+def _rademacher_probes(key, x, num_samples):
+  """Returns a tree like ``x`` with ``num_samples`` stacked Rademacher probes."""
+  leaves, treedef = tree_flatten(x)
+  keys = random.split(key, len(leaves))
+  return tree_unflatten(treedef, [
+      random.rademacher(key, (num_samples,) + jnp.shape(leaf)).astype(
+          jnp.result_type(leaf))
+      for key, leaf in zip(keys, leaves)])
+
+
+def _lanczos_tridiagonal(A, v, num_steps, coeffs=None):
+  """Lanczos tridiagonalization of ``A`` without reorthogonalization.
+
+  Returns the diagonal and off-diagonal of the tridiagonal matrix for the
+  Krylov basis started at ``v / norm(v)``, and the linear combination of the
+  basis vectors with the given ``coeffs``. ``v`` can be a tree of arrays.
+  """
+  if coeffs is None:
+    dtype = jnp.finfo(jnp.result_type(*tree_leaves(v))).dtype
+    coeffs = jnp.zeros(num_steps, dtype)
+
+  def step(carry, coeff):
+    v, v_prev, beta_prev, acc = carry
+    Av = A(v)
+    alpha = _vdot_real_tree(v, Av)
+    w = _sub(_sub(Av, _mul(alpha, v)), _mul(beta_prev, v_prev))
+    v_next, beta = _breakdown_normalize(w, Av)
+    acc = _add(acc, _mul(coeff, v))
+    return (v_next, v, beta, acc), (alpha, beta)
+
+  v, _ = _safe_normalize(v)
+  zeros = tree_map(jnp.zeros_like, v)
+  init = (v, zeros, jnp.zeros((), coeffs.dtype), zeros)
+  (*_, acc), (alphas, betas) = lax.scan(step, init, coeffs)
+  return alphas, betas[:-1], acc
+
+
+def _tridiagonal_eigh(alphas, betas):
+  T = jnp.diag(alphas) + jnp.diag(betas, 1) + jnp.diag(betas, -1)
+  return jnp.linalg.eigh(T)
+
+
+def _weighted_log(theta, s):
+  """Returns ``s * log(theta)``, taken to be zero where ``s`` is zero.
+
+  After a Lanczos breakdown, the Ritz values of the decoupled blocks of the
+  tridiagonal matrix have zero weight, and may be zero.
+  """
+  nonzero = s != 0
+  return jnp.where(nonzero, s * jnp.log(jnp.where(nonzero, theta, 1)), 0)
+
+
+def _log_quadratic_form(A, v, num_steps):
+  """Stochastic Lanczos quadrature estimate of ``v^H log(A) v``."""
+  alphas, betas, _ = _lanczos_tridiagonal(A, v, num_steps)
+  theta, S = _tridiagonal_eigh(alphas, betas)
+  return _vdot_real_tree(v, v) * jnp.sum(S[0] * _weighted_log(theta, S[0]))
+
+
+def _log_matvec(A, v, num_steps):
+  """Lanczos approximation of ``log(A) v``, recomputing the basis."""
+  alphas, betas, _ = _lanczos_tridiagonal(A, v, num_steps)
+  theta, S = _tridiagonal_eigh(alphas, betas)
+  coeffs = _norm(v) * _dot(S, _weighted_log(theta, S[0]))
+  _, _, y = _lanczos_tridiagonal(A, v, num_steps, coeffs)
+  return y
+
+
+def _hutch_plus_plus(block_matvec, quadratic_forms, key, x_flat, num_samples):
+  """Hutch++ on flat vectors.
+
+  ``block_matvec`` applies the operator to the columns of a matrix, and
+  ``quadratic_forms`` returns ``v^H A v`` for each column ``v`` of a matrix.
+  """
+  num_sketch = num_samples // 3
+  num_residual = num_samples - 2 * num_sketch
+  key_sketch, key_residual = random.split(key)
+  S = _rademacher_probes(key_sketch, x_flat, num_sketch).T
+  Q, _ = jnp.linalg.qr(block_matvec(S))
+  G = _rademacher_probes(key_residual, x_flat, num_residual).T
+  G = G - _dot(Q, _dot(Q.T.conj(), G))
+  return (jnp.sum(quadratic_forms(Q)) +
+          jnp.sum(quadratic_forms(G)) / num_residual)
+
+
+def _check_estimator_args(method, num_samples):
+  if method not in ('hutchinson', 'hutch++'):
+    raise ValueError(f"invalid method {method}, must be either 'hutchinson' "
+                     "or 'hutch++'")
+  min_samples = 3 if method == 'hutch++' else 1
+  if num_samples < min_samples:
+    raise ValueError(f"method {method} requires num_samples >= {min_samples}, "
+                     f"got {num_samples}")
+
+
+def trace_estimate(A, x, key, *, num_samples=30, method='hutch++'):
+  """Estimate the trace of a linear operator from matrix-vector products.
+
+  The Hutchinson estimator averages ``z^H A z`` over random sign vectors ``z``.
+  Hutch++ spends two thirds of its matrix-vector products on computing the
+  trace exactly on a sketch of the dominant subspace of ``A``, and applies
+  Hutchinson's estimator only to the remainder. Its error decays like
+  ``1 / num_samples`` rather than ``1 / sqrt(num_samples)`` for operators with
+  decaying spectra. Both methods use exactly ``num_samples`` matrix-vector
+  products, computed by vectorizing ``A`` with ``vmap``.
+
+  Parameters
+  ----------
+  A: ndarray or function
+      2D array or function that calculates the linear map (matrix-vector
+      product) ``Ax`` when called like ``A(x)``. ``A`` must return array(s)
+      with the same structure and shape as its argument.
+  x : array or tree of arrays
+      An example argument for ``A``, defining the structure, shapes and dtypes
+      of vectors. Its values are not used.
+  key : PRNGKey
+      Key for generating the random probe vectors.
+
+  Returns
+  -------
+  trace : array
+      Scalar estimate of the real part of the trace of ``A``.
+
+  Other Parameters
+  ----------------
+  num_samples : integer, optional
+      Number of matrix-vector products. Default is 30.
+  method : {'hutch++', 'hutchinson'}, optional
+      The estimator to use. Default is 'hutch++'.
+
+  See also
+  --------
+  jax.scipy.sparse.linalg.logdet_estimate
+  """
+  _check_estimator_args(method, num_samples)
+  A = _normalize_matvec(A)
+  x = device_put(x)
+
+  if method == 'hutchinson':
+    Z = _rademacher_probes(key, x, num_samples)
+    return jnp.mean(vmap(lambda z: _vdot_real_tree(z, A(z)))(Z))
+
+  x_flat, unravel = ravel_pytree(x)
+  block_matvec = vmap(_flat_matvec(A, unravel), in_axes=1, out_axes=1)
+  quadratic_forms = lambda V: jnp.sum((V.conj() * block_matvec(V)).real, 0)
+  return _hutch_plus_plus(block_matvec, quadratic_forms, key, x_flat,
+                          num_samples)
+
+
+def logdet_estimate(A, x, key, *, num_samples=30, num_steps=20,
+                    method='hutchinson'):
+  """Estimate the log-determinant of a positive definite linear operator.
+
+  Uses stochastic Lanczos quadrature: ``log(det(A)) = trace(log(A))`` is
+  estimated with the Hutchinson or Hutch++ estimator, where each quadratic form
+  ``z^H log(A) z`` is approximated by Gauss quadrature from ``num_steps``
+  Lanczos iterations started at ``z``. Hutchinson's method costs
+  ``num_samples * num_steps`` matrix-vector products; Hutch++ costs up to
+  ``4/3`` times more, as it computes ``log(A)`` applied to its sketch.
+
+  Derivatives of ``logdet_estimate`` are not defined.
+
+  Parameters
+  ----------
+  A: ndarray or function
+      2D array or function that calculates the linear map (matrix-vector
+      product) ``Ax`` when called like ``A(x)``. ``A`` must represent a
+      hermitian positive definite operator, and must return array(s) with the
+      same structure and shape as its argument.
+  x : array or tree of arrays
+      An example argument for ``A``, defining the structure, shapes and dtypes
+      of vectors. Its values are not used.
+  key : PRNGKey
+      Key for generating the random probe vectors.
+
+  Returns
+  -------
+  logdet : array
+      Scalar estimate of ``log(det(A))``.
+
+  Other Parameters
+  ----------------
+  num_samples : integer, optional
+      Number of probe vectors. Default is 30.
+  num_steps : integer, optional
+      Number of Lanczos iterations per probe vector. Default is 20.
+  method : {'hutchinson', 'hutch++'}, optional
+      The trace estimator to use. Default is 'hutchinson'.
+
+  See also
+  --------
+  jax.scipy.sparse.linalg.trace_estimate
+  """
+  _check_estimator_args(method, num_samples)
+  A = _normalize_matvec(A)
+  x = device_put(x)
+
+  if method == 'hutchinson':
+    Z = _rademacher_probes(key, x, num_samples)
+    return jnp.mean(vmap(partial(_log_quadratic_form, A,
+                                 num_steps=num_steps))(Z))
+
+  x_flat, unravel = ravel_pytree(x)
+  A_flat = _flat_matvec(A, unravel)
+  block_matvec = vmap(partial(_log_matvec, A_flat, num_steps=num_steps),
+                      in_axes=1, out_axes=1)
+  quadratic_forms = vmap(partial(_log_quadratic_form, A_flat,
+                                 num_steps=num_steps), in_axes=1)
+  return _hutch_plus_plus(block_matvec, quadratic_forms, key, x_flat,
+                          num_samples)
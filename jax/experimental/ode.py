@@ -12,23 +12,31 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""JAX-based Dormand-Prince ODE integration with adaptive stepsize.
+"""JAX-based ODE integration with adaptive stepsize.
 
 Integrate systems of ordinary differential equations (ODEs) using the JAX
-autograd/diff library and the Dormand-Prince method for adaptive integration
-stepsize calculation. Provides improved integration accuracy over fixed
-stepsize integration methods.
+autograd/diff library and adaptive integration stepsize calculation. Provides
+improved integration accuracy over fixed stepsize integration methods.
 
-For details of the mixed 4th/5th order Runge-Kutta integration method, see
-https://doi.org/10.1090/S0025-5718-1986-0815836-3
+The available methods are:
+
+- ``'dopri5'``: the mixed 4th/5th order Runge-Kutta method of Dormand and
+  Prince, https://doi.org/10.1090/S0025-5718-1986-0815836-3
+- ``'tsit5'``: the mixed 4th/5th order Runge-Kutta method of Tsitouras,
+  https://doi.org/10.1016/j.camwa.2011.06.002
+- ``'rosenbrock23'``: the L-stable mixed 2nd/3rd order Rosenbrock method of
+  Shampine and Reichelt for stiff problems, https://doi.org/10.1137/S1064827594276424
 
 Adjoint algorithm based on Appendix C of https://arxiv.org/pdf/1806.07366.pdf
 """
 
 
 from functools import partial
+from typing import Callable, NamedTuple
 import operator as op
 
+import numpy as np
+
 import jax
 import jax.numpy as jnp
 from jax import core
@@ -36,7 +44,8 @@ from jax import custom_derivatives
 from jax import lax
 from jax._src.util import safe_map, safe_zip
 from jax.flatten_util import ravel_pytree
-from jax.tree_util import tree_map
+from jax.scipy.sparse import linalg as sparse_linalg
+from jax.tree_util import tree_leaves, tree_map
 from jax import linear_util as lu
 
 map = safe_map
@@ -62,6 +71,12 @@ def interp_fit_dopri(y0, y1, k, dt):
   y_mid = y0 + dt * jnp.dot(dps_c_mid, k)
   return jnp.asarray(fit_4th_order_polynomial(y0, y1, y_mid, k[0], k[-1], dt))
 
+def interp_eval(interp_coeff, relative_output_time):
+  # Evaluate the 4th order dense output polynomial directly, as a single dot
+  # product with the powers of the relative output time.
+  powers = relative_output_time ** jnp.arange(4, -1, -1)
+  return jnp.dot(powers, interp_coeff)
+
 def fit_4th_order_polynomial(y0, y1, y_mid, dy0, dy1, dt):
   a = -2.*dt*dy0 + 2.*dt*dy1 -  8.*y0 -  8.*y1 + 16.*y_mid
   b =  5.*dt*dy0 - 3.*dt*dy1 + 18.*y0 + 14.*y1 - 32.*y_mid
@@ -120,6 +135,124 @@ def runge_kutta_step(func, y0, f0, t0, dt):
   f1 = k[-1]
   return y1, f1, y1_error, k
 
+def _dopri5_step(func, y0, f0, t0, dt):
+  y1, f1, y1_error, k = runge_kutta_step(func, y0, f0, t0, dt)
+  return y1, f1, y1_error, interp_fit_dopri(y0, y1, k, dt)
+
+# Tsit5 Butcher tableau. The last row of _TSIT5_A is also the solution weights.
+_TSIT5_ALPHA = [0.161, 0.327, 0.9, 0.9800255409045097, 1., 1.]
+_TSIT5_A = np.array([
+    [0.161, 0, 0, 0, 0, 0, 0],
+    [-0.008480655492356989, 0.335480655492357, 0, 0, 0, 0, 0],
+    [2.897153057105493, -6.359448489975075, 4.3622954328695815, 0, 0, 0, 0],
+    [5.325864828439257, -11.748883564062828, 7.4955393428898365,
+     -0.09249506636175525, 0, 0, 0],
+    [5.86145544294642, -12.92096931784711, 8.159367898576159,
+     -0.071584973281401, -0.028269050394068383, 0, 0],
+    [0.09646076681806523, 0.01, 0.4798896504144996, 1.379008574103742,
+     -3.290069515436081, 2.324710524099774, 0]
+])
+_TSIT5_C_ERROR = [0.001780011052226, 0.000816434459657, -0.007880878010262,
+                  0.144711007173263, -0.582357165452555, 0.458082105929187,
+                  -1. / 66.]
+
+def _tsit5_interp_coefficients():
+  # Tsitouras' 4th order dense output: the solution at t0 + theta * dt is
+  # y0 + dt * sum_i b_i(theta) k_i. Returns the coefficients of the b_i,
+  # highest power of theta first, as a [5, 7] matrix.
+  theta = np.poly1d([1., 0.])
+  b = [
+      -1.0530884977290216 * theta * (theta - 1.3299890189751412) *
+      np.poly1d([1., -1.4364028541716351, 0.7139816917074209]),
+      0.1017 * theta ** 2 * np.poly1d([1., -2.1966568338249754, 1.2949852507374631]),
+      2.490627285651252793 * theta ** 2 *
+      np.poly1d([1., -2.38535645472061657, 1.57803468208092486]),
+      -16.54810288924490272 * (theta - 1.21712927295533244) *
+      (theta - 0.61620406037800089) * theta ** 2,
+      47.37952196281928122 * (theta - 1.203071208372362603) *
+      (theta - 0.658047292653547382) * theta ** 2,
+      -34.87065786149660974 * (theta - 1.2) * (theta - 0.666666666666666667) * theta ** 2,
+      2.5 * (theta - 1) * (theta - 0.6) * theta ** 2,
+  ]
+  return np.stack([np.pad(p.coeffs, (5 - len(p.coeffs), 0)) for p in b], axis=1)
+
+_TSIT5_INTERP = _tsit5_interp_coefficients()
+
+def _tsit5_step(func, y0, f0, t0, dt):
+  alpha = jnp.array(_TSIT5_ALPHA)
+  beta = jnp.array(_TSIT5_A)
+  c_error = jnp.array(_TSIT5_C_ERROR)
+
+  def body_fun(i, k):
+    ti = t0 + dt * alpha[i-1]
+    yi = y0 + dt * jnp.dot(beta[i-1, :], k)
+    ft = func(yi, ti)
+    return k.at[i, :].set(ft)
+
+  k = jnp.zeros((7, f0.shape[0]), f0.dtype).at[0, :].set(f0)
+  k = lax.fori_loop(1, 7, body_fun, k)
+
+  y1 = dt * jnp.dot(beta[-1], k) + y0
+  y1_error = dt * jnp.dot(c_error, k)
+  interp_coeff = (dt * jnp.dot(jnp.array(_TSIT5_INTERP), k)).at[-1].add(y0)
+  return y1, k[-1], y1_error, interp_coeff
+
+_ROSENBROCK23_D = 1 / (2 + np.sqrt(2))
+_ROSENBROCK23_E32 = 6 + np.sqrt(2)
+
+def _rosenbrock23_step(func, y0, f0, t0, dt, *, linear_tol):
+  # Shampine & Reichelt, The MATLAB ODE Suite, SIAM J. Sci. Comput. 18 (1997).
+  # Each stage solves a system with W = I - dt * d * df/dy, which is applied
+  # matrix-free with Jacobian-vector products and solved with GMRES.
+  d, e32 = _ROSENBROCK23_D, _ROSENBROCK23_E32
+  _, jvp_fun = jax.linearize(lambda y: func(y, t0), y0)
+  _, dfdt = jax.jvp(lambda t: func(y0, t), (t0,), (jnp.ones_like(t0),))
+  hd = dt * d
+  tol = max(linear_tol, 10 * float(jnp.finfo(y0.dtype).eps))
+
+  def solve(b):
+    x, _ = sparse_linalg.gmres(lambda v: v - hd * jvp_fun(v), b, tol=tol)
+    return x
+
+  k1 = solve(f0 + hd * dfdt)
+  f1 = func(y0 + 0.5 * dt * k1, t0 + 0.5 * dt)
+  k2 = solve(f1 - k1) + k1
+  y1 = y0 + dt * k2
+  f2 = func(y1, t0 + dt)
+  k3 = solve(f2 - e32 * (k2 - f1) - 2 * (k1 - f0) + hd * dfdt)
+  y1_error = dt / 6 * (k1 - 2 * k2 + k3)
+  # Dense output: y0 + dt * (s * (1 - s) * k1 + s * (s - 2d) * k2) / (1 - 2d).
+  zero = jnp.zeros_like(y0)
+  interp_coeff = jnp.stack([zero, zero, dt * (k2 - k1) / (1 - 2 * d),
+                            dt * (k1 - 2 * d * k2) / (1 - 2 * d), y0])
+  return y1, f2, y1_error, interp_coeff
+
+class _Method(NamedTuple):
+  step: Callable
+  order: int  # Order of the lower-order solution of the embedded pair.
+  implicit: bool = False
+
+_METHODS = {
+    'dopri5': _Method(_dopri5_step, 4),
+    'tsit5': _Method(_tsit5_step, 4),
+    'rosenbrock23': _Method(_rosenbrock23_step, 2, implicit=True),
+}
+
+def _get_method(method, rtol):
+  """Returns the step function and order of an integration method.
+
+  The step function maps ``(func, y0, f0, t0, dt)`` to the new state, its time
+  derivative, an estimate of the local error and the coefficients of a degree
+  4 polynomial in ``(t - t0) / dt`` that interpolates the solution.
+  """
+  if method not in _METHODS:
+    raise ValueError(f"Unknown odeint method {method!r}; expected one of "
+                     f"{sorted(_METHODS)}.")
+  step, order, implicit = _METHODS[method]
+  if implicit:
+    step = partial(step, linear_tol=0.01 * rtol)
+  return step, order
+
 def abs2(x):
   if jnp.iscomplexobj(x):
     return x.real ** 2 + x.imag ** 2
@@ -142,8 +275,15 @@ def optimal_step_size(last_step, mean_error_ratio, safety=0.9, ifactor=10.0,
                       jnp.minimum(err_ratio**(1.0 / order) / safety, 1.0 / dfactor))
   return jnp.where(mean_error_ratio == 0, last_step * ifactor, last_step / factor)
 
-def odeint(func, y0, t, *args, rtol=1.4e-8, atol=1.4e-8, mxstep=jnp.inf):
-  """Adaptive stepsize (Dormand-Prince) Runge-Kutta odeint implementation.
+def _check_arg(arg):
+  if not isinstance(arg, core.Tracer) and not core.valid_jaxtype(arg):
+    msg = ("The contents of odeint *args must be arrays or scalars, but got "
+           "\n{}.")
+    raise TypeError(msg.format(arg))
+
+def odeint(func, y0, t, *args, rtol=1.4e-8, atol=1.4e-8, mxstep=jnp.inf,
+           method='dopri5', adjoint='backsolve', checkpoints=1):
+  """Adaptive stepsize Runge-Kutta odeint implementation.
 
   Args:
     func: function to evaluate the time derivative of the solution `y` at time
@@ -157,31 +297,68 @@ def odeint(func, y0, t, *args, rtol=1.4e-8, atol=1.4e-8, mxstep=jnp.inf):
     rtol: float, relative local error tolerance for solver (optional).
     atol: float, absolute local error tolerance for solver (optional).
     mxstep: int, maximum number of steps to take for each timepoint (optional).
+    method: string, the integration method: ``'dopri5'`` (default),
+      ``'tsit5'`` or, for stiff problems, ``'rosenbrock23'`` (optional).
+    adjoint: string, how reverse-mode derivatives are computed (optional).
+      ``'backsolve'`` (default) solves the adjoint ODE backwards in time,
+      restarting the backwards solution of `y` from a stored forward state at
+      each of `checkpoints` evenly spaced times per interval of `t`.
+      ``'discrete'`` differentiates through the solver steps themselves, which
+      gives the exact gradient of the computed solution; it requires a finite
+      `mxstep` and stores the solver state at `checkpoints` evenly spaced steps
+      per interval of `t`, recomputing the steps in between on the backward
+      pass. As the number of steps must be fixed, every interval of `t` costs
+      the full `mxstep` budget of steps, both forwards and backwards, even when
+      the solution reaches the end of the interval in fewer steps; choose
+      `mxstep` close to the number of steps needed.
+    checkpoints: int, the number of stored forward states per interval of
+      `t` used by the backward pass (optional). More checkpoints use more
+      memory, and make the backwards solution more accurate for ``'backsolve'``
+      or recompute fewer steps for ``'discrete'``.
 
   Returns:
     Values of the solution `y` (i.e. integrated system values) at each time
     point in `t`, represented as an array (or pytree of arrays) with the same
     shape/structure as `y0` except with a new leading axis of length `len(t)`.
   """
-  def _check_arg(arg):
-    if not isinstance(arg, core.Tracer) and not core.valid_jaxtype(arg):
-      msg = ("The contents of odeint *args must be arrays or scalars, but got "
-             "\n{}.")
-      raise TypeError(msg.format(arg))
-
+  for arg in tree_leaves(args):
+    _check_arg(arg)
+  _get_method(method, rtol)
+  if adjoint not in ('backsolve', 'discrete'):
+    raise ValueError(f"Unknown odeint adjoint {adjoint!r}; expected "
+                     "'backsolve' or 'discrete'.")
+  try:
+    positive = op.index(checkpoints) >= 1
+  except TypeError:
+    positive = False
+  if not positive:
+    raise ValueError(f"odeint checkpoints must be a positive integer, got "
+                     f"{checkpoints}.")
+  checkpoints = op.index(checkpoints)
+  if adjoint == 'discrete':
+    if not np.isfinite(mxstep):
+      raise ValueError("odeint with adjoint='discrete' requires a finite mxstep.")
+    mxstep = int(mxstep)
   converted, consts = custom_derivatives.closure_convert(func, y0, t[0], *args)
-  return _odeint_wrapper(converted, rtol, atol, mxstep, y0, t, *args, *consts)
+  return _odeint_wrapper(converted, rtol, atol, mxstep, method, adjoint,
+                         checkpoints, y0, t, *args, *consts)
 
-@partial(jax.jit, static_argnums=(0, 1, 2, 3))
-def _odeint_wrapper(func, rtol, atol, mxstep, y0, ts, *args):
+@partial(jax.jit, static_argnums=(0, 1, 2, 3, 4, 5, 6))
+def _odeint_wrapper(func, rtol, atol, mxstep, method, adjoint, checkpoints, y0,
+                    ts, *args):
   y0, unravel = ravel_pytree(y0)
   func = ravel_first_arg(func, unravel)
-  out = _odeint(func, rtol, atol, mxstep, y0, ts, *args)
+  if adjoint == 'discrete':
+    out = _odeint_discrete(func, rtol, atol, mxstep, method, checkpoints, y0, ts,
+                           *args)
+  else:
+    out = _odeint(func, rtol, atol, mxstep, method, checkpoints, y0, ts, *args)
   return jax.vmap(unravel)(out)
 
-@partial(jax.custom_vjp, nondiff_argnums=(0, 1, 2, 3))
-def _odeint(func, rtol, atol, mxstep, y0, ts, *args):
+@partial(jax.custom_vjp, nondiff_argnums=(0, 1, 2, 3, 4, 5))
+def _odeint(func, rtol, atol, mxstep, method, checkpoints, y0, ts, *args):
   func_ = lambda y, t: func(y, t, *args)
+  step, order = _get_method(method, rtol)
 
   def scan_fun(carry, target_t):
 
@@ -191,11 +368,10 @@ def _odeint(func, rtol, atol, mxstep, y0, ts, *args):
 
     def body_fun(state):
       i, y, f, t, dt, last_t, interp_coeff = state
-      next_y, next_f, next_y_error, k = runge_kutta_step(func_, y, f, t, dt)
+      next_y, next_f, next_y_error, new_interp_coeff = step(func_, y, f, t, dt)
       next_t = t + dt
       error_ratios = error_ratio(next_y_error, rtol, atol, y, next_y)
-      new_interp_coeff = interp_fit_dopri(y, next_y, k, dt)
-      dt = optimal_step_size(dt, error_ratios)
+      dt = optimal_step_size(dt, error_ratios, order=order + 1)
 
       new = [i + 1, next_y, next_f, next_t, dt,      t, new_interp_coeff]
       old = [i + 1,      y,      f,      t, dt, last_t,     interp_coeff]
@@ -204,22 +380,33 @@ def _odeint(func, rtol, atol, mxstep, y0, ts, *args):
     _, *carry = lax.while_loop(cond_fun, body_fun, [0] + carry)
     _, _, t, _, last_t, interp_coeff = carry
     relative_output_time = (target_t - last_t) / (t - last_t)
-    y_target = jnp.polyval(interp_coeff, relative_output_time)
+    y_target = interp_eval(interp_coeff, relative_output_time)
     return carry, y_target
 
   f0 = func_(y0, ts[0])
-  dt = initial_step_size(func_, ts[0], y0, 4, rtol, atol, f0)
+  dt = initial_step_size(func_, ts[0], y0, order, rtol, atol, f0)
   interp_coeff = jnp.array([y0] * 5)
   init_carry = [y0, f0, ts[0], dt, ts[0], interp_coeff]
   _, ys = lax.scan(scan_fun, init_carry, ts[1:])
   return jnp.concatenate((y0[None], ys))
 
-def _odeint_fwd(func, rtol, atol, mxstep, y0, ts, *args):
-  ys = _odeint(func, rtol, atol, mxstep, y0, ts, *args)
-  return ys, (ys, ts, args)
+def _refine_times(ts, num):
+  # Subdivide each interval of `ts` into `num` equal intervals.
+  fractions = jnp.arange(num) / num
+  fine = ts[:-1, None] + (ts[1:] - ts[:-1])[:, None] * fractions
+  return jnp.concatenate([fine.ravel(), ts[-1:]])
+
+def _odeint_fwd(func, rtol, atol, mxstep, method, checkpoints, y0, ts, *args):
+  # The forward solution is also stored at the checkpoints between output
+  # times; the choice of output times does not affect the solver steps.
+  ys = _odeint(func, rtol, atol, mxstep, method, checkpoints, y0,
+               _refine_times(ts, checkpoints), *args)
+  return ys[::checkpoints], (ys, ts, args)
 
-def _odeint_rev(func, rtol, atol, mxstep, res, g):
-  ys, ts, args = res
+def _odeint_rev(func, rtol, atol, mxstep, method, checkpoints, res, g):
+  ys, coarse_ts, args = res
+  ts, refine_vjp = jax.vjp(partial(_refine_times, num=checkpoints), coarse_ts)
+  g = jnp.zeros_like(ys).at[::checkpoints].set(g)
 
   def aug_dynamics(augmented_state, t, *args):
     """Original system augmented with vjp_y, vjp_t and vjp_args."""
@@ -243,7 +430,7 @@ def _odeint_rev(func, rtol, atol, mxstep, res, g):
     _, y_bar, t0_bar, args_bar = odeint(
         aug_dynamics, (ys[i], y_bar, t0_bar, args_bar),
         jnp.array([-ts[i], -ts[i - 1]]),
-        *args, rtol=rtol, atol=atol, mxstep=mxstep)
+        *args, rtol=rtol, atol=atol, mxstep=mxstep, method=method)
     y_bar, t0_bar, args_bar = tree_map(op.itemgetter(1), (y_bar, t0_bar, args_bar))
     # Add gradient from current output
     y_bar = y_bar + g[i - 1]
@@ -253,6 +440,179 @@ def _odeint_rev(func, rtol, atol, mxstep, res, g):
   (y_bar, t0_bar, args_bar), rev_ts_bar = lax.scan(
       scan_fun, init_carry, jnp.arange(len(ts) - 1, 0, -1))
   ts_bar = jnp.concatenate([jnp.array([t0_bar]), rev_ts_bar[::-1]])
+  ts_bar, = refine_vjp(ts_bar)
   return (y_bar, ts_bar, *args_bar)
 
 _odeint.defvjp(_odeint_fwd, _odeint_rev)
+
+def _odeint_discrete(func, rtol, atol, mxstep, method, checkpoints, y0, ts,
+                     *args):
+  # Each interval of `ts` takes a fixed budget of at least `mxstep` steps, split
+  # into `checkpoints` segments which are rematerialized on the backward pass.
+  # Steps after the solution reaches the output time are masked out. The step
+  # size controller is treated as constant, as its derivatives are not smooth.
+  func_ = lambda y, t: func(y, t, *args)
+  step, order = _get_method(method, rtol)
+  segment_steps = -(-mxstep // checkpoints)
+
+  def step_fun(target_t, state, _):
+    y, f, t, dt, last_t, interp_coeff = state
+    next_y, next_f, next_y_error, new_interp_coeff = step(func_, y, f, t, dt)
+    error_ratios = lax.stop_gradient(
+        error_ratio(next_y_error, rtol, atol, y, next_y))
+    active = (t < target_t) & (dt > 0)
+    accept = active & jnp.all(error_ratios <= 1.)
+    next_dt = optimal_step_size(dt, error_ratios, order=order + 1)
+
+    new = [next_y, next_f, t + dt, t, new_interp_coeff]
+    old = [     y,      f,      t, last_t,     interp_coeff]
+    y, f, t, last_t, interp_coeff = map(partial(jnp.where, accept), new, old)
+    dt = jnp.where(active, next_dt, dt)
+    return [y, f, t, dt, last_t, interp_coeff], None
+
+  @jax.checkpoint
+  def segment_fun(state, target_t):
+    state, _ = lax.scan(partial(step_fun, target_t), state, None,
+                        length=segment_steps)
+    return state
+
+  def scan_fun(carry, target_t):
+    carry, _ = lax.scan(lambda state, _: (segment_fun(state, target_t), None),
+                        carry, None, length=checkpoints)
+    _, _, t, _, last_t, interp_coeff = carry
+    relative_output_time = (target_t - last_t) / (t - last_t)
+    return carry, interp_eval(interp_coeff, relative_output_time)
+
+  f0 = func_(y0, ts[0])
+  dt = lax.stop_gradient(initial_step_size(func_, ts[0], y0, order, rtol, atol, f0))
+  interp_coeff = jnp.array([y0] * 5)
+  init_carry = [y0, f0, ts[0], dt, ts[0], interp_coeff]
+  _, ys = lax.scan(scan_fun, init_carry, ts[1:])
+  return jnp.concatenate((y0[None], ys))
+
+
+def odeint_batched(func, y0, t, *args, rtol=1.4e-8, atol=1.4e-8, mxstep=jnp.inf,
+                   method='dopri5', in_axes=None):
+  """Integrates a batch of independent trajectories with per-trajectory steps.
+
+  Equivalent to ``jax.vmap(odeint)`` over the leading axis of ``y0``, but each
+  trajectory keeps its own step size and position, and the integration loop
+  runs until every trajectory has reached ``t[-1]``, rather than running every
+  trajectory in lockstep until the slowest has reached each output time.
+  Trajectories that have finished are masked out of the remaining steps.
+
+  Args:
+    func: function to evaluate the time derivative of a single trajectory `y`
+      at time `t` as `func(y, t, *args)`, as for :func:`odeint`.
+    y0: array or pytree of arrays representing the initial values, with a
+      leading batch axis of the same size on every leaf.
+    t: array of float times for evaluation, shared by all trajectories, in
+      which the values must be strictly increasing.
+    *args: tuple of additional arguments for `func`.
+    rtol: float, relative local error tolerance for solver (optional).
+    atol: float, absolute local error tolerance for solver (optional).
+    mxstep: int, maximum number of steps to take for each timepoint (optional).
+    method: string, the integration method, as for :func:`odeint` (optional).
+    in_axes: ``None``, ``0`` or a tuple with one entry per element of `args`,
+      indicating which of `args` have a leading batch axis (``0``) and which
+      are shared by all trajectories (``None``). Defaults to ``None``.
+
+  Returns:
+    Values of the solution at each time point in `t`, with the same
+    shape/structure as `y0` except with a new axis of length `len(t)` after the
+    batch axis.
+
+  Reverse-mode differentiation is not supported; use ``jax.vmap(odeint)`` when
+  gradients are needed.
+  """
+  for arg in tree_leaves(args):
+    _check_arg(arg)
+  _get_method(method, rtol)
+  if in_axes is None or isinstance(in_axes, int):
+    in_axes = (in_axes,) * len(args)
+  in_axes = tuple(in_axes)
+  if len(in_axes) != len(args):
+    raise ValueError(f"odeint_batched in_axes must have one entry per argument, "
+                     f"got {len(in_axes)} entries for {len(args)} arguments.")
+  if any(axis not in (None, 0) for axis in in_axes):
+    raise ValueError(f"odeint_batched in_axes entries must be None or 0, got "
+                     f"{in_axes}.")
+  batch_sizes = {jnp.shape(leaf)[0] if jnp.ndim(leaf) else None
+                 for leaf in tree_leaves(y0)}
+  if len(batch_sizes) != 1 or None in batch_sizes:
+    raise ValueError("odeint_batched y0 leaves must share a leading batch "
+                     f"axis, got batch sizes {batch_sizes}.")
+
+  lane = partial(tree_map, op.itemgetter(0))
+  lane_args = [arg if axis is None else lane(arg)
+               for arg, axis in zip(args, in_axes)]
+  converted, consts = custom_derivatives.closure_convert(
+      func, lane(y0), t[0], *lane_args)
+  in_axes = in_axes + (None,) * len(consts)
+  return _odeint_batched(converted, rtol, atol, mxstep, method, in_axes, y0, t,
+                         *args, *consts)
+
+@partial(jax.jit, static_argnums=(0, 1, 2, 3, 4, 5))
+def _odeint_batched(func, rtol, atol, mxstep, method, in_axes, y0, ts, *args):
+  step, order = _get_method(method, rtol)
+  _, unravel = ravel_pytree(tree_map(op.itemgetter(0), y0))
+  y0 = jax.vmap(lambda y: ravel_pytree(y)[0])(y0)
+  func = ravel_first_arg(func, unravel)
+  num_lanes, num_ts = y0.shape[0], ts.shape[0]
+  lanes = jnp.arange(num_lanes)
+
+  def init_lane(y0, args):
+    func_ = lambda y, t: func(y, t, *args)
+    f0 = func_(y0, ts[0])
+    return f0, initial_step_size(func_, ts[0], y0, order, rtol, atol, f0)
+
+  def step_lane(y, f, t, dt, args):
+    func_ = lambda y, t: func(y, t, *args)
+    next_y, next_f, next_y_error, interp_coeff = step(func_, y, f, t, dt)
+    error_ratios = error_ratio(next_y_error, rtol, atol, y, next_y)
+    next_dt = optimal_step_size(dt, error_ratios, order=order + 1)
+    return next_y, next_f, interp_coeff, error_ratios <= 1., next_dt
+
+  # Each lane carries the index `j` of its next output time and the number of
+  # steps `i` taken since its last output; lanes with `j == len(ts)` are done.
+  def needs_output(state):
+    j, i, _, _, t, dt, _, _, _ = state
+    target_t = ts[jnp.minimum(j, num_ts - 1)]
+    return (j < num_ts) & ((t >= target_t) | (i >= mxstep) | (dt <= 0))
+
+  def emit_fun(state):
+    j, i, y, f, t, dt, last_t, interp_coeff, ys = state
+    emit = needs_output(state)
+    target_t = ts[jnp.minimum(j, num_ts - 1)]
+    relative_output_time = (target_t - last_t) / (t - last_t)
+    y_target = jax.vmap(interp_eval)(interp_coeff, relative_output_time)
+    ys = ys.at[jnp.where(emit, j, num_ts), lanes].set(y_target, mode='drop')
+    return [j + emit, jnp.where(emit, 0, i), y, f, t, dt, last_t, interp_coeff,
+            ys]
+
+  def emit_all(state):
+    # A single step may pass several output times, so keep emitting until
+    # every lane is waiting on an output time beyond its current time.
+    return lax.while_loop(lambda s: jnp.any(needs_output(s)), emit_fun, state)
+
+  def body_fun(state):
+    j, i, y, f, t, dt, last_t, interp_coeff, ys = state
+    active = j < num_ts
+    next_y, next_f, new_interp_coeff, ok, next_dt = jax.vmap(
+        step_lane, (0, 0, 0, 0, in_axes))(y, f, t, dt, args)
+    accept = active & ok
+    where = lambda new, old: jnp.where(
+        accept.reshape(accept.shape + (1,) * (new.ndim - 1)), new, old)
+    state = [j, i + active, where(next_y, y), where(next_f, f),
+             where(t + dt, t), jnp.where(active, next_dt, dt),
+             where(t, last_t), where(new_interp_coeff, interp_coeff), ys]
+    return emit_all(state)
+
+  f0, dt = jax.vmap(init_lane, (0, in_axes))(y0, args)
+  t0 = jnp.full((num_lanes,), ts[0])
+  ys = jnp.zeros((num_ts,) + y0.shape, y0.dtype).at[0].set(y0)
+  init_state = [jnp.ones(num_lanes, jnp.int32), jnp.zeros(num_lanes, jnp.int32),
+                y0, f0, t0, dt, t0, jnp.stack([y0] * 5, axis=1), ys]
+  state = emit_all(init_state)
+  *_, ys = lax.while_loop(lambda s: jnp.any(s[0] < num_ts), body_fun, state)
+  return jax.vmap(jax.vmap(unravel))(jnp.swapaxes(ys, 0, 1))
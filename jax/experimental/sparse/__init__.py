@@ -198,8 +198,12 @@ from .bcoo import (
     bcoo_fromdense_p as bcoo_fromdense_p,
     bcoo_reduce_sum as bcoo_reduce_sum,
     bcoo_rdot_general as bcoo_rdot_general,
+    bcoo_sort_indices as bcoo_sort_indices,
     bcoo_spdot_general as bcoo_spdot_general,
     bcoo_spdot_general_p as bcoo_spdot_general_p,
+    bcoo_spgemm as bcoo_spgemm,
+    bcoo_spgemm_sizes as bcoo_spgemm_sizes,
+    bcoo_sum_duplicates as bcoo_sum_duplicates,
     bcoo_todense as bcoo_todense,
     bcoo_todense_p as bcoo_todense_p,
     bcoo_transpose as bcoo_transpose,
@@ -207,6 +211,19 @@ from .bcoo import (
     BCOO as BCOO,
 )
 
+from .bsr import (
+    bsr_extract as bsr_extract,
+    bsr_extract_p as bsr_extract_p,
+    bsr_fromdense as bsr_fromdense,
+    bsr_matmat as bsr_matmat,
+    bsr_matmat_p as bsr_matmat_p,
+    bsr_matvec as bsr_matvec,
+    bsr_todense as bsr_todense,
+    bsr_todense_p as bsr_todense_p,
+    bsr_transpose as bsr_transpose,
+    BSR as BSR,
+)
+
 from .ops import (
     coo_fromdense as coo_fromdense,
     coo_fromdense_p as coo_fromdense_p,
@@ -230,3 +247,5 @@ from .ops import (
 )
 
 from .transform import sparsify as sparsify
+
+from . import preconditioners as preconditioners
@@ -136,7 +136,7 @@ def _validate_bcoo(data: jnp.ndarray, indices: jnp.ndarray, shape: Sequence[int]
 
 bcoo_todense_p = core.Primitive('bcoo_todense_p')
 
-def bcoo_todense(data, indices, *, shape):
+def bcoo_todense(data, indices, *, shape, indices_sorted=False, unique_indices=False):
   """Convert batched sparse matrix to a dense matrix.
 
   Args:
@@ -145,14 +145,19 @@ def bcoo_todense(data, indices, *, shape):
     shape : tuple; the shape of the (batched) matrix. Equal to
       ``batch_dims + sparse_dims + block_dims``
       where ``len(sparse_dims) == n_sparse``
+    indices_sorted : bool; whether the indices are known to be sorted within
+      each batch (default: False)
+    unique_indices : bool; whether the in-bounds indices are known to be unique
+      within each batch (default: False)
 
   Returns:
     mat : array with specified shape and dtype matching ``data``
   """
-  return bcoo_todense_p.bind(jnp.asarray(data), jnp.asarray(indices), shape=tuple(shape))
+  return bcoo_todense_p.bind(jnp.asarray(data), jnp.asarray(indices), shape=tuple(shape),
+                             indices_sorted=indices_sorted, unique_indices=unique_indices)
 
 @bcoo_todense_p.def_impl
-def _bcoo_todense_impl(data, indices, *, shape):
+def _bcoo_todense_impl(data, indices, *, shape, indices_sorted, unique_indices):
   n_batch, n_sparse, _, _ = _validate_bcoo(data, indices, shape)
 
   ind_slices = tuple(np.zeros(s, int) if i_s == 1 else np.arange(s)
@@ -166,25 +171,31 @@ def _bcoo_todense_impl(data, indices, *, shape):
 
   if not sparse_ind:
     data = data.sum(n_batch, keepdims=bool(batch_ind))
-  return jnp.zeros(shape, data.dtype).at[batch_ind + sparse_ind].add(data)
+  # Out-of-bounds indices, used to pad sparse arrays, are dropped.
+  return jnp.zeros(shape, data.dtype).at[batch_ind + sparse_ind].add(
+      data, indices_are_sorted=indices_sorted, unique_indices=unique_indices,
+      mode='drop')
 
 @bcoo_todense_p.def_abstract_eval
-def _bcoo_todense_abstract_eval(data, indices, *, shape):
+def _bcoo_todense_abstract_eval(data, indices, *, shape, indices_sorted, unique_indices):
   _validate_bcoo(data, indices, shape)
   return core.ShapedArray(shape, data.dtype)
 
-def _bcoo_todense_jvp(data_dot, data, indices, *, shape):
-  return bcoo_todense(data_dot, indices, shape=shape)
+def _bcoo_todense_jvp(data_dot, data, indices, *, shape, indices_sorted, unique_indices):
+  return bcoo_todense(data_dot, indices, shape=shape, indices_sorted=indices_sorted,
+                      unique_indices=unique_indices)
 
-def _bcoo_todense_transpose(ct, data, indices, *, shape):
+def _bcoo_todense_transpose(ct, data, indices, *, shape, indices_sorted, unique_indices):
   assert ad.is_undefined_primal(data)
   if ad.is_undefined_primal(indices):
     raise ValueError("Cannot transpose with respect to sparse indices")
   assert ct.shape == shape
   assert ct.dtype == data.aval.dtype
-  return bcoo_extract(indices, ct), indices
+  return bcoo_extract(indices, ct, indices_sorted=indices_sorted,
+                      unique_indices=unique_indices), indices
 
-def _bcoo_todense_batching_rule(batched_args, batch_dims, *, shape):
+def _bcoo_todense_batching_rule(batched_args, batch_dims, *, shape, indices_sorted,
+                                unique_indices):
   data, indices = batched_args
   if any(b not in [0, None] for b in batch_dims):
     raise NotImplementedError(f"batch_dims={batch_dims}. Only 0 and None are supported.")
@@ -192,7 +203,8 @@ def _bcoo_todense_batching_rule(batched_args, batch_dims, *, shape):
     data = data[None, ...]
   if batch_dims[1] is None:
     indices = indices[None, ...]
-  return bcoo_todense(data, indices, shape=(max(data.shape[0], indices.shape[0]), *shape)), 0
+  return bcoo_todense(data, indices, shape=(max(data.shape[0], indices.shape[0]), *shape),
+                      indices_sorted=indices_sorted, unique_indices=unique_indices), 0
 
 ad.defjvp(bcoo_todense_p, _bcoo_todense_jvp, None)
 ad.primitive_transposes[bcoo_todense_p] = _bcoo_todense_transpose
@@ -301,12 +313,16 @@ xla.translations[bcoo_fromdense_p] = xla.lower_fun(
 
 bcoo_extract_p = core.Primitive('bcoo_extract')
 
-def bcoo_extract(indices, mat):
-  """Extract BCOO values from dense matrix `mat` at given BCOO indices."""
-  return bcoo_extract_p.bind(indices, mat)
+def bcoo_extract(indices, mat, *, indices_sorted=False, unique_indices=False):
+  """Extract BCOO values from dense matrix `mat` at given BCOO indices.
+
+  Values at out-of-bounds indices, used to pad sparse arrays, are zero.
+  """
+  return bcoo_extract_p.bind(indices, mat, indices_sorted=indices_sorted,
+                             unique_indices=unique_indices)
 
 @bcoo_extract_p.def_impl
-def _bcoo_extract_impl(indices, mat):
+def _bcoo_extract_impl(indices, mat, *, indices_sorted, unique_indices):
   n_batch, n_sparse, _, _ = _validate_bcoo(None, indices, mat.shape)
 
   ind_slices = tuple(np.zeros(s, int) if i_s == 1 else np.arange(s)
@@ -320,26 +336,31 @@ def _bcoo_extract_impl(indices, mat):
 
   if not sparse_ind + batch_ind:
     return mat[None]
-  return mat[batch_ind + sparse_ind]
+  return mat.at[batch_ind + sparse_ind].get(
+      indices_are_sorted=indices_sorted, unique_indices=unique_indices,
+      mode='fill', fill_value=0)
 
 @bcoo_extract_p.def_abstract_eval
-def _bcoo_extract_abstract_eval(indices, mat):
+def _bcoo_extract_abstract_eval(indices, mat, *, indices_sorted, unique_indices):
   n_batch, _, n_dense, nse = _validate_bcoo(None, indices, mat.shape)
   out_shape = mat.shape[:n_batch] + (nse,) + mat.shape[mat.ndim - n_dense:]
   return core.ShapedArray(out_shape, mat.dtype)
 
-def _bcoo_extract_jvp(mat_dot, indices, mat):
+def _bcoo_extract_jvp(mat_dot, indices, mat, *, indices_sorted, unique_indices):
   assert mat_dot.shape == mat.shape
-  return bcoo_extract(indices, mat_dot)
+  return bcoo_extract(indices, mat_dot, indices_sorted=indices_sorted,
+                      unique_indices=unique_indices)
 
-def _bcoo_extract_transpose(ct, indices, mat):
+def _bcoo_extract_transpose(ct, indices, mat, *, indices_sorted, unique_indices):
   assert ad.is_undefined_primal(mat)
   if ad.is_undefined_primal(indices):
     raise ValueError("Cannot transpose with respect to sparse indices")
   assert ct.dtype == mat.aval.dtype
-  return indices, bcoo_todense(ct, indices, shape=mat.aval.shape)
+  return indices, bcoo_todense(ct, indices, shape=mat.aval.shape,
+                               indices_sorted=indices_sorted,
+                               unique_indices=unique_indices)
 
-def _bcoo_extract_batching_rule(batched_args, batch_dims):
+def _bcoo_extract_batching_rule(batched_args, batch_dims, *, indices_sorted, unique_indices):
   indices, mat = batched_args
   assert any(b is not None for b in batch_dims)
   if batch_dims[0] is None:
@@ -354,7 +375,8 @@ def _bcoo_extract_batching_rule(batched_args, batch_dims):
   n_batch = indices.ndim - 2
   if bdim >= n_batch:
     raise ValueError(f"batch_dims={batch_dims} out of range for indices with n_batch={n_batch}")
-  return bcoo_extract(indices, mat), bdim
+  return bcoo_extract(indices, mat, indices_sorted=indices_sorted,
+                      unique_indices=unique_indices), bdim
 
 ad.defjvp(bcoo_extract_p, None, _bcoo_extract_jvp)
 ad.primitive_transposes[bcoo_extract_p] = _bcoo_extract_transpose
@@ -472,33 +494,47 @@ def _dot_general_validated_shape(lhs_shape: Shape, rhs_shape: Shape, dimension_n
     lhs, rhs, dimension_numbers=dimension_numbers,
     precision=None, preferred_element_type=None)
 
-def bcoo_dot_general(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape):
+def bcoo_dot_general(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape,
+                     indices_sorted=False):
   return bcoo_dot_general_p.bind(jnp.asarray(lhs_data), jnp.asarray(lhs_indices), jnp.asarray(rhs),
-                                 dimension_numbers=dimension_numbers, lhs_shape=tuple(lhs_shape))
+                                 dimension_numbers=dimension_numbers, lhs_shape=tuple(lhs_shape),
+                                 indices_sorted=indices_sorted)
 
-def bcoo_rdot_general(lhs, rhs_data, rhs_indices, *, dimension_numbers, rhs_shape):
+def bcoo_rdot_general(lhs, rhs_data, rhs_indices, *, dimension_numbers, rhs_shape,
+                      indices_sorted=False):
   # TODO(jakevdp): perhaps this should be part of the bcoo_dot_general primitive?
   result = bcoo_dot_general(rhs_data, rhs_indices, lhs, lhs_shape=rhs_shape,
-                            dimension_numbers=[d[::-1] for d in dimension_numbers])
+                            dimension_numbers=[d[::-1] for d in dimension_numbers],
+                            indices_sorted=indices_sorted)
   n_contract, n_batch = (len(d[0]) for d in dimension_numbers)
   n_swap = len(rhs_shape) - n_contract
   permutation = tuple([*range(n_batch), *range(n_swap, result.ndim), *range(n_batch, n_swap)])
   return lax.transpose(result, permutation)
 
 @bcoo_dot_general_p.def_impl
-def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape):
+def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape,
+                           indices_sorted):
   lhs_data = jnp.asarray(lhs_data)
   lhs_indices = jnp.asarray(lhs_indices)
   rhs = jnp.asarray(rhs)
   # Validate all inputs via abstract_eval
   out_aval = _bcoo_dot_general_abstract_eval(lhs_data.aval, lhs_indices.aval, rhs.aval,
                                              dimension_numbers=dimension_numbers,
-                                             lhs_shape=lhs_shape)
+                                             lhs_shape=lhs_shape,
+                                             indices_sorted=indices_sorted)
 
   (lhs_contracting, rhs_contracting) , (lhs_batch, rhs_batch) = dimension_numbers
   n_sparse = lhs_indices.shape[-1]
   n_batch = lhs_indices.ndim - 2
 
+  # Indices sorted within each batch remain sorted by output position when the
+  # batches keep their order and the contracting dimensions are the trailing
+  # sparse dimensions.
+  n_contracting = len(lhs_contracting)
+  output_sorted = (indices_sorted and tuple(lhs_batch) == tuple(range(len(lhs_batch))) and
+                   tuple(lhs_contracting) == tuple(range(n_batch + n_sparse - n_contracting,
+                                                         n_batch + n_sparse)))
+
   # Move lhs batch dimensions to the front
   if lhs_batch:
     perm = list(lhs_batch) + remaining(range(n_batch), lhs_batch)
@@ -506,7 +542,6 @@ def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs
     lhs_indices = lhs_indices.transpose(perm + list(range(n_batch, lhs_indices.ndim)))
 
   # Move lhs contracting dimensions to the front of sparse dims, in order
-  n_contracting = len(lhs_contracting)
   lhs_contracting = [d - n_batch for d in lhs_contracting]
   perm = list(lhs_contracting) + remaining(range(n_sparse), lhs_contracting)
   lhs_indices = lhs_indices[..., jnp.array(perm)]
@@ -516,12 +551,78 @@ def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs
           remaining(range(rhs.ndim), rhs_batch, rhs_contracting))
   rhs = rhs.transpose(perm)
 
+  batch_shape = tuple(lhs_shape[d] for d in lhs_batch) + tuple(
+      lhs_shape[d] for d in remaining(range(n_batch), lhs_batch))
+  out_sparse_shape = out_aval.shape[n_batch:n_batch + n_sparse - n_contracting]
+  if np.prod(batch_shape + out_sparse_shape) <= _BCOO_DOT_GENERAL_MAX_SEGMENTS:
+    return _bcoo_dot_general_fused(lhs_data, lhs_indices, rhs, out_aval=out_aval,
+                                   batch_shape=batch_shape, n_rhs_batch=len(lhs_batch),
+                                   n_contracting=n_contracting, output_sorted=output_sorted)
+  return _bcoo_dot_general_vmapped(lhs_data, lhs_indices, rhs, out_aval=out_aval,
+                                   n_rhs_batch=len(lhs_batch),
+                                   n_contracting=n_contracting)
+
+# Stored elements are summed into the output by a single sorted segment sum over
+# all batches, as long as the output segments can be numbered with int32;
+# otherwise each batch scatter-adds into its own output.
+_BCOO_DOT_GENERAL_MAX_SEGMENTS = np.iinfo(np.int32).max
+
+def _bcoo_dot_general_fused(lhs_data, lhs_indices, rhs, *, out_aval, batch_shape,
+                            n_rhs_batch, n_contracting, output_sorted=False):
+  """bcoo_dot_general with batch and contracting dimensions moved to the front."""
+  n_batch = len(batch_shape)
+  nse, n_sparse = lhs_indices.shape[-2:]
+  size = int(np.prod(batch_shape)) * nse
+  lhs_data = jnp.broadcast_to(lhs_data, batch_shape + lhs_data.shape[n_batch:])
+  lhs_data = lhs_data.reshape(size, *lhs_data.shape[n_batch + 1:])
+  lhs_indices = jnp.broadcast_to(lhs_indices, batch_shape + (nse, n_sparse))
+  lhs_indices = lhs_indices.reshape(size, n_sparse).astype(np.int32)
+
+  # Flatten the batches into a single list of stored elements, each with its
+  # full index into the batch and sparse dimensions.
+  batch_ind = [lax.broadcasted_iota(np.int32, batch_shape + (nse,), d).ravel()
+               for d in range(n_batch)]
+  sparse_ind = [lhs_indices[:, d] for d in range(n_sparse)]
+  idx_right = tuple(batch_ind[:n_rhs_batch] + sparse_ind[:n_contracting])
+  idx_out = batch_ind + sparse_ind[n_contracting:]
+
+  if idx_right:
+    rhs_rows = rhs.at[idx_right].get(mode='fill', fill_value=0)
+  else:
+    rhs_rows = jnp.broadcast_to(rhs, (size, *rhs.shape))
+  prod = lax.dot_general(lhs_data, rhs_rows, (([], []), ([0], [0])))
+
+  # Out-of-bounds output indices, used to pad sparse arrays, contribute nothing;
+  # clamping them keeps padding sorted after the in-bounds elements of its batch.
+  segment_shape = out_aval.shape[:len(idx_out)]
+  in_bounds = jnp.ones(size, bool)
+  segment_ids = jnp.zeros(size, np.int32)
+  for i, dim in zip(idx_out, segment_shape):
+    in_bounds &= (i >= 0) & (i < dim)
+    segment_ids = segment_ids * np.int32(dim) + jnp.clip(i, 0, dim - 1)
+  prod = jnp.where(in_bounds.reshape((size,) + (1,) * (prod.ndim - 1)), prod, 0)
+
+  # Sort the elements by output position once, so that all of them are
+  # accumulated by one segment sum with sorted segment ids.
+  if not output_sorted:
+    segment_ids, perm = lax.sort_key_val(segment_ids, lax.iota(np.int32, size))
+    prod = prod[perm]
+  out = jax.ops.segment_sum(prod, segment_ids,
+                            num_segments=int(np.prod(segment_shape)),
+                            indices_are_sorted=True)
+  return out.reshape(out_aval.shape).astype(out_aval.dtype)
+
+def _bcoo_dot_general_vmapped(lhs_data, lhs_indices, rhs, *, out_aval,
+                              n_rhs_batch, n_contracting):
+  """bcoo_dot_general as a scatter-add per batch, vmapped over the batches."""
+  n_batch = lhs_indices.ndim - 2
   out_array = jnp.zeros(out_aval.shape, out_aval.dtype)
   def result(out_array, lhs_data, lhs_indices, rhs):
     idx = tuple(lhs_indices.T)
     idx_right, idx_out = idx[:n_contracting], idx[n_contracting:]
     ctc = [0] if n_contracting else []
-    prod = lax.dot_general(lhs_data, rhs[idx_right], (([], []), (ctc, ctc)))
+    rhs_rows = rhs.at[idx_right].get(mode='fill', fill_value=0)
+    prod = lax.dot_general(lhs_data, rhs_rows, (([], []), (ctc, ctc)))
     return out_array.at[idx_out].add(prod) if idx_out else prod.sum(0, dtype=out_array.dtype)
   for i in range(n_batch)[::-1]:
     axes_in = [0, 0, 0, 0]
@@ -531,13 +632,14 @@ def _bcoo_dot_general_impl(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs
     if lhs_indices.shape[i] == 1:
       lhs_indices = lax.squeeze(lhs_indices, (i,))
       axes_in[2] = None
-    if i >= len(lhs_batch):
+    if i >= n_rhs_batch:
       axes_in[3] = None
     result = vmap(result, tuple(axes_in))
   return result(out_array, lhs_data, lhs_indices, rhs)
 
 @bcoo_dot_general_p.def_abstract_eval
-def _bcoo_dot_general_abstract_eval(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape):
+def _bcoo_dot_general_abstract_eval(lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape,
+                                    indices_sorted):
   (lhs_contracting, rhs_contracting), (lhs_batch, rhs_batch) = dimension_numbers
   n_batch, n_sparse, _, _ = _validate_bcoo(lhs_data, lhs_indices, lhs_shape)
   out_shape = _dot_general_validated_shape(lhs_shape, rhs.shape, dimension_numbers)
@@ -558,13 +660,18 @@ def _bcoo_dot_general_abstract_eval(lhs_data, lhs_indices, rhs, *, dimension_num
   out_dtype = jnp.promote_types(lhs_data.dtype, rhs.dtype)
   return core.ShapedArray(out_shape, out_dtype)
 
-def _bcoo_dot_general_jvp_lhs(lhs_data_dot, lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape):
-  return bcoo_dot_general(lhs_data_dot, lhs_indices, rhs, dimension_numbers=dimension_numbers, lhs_shape=lhs_shape)
+def _bcoo_dot_general_jvp_lhs(lhs_data_dot, lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape,
+                              indices_sorted):
+  return bcoo_dot_general(lhs_data_dot, lhs_indices, rhs, dimension_numbers=dimension_numbers,
+                          lhs_shape=lhs_shape, indices_sorted=indices_sorted)
 
-def _bcoo_dot_general_jvp_rhs(rhs_dot, lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape):
-  return bcoo_dot_general(lhs_data, lhs_indices, rhs_dot, dimension_numbers=dimension_numbers, lhs_shape=lhs_shape)
+def _bcoo_dot_general_jvp_rhs(rhs_dot, lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape,
+                              indices_sorted):
+  return bcoo_dot_general(lhs_data, lhs_indices, rhs_dot, dimension_numbers=dimension_numbers,
+                          lhs_shape=lhs_shape, indices_sorted=indices_sorted)
 
-def _bcoo_dot_general_transpose(ct, lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape):
+def _bcoo_dot_general_transpose(ct, lhs_data, lhs_indices, rhs, *, dimension_numbers, lhs_shape,
+                                indices_sorted):
   assert not ad.is_undefined_primal(lhs_indices)
   if type(ct) is ad.Zero:
     return ad.Zero
@@ -597,10 +704,12 @@ def _bcoo_dot_general_transpose(ct, lhs_data, lhs_indices, rhs, *, dimension_num
     dims = ((lhs_kept, ans_lhs), (lhs_batch, ans_batch))
     rhs_contract_sorted_by_lhs = list(np.take(rhs_contract, np.argsort(lhs_contract)))
     out_axes = np.argsort(list(rhs_batch) + rhs_contract_sorted_by_lhs + rhs_kept)
-    result = bcoo_dot_general(lhs_data, lhs_indices, ct, lhs_shape=lhs_shape, dimension_numbers=dims)
+    result = bcoo_dot_general(lhs_data, lhs_indices, ct, lhs_shape=lhs_shape, dimension_numbers=dims,
+                              indices_sorted=indices_sorted)
     return lhs_data, lhs_indices, lax.transpose(result, out_axes)
 
-def _bcoo_dot_general_batch_rule(batched_args, batch_dims, *, dimension_numbers, lhs_shape):
+def _bcoo_dot_general_batch_rule(batched_args, batch_dims, *, dimension_numbers, lhs_shape,
+                                 indices_sorted):
   lhs_data, lhs_indices, rhs = batched_args
   batch_dims = list(batch_dims)
   batch_size = max(0 if dim is None else arg.shape[dim]
@@ -617,7 +726,8 @@ def _bcoo_dot_general_batch_rule(batched_args, batch_dims, *, dimension_numbers,
       (len(lhs_shape), rhs.ndim), (batch_dims[0], batch_dims[2]), dimension_numbers)
   new_shape = (batch_size, *lhs_shape)
   batched_out = bcoo_dot_general(lhs_data, lhs_indices, rhs, lhs_shape=new_shape,
-                                 dimension_numbers=new_dimension_numbers)
+                                 dimension_numbers=new_dimension_numbers,
+                                 indices_sorted=indices_sorted)
   return batched_out, result_batch_dim
 
 ad.defjvp(bcoo_dot_general_p, _bcoo_dot_general_jvp_lhs, None, _bcoo_dot_general_jvp_rhs)
@@ -870,6 +980,231 @@ def bcoo_reduce_sum(data, indices, *, shape, axes):
 
   out_shape = tuple(shape[i] for i in range(len(shape)) if i not in axes)
   return data, indices, out_shape
+
+def _bcoo_broadcast_batch(data, indices, *, shape):
+  n_batch = _validate_bcoo(data, indices, shape).n_batch
+  batch_shape = tuple(shape[:n_batch])
+  return (jnp.broadcast_to(data, batch_shape + data.shape[n_batch:]),
+          jnp.broadcast_to(indices, batch_shape + indices.shape[n_batch:]))
+
+def bcoo_sort_indices(data, indices, *, shape):
+  """Sort the indices of a BCOO array lexicographically within each batch.
+
+  Args:
+    data : array of shape ``batch_dims + (nse,) + block_dims``.
+    indices : array of shape ``batch_dims + (nse, n_sparse)``
+    shape : tuple; the shape of the (batched) matrix.
+
+  Returns:
+    data, indices : the same elements, with indices in sorted order and batch
+      dimensions broadcast to ``shape``.
+  """
+  n_batch, n_sparse, _, _ = _validate_bcoo(data, indices, shape)
+  data, indices = _bcoo_broadcast_batch(data, indices, shape=shape)
+  if n_sparse == 0:
+    return data, indices
+  f = _bcoo_sort_indices_one
+  for _ in range(n_batch):
+    f = vmap(f)
+  return f(data, indices)
+
+def _bcoo_sort_indices_one(data, indices):
+  assert indices.ndim == 2
+  nse, n_sparse = indices.shape
+  *sorted_indices, perm = lax.sort((*indices.T, lax.iota(np.int32, nse)), num_keys=n_sparse)
+  return data[perm], jnp.stack(sorted_indices, axis=1)
+
+def bcoo_sum_duplicates(data, indices, *, shape, nse=None, indices_sorted=False):
+  """Sum duplicate indices of a BCOO array.
+
+  Out-of-bounds indices are dropped, and the result is padded with zero data at
+  out-of-bounds indices equal to the sparse shape, so that it remains sorted.
+
+  Args:
+    data : array of shape ``batch_dims + (nse,) + block_dims``.
+    indices : array of shape ``batch_dims + (nse, n_sparse)``
+    shape : tuple; the shape of the (batched) matrix.
+    nse : number of specified elements in each batch of the output. If not
+      specified, it is the largest number of unique in-bounds indices in a batch,
+      which must be concrete.
+    indices_sorted : bool; whether the indices are already sorted within each
+      batch (default: False)
+
+  Returns:
+    data, indices : the summed elements, with sorted and unique indices.
+  """
+  n_batch, n_sparse, _, _ = _validate_bcoo(data, indices, shape)
+  if indices_sorted:
+    data, indices = _bcoo_broadcast_batch(data, indices, shape=shape)
+  else:
+    data, indices = bcoo_sort_indices(data, indices, shape=shape)
+  sparse_shape = tuple(shape[n_batch:n_batch + n_sparse])
+  if nse is None:
+    nse = _bcoo_unique_mask(indices, sparse_shape).sum(-1).max()
+  nse = core.concrete_or_error(operator.index, nse, "nse argument of bcoo_sum_duplicates")
+  f = functools.partial(_bcoo_sum_duplicates_one, sparse_shape=sparse_shape, nse=nse)
+  for _ in range(n_batch):
+    f = vmap(f)
+  return f(data, indices)
+
+def _bcoo_unique_mask(indices, sparse_shape):
+  """Mask of the first in-bounds occurrence of each of a batch of sorted indices."""
+  in_bounds = jnp.all((indices >= 0) & (indices < np.array(sparse_shape, indices.dtype)), -1)
+  new = jnp.ones(indices.shape[:-1], bool)
+  new = new.at[..., 1:].set(jnp.any(indices[..., 1:, :] != indices[..., :-1, :], -1))
+  return new & in_bounds
+
+def _bcoo_sum_duplicates_one(data, indices, *, sparse_shape, nse):
+  assert indices.ndim == 2
+  in_bounds = jnp.all((indices >= 0) & (indices < np.array(sparse_shape, indices.dtype)), -1)
+  pos = jnp.cumsum(_bcoo_unique_mask(indices, sparse_shape)) - 1
+  pos = jnp.where(in_bounds, pos, nse)
+  indices_out = jnp.broadcast_to(np.array(sparse_shape, indices.dtype), (nse, len(sparse_shape)))
+  indices_out = indices_out.at[pos].set(indices, mode='drop')
+  data_out = jnp.zeros((nse, *data.shape[1:]), data.dtype)
+  data_out = data_out.at[pos].add(data, mode='drop')
+  return data_out, indices_out
+
+def _validate_spgemm(lhs_indices, rhs_indices, lhs_shape, rhs_shape):
+  for name, indices, shape in [("lhs", lhs_indices, lhs_shape), ("rhs", rhs_indices, rhs_shape)]:
+    if len(shape) != 2 or indices.shape[1:] != (2,):
+      raise NotImplementedError(
+        f"bcoo_spgemm requires unbatched sparse matrices; got {name} with shape={shape} "
+        f"and indices.shape={indices.shape}")
+  if lhs_shape[1] != rhs_shape[0]:
+    raise ValueError(f"bcoo_spgemm: incompatible shapes lhs_shape={lhs_shape}, rhs_shape={rhs_shape}")
+
+def _bcoo_spgemm_counts(lhs_indices, rhs_indices, *, lhs_shape, rhs_shape):
+  """For each lhs element, the range of rhs elements (sorted by row) it multiplies."""
+  rhs_rows, perm = lax.sort_key_val(rhs_indices[:, 0], lax.iota(np.int32, rhs_indices.shape[0]))
+  lhs_k = lhs_indices[:, 1]
+  in_bounds = (lhs_indices[:, 0] >= 0) & (lhs_indices[:, 0] < lhs_shape[0])
+  in_bounds &= (lhs_k >= 0) & (lhs_k < lhs_shape[1])
+  start = jnp.searchsorted(rhs_rows, lhs_k, side='left')
+  count = jnp.searchsorted(rhs_rows, lhs_k, side='right') - start
+  # Product counts can exceed the range of the (int32) positions they are computed from.
+  count = jnp.where(in_bounds, count, 0).astype(dtypes.canonicalize_dtype(np.int64))
+  return perm, start, count
+
+def _bcoo_spgemm_products(lhs_data, lhs_indices, rhs_data, rhs_indices, *,
+                          lhs_shape, rhs_shape, n_products):
+  """All partial products of an SpGEMM, as unsorted COO elements.
+
+  Slots beyond the actual number of products have out-of-bounds indices.
+  """
+  dtype = jnp.promote_types(lhs_data.dtype, rhs_data.dtype)
+  lhs_nse, rhs_nse = lhs_indices.shape[0], rhs_indices.shape[0]
+  if n_products == 0 or lhs_nse == 0 or rhs_nse == 0:
+    return (jnp.zeros(n_products, dtype),
+            jnp.broadcast_to(np.array([lhs_shape[0], rhs_shape[1]], lhs_indices.dtype),
+                             (n_products, 2)))
+  perm, start, count = _bcoo_spgemm_counts(lhs_indices, rhs_indices,
+                                           lhs_shape=lhs_shape, rhs_shape=rhs_shape)
+  offsets = jnp.cumsum(count)
+
+  # Product p multiplies lhs element a by the r-th rhs element in row lhs_k[a].
+  p = lax.iota(offsets.dtype, n_products)
+  a = jnp.searchsorted(offsets, p, side='right')
+  valid = a < lhs_nse
+  a = jnp.minimum(a, lhs_nse - 1)
+  b = perm[jnp.clip(start[a] + p - (offsets[a] - count[a]), 0, rhs_nse - 1)]
+
+  data = jnp.where(valid, lhs_data[a].astype(dtype) * rhs_data[b].astype(dtype), 0)
+  rows = jnp.where(valid, lhs_indices[a, 0], lhs_shape[0])
+  cols = jnp.where(valid, rhs_indices[b, 1].astype(lhs_indices.dtype), rhs_shape[1])
+  return data, jnp.stack([rows, cols], axis=1)
+
+def bcoo_spgemm_sizes(lhs_indices, rhs_indices, *, lhs_shape, rhs_shape, exact=True):
+  """Symbolic phase of :func:`bcoo_spgemm`: sizes of the product of sparse matrices.
+
+  The sizes depend only on the sparsity patterns, and must be computed outside
+  :func:`jax.jit`; they can then be passed to :func:`bcoo_spgemm` as static hints.
+
+  Args:
+    lhs_indices : array of shape ``(lhs_nse, 2)``.
+    rhs_indices : array of shape ``(rhs_nse, 2)``.
+    lhs_shape, rhs_shape : shapes of the two matrices.
+    exact : bool; if False, bound the output nse by the number of partial
+      products rather than counting unique output indices (default: True).
+
+  Returns:
+    n_products : the number of partial products.
+    nse : the number of unique output indices, or an upper bound of it.
+  """
+  lhs_indices, rhs_indices = jnp.asarray(lhs_indices), jnp.asarray(rhs_indices)
+  _validate_spgemm(lhs_indices, rhs_indices, lhs_shape, rhs_shape)
+  _, _, count = _bcoo_spgemm_counts(lhs_indices, rhs_indices,
+                                    lhs_shape=lhs_shape, rhs_shape=rhs_shape)
+  n_products = core.concrete_or_error(operator.index, count.sum(),
+                                      "bcoo_spgemm_sizes requires concrete indices.")
+  if not exact:
+    return n_products, min(n_products, lhs_shape[0] * rhs_shape[1])
+  lhs_data = jnp.zeros(lhs_indices.shape[0], np.float32)
+  rhs_data = jnp.zeros(rhs_indices.shape[0], np.float32)
+  _, indices = _bcoo_spgemm_products(lhs_data, lhs_indices, rhs_data, rhs_indices,
+                                     lhs_shape=lhs_shape, rhs_shape=rhs_shape,
+                                     n_products=n_products)
+  _, indices = bcoo_sort_indices(jnp.zeros(n_products), indices,
+                                 shape=(lhs_shape[0], rhs_shape[1]))
+  nse = _bcoo_unique_mask(indices, (lhs_shape[0], rhs_shape[1])).sum()
+  return n_products, operator.index(nse)
+
+def bcoo_spgemm(lhs_data, lhs_indices, rhs_data, rhs_indices, *, lhs_shape, rhs_shape,
+                nse=None, n_products=None):
+  """Product of two sparse matrices, returning a sparse matrix.
+
+  The partial products are formed, sorted and summed by output index, so that
+  the output holds only the structurally nonzero elements. Its size is given by
+  :func:`bcoo_spgemm_sizes`, which is called if ``nse`` or ``n_products`` is not
+  specified; within :func:`jax.jit` both must be specified.
+
+  Args:
+    lhs_data : array of shape ``(lhs_nse,)``.
+    lhs_indices : array of shape ``(lhs_nse, 2)``.
+    rhs_data : array of shape ``(rhs_nse,)``.
+    rhs_indices : array of shape ``(rhs_nse, 2)``.
+    lhs_shape, rhs_shape : shapes of the two matrices.
+    nse : number of specified elements in the output. Elements beyond ``nse``
+      are dropped; unused elements are padded with out-of-bounds indices.
+    n_products : number of partial products to form; at least the value
+      returned by :func:`bcoo_spgemm_sizes`.
+
+  Returns:
+    data, indices : the output matrix of shape ``(lhs_shape[0], rhs_shape[1])``,
+      with sorted and unique indices.
+  """
+  lhs_data, lhs_indices = jnp.asarray(lhs_data), jnp.asarray(lhs_indices)
+  rhs_data, rhs_indices = jnp.asarray(rhs_data), jnp.asarray(rhs_indices)
+  _validate_spgemm(lhs_indices, rhs_indices, lhs_shape, rhs_shape)
+  if lhs_data.shape != lhs_indices.shape[:1] or rhs_data.shape != rhs_indices.shape[:1]:
+    raise NotImplementedError("bcoo_spgemm with dense dimensions.")
+  if n_products is None:
+    n_products, nse_exact = bcoo_spgemm_sizes(lhs_indices, rhs_indices, lhs_shape=lhs_shape,
+                                              rhs_shape=rhs_shape, exact=nse is None)
+    nse = nse_exact if nse is None else nse
+  n_products = core.concrete_or_error(operator.index, n_products,
+                                      "n_products argument of bcoo_spgemm")
+  data, indices = _bcoo_spgemm_products(lhs_data, lhs_indices, rhs_data, rhs_indices,
+                                        lhs_shape=lhs_shape, rhs_shape=rhs_shape,
+                                        n_products=n_products)
+  return bcoo_sum_duplicates(data, indices, shape=(lhs_shape[0], rhs_shape[1]), nse=nse)
+
+def _is_spgemm(lhs, rhs):
+  """Whether lhs @ rhs is a product of unbatched sparse matrices."""
+  return all(M.ndim == 2 and M.n_batch == 0 and M.n_dense == 0 for M in (lhs, rhs))
+
+def _bcoo_spgemm_matmul(lhs, rhs):
+  """lhs @ rhs for unbatched BCOO matrices, with a static size bound under tracing."""
+  if isinstance(lhs.indices, core.Tracer) or isinstance(rhs.indices, core.Tracer):
+    # Traced sparsity patterns cannot be counted; every pair of elements may
+    # form a product, and the output has at most one element per index.
+    n_products = lhs.nse * rhs.nse
+    nse = min(n_products, lhs.shape[0] * rhs.shape[1])
+  else:
+    n_products = nse = None
+  return bcoo_spgemm(lhs.data, lhs.indices, rhs.data, rhs.indices, lhs_shape=lhs.shape,
+                     rhs_shape=rhs.shape, nse=nse, n_products=n_products)
+
 def _is_placeholder(*args):
   return all(type(arg) is object for arg in args) or all(arg is None for arg in args)
 
@@ -890,7 +1225,14 @@ class BCOO(ops.JAXSparse):
     data : ndarray of shape ``[*batch_dims, nse, *dense_dims]`` containing the
       explicitly stored data within the sparse matrix.
     indices : ndarray of shape ``[*batch_dims, nse, n_sparse]`` containing the
-      indices of the explicitly stored data. Duplicate entries will be summed.
+      indices of the explicitly stored data. Duplicate entries will be summed,
+      and out-of-bounds entries will be ignored.
+    indices_sorted : bool; whether the indices are known to be sorted
+      lexicographically within each batch. Operations pass this on to the
+      underlying scatters and gathers. Reset to False when ``indices`` is
+      reassigned.
+    unique_indices : bool; whether the in-bounds indices are known to be unique
+      within each batch. Reset to False when ``indices`` is reassigned.
 
   Examples:
     Create a sparse array from a dense array:
@@ -930,7 +1272,6 @@ class BCOO(ops.JAXSparse):
                  [0., 0., 5.]], dtype=float32)
   """
   data: jnp.ndarray
-  indices: jnp.ndarray
   shape: Shape
   nse = property(lambda self: self.indices.shape[-2])
   dtype = property(lambda self: self.data.dtype)
@@ -942,16 +1283,33 @@ class BCOO(ops.JAXSparse):
   def _sparse_shape(self):
     return tuple(self.shape[self.n_batch:self.n_batch + self.n_sparse])
 
-  def __init__(self, args, *, shape):
+  @property
+  def indices(self) -> jnp.ndarray:
+    return self._indices
+
+  @indices.setter
+  def indices(self, indices):
+    # Nothing is known about the order of newly assigned indices.
+    self._indices = indices
+    self.indices_sorted = False
+    self.unique_indices = False
+
+  def __init__(self, args, *, shape, indices_sorted=False, unique_indices=False):
     # JAX transforms will sometimes instantiate pytrees with null values, so we
     # must catch that in the initialization of inputs.
     self.data, self.indices = args if _is_placeholder(*args) else map(_asarray_or_float0, args)
+    self.indices_sorted = indices_sorted
+    self.unique_indices = unique_indices
     super().__init__(args, shape=shape)
 
   @classmethod
   def fromdense(cls, mat, *, nse=None, index_dtype=np.int32, n_dense=0, n_batch=0):
     """Create a BCOO array from a (dense) :class:`DeviceArray`."""
-    return cls(bcoo_fromdense(mat, nse=nse, index_dtype=index_dtype, n_dense=n_dense, n_batch=n_batch), shape=mat.shape)
+    # Nonzeros are found in row-major order; only batched or explicitly sized
+    # outputs contain zero-index padding.
+    canonical = nse is None and n_batch == 0
+    return cls(bcoo_fromdense(mat, nse=nse, index_dtype=index_dtype, n_dense=n_dense, n_batch=n_batch),
+               shape=mat.shape, indices_sorted=canonical, unique_indices=canonical)
 
   @classmethod
   def from_scipy_sparse(cls, mat, *, index_dtype=None, n_dense=0, n_batch=0):
@@ -961,7 +1319,8 @@ class BCOO(ops.JAXSparse):
     mat = mat.tocoo()
     data = jnp.asarray(mat.data)
     indices = jnp.column_stack((mat.row, mat.col)).astype(index_dtype)
-    return cls((data, indices), shape=mat.shape)
+    return cls((data, indices), shape=mat.shape, indices_sorted=bool(mat.has_canonical_format),
+               unique_indices=bool(mat.has_canonical_format))
 
   def _unbatch(self):
     """Return an unbatched representation of the BCOO matrix."""
@@ -971,13 +1330,36 @@ class BCOO(ops.JAXSparse):
     """Return a de-duplicated representation of the BCOO matrix."""
     return BCOO(_dedupe_bcoo(self.data, self.indices, self.shape), shape=self.shape)
 
+  def sort_indices(self):
+    """Return a copy of the matrix with indices sorted within each batch."""
+    if self.indices_sorted:
+      return self
+    data, indices = bcoo_sort_indices(self.data, self.indices, shape=self.shape)
+    return BCOO((data, indices), shape=self.shape, indices_sorted=True,
+                unique_indices=self.unique_indices)
+
+  def sum_duplicates(self, nse=None):
+    """Return a copy of the matrix with duplicate indices summed.
+
+    The result has sorted, unique indices. See :func:`bcoo_sum_duplicates`.
+    """
+    data, indices = bcoo_sum_duplicates(self.data, self.indices, shape=self.shape, nse=nse,
+                                        indices_sorted=self.indices_sorted)
+    return BCOO((data, indices), shape=self.shape, indices_sorted=True, unique_indices=True)
+
   @jax.jit
   def todense(self):
     """Create a dense version of the array."""
-    return bcoo_todense(self.data, self.indices, shape=self.shape)
+    return bcoo_todense(self.data, self.indices, shape=self.shape,
+                        indices_sorted=self.indices_sorted,
+                        unique_indices=self.unique_indices)
 
   def __matmul__(self, other):
-    if isinstance(other, BCOO):
+    if isinstance(other, BCOO) and _is_spgemm(self, other):
+      data, indices = _bcoo_spgemm_matmul(self, other)
+      return BCOO((data, indices), shape=(self.shape[0], other.shape[1]),
+                  indices_sorted=True, unique_indices=True)
+    elif isinstance(other, BCOO):
       dtype = jnp.promote_types(self.dtype, other.dtype)
       dimension_numbers = (([self.ndim - 1], [0]), ([], []))
       data, indices = bcoo_spdot_general(self.data.astype(dtype), self.indices,
@@ -996,7 +1378,8 @@ class BCOO(ops.JAXSparse):
     dtype = jnp.promote_types(self.dtype, other.dtype)
     return bcoo_dot_general(self.data.astype(dtype), self.indices, other.astype(dtype),
                             lhs_shape=self.shape,
-                            dimension_numbers=(([self.ndim - 1], [0]), ([], [])))
+                            dimension_numbers=(([self.ndim - 1], [0]), ([], [])),
+                            indices_sorted=self.indices_sorted)
 
   def __rmatmul__(self, other):
     if isinstance(other, ops.JAXSparse):
@@ -1009,21 +1392,26 @@ class BCOO(ops.JAXSparse):
     dtype = jnp.promote_types(self.dtype, other.dtype)
     return bcoo_rdot_general(other.astype(dtype), self.data.astype(dtype), self.indices,
                              rhs_shape=self.shape,
-                             dimension_numbers=(([other.ndim - 1], [0]), ([], [])))
+                             dimension_numbers=(([other.ndim - 1], [0]), ([], [])),
+                             indices_sorted=self.indices_sorted)
 
   def transpose(self, axes=None):
     """Create a new array containing the transpose."""
     axes = np.arange(self.ndim)[::-1] if axes is None else axes
     data_T, indices_T = bcoo_transpose(self.data, self.indices, shape=self.shape, permutation=axes)
     shape_T = [self.shape[i] for i in axes]
-    return BCOO((data_T, indices_T), shape=shape_T)
+    # Sorted order is only preserved by the identity permutation.
+    indices_sorted = self.indices_sorted and tuple(axes) == tuple(range(self.ndim))
+    return BCOO((data_T, indices_T), shape=shape_T, indices_sorted=indices_sorted,
+                unique_indices=self.unique_indices)
 
   def tree_flatten(self):
     children = (self.data, self.indices)
     # pytree sometimes creates placeholder objects & we need to handle that.
     sparse_shape = self.shape if _is_placeholder(*children) else self._sparse_shape
     # We serialize the sparse shape only to support batching.
-    return children, {"sparse_shape": sparse_shape}
+    return children, {"sparse_shape": sparse_shape, "indices_sorted": self.indices_sorted,
+                      "unique_indices": self.unique_indices}
 
   @classmethod
   def tree_unflatten(cls, aux_data, children):
@@ -1041,7 +1429,8 @@ class BCOO(ops.JAXSparse):
           tuple(np.maximum(data.shape[:n_batch], indices.shape[:n_batch]))
           + tuple(sparse_shape)
           + tuple(data.shape[n_batch + 1:]))
-    return cls(children, shape=shape)
+    return cls(children, shape=shape, indices_sorted=aux_data["indices_sorted"],
+               unique_indices=aux_data["unique_indices"])
 
   # TODO(jakevdp): refactor to avoid circular imports - we can use the same strategy
   #                we use when adding methods to DeviceArray within lax_numpy.py
@@ -0,0 +1,426 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""BSR (block compressed sparse row) matrix object and associated primitives."""
+import functools
+import operator
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+import jax
+from jax import core
+from jax import lax
+from jax import tree_util
+from jax import vmap
+from jax.interpreters import ad
+from jax.interpreters import batching
+from jax.interpreters import xla
+import jax.numpy as jnp
+from . import ops
+from .bcoo import BCOO, _is_placeholder
+
+Shape = Tuple[int, ...]
+
+#----------------------------------------------------------------------
+# BSR primitives: a CSR structure over dense (R, C) blocks.
+#
+# A BSR matrix of shape (M, N) is stored as
+#   data : array of shape (nse, R, C) of stored blocks
+#   indices : array of shape (nse,) holding the block column of each block
+#   indptr : array of shape (M // R + 1,) delimiting the blocks of each block row
+# Stored blocks beyond indptr[-1] are padding, and are ignored.
+
+class BSRProperties(NamedTuple):
+  n_block_rows: int
+  n_block_cols: int
+  blocksize: Tuple[int, int]
+  nse: int
+
+def _validate_bsr(data, indices, indptr, shape) -> BSRProperties:
+  assert jnp.issubdtype(indices.dtype, jnp.integer)
+  assert indices.dtype == indptr.dtype
+  if len(shape) != 2:
+    raise ValueError(f"BSR arrays must be two-dimensional; got shape={shape}")
+  if data.ndim != 3 or indices.shape != data.shape[:1] or indptr.ndim != 1:
+    raise ValueError(f"Invalid BSR representation: data.shape={data.shape}, "
+                     f"indices.shape={indices.shape}, indptr.shape={indptr.shape}")
+  blocksize = tuple(data.shape[1:])
+  if shape[0] % blocksize[0] or shape[1] % blocksize[1]:
+    raise ValueError(f"blocksize={blocksize} does not divide shape={shape}")
+  n_block_rows, n_block_cols = shape[0] // blocksize[0], shape[1] // blocksize[1]
+  if indptr.shape[0] != n_block_rows + 1:
+    raise ValueError(f"indptr.shape={indptr.shape} does not match {n_block_rows} block rows.")
+  return BSRProperties(n_block_rows, n_block_cols, blocksize, data.shape[0])
+
+def _bsr_rows(indptr, nse):
+  """Block row of each stored block; padding blocks get an out-of-bounds row."""
+  return ops._csr_to_coo(indptr, nse)
+
+def _take_row_blocks(mat, size, blocks):
+  """Selected blocks of `size` rows of `mat`; out-of-bounds blocks are zero."""
+  mat = mat.reshape(mat.shape[0] // size, size, mat.shape[1])
+  return mat.at[blocks].get(mode='fill', fill_value=0)
+
+def _to_blocks(mat, blocksize):
+  R, C = blocksize
+  return mat.reshape(mat.shape[0] // R, R, mat.shape[1] // C, C).transpose(0, 2, 1, 3)
+
+def _from_blocks(blocks):
+  nbr, nbc, R, C = blocks.shape
+  return blocks.transpose(0, 2, 1, 3).reshape(nbr * R, nbc * C)
+
+def _vmap_batch_rule(impl):
+  """Batching rule that vmaps the primitive's implementation."""
+  def batch_rule(batched_args, batch_dims, **params):
+    return vmap(functools.partial(impl, **params), in_axes=batch_dims)(*batched_args), 0
+  return batch_rule
+
+#----------------------------------------------------------------------
+# bsr_todense
+
+bsr_todense_p = core.Primitive('bsr_todense')
+
+def bsr_todense(data, indices, indptr, *, shape):
+  """Convert a BSR matrix to a dense matrix.
+
+  Args:
+    data : array of shape ``(nse, R, C)``.
+    indices : array of shape ``(nse,)``
+    indptr : array of shape ``(shape[0] // R + 1,)`` and dtype ``indices.dtype``
+    shape : length-2 tuple representing the matrix shape
+
+  Returns:
+    mat : array with specified shape and dtype matching ``data``
+  """
+  return bsr_todense_p.bind(jnp.asarray(data), jnp.asarray(indices), jnp.asarray(indptr),
+                            shape=tuple(shape))
+
+@bsr_todense_p.def_impl
+def _bsr_todense_impl(data, indices, indptr, *, shape):
+  props = _validate_bsr(data, indices, indptr, shape)
+  rows = _bsr_rows(indptr, props.nse)
+  blocks = jnp.zeros((props.n_block_rows, props.n_block_cols, *props.blocksize), data.dtype)
+  return _from_blocks(blocks.at[rows, indices].add(data, mode='drop'))
+
+@bsr_todense_p.def_abstract_eval
+def _bsr_todense_abstract_eval(data, indices, indptr, *, shape):
+  _validate_bsr(data, indices, indptr, shape)
+  return core.ShapedArray(shape, data.dtype)
+
+def _bsr_todense_jvp(data_dot, data, indices, indptr, *, shape):
+  return bsr_todense(data_dot, indices, indptr, shape=shape)
+
+def _bsr_todense_transpose(ct, data, indices, indptr, *, shape):
+  assert ad.is_undefined_primal(data)
+  if ad.is_undefined_primal(indices) or ad.is_undefined_primal(indptr):
+    raise ValueError("Cannot transpose with respect to sparse indices")
+  assert ct.shape == shape
+  return bsr_extract(indices, indptr, ct, blocksize=data.aval.shape[1:]), indices, indptr
+
+ad.defjvp(bsr_todense_p, _bsr_todense_jvp, None, None)
+ad.primitive_transposes[bsr_todense_p] = _bsr_todense_transpose
+batching.primitive_batchers[bsr_todense_p] = _vmap_batch_rule(_bsr_todense_impl)
+xla.translations[bsr_todense_p] = xla.lower_fun(
+    _bsr_todense_impl, multiple_results=False)
+
+#----------------------------------------------------------------------
+# bsr_extract
+
+bsr_extract_p = core.Primitive('bsr_extract')
+
+def bsr_extract(indices, indptr, mat, *, blocksize):
+  """Extract the blocks of dense matrix `mat` at given BSR indices.
+
+  Blocks of padding are zero.
+  """
+  return bsr_extract_p.bind(jnp.asarray(indices), jnp.asarray(indptr), jnp.asarray(mat),
+                            blocksize=tuple(blocksize))
+
+@bsr_extract_p.def_impl
+def _bsr_extract_impl(indices, indptr, mat, *, blocksize):
+  rows = _bsr_rows(indptr, indices.shape[0])
+  return _to_blocks(mat, blocksize).at[rows, indices].get(mode='fill', fill_value=0)
+
+@bsr_extract_p.def_abstract_eval
+def _bsr_extract_abstract_eval(indices, indptr, mat, *, blocksize):
+  data = core.ShapedArray((indices.shape[0], *blocksize), mat.dtype)
+  _validate_bsr(data, indices, indptr, mat.shape)
+  return data
+
+def _bsr_extract_jvp(mat_dot, indices, indptr, mat, *, blocksize):
+  return bsr_extract(indices, indptr, mat_dot, blocksize=blocksize)
+
+def _bsr_extract_transpose(ct, indices, indptr, mat, *, blocksize):
+  assert ad.is_undefined_primal(mat)
+  if ad.is_undefined_primal(indices) or ad.is_undefined_primal(indptr):
+    raise ValueError("Cannot transpose with respect to sparse indices")
+  return indices, indptr, bsr_todense(ct, indices, indptr, shape=mat.aval.shape)
+
+ad.defjvp(bsr_extract_p, None, None, _bsr_extract_jvp)
+ad.primitive_transposes[bsr_extract_p] = _bsr_extract_transpose
+batching.primitive_batchers[bsr_extract_p] = _vmap_batch_rule(_bsr_extract_impl)
+xla.translations[bsr_extract_p] = xla.lower_fun(
+    _bsr_extract_impl, multiple_results=False)
+
+#----------------------------------------------------------------------
+# bsr_matmat
+
+bsr_matmat_p = core.Primitive('bsr_matmat')
+
+def bsr_matmat(data, indices, indptr, B, *, shape, transpose=False):
+  """Product of BSR sparse matrix and a dense matrix.
+
+  Args:
+    data : array of shape ``(nse, R, C)``.
+    indices : array of shape ``(nse,)``
+    indptr : array of shape ``(shape[0] // R + 1,)`` and dtype ``indices.dtype``
+    B : array of shape ``(shape[0] if transpose else shape[1], cols)`` and
+      dtype ``data.dtype``
+    shape : length-2 tuple representing the matrix shape
+    transpose : boolean specifying whether to transpose the sparse matrix
+      before computing.
+
+  Returns:
+    C : array of shape ``(shape[1] if transpose else shape[0], cols)``
+      representing the matrix-matrix product.
+  """
+  return bsr_matmat_p.bind(jnp.asarray(data), jnp.asarray(indices), jnp.asarray(indptr),
+                           jnp.asarray(B), shape=tuple(shape), transpose=transpose)
+
+def bsr_matvec(data, indices, indptr, v, *, shape, transpose=False):
+  """Product of BSR sparse matrix and a dense vector.
+
+  Args:
+    data : array of shape ``(nse, R, C)``.
+    indices : array of shape ``(nse,)``
+    indptr : array of shape ``(shape[0] // R + 1,)`` and dtype ``indices.dtype``
+    v : array of shape ``(shape[0] if transpose else shape[1],)``
+      and dtype ``data.dtype``
+    shape : length-2 tuple representing the matrix shape
+    transpose : boolean specifying whether to transpose the sparse matrix
+      before computing.
+
+  Returns:
+    y : array of shape ``(shape[1] if transpose else shape[0],)`` representing
+      the matrix vector product.
+  """
+  v = jnp.asarray(v)
+  return bsr_matmat(data, indices, indptr, v[:, None], shape=shape, transpose=transpose)[:, 0]
+
+@bsr_matmat_p.def_impl
+def _bsr_matmat_impl(data, indices, indptr, B, *, shape, transpose):
+  props = _validate_bsr(data, indices, indptr, shape)
+  R, C = props.blocksize
+  rows = _bsr_rows(indptr, props.nse)
+  # Each stored block multiplies one block of rows of B with a dense dot_general,
+  # batched over blocks; the products are then summed into their block rows.
+  if transpose:
+    B_blocks = _take_row_blocks(B, R, rows)
+    prod = lax.dot_general(data, B_blocks, (([1], [1]), ([0], [0])))
+    out = jax.ops.segment_sum(prod, indices, num_segments=props.n_block_cols)
+    return out.reshape(shape[1], B.shape[1])
+  else:
+    B_blocks = _take_row_blocks(B, C, indices)
+    prod = lax.dot_general(data, B_blocks, (([2], [1]), ([0], [0])))
+    out = jax.ops.segment_sum(prod, rows, num_segments=props.n_block_rows,
+                              indices_are_sorted=True)
+    return out.reshape(shape[0], B.shape[1])
+
+@bsr_matmat_p.def_abstract_eval
+def _bsr_matmat_abstract_eval(data, indices, indptr, B, *, shape, transpose):
+  _validate_bsr(data, indices, indptr, shape)
+  assert data.dtype == B.dtype
+  assert B.ndim == 2
+  assert B.shape[0] == (shape[0] if transpose else shape[1])
+  out_shape = shape[1] if transpose else shape[0]
+  return core.ShapedArray((out_shape, B.shape[1]), data.dtype)
+
+def _bsr_matmat_jvp_data(data_dot, data, indices, indptr, B, *, shape, transpose):
+  return bsr_matmat(data_dot, indices, indptr, B, shape=shape, transpose=transpose)
+
+def _bsr_matmat_jvp_B(B_dot, data, indices, indptr, B, *, shape, transpose):
+  return bsr_matmat(data, indices, indptr, B_dot, shape=shape, transpose=transpose)
+
+def _bsr_matmat_transpose(ct, data, indices, indptr, B, *, shape, transpose):
+  assert not ad.is_undefined_primal(indices)
+  assert not ad.is_undefined_primal(indptr)
+  if ad.is_undefined_primal(B):
+    if type(ct) is ad.Zero:
+      return data, indices, indptr, ad.Zero(B.aval)
+    return data, indices, indptr, bsr_matmat(data, indices, indptr, ct, shape=shape,
+                                             transpose=not transpose)
+  else:
+    if type(ct) is ad.Zero:
+      return ad.Zero(data.aval), indices, indptr, B
+    # The cotangent of each block is the product of its block of rows of X with
+    # its block of rows of Y, where X @ Y.T is the dense cotangent of the matrix.
+    X, Y = (B, ct) if transpose else (ct, B)
+    nse, R, C = data.aval.shape
+    rows = _bsr_rows(indptr, nse)
+    X_blocks = _take_row_blocks(X, R, rows)
+    Y_blocks = _take_row_blocks(Y, C, indices)
+    return lax.dot_general(X_blocks, Y_blocks, (([2], [2]), ([0], [0]))), indices, indptr, B
+
+ad.defjvp(bsr_matmat_p, _bsr_matmat_jvp_data, None, None, _bsr_matmat_jvp_B)
+ad.primitive_transposes[bsr_matmat_p] = _bsr_matmat_transpose
+batching.primitive_batchers[bsr_matmat_p] = _vmap_batch_rule(_bsr_matmat_impl)
+xla.translations[bsr_matmat_p] = xla.lower_fun(
+    _bsr_matmat_impl, multiple_results=False)
+
+#----------------------------------------------------------------------
+# BSR functions that maybe should be primitives?
+
+def bsr_fromdense(mat, *, blocksize, nse=None, index_dtype=jnp.int32):
+  """Create a BSR matrix from a dense matrix.
+
+  Args:
+    mat : two-dimensional array to be converted to BSR.
+    blocksize : length-2 tuple ``(R, C)``; the shape of the dense blocks.
+    nse : number of stored blocks. If not specified, it is the number of blocks
+      containing a nonzero element, which must be concrete.
+    index_dtype : dtype of block indices (default: int32)
+
+  Returns:
+    data : array of shape ``(nse, R, C)`` and dtype ``mat.dtype``
+    indices : array of shape ``(nse,)``
+    indptr : array of shape ``(mat.shape[0] // R + 1,)``
+  """
+  mat = jnp.asarray(mat)
+  blocksize = tuple(blocksize)
+  if mat.ndim != 2:
+    raise ValueError(f"bsr_fromdense requires a two-dimensional array; got shape={mat.shape}")
+  if len(blocksize) != 2 or mat.shape[0] % blocksize[0] or mat.shape[1] % blocksize[1]:
+    raise ValueError(f"blocksize={blocksize} does not divide shape={mat.shape}")
+  mask = _to_blocks(mat != 0, blocksize).any((2, 3))
+  if nse is None:
+    nse = mask.sum()
+  nse = core.concrete_or_error(operator.index, nse, "nse argument of bsr_fromdense")
+  rows, cols = jnp.nonzero(mask, size=nse)
+  # Padding blocks go at the end, with out-of-bounds indices.
+  valid = jnp.arange(nse) < mask.sum()
+  rows = jnp.where(valid, rows, mask.shape[0]).astype(index_dtype)
+  indices = jnp.where(valid, cols, mask.shape[1]).astype(index_dtype)
+  indptr = ops._coo_to_csr(rows, mask.shape[0])
+  return bsr_extract(indices, indptr, mat, blocksize=blocksize), indices, indptr
+
+def bsr_transpose(data, indices, indptr, *, shape):
+  """Transpose a BSR matrix.
+
+  Returns:
+    data, indices, indptr : the BSR representation of the transpose, of shape
+      ``shape[::-1]``.
+  """
+  props = _validate_bsr(data, indices, indptr, shape)
+  rows = _bsr_rows(indptr, props.nse).astype(indices.dtype)
+  # The rows of the transpose are the block columns; padding sorts last.
+  cols_T, indices_T, perm = lax.sort((indices, rows, lax.iota(np.int32, props.nse)), num_keys=2)
+  indptr_T = ops._coo_to_csr(cols_T, props.n_block_cols)
+  return data[perm].transpose(0, 2, 1), indices_T, indptr_T
+
+def _bsr_to_bcoo(data, indices, indptr, *, shape):
+  """Element-wise BCOO representation of a BSR matrix."""
+  props = _validate_bsr(data, indices, indptr, shape)
+  R, C = props.blocksize
+  rows = _bsr_rows(indptr, props.nse)
+  row = rows[:, None, None] * R + lax.broadcasted_iota(rows.dtype, (1, R, C), 1)
+  col = indices[:, None, None] * C + lax.broadcasted_iota(indices.dtype, (1, R, C), 2)
+  bcoo_indices = jnp.stack([row, col.astype(row.dtype)], axis=-1).reshape(-1, 2)
+  return data.reshape(-1), bcoo_indices
+
+@tree_util.register_pytree_node_class
+class BSR(ops.JAXSparse):
+  """Experimental BSR (block compressed sparse row) matrix implemented in JAX.
+
+  Args:
+    (data, indices, indptr) : data and indices in BSR format.
+    shape : shape of sparse array.
+
+  Attributes:
+    data : ndarray of shape ``[nse, *blocksize]`` containing the explicitly
+      stored dense blocks.
+    indices : ndarray of shape ``[nse]`` containing the block column of each
+      stored block.
+    indptr : ndarray of shape ``[shape[0] // blocksize[0] + 1]``; the blocks of
+      block row ``i`` are ``data[indptr[i]:indptr[i + 1]]``.
+
+  Examples:
+    >>> M = jnp.array([[1., 2., 0., 0.], [3., 4., 0., 0.], [0., 0., 0., 5.], [0., 0., 0., 0.]])
+    >>> M_sp = BSR.fromdense(M, blocksize=(2, 2))
+    >>> M_sp
+    BSR(float32[4, 4], nse=2)
+    >>> M_sp.indices
+    DeviceArray([0, 1], dtype=int32)
+    >>> M_sp.indptr
+    DeviceArray([0, 1, 2], dtype=int32)
+  """
+  data: jnp.ndarray
+  indices: jnp.ndarray
+  indptr: jnp.ndarray
+  nse = property(lambda self: self.data.shape[0])
+  dtype = property(lambda self: self.data.dtype)
+  blocksize = property(lambda self: tuple(self.data.shape[1:]))
+
+  def __init__(self, args, *, shape):
+    # JAX transforms will sometimes instantiate pytrees with null values, so we
+    # must catch that in the initialization of inputs.
+    self.data, self.indices, self.indptr = (
+        args if _is_placeholder(*args) else map(jnp.asarray, args))
+    super().__init__(args, shape=tuple(shape))
+
+  @classmethod
+  def fromdense(cls, mat, *, blocksize, nse=None, index_dtype=np.int32):
+    """Create a BSR array from a (dense) :class:`DeviceArray`."""
+    mat = jnp.asarray(mat)
+    return cls(bsr_fromdense(mat, blocksize=blocksize, nse=nse, index_dtype=index_dtype),
+               shape=mat.shape)
+
+  @classmethod
+  def from_scipy_sparse(cls, mat, *, blocksize=None, index_dtype=np.int32):
+    """Create a BSR array from a :mod:`scipy.sparse` array."""
+    mat = mat.tobsr(blocksize=blocksize)
+    return cls((mat.data, mat.indices.astype(index_dtype), mat.indptr.astype(index_dtype)),
+               shape=mat.shape)
+
+  def to_bcoo(self):
+    """Return the element-wise :class:`BCOO` representation of the matrix."""
+    return BCOO(_bsr_to_bcoo(self.data, self.indices, self.indptr, shape=self.shape),
+                shape=self.shape, unique_indices=True)
+
+  @jax.jit
+  def todense(self):
+    """Create a dense version of the array."""
+    return bsr_todense(self.data, self.indices, self.indptr, shape=self.shape)
+
+  @jax.jit
+  def matvec(self, v):
+    dtype = jnp.promote_types(self.dtype, v.dtype)
+    return bsr_matvec(self.data.astype(dtype), self.indices, self.indptr, v.astype(dtype),
+                      shape=self.shape)
+
+  @jax.jit
+  def matmat(self, B):
+    dtype = jnp.promote_types(self.dtype, B.dtype)
+    return bsr_matmat(self.data.astype(dtype), self.indices, self.indptr, B.astype(dtype),
+                      shape=self.shape)
+
+  def transpose(self, axes=None):
+    """Create a new array containing the transpose."""
+    if axes is not None and tuple(axes) != (1, 0):
+      raise ValueError(f"Invalid axes={axes} for the transpose of a BSR matrix.")
+    return BSR(bsr_transpose(self.data, self.indices, self.indptr, shape=self.shape),
+               shape=self.shape[::-1])
+
+  def tree_flatten(self):
+    return (self.data, self.indices, self.indptr), {"shape": self.shape}
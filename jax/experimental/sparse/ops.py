@@ -72,6 +72,18 @@ def _coo_extract(row, col, mat):
   """Extract values of dense matrix mat at given COO indices."""
   return mat[row, col]
 
+def _csr_matmat_rows(data, indices, indptr, B, *, nrows):
+  """Product of a CSR matrix and a dense vector or matrix, summed row by row.
+
+  The rows of a CSR matrix are sorted, so the products of its elements are
+  summed into the output with a sorted segment sum rather than a scatter-add.
+  This is the lowering used when cuSPARSE is not available, e.g. on CPU.
+  """
+  B = jnp.asarray(B)
+  row = _csr_to_coo(indptr, len(indices))
+  dB = data.reshape(data.shape + (1,) * (B.ndim - 1)) * B[indices]
+  return jax.ops.segment_sum(dB, row, num_segments=nrows, indices_are_sorted=True)
+
 #--------------------------------------------------------------------
 # csr_todense
 
@@ -196,6 +208,8 @@ def csr_matvec(data, indices, indptr, v, *, shape, transpose=False):
 
 @csr_matvec_p.def_impl
 def _csr_matvec_impl(data, indices, indptr, v, *, shape, transpose):
+  if not transpose:
+    return _csr_matmat_rows(data, indices, indptr, v, nrows=shape[0])
   row = _csr_to_coo(indptr, len(indices))
   return _coo_matvec_impl(data, row, indices, v, shape=shape, transpose=transpose)
 
@@ -247,6 +261,8 @@ def csr_matmat(data, indices, indptr, B, *, shape, transpose=False):
 
 @csr_matmat_p.def_impl
 def _csr_matmat_impl(data, indices, indptr, B, *, shape, transpose):
+  if not transpose:
+    return _csr_matmat_rows(data, indices, indptr, B, nrows=shape[0])
   row = _csr_to_coo(indptr, len(indices))
   return _coo_matmat_impl(data, row, indices, B, shape=shape, transpose=transpose)
 
@@ -0,0 +1,382 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Preconditioners for the iterative solvers in jax.scipy.sparse.linalg.
+
+Each function here builds a preconditioner from a linear operator ``A`` and
+returns it as a :class:`jax.tree_util.Partial`, which can be passed as the
+``M`` argument of :func:`jax.scipy.sparse.linalg.cg`,
+:func:`~jax.scipy.sparse.linalg.gmres` and
+:func:`~jax.scipy.sparse.linalg.bicgstab`, including as an argument of a
+jitted function. ``A`` may be a dense 2D array or one of the :class:`BCOO`,
+:class:`CSR`, :class:`CSC` or :class:`COO` sparse matrix types.
+
+    >>> from jax.experimental import sparse
+    >>> import jax.numpy as jnp
+    >>> from jax.scipy.sparse.linalg import cg
+
+    >>> A = sparse.CSR.fromdense(jnp.array([[4., 1., 0.],
+    ...                                     [1., 3., 0.],
+    ...                                     [0., 0., 2.]]))
+    >>> b = jnp.array([1., 2., 3.])
+    >>> x, _ = cg(A.matvec, b, M=sparse.preconditioners.ilu0(A))
+    >>> x  # doctest: +SKIP
+    DeviceArray([0.09090909, 0.6363636 , 1.5       ], dtype=float32)
+"""
+
+import functools
+import math
+
+import numpy as np
+
+import jax
+from jax import lax
+from jax.tree_util import Partial
+import jax.numpy as jnp
+from . import ops
+from .bcoo import BCOO
+
+
+def _coo_triplets(A):
+  """Return ``(data, row, col, n)`` describing the square sparse matrix A."""
+  if isinstance(A, BCOO):
+    if A.ndim != 2 or A.n_batch or A.n_dense:
+      raise NotImplementedError(
+          "preconditioners for BCOO matrices with batch or dense dimensions.")
+    data, row, col = A.data, A.indices[:, 0], A.indices[:, 1]
+  elif isinstance(A, ops.CSR):
+    data, row, col = A.data, ops._csr_to_coo(A.indptr, A.nse), A.indices
+  elif isinstance(A, ops.CSC):
+    data, row, col = A.data, A.indices, ops._csr_to_coo(A.indptr, A.nse)
+  elif isinstance(A, ops.COO):
+    data, row, col = A.data, A.row, A.col
+  else:
+    raise TypeError(f"expected a sparse matrix, got {type(A)}")
+  if A.shape[0] != A.shape[1]:
+    raise ValueError(f"matrix must be square, but has shape: {A.shape}")
+  return data, row, col, A.shape[0]
+
+
+def _dense_or_triplets(A):
+  if isinstance(A, ops.JAXSparse):
+    return None, _coo_triplets(A)
+  A = jnp.asarray(A)
+  if A.ndim != 2 or A.shape[0] != A.shape[1]:
+    raise ValueError(f"matrix must be square, but has shape: {A.shape}")
+  return A, None
+
+
+def _matvec(A):
+  if callable(A):
+    return A
+  elif isinstance(A, ops.JAXSparse):
+    return A.__matmul__
+  return functools.partial(jnp.dot, jnp.asarray(A),
+                           precision=lax.Precision.HIGHEST)
+
+
+#----------------------------------------------------------------------
+# Jacobi and block-Jacobi
+
+@jax.jit
+def _apply_jacobi(inv_diag, x):
+  return inv_diag * x
+
+
+def jacobi(A):
+  """Jacobi (diagonal) preconditioner.
+
+  Args:
+    A : square dense or sparse matrix.
+
+  Returns:
+    M : preconditioner computing ``x / diag(A)``.
+  """
+  dense, triplets = _dense_or_triplets(A)
+  if dense is not None:
+    diag = jnp.diagonal(dense)
+  else:
+    data, row, col, n = triplets
+    diag = jnp.zeros(n, data.dtype).at[row].add(jnp.where(row == col, data, 0))
+  return Partial(_apply_jacobi, 1 / diag)
+
+
+@jax.jit
+def _apply_block_jacobi(inv_blocks, x):
+  num_blocks, block_size, _ = inv_blocks.shape
+  n = x.shape[0]
+  x = jnp.pad(x, (0, num_blocks * block_size - n)).reshape(num_blocks, block_size)
+  y = jnp.einsum('bij,bj->bi', inv_blocks, x, precision=lax.Precision.HIGHEST)
+  return y.reshape(-1)[:n]
+
+
+def block_jacobi(A, block_size):
+  """Block-Jacobi preconditioner.
+
+  The diagonal of ``A`` is split into square blocks of size ``block_size`` (the
+  last block is padded with the identity if ``block_size`` does not divide the
+  size of ``A``), and each block is inverted.
+
+  Args:
+    A : square dense or sparse matrix.
+    block_size : size of the diagonal blocks.
+
+  Returns:
+    M : preconditioner multiplying by the inverse of the block diagonal of A.
+  """
+  block_size = int(block_size)
+  if block_size < 1:
+    raise ValueError(f"block_size must be positive, got {block_size}")
+  dense, triplets = _dense_or_triplets(A)
+  n = dense.shape[0] if dense is not None else triplets[-1]
+  num_blocks = -(-n // block_size)
+  padded = num_blocks * block_size
+  if dense is not None:
+    dense = jnp.pad(dense, (0, padded - n))
+    blocks = dense.reshape(num_blocks, block_size, num_blocks, block_size)
+    blocks = jnp.diagonal(blocks, axis1=0, axis2=2).transpose(2, 0, 1)
+  else:
+    data, row, col, _ = triplets
+    in_block = (row // block_size) == (col // block_size)
+    blocks = jnp.zeros((num_blocks, block_size, block_size), data.dtype)
+    blocks = blocks.at[row // block_size, row % block_size,
+                       col % block_size].add(jnp.where(in_block, data, 0))
+  pad = np.arange(n, padded)
+  blocks = blocks.at[pad // block_size, pad % block_size,
+                     pad % block_size].set(1)
+  return Partial(_apply_block_jacobi, jnp.linalg.inv(blocks))
+
+
+#----------------------------------------------------------------------
+# Incomplete factorizations
+
+def _sorted_csr(data, row, col, n):
+  """Sorted, de-duplicated CSR representation of COO triplets.
+
+  Returns ``(data, indices, indptr)``; any entries freed by summing duplicates
+  are moved past ``indptr[-1]``.
+  """
+  perm = jnp.lexsort((col, row))
+  data, row, col = data[perm], row[perm], col[perm]
+  new = jnp.ones(row.shape, bool).at[1:].set(
+      (row[1:] != row[:-1]) | (col[1:] != col[:-1]))
+  pos = jnp.cumsum(new) - 1
+  data = jnp.zeros_like(data).at[pos].add(data)
+  row = jnp.full_like(row, n).at[pos].set(row)
+  indices = jnp.zeros_like(col).at[pos].set(col)
+  indptr = jnp.searchsorted(row, jnp.arange(n + 1, dtype=row.dtype))
+  return data, indices, indptr
+
+
+def _row_search(indices, start, end, j):
+  """Position of column ``j`` within the sorted ``indices[start:end]``."""
+  nse = indices.shape[0]
+  num_steps = max(1, math.ceil(math.log2(nse + 1)))
+
+  def body(_, bounds):
+    lo, hi = bounds
+    mid = (lo + hi) // 2
+    go_right = indices[jnp.minimum(mid, nse - 1)] < j
+    active = lo < hi
+    return (jnp.where(active & go_right, mid + 1, lo),
+            jnp.where(active & ~go_right, mid, hi))
+
+  pos, _ = lax.fori_loop(0, num_steps, body, (start, end))
+  in_row = pos < end
+  pos = jnp.minimum(pos, nse - 1)
+  return pos, in_row & (indices[pos] == j)
+
+
+def _diagonal_positions(indices, indptr):
+  n = indptr.shape[0] - 1
+  row = ops._csr_to_coo(indptr, indices.shape[0])
+  is_diag = (row == indices) & (jnp.arange(indices.shape[0]) < indptr[-1])
+  return jnp.zeros(n, indptr.dtype).at[jnp.where(is_diag, row, n)].set(
+      jnp.arange(indices.shape[0], dtype=indptr.dtype))
+
+
+@jax.jit
+def _ilu0_factor(data, indices, indptr, diag_pos):
+  # IKJ variant of Gaussian elimination, restricted to the sparsity pattern.
+  n = indptr.shape[0] - 1
+
+  def update_row(i, data):
+    end = indptr[i + 1]
+
+    def eliminate(p, data):
+      k = indices[p]
+      l = data[p] / data[diag_pos[k]]
+      data = data.at[p].set(l)
+      k_start, k_end = indptr[k], indptr[k + 1]
+
+      def subtract(q, data):
+        pos, found = _row_search(indices, k_start, k_end, indices[q])
+        return data.at[q].add(jnp.where(found, -l * data[pos], 0))
+      return lax.fori_loop(p + 1, end, subtract, data)
+
+    return lax.fori_loop(indptr[i], diag_pos[i], eliminate, data)
+
+  return lax.fori_loop(0, n, update_row, data)
+
+
+@jax.jit
+def _apply_ilu0(data, indices, indptr, diag_pos, x):
+  n = indptr.shape[0] - 1
+  dtype = jnp.result_type(data, x)
+  x = x.astype(dtype)
+
+  def row_dot(y, start, end):
+    return lax.fori_loop(start, end, lambda p, s: s + data[p] * y[indices[p]],
+                         jnp.zeros((), dtype))
+
+  def lower(i, y):
+    return y.at[i].add(-row_dot(y, indptr[i], diag_pos[i]))
+
+  def upper(t, z):
+    i = n - 1 - t
+    s = row_dot(z, diag_pos[i] + 1, indptr[i + 1])
+    return z.at[i].set((z[i] - s) / data[diag_pos[i]])
+
+  return lax.fori_loop(0, n, upper, lax.fori_loop(0, n, lower, x))
+
+
+def ilu0(A):
+  """Incomplete LU factorization preconditioner with zero fill-in, ILU(0).
+
+  Computes unit lower triangular ``L`` and upper triangular ``U`` with the
+  sparsity pattern of ``A`` such that ``L @ U`` matches ``A`` on that pattern.
+  Every diagonal entry of ``A`` must be part of its sparsity pattern. Duplicate
+  entries are summed.
+
+  Both the factorization and the triangular solves are inherently sequential,
+  and cost ``O(nse)`` scalar operations or more; they are best suited to
+  problems where they save many iterations of an expensive operator.
+
+  Args:
+    A : square sparse matrix.
+
+  Returns:
+    M : preconditioner computing ``U^{-1} L^{-1} x``.
+  """
+  if not isinstance(A, ops.JAXSparse):
+    raise TypeError("ilu0 requires a sparse matrix; convert dense matrices "
+                    f"with e.g. CSR.fromdense. Got {type(A)}")
+  data, indices, indptr = _sorted_csr(*_coo_triplets(A))
+  diag_pos = _diagonal_positions(indices, indptr)
+  data = _ilu0_factor(data, indices, indptr, diag_pos)
+  return Partial(_apply_ilu0, data, indices, indptr, diag_pos)
+
+
+def incomplete_cholesky(A):
+  """Incomplete Cholesky preconditioner with zero fill-in, IC(0).
+
+  For a symmetric matrix, the ILU(0) factorization is ``L @ D @ L.T``, with
+  ``D`` the diagonal of ``U``, which is the IC(0) factorization written without
+  square roots. This is therefore computed with :func:`ilu0`, and has the same
+  requirements.
+
+  Args:
+    A : symmetric positive definite sparse matrix.
+
+  Returns:
+    M : preconditioner computing ``(L D L^T)^{-1} x``.
+  """
+  return ilu0(A)
+
+
+#----------------------------------------------------------------------
+# Polynomial preconditioners
+
+def _estimate_max_eigenvalue(matvec, n, dtype, num_iters):
+  v = jax.random.normal(jax.random.PRNGKey(0), (n,), dtype)
+
+  def body(_, carry):
+    v, _ = carry
+    w = matvec(v)
+    norm = jnp.linalg.norm(w)
+    return w / norm, norm
+
+  v = v / jnp.linalg.norm(v)
+  _, norm = lax.fori_loop(0, num_iters, body, (v, jnp.zeros((), dtype)))
+  return norm
+
+
+def _apply_chebyshev(degree, matvec, lambda_min, lambda_max, x):
+  # Chebyshev iteration for A y = x from y = 0; see Saad, "Iterative Methods
+  # for Sparse Linear Systems", Algorithm 12.1.
+  theta = (lambda_max + lambda_min) / 2
+  delta = (lambda_max - lambda_min) / 2
+  sigma = theta / delta
+  rho = 1 / sigma
+  d = x / theta
+  y = d
+  r = x
+  for _ in range(degree - 1):
+    r = r - matvec(d)
+    rho_ = 1 / (2 * sigma - rho)
+    d = rho_ * rho * d + (2 * rho_ / delta) * r
+    y = y + d
+    rho = rho_
+  return y
+
+
+def _apply_chebyshev_matrix(degree, A, lambda_min, lambda_max, x):
+  return _apply_chebyshev(degree, _matvec(A), lambda_min, lambda_max, x)
+
+
+def chebyshev(A, degree=3, *, lambda_min=None, lambda_max=None,
+              lambda_ratio=30.0, num_power_iters=20):
+  """Chebyshev polynomial preconditioner.
+
+  Approximates ``A^{-1}`` by the polynomial in ``A`` of the given degree
+  obtained by that many steps of Chebyshev iteration, which is optimal for
+  eigenvalues in ``[lambda_min, lambda_max]``. Applying it costs ``degree - 1``
+  matrix-vector products, and needs no inner products, so it parallelizes
+  well. ``A`` should be symmetric positive definite.
+
+  Args:
+    A : square dense or sparse matrix, or a function computing ``A @ x``.
+    degree : degree of the polynomial.
+    lambda_min, lambda_max : bounds on the targeted eigenvalues of ``A``. If
+      ``lambda_max`` is not given, it is estimated by power iteration (and
+      increased by 10% for safety); if ``lambda_min`` is not given, it is taken
+      to be ``lambda_max / lambda_ratio``. Both are required when ``A`` is a
+      function.
+    lambda_ratio : ratio of ``lambda_max`` to the default ``lambda_min``.
+    num_power_iters : number of power iterations used to estimate
+      ``lambda_max``.
+
+  Returns:
+    M : preconditioner computing ``p(A) x``.
+  """
+  degree = int(degree)
+  if degree < 1:
+    raise ValueError(f"degree must be positive, got {degree}")
+  if lambda_max is None:
+    if callable(A):
+      raise ValueError("chebyshev requires lambda_max when A is a function.")
+    dense, triplets = _dense_or_triplets(A)
+    n = dense.shape[0] if dense is not None else triplets[-1]
+    dtype = dense.dtype if dense is not None else triplets[0].dtype
+    lambda_max = 1.1 * _estimate_max_eigenvalue(_matvec(A), n, dtype,
+                                                num_power_iters)
+  if lambda_min is None:
+    lambda_min = lambda_max / lambda_ratio
+  if callable(A):
+    return Partial(functools.partial(_apply_chebyshev, degree, A),
+                   lambda_min, lambda_max)
+  # The matrix is an argument of the Partial, rather than being closed over,
+  # so that it is not baked into jitted functions as a constant.
+  return Partial(functools.partial(_apply_chebyshev_matrix, degree), A,
+                 lambda_min, lambda_max)
@@ -63,7 +63,7 @@ from jax.util import safe_map, safe_zip, split_list
 from jax._src.lax.control_flow import _check_tree_and_avals
 from jax._src.util import canonicalize_axis
 from jax.experimental import sparse
-from jax.experimental.sparse import BCOO
+from jax.experimental.sparse import BCOO, BSR
 
 sparse_rules : Dict[core.Primitive, Callable] = {}
 
@@ -92,6 +92,8 @@ class ArgSpec(NamedTuple):
   shape: Tuple[int, ...]
   data_ref: Optional[int]
   indices_ref: Optional[int]
+  indices_sorted: bool = False
+  unique_indices: bool = False
 
   @property
   def ndim(self):
@@ -111,7 +113,7 @@ class ArgSpec(NamedTuple):
     assert self.indices_ref is not None
     return spenv.get(self.indices_ref)
 
-_is_bcoo = lambda arg: isinstance(arg, BCOO)
+_is_sparse = lambda arg: isinstance(arg, (BCOO, BSR))
 _is_argspec = lambda arg: isinstance(arg, ArgSpec)
 
 
@@ -119,15 +121,21 @@ def arrays_to_argspecs(
     spenv: SparseEnv,
     args: Any
     ) -> Any:
-  """Convert a pytree of (sparse) arrays to an equivalent pytree of argspecs."""
+  """Convert a pytree of (sparse) arrays to an equivalent pytree of argspecs.
+
+  BSR matrices are converted to their element-wise BCOO representation.
+  """
   def array_to_argspec(arg):
+    if isinstance(arg, BSR):
+      arg = arg.to_bcoo()
     if isinstance(arg, BCOO):
-      return ArgSpec(arg.shape, spenv.push(arg.data), spenv.push(arg.indices))
+      return ArgSpec(arg.shape, spenv.push(arg.data), spenv.push(arg.indices),
+                     arg.indices_sorted, arg.unique_indices)
     elif core.get_aval(arg) is core.abstract_unit:
       return ArgSpec((), None, None)
     else:
       return ArgSpec(np.shape(arg), spenv.push(arg), None)
-  return tree_map(array_to_argspec, args, is_leaf=_is_bcoo)
+  return tree_map(array_to_argspec, args, is_leaf=_is_sparse)
 
 
 def argspecs_to_arrays(
@@ -138,7 +146,9 @@ def argspecs_to_arrays(
   def argspec_to_array(argspec):
     if argspec.is_sparse():
       assert argspec.indices_ref is not None
-      return BCOO((argspec.data(spenv), argspec.indices(spenv)), shape=argspec.shape)
+      return BCOO((argspec.data(spenv), argspec.indices(spenv)), shape=argspec.shape,
+                  indices_sorted=argspec.indices_sorted,
+                  unique_indices=argspec.unique_indices)
     elif argspec.is_unit():
       return core.unit
     else:
@@ -267,7 +277,7 @@ def _zero_preserving_unary_op(prim):
     assert len(argspecs) == 1
     buf = argspecs[0].data(spenv)
     buf_out = prim.bind(buf, **kwargs)
-    out_argspec = ArgSpec(argspecs[0].shape, spenv.push(buf_out), argspecs[0].indices_ref)
+    out_argspec = argspecs[0]._replace(data_ref=spenv.push(buf_out))
     return (out_argspec,)
   return func
 
@@ -281,7 +291,11 @@ for _prim in [
 
 def _dot_general_sparse(spenv, *argspecs, dimension_numbers, precision, preferred_element_type):
   A, B = argspecs_to_arrays(spenv, argspecs)
-  if argspecs[0].is_sparse() and argspecs[1].is_sparse():
+  if (argspecs[0].is_sparse() and argspecs[1].is_sparse() and sparse.bcoo._is_spgemm(A, B)
+      and tuple(map(tuple, dimension_numbers[0])) == ((1,), (0,)) and not any(dimension_numbers[1])):
+    data, indices = sparse.bcoo._bcoo_spgemm_matmul(A, B)
+    return [ArgSpec((A.shape[0], B.shape[1]), spenv.push(data), spenv.push(indices), True, True)]
+  elif argspecs[0].is_sparse() and argspecs[1].is_sparse():
     shape = sparse.bcoo._dot_general_validated_shape(A.shape, B.shape, dimension_numbers)
     data, indices = sparse.bcoo_spdot_general(A.data, A.indices, B.data, B.indices,
                                               lhs_shape=A.shape, rhs_shape=B.shape,
@@ -289,10 +303,12 @@ def _dot_general_sparse(spenv, *argspecs, dimension_numbers, precision, preferre
     return [ArgSpec(shape, spenv.push(data), spenv.push(indices))]
   elif argspecs[0].is_sparse():
     result = sparse.bcoo_dot_general(A.data, A.indices, B, lhs_shape=A.shape,
-                                    dimension_numbers=dimension_numbers)
+                                    dimension_numbers=dimension_numbers,
+                                    indices_sorted=A.indices_sorted)
   else:
     result = sparse.bcoo_rdot_general(A, B.data, B.indices, rhs_shape=B.shape,
-                                      dimension_numbers=dimension_numbers)
+                                      dimension_numbers=dimension_numbers,
+                                      indices_sorted=B.indices_sorted)
   return [ArgSpec(result.shape, spenv.push(result), None)]
 
 sparse_rules[lax.dot_general_p] = _dot_general_sparse
@@ -321,10 +337,13 @@ def _transpose_sparse(spenv, *argspecs, permutation):
   # Indices unchanged if batch & sparse dims are not permuted
   if batch_dims_unchanged and sparse_dims_unchanged:
     indices_ref = argspecs[0].indices_ref
+    indices_sorted = argspecs[0].indices_sorted
   else:
     indices_ref = spenv.push(indices)
+    indices_sorted = False
 
-  argspec = ArgSpec(out_shape, data_ref, indices_ref)
+  argspec = ArgSpec(out_shape, data_ref, indices_ref, indices_sorted,
+                    argspecs[0].unique_indices)
   return (argspec,)
 
 sparse_rules[lax.transpose_p] = _transpose_sparse
@@ -336,7 +355,7 @@ def _add_sparse(spenv, *argspecs):
       raise NotImplementedError("Addition between sparse matrices of different shapes.")
     if X.indices_ref == Y.indices_ref:
       out_data = lax.add(X.data(spenv), Y.data(spenv))
-      out_argspec = ArgSpec(X.shape, spenv.push(out_data), X.indices_ref)
+      out_argspec = X._replace(data_ref=spenv.push(out_data))
     elif X.indices(spenv).ndim != Y.indices(spenv).ndim or X.data(spenv).ndim != Y.data(spenv).ndim:
       raise NotImplementedError("Addition between sparse matrices with different batch/dense dimensions.")
     else:
@@ -359,7 +378,7 @@ def _mul_sparse(spenv, *argspecs):
       raise NotImplementedError("Multiplication between sparse matrices of different shapes.")
     if X.indices_ref == Y.indices_ref:
       out_data = lax.mul(X.data(spenv), Y.data(spenv))
-      out_argspec = ArgSpec(X.shape, spenv.push(out_data), X.indices_ref)
+      out_argspec = X._replace(data_ref=spenv.push(out_data))
     elif X.indices(spenv).ndim != Y.indices(spenv).ndim or X.data(spenv).ndim != Y.data(spenv).ndim:
       raise NotImplementedError("Multiplication between sparse matrices with different batch/dense dimensions.")
     else:
@@ -371,10 +390,12 @@ def _mul_sparse(spenv, *argspecs):
     if Ydata.ndim == 0:
       out_data = lax.mul(X.data(spenv), Ydata)
     elif Ydata.shape == X.shape:
-      out_data = lax.mul(X.data(spenv), sparse.bcoo_extract(X.indices(spenv), Ydata))
+      out_data = lax.mul(X.data(spenv), sparse.bcoo_extract(X.indices(spenv), Ydata,
+                                                            indices_sorted=X.indices_sorted,
+                                                            unique_indices=X.unique_indices))
     else:
       raise NotImplementedError("Multiplication between sparse and dense matrices of different shape.")
-    out_argspec = ArgSpec(X.shape, spenv.push(out_data), X.indices_ref)
+    out_argspec = X._replace(data_ref=spenv.push(out_data))
 
   return (out_argspec,)
 
@@ -387,7 +408,11 @@ def _reduce_sum_sparse(spenv, *argspecs, axes):
   if out_shape == ():
     out_argspec = ArgSpec(out_shape, spenv.push(data.sum()), None)
   else:
-    out_argspec = ArgSpec(out_shape, spenv.push(data), spenv.push(indices))
+    # Indices are unchanged when summing only over dense dimensions.
+    n_batch, n_sparse = X.indices(spenv).ndim - 2, X.indices(spenv).shape[-1]
+    dense_only = all(ax >= n_batch + n_sparse for ax in axes)
+    out_argspec = ArgSpec(out_shape, spenv.push(data), spenv.push(indices),
+                          X.indices_sorted and dense_only, X.unique_indices and dense_only)
   return (out_argspec,)
 
 sparse_rules[lax.reduce_sum_p] = _reduce_sum_sparse
@@ -409,7 +434,10 @@ def _squeeze_sparse(spenv, *argspecs, dimensions):
   data_out = lax.squeeze(data, batch_dims + dense_dims)
   indices_out = lax.squeeze(indices[..., sparse_dims], batch_dims)
   out_shape = tuple(s for i, s in enumerate(arr.shape) if i not in dimensions)
-  return (ArgSpec(out_shape, spenv.push(data_out), spenv.push(indices_out)),)
+  # Squeezed sparse dimensions have a single in-bounds index, so neither the
+  # order nor the uniqueness of the remaining indices changes.
+  return (ArgSpec(out_shape, spenv.push(data_out), spenv.push(indices_out),
+                  arr.indices_sorted, arr.unique_indices),)
 
 sparse_rules[lax.squeeze_p] = _squeeze_sparse
 
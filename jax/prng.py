@@ -20,5 +20,9 @@ from jax._src.prng import (
   threefry2x32_p as threefry2x32_p,
   threefry_2x32 as threefry_2x32,
   threefry_prng_impl as threefry_prng_impl,
+  philox4x32_p as philox4x32_p,
+  philox_4x32 as philox_4x32,
+  philox_prng_impl as philox_prng_impl,
+  philox_fast_prng_impl as philox_fast_prng_impl,
   rbg_prng_impl as rbg_prng_impl,
 )
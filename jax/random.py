@@ -83,8 +83,12 @@ for the design and its motivation.
 from jax._src.prng import PRNGKeyArray as KeyArray
 
 from jax._src.random import (
+  AliasTable as AliasTable,
   PRNGKey as PRNGKey,
+  alias_sample as alias_sample,
+  alias_table as alias_table,
   bernoulli as bernoulli,
+  bernoulli_packed as bernoulli_packed,
   beta as beta,
   categorical as categorical,
   cauchy as cauchy,
@@ -102,6 +106,7 @@ from jax._src.random import (
   normal as normal,
   pareto as pareto,
   permutation as permutation,
+  permutation_index as permutation_index,
   poisson as poisson,
   rademacher as rademacher,
   randint as randint,
@@ -16,5 +16,6 @@
 
 from jax._src.scipy.optimize.minimize import (
   minimize as minimize,
+  minimize_batched as minimize_batched,
   OptimizeResults as OptimizeResults,
 )
@@ -20,4 +20,6 @@ from jax._src.scipy.signal import (
   correlate as correlate,
   correlate2d as correlate2d,
   detrend as detrend,
+  fftconvolve as fftconvolve,
+  oaconvolve as oaconvolve,
 )
@@ -15,6 +15,15 @@
 # flake8: noqa: F401
 from jax._src.scipy.sparse.linalg import (
   cg as cg,
+  gcrotmk as gcrotmk,
   gmres as gmres,
   bicgstab as bicgstab,
+  eigsh as eigsh,
+  lobpcg as lobpcg,
+  trace_estimate as trace_estimate,
+  logdet_estimate as logdet_estimate,
+  cg_batched as cg_batched,
+  gmres_batched as gmres_batched,
+  bicgstab_batched as bicgstab_batched,
+  BatchedSolveInfo as BatchedSolveInfo,
 )
@@ -38,7 +38,7 @@ setup(
     install_requires=[
         'absl-py',
         'numpy>=1.18',
-        'opt_einsum',
+        'opt_einsum>=3.2',
         'scipy>=1.2.1',
     ],
     extras_require={
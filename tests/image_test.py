@@ -25,6 +25,7 @@ import jax
 from jax import image
 from jax import numpy as jnp
 from jax._src import test_util as jtu
+from jax._src.image import scale
 
 from jax.config import config
 
@@ -382,6 +383,48 @@ class ImageTest(jtu.JaxTestCase):
     self.assertTrue(jnp.all(jnp.isfinite(translate_out)))
 
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+       {"testcase_name": "_shape={}_target={}_method={}_antialias={}".format(
+          jtu.format_shape_dtype_string(image_shape, dtype),
+          jtu.format_shape_dtype_string(target_shape, dtype), method,
+          antialias),
+        "dtype": dtype, "image_shape": image_shape,
+        "target_shape": target_shape,
+        "method": method, "antialias": antialias}
+       for dtype in [np.float32]
+       for image_shape, target_shape in [
+         ([2, 64, 48, 3], [2, 16, 12, 3]),
+         ([2, 64, 48, 3], [2, 37, 48, 3]),
+         ([2, 64, 48, 3], [2, 128, 96, 3]),
+         ([2, 17, 9, 3], [2, 68, 36, 3]),
+       ]
+       for method in ["linear", "lanczos3", "lanczos5", "cubic"]
+       for antialias in [False, True]))
+  def testResizeBanded(self, dtype, image_shape, target_shape, method,
+                       antialias):
+    # resize gathers the support of each output pixel when it is small; compare
+    # against the dense weight matrices used by scale_and_translate.
+    rng = jtu.rand_default(self.rng())
+    x = rng(image_shape, dtype)
+    scale_factors = np.array(target_shape, np.float32) / np.array(image_shape)
+    expected = image.scale_and_translate(
+        x, target_shape, range(len(image_shape)), scale_factors,
+        np.zeros(len(image_shape), np.float32), method, antialias=antialias)
+    resize = partial(image.resize, shape=target_shape, method=method,
+                     antialias=antialias)
+    self.assertAllClose(resize(x), expected, atol=1e-4, rtol=1e-4)
+
+    banded = any(
+        scale._resize_weight_plan(m, n, image.ResizeMethod.from_string(method),
+                                  antialias, config.x64_enabled)[0] is not None
+        for m, n in zip(image_shape, target_shape) if m != n)
+    self.assertEqual(banded, 'gather' in str(jax.make_jaxpr(resize)(x)))
+
+    cache_info = scale._resize_weight_plan.cache_info()
+    jax.jit(resize)(x)
+    self.assertEqual(scale._resize_weight_plan.cache_info().misses,
+                     cache_info.misses)
+
   def testResizeWithUnusualShapes(self):
     x = jnp.ones((3, 4))
     # Array shapes are accepted
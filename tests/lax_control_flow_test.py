@@ -2541,6 +2541,54 @@ class LaxControlFlowTest(jtu.JaxTestCase):
     result = lax.associative_scan(operator.add, data, reverse=True)
     self.assertAllClose(result, expected, check_dtypes=False)
 
+  @parameterized.named_parameters(
+      {"testcase_name": f"_{shape}_axis={axis}_block={block_size}_reverse={reverse}",
+       "shape": shape, "axis": axis, "block_size": block_size,
+       "reverse": reverse}
+      for shape in [[1], [7], [100], [1000], [37, 5], [5, 123, 3]]
+      for axis in range(len(shape))
+      for block_size in [1, 3, 16, 50]
+      for reverse in [False, True])
+  def testAssociativeScanBlocked(self, shape, axis, block_size, reverse):
+    rng = jtu.rand_int(self.rng(), 0, 10)
+    data = rng(shape, np.int32)
+    flip = lambda x: np.flip(x, axis) if reverse else x
+    result = lax.associative_scan(lax.add, data, reverse=reverse, axis=axis,
+                                  block_size=block_size)
+    self.assertAllClose(result, flip(np.cumsum(flip(data), axis=axis)),
+                        check_dtypes=False)
+    result = lax.associative_scan(lax.max, data, reverse=reverse, axis=axis,
+                                  block_size=block_size)
+    self.assertAllClose(result, flip(np.maximum.accumulate(flip(data), axis=axis)),
+                        check_dtypes=False)
+
+  def testAssociativeScanBlockedStructured(self):
+    data = (np.arange(100.), np.arange(100.) * 10)
+    fn = lambda a, b: (a[0] + b[0], jnp.maximum(a[1], b[1]))
+    result = lax.associative_scan(fn, data, block_size=8)
+    self.assertAllClose(result[0], np.cumsum(data[0]), check_dtypes=False)
+    self.assertAllClose(result[1], data[1], check_dtypes=False)
+
+  def testAssociativeScanBlockedInvalidBlockSize(self):
+    with self.assertRaisesRegex(ValueError, "block_size must be positive"):
+      lax.associative_scan(lax.add, np.arange(4), block_size=0)
+
+  @parameterized.named_parameters(
+      {"testcase_name": f"_{op.__name__}_reverse={reverse}", "op": op,
+       "np_op": np_op, "reverse": reverse}
+      for op, np_op in [(lax.cumsum, np.cumsum),
+                        (lax.cummax, np.maximum.accumulate),
+                        (lax.cummin, np.minimum.accumulate)]
+      for reverse in [False, True])
+  def testCumulativeReductionLongSequence(self, op, np_op, reverse):
+    # Long enough to take the blocked path on CPU, and not a multiple of the
+    # block size.
+    n = (1 << 16) + 1234
+    data = self.rng().randint(-100, 100, size=(n,)).astype(np.int32)
+    flip = lambda x: x[::-1] if reverse else x
+    result = jax.jit(partial(op, reverse=reverse))(data)
+    self.assertArraysEqual(result, flip(np_op(flip(data))).astype(np.int32))
+
   def testAssociativeScanStructured3(self):
     pair = collections.namedtuple('pair', ('first', 'second'))
     data = pair(first=np.array([0., 1., 2.]),
@@ -16,8 +16,12 @@
 from collections import defaultdict
 from functools import partial
 import itertools
+import os
+import tempfile
+from unittest import mock
 
 import numpy as np
+import opt_einsum
 from absl.testing import absltest
 from absl.testing import parameterized
 
@@ -25,6 +29,8 @@ import jax
 from jax import lax
 import jax.numpy as jnp
 import jax._src.test_util as jtu
+from jax._src import config as jax_config
+from jax._src.numpy import lax_numpy
 
 from jax.config import config
 config.parse_flags_with_absl()
@@ -349,6 +355,55 @@ class EinsumTest(jtu.JaxTestCase):
     jaxpr = jax.make_jaxpr(partial(jnp.einsum, "ijk,kl->ijl"))(x, y)
     self.assertNotIn('transpose', str(jaxpr))
 
+  def test_einsum_path_cache(self):
+    r = self.rng()
+    x, y, z = r.randn(3, 4), r.randn(4, 5), r.randn(5, 6)
+    lax_numpy._einsum_contract_path.cache_clear()
+    with mock.patch.object(opt_einsum, 'contract_path',
+                           wraps=opt_einsum.contract_path) as contract_path:
+      f = partial(jnp.einsum, 'ij,jk,kl->il')
+      self._check('ij,jk,kl->il', x, y, z)
+      jax.jit(f)(x, y, z)
+      jax.grad(lambda x: f(x, y, z).sum())(x)
+      self.assertEqual(contract_path.call_count, 1)
+      jnp.einsum('ij,jk,kl->il', x, y, r.randn(5, 2))
+      self.assertEqual(contract_path.call_count, 2)
+
+  def test_einsum_path_cache_file(self):
+    r = self.rng()
+    x, y, z = r.randn(3, 4), r.randn(4, 5), r.randn(5, 6)
+    with tempfile.TemporaryDirectory() as tmpdir:
+      fname = os.path.join(tmpdir, 'einsum_paths')
+      # A path cached in memory before the file is set is still written to it.
+      jnp.einsum('ij,jk,kl->il', x, y, z)
+      with jax_config.einsum_path_cache_file(fname):
+        expected = jnp.einsum('ij,jk,kl->il', x, y, z)
+        self.assertTrue(os.path.exists(fname))
+
+        # A new process reads the paths back from the file.
+        lax_numpy._einsum_contract_path.cache_clear()
+        lax_numpy._einsum_path_files.clear()
+        with mock.patch.object(opt_einsum, 'contract_path') as contract_path:
+          actual = jnp.einsum('ij,jk,kl->il', x, y, z)
+        contract_path.assert_not_called()
+      lax_numpy._einsum_path_files.clear()
+    self.assertAllClose(actual, expected)
+
+  @parameterized.named_parameters(
+      {"testcase_name": f"_{n}", "n": n} for n in [2, 6, 20])
+  def test_einsum_default_optimize(self, n):
+    r = self.rng()
+    operands = [r.randn(2, 2) for _ in range(n)]
+    names = 'abcdefghijklmnopqrstuvwxyz'
+    s = ','.join(names[i:i + 2] for i in range(n)) + '->a' + names[n]
+    self._check(s, *operands)
+    with mock.patch.object(opt_einsum, 'contract_path',
+                           wraps=opt_einsum.contract_path) as contract_path:
+      lax_numpy._einsum_contract_path.cache_clear()
+      jnp.einsum(s, *operands)
+    self.assertEqual(contract_path.call_args[1]['optimize'],
+                     lax_numpy._einsum_default_optimize(n))
+
 
 if __name__ == '__main__':
   absltest.main(testLoader=jtu.JaxTestLoader())
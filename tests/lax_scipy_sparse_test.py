@@ -471,6 +471,305 @@ class LaxBackedScipyTests(jtu.JaxTestCase):
     QAQ = matmul_high_precision(QA, Q[:, :n])
     self.assertAllClose(QAQ, H.T[:n, :], rtol=1e-5, atol=1e-5)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_solve_method={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), solve_method),
+       "shape": shape, "dtype": dtype, "solve_method": solve_method}
+      for shape in [(10, 10)]
+      for dtype in [np.float64, np.complex128]
+      for solve_method in ['incremental', 'batched']))
+  def test_gmres_mixed_precision(self, shape, dtype, solve_method):
+    if not config.x64_enabled:
+      raise unittest.SkipTest("requires x64 mode")
+
+    rng = jtu.rand_default(self.rng())
+    A = rng(shape, dtype) + 5 * np.eye(shape[0], dtype=dtype)
+    b = rng(shape[:1], dtype)
+    x, info = jax.scipy.sparse.linalg.gmres(
+        A, b, tol=1e-12, restart=5, solve_method=solve_method,
+        inner_dtype=np.float32)
+    self.assertEqual(x.dtype, dtype)
+    self.assertEqual(info, 0)
+    # Iterative refinement reaches full float64 accuracy.
+    self.assertAllClose(np.linalg.solve(A, b), x, atol=1e-10, rtol=1e-10)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_preconditioner={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), preconditioner),
+       "shape": shape, "dtype": dtype, "preconditioner": preconditioner}
+      for shape in [(2, 2), (7, 7)]
+      for dtype in float_types + complex_types
+      for preconditioner in [None, 'identity', 'exact']))
+  def test_gcrotmk_on_random_system(self, shape, dtype, preconditioner):
+    rng = jtu.rand_default(self.rng())
+    A = rng(shape, dtype) + 3 * np.eye(shape[0], dtype=dtype)
+    b = rng(shape[:1], dtype)
+    M = self._fetch_preconditioner(preconditioner, A, rng=rng)
+    solve = partial(jax.scipy.sparse.linalg.gcrotmk, tol=1e-6, m=3, k=2, M=M)
+    x, info, recycle = jit(solve)(A, b)
+    self.assertEqual(info, 0)
+    self.assertEqual(recycle.shape, (shape[0], 2))
+    self.assertAllClose(np.linalg.solve(A, b), x, atol=1e-4, rtol=1e-4)
+
+    # Recycling the subspace for a perturbed system.
+    A2 = A + 0.01 * np.diag(np.arange(shape[0])).astype(dtype)
+    x, info, _ = jit(solve)(A2, b, recycle=recycle)
+    self.assertAllClose(np.linalg.solve(A2, b), x, atol=1e-4, rtol=1e-4)
+
+  def test_gcrotmk_recycling_speeds_up_related_solves(self):
+    rng = np.random.RandomState(0)
+    n = 50
+    A = np.diag(np.logspace(0, 2, n)).astype(np.float32)
+    b = rng.randn(n).astype(np.float32)
+    solve = partial(jax.scipy.sparse.linalg.gcrotmk, m=5, k=10, maxiter=4)
+    _, _, recycle = solve(A, b, maxiter=20)
+    A2 = A * 1.01
+    x_fresh, _, _ = solve(A2, b)
+    x_recycled, _, _ = solve(A2, b, recycle=recycle)
+    err = lambda x: np.linalg.norm(A2 @ x - b)
+    self.assertLess(err(x_recycled), err(x_fresh))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_diagonal={}".format(diagonal), "diagonal": diagonal}
+      for diagonal in [(1., 1., 1.), (1., 2., 2.)]))
+  def test_gcrotmk_breakdown(self, diagonal):
+    # The Krylov space is invariant after one or two steps, before m steps.
+    A = np.diag(np.array(diagonal, np.float32))
+    b = np.array([1., -2., 3.], np.float32)
+    x, info, recycle = jax.scipy.sparse.linalg.gcrotmk(A, b, m=3)
+    self.assertEqual(info, 0)
+    self.assertAllClose(b / np.array(diagonal, np.float32), x)
+    self.assertFalse(np.any(np.isnan(recycle)))
+
+  def test_gcrotmk_pytree(self):
+    A = lambda x: {"a": x["a"] + 0.5 * x["b"], "b": 0.5 * x["a"] + x["b"]}
+    b = {"a": 1.0, "b": -4.0}
+    expected = {"a": 4.0, "b": -6.0}
+    actual, _, recycle = jax.scipy.sparse.linalg.gcrotmk(A, b)
+    self.assertEqual(recycle.shape, (2, 2))
+    self.assertEqual(expected.keys(), actual.keys())
+    self.assertAlmostEqual(expected["a"], actual["a"], places=5)
+    self.assertAlmostEqual(expected["b"], actual["b"], places=5)
+
+  def test_gcrotmk_grad(self):
+    rng = np.random.RandomState(0)
+    a = rng.randn(4, 4) + 4 * np.eye(4)
+    b = rng.randn(4)
+    solve = lambda a, b: jax.scipy.sparse.linalg.gcrotmk(
+        partial(matmul_high_precision, a), b, tol=1e-8, m=4)[0]
+    jtu.check_grads(solve, (a, b), order=1, modes=["rev"], rtol=2e-2)
+
+  # Batched solvers
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_solver={}_compact_every={}_preconditioned={}".format(
+          solver, compact_every, preconditioned),
+       "solver": solver, "compact_every": compact_every,
+       "preconditioned": preconditioned}
+      for solver in ["cg", "bicgstab", "gmres"]
+      for compact_every in [None, 1, 3]
+      for preconditioned in [False, True]))
+  def test_batched_solver_against_numpy(self, solver, compact_every,
+                                        preconditioned):
+    batch, n = 32, 6
+    rng = jtu.rand_default(self.rng())
+    # Half of the systems are trivial and converge after a single iteration.
+    A = np.stack([rand_sym_pos_def(rng, (n, n), np.float32) if i % 2 else
+                  np.eye(n, dtype=np.float32) for i in range(batch)])
+    b = rng((batch, n), np.float32)
+    M = np.linalg.inv(A) if preconditioned else None
+    func = getattr(jax.scipy.sparse.linalg, f"{solver}_batched")
+    x, info = func(A, b, tol=1e-6, M=M, maxiter=100,
+                   compact_every=compact_every)
+    expected = np.linalg.solve(A, b[..., None])[..., 0]
+    self.assertAllClose(expected, x, atol=1e-3, rtol=1e-3)
+    self.assertEqual(info.converged.shape, (batch,))
+    self.assertEqual(info.num_iters.shape, (batch,))
+    self.assertTrue(np.all(info.converged))
+    self.assertTrue(np.all(info.num_iters[::2] <= info.num_iters[1::2]))
+
+  def test_cg_batched_per_system_iterations(self):
+    batch, n = 16, 8
+    A = np.stack([np.diag(np.linspace(1., 1. + i, n)) for i in range(batch)])
+    b = np.ones((batch, n))
+    x, info = jax.scipy.sparse.linalg.cg_batched(A, b, maxiter=4 * n)
+    self.assertAllClose(b / np.diagonal(A, axis1=1, axis2=2), x,
+                        atol=1e-4, rtol=1e-4)
+    self.assertEqual(info.num_iters[0], 1)
+    self.assertGreater(info.num_iters[-1], 1)
+    x_vmap = jax.vmap(lambda A, b: lax_cg(A, b, maxiter=4 * n))(A, b)
+    self.assertAllClose(x_vmap, x, atol=1e-4, rtol=1e-4)
+
+  def test_cg_batched_pytree_with_args(self):
+    A = lambda x, d: {"a": d * x["a"] + 0.5 * x["b"],
+                      "b": 0.5 * x["a"] + d * x["b"]}
+    d = jnp.array([1.0, 2.0, 3.0])
+    b = {"a": jnp.ones(3), "b": -jnp.ones(3)}
+    x, info = jit(partial(jax.scipy.sparse.linalg.cg_batched, A))(
+        b, args=(d,))
+    expected = 1 / (d - 0.5)
+    self.assertAllClose(expected, x["a"], atol=1e-5, rtol=1e-5)
+    self.assertAllClose(-expected, x["b"], atol=1e-5, rtol=1e-5)
+    self.assertTrue(np.all(info.converged))
+
+  def test_batched_solver_errors(self):
+    A = lambda x: x
+    b = jnp.zeros((3, 2))
+    cg_batched = jax.scipy.sparse.linalg.cg_batched
+    with self.assertRaisesRegex(ValueError, "same leading batch dimension"):
+      cg_batched(A, {'x': b, 'y': b[:2]})
+    with self.assertRaisesRegex(ValueError, "must be a stack of square"):
+      cg_batched(jnp.zeros((3, 2, 3)), b)
+    with self.assertRaisesRegex(ValueError, "compact_every must be positive"):
+      cg_batched(A, b, compact_every=0)
+
+
+  # Matrix-free eigensolvers and trace estimators
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_which={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), which),
+       "shape": shape, "dtype": dtype, "which": which}
+      for shape in [(30, 30), (64, 64)]
+      for dtype in float_types + complex_types
+      for which in ["LM", "LA", "SA"]))
+  def test_eigsh_against_numpy(self, shape, dtype, which):
+    rng = jtu.rand_default(self.rng())
+    A = rand_sym_pos_def(rng, shape, dtype) - 2 * np.eye(shape[0], dtype=dtype)
+    k = 3
+    w, v = jit(partial(jax.scipy.sparse.linalg.eigsh, k=k, which=which,
+                       ncv=12, tol=1e-5))(A)
+    expected = np.linalg.eigvalsh(A)
+    if which == "LM":
+      expected = np.sort(expected[np.argsort(-np.abs(expected))[:k]])
+    elif which == "LA":
+      expected = expected[-k:]
+    else:
+      expected = expected[:k]
+    self.assertEqual(v.shape, (shape[0], k))
+    tol = 1e-3 if dtype in (np.float32, np.complex64) else 1e-6
+    self.assertAllClose(expected, w, atol=tol, rtol=tol, check_dtypes=False)
+    self.assertAllClose(matmul_high_precision(A, v), v * w[None, :],
+                        atol=10 * tol, rtol=10 * tol, check_dtypes=False)
+
+  def test_eigsh_pytree(self):
+    A = lambda x: {"a": 2 * x["a"] + x["b"], "b": x["a"] + 2 * x["b"] + x["c"],
+                   "c": x["b"] + 2 * x["c"]}
+    v0 = {"a": 1.0, "b": 0.5, "c": -1.0}
+    w, v = jax.scipy.sparse.linalg.eigsh(A, k=1, v0=v0, which="LA")
+    self.assertAllClose(w, np.array([2 + np.sqrt(2)]), atol=1e-5, rtol=1e-5,
+                        check_dtypes=False)
+    self.assertEqual(v["a"].shape, (1,))
+    self.assertAllClose(abs(v["b"][0] / v["a"][0]), np.sqrt(2), atol=1e-4,
+                        rtol=1e-4, check_dtypes=False)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_which={}_k={}".format(which, k),
+       "which": which, "k": k}
+      for which in ["LM", "LA", "SA"]
+      for k in [1, 3]))
+  def test_eigsh_invariant_subspace(self, which, k):
+    # The Krylov spaces of these operators are invariant after a few steps.
+    eigsh = partial(jax.scipy.sparse.linalg.eigsh, k=k, which=which, ncv=8)
+    w, _ = eigsh(jnp.eye(10))
+    self.assertAllClose(np.ones(k), w, atol=1e-5, rtol=1e-5,
+                        check_dtypes=False)
+    diagonal = np.zeros(10, np.float32)
+    diagonal[:2] = [3., -2.]
+    expected = np.sort(diagonal)
+    if which == "LM":
+      expected = np.sort(expected[np.argsort(-np.abs(expected))[:k]])
+    elif which == "LA":
+      expected = expected[-k:]
+    else:
+      expected = expected[:k]
+    w, v = eigsh(np.diag(diagonal))
+    self.assertAllClose(expected, w, atol=1e-5, rtol=1e-5, check_dtypes=False)
+    self.assertAllClose(diagonal[:, None] * v, v * w[None, :], atol=1e-4,
+                        rtol=1e-4, check_dtypes=False)
+
+  def test_eigsh_errors(self):
+    eigsh = jax.scipy.sparse.linalg.eigsh
+    A = jnp.eye(5)
+    with self.assertRaisesRegex(ValueError, "v0 must be provided"):
+      eigsh(lambda x: x, k=1)
+    with self.assertRaisesRegex(ValueError, "invalid which"):
+      eigsh(A, k=1, which="SM")
+    with self.assertRaisesRegex(ValueError, "k must satisfy"):
+      eigsh(A, k=5)
+    with self.assertRaisesRegex(ValueError, "ncv must satisfy"):
+      eigsh(A, k=2, ncv=2)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_largest={}_preconditioned={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), largest, preconditioned),
+       "shape": shape, "dtype": dtype, "largest": largest,
+       "preconditioned": preconditioned}
+      for shape in [(30, 30), (64, 64)]
+      for dtype in float_types + complex_types
+      for largest in [True, False]
+      for preconditioned in [False, True]))
+  def test_lobpcg_against_numpy(self, shape, dtype, largest, preconditioned):
+    rng = jtu.rand_default(self.rng())
+    A = rand_sym_pos_def(rng, shape, dtype)
+    k = 3
+    X = rng((shape[0], k), dtype)
+    M = np.diag(1 / np.diagonal(A)) if preconditioned else None
+    w, v = jit(partial(jax.scipy.sparse.linalg.lobpcg, M=M, largest=largest,
+                       tol=1e-6, maxiter=200))(A, X)
+    expected = np.linalg.eigvalsh(A)
+    expected = expected[-k:] if largest else expected[:k]
+    self.assertEqual(v.shape, (shape[0], k))
+    tol = 1e-3 if dtype in (np.float32, np.complex64) else 1e-6
+    self.assertAllClose(expected, w, atol=tol, rtol=tol, check_dtypes=False)
+
+  def test_lobpcg_errors(self):
+    with self.assertRaisesRegex(ValueError, "number of eigenpairs"):
+      jax.scipy.sparse.linalg.lobpcg(jnp.eye(5), jnp.ones((5, 2)))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_method={}".format(method), "method": method}
+      for method in ["hutchinson", "hutch++"]))
+  def test_trace_estimate(self, method):
+    rng = np.random.RandomState(0)
+    n = 100
+    Q, _ = np.linalg.qr(rng.randn(n, n))
+    A = (Q * np.linspace(1, 2, n)) @ Q.T
+    estimate = jax.scipy.sparse.linalg.trace_estimate(
+        A.astype(np.float32), jnp.zeros(n), jax.random.PRNGKey(0),
+        num_samples=60, method=method)
+    self.assertAllClose(np.trace(A), estimate, rtol=0.2, check_dtypes=False)
+
+  def test_trace_estimate_exact_for_low_rank(self):
+    rng = np.random.RandomState(0)
+    U = rng.randn(50, 5).astype(np.float32)
+    A = lambda x: {"x": U @ (U.T @ x["x"])}
+    estimate = jax.scipy.sparse.linalg.trace_estimate(
+        A, {"x": jnp.zeros(50)}, jax.random.PRNGKey(0), num_samples=18)
+    self.assertAllClose(np.sum(U ** 2), estimate, rtol=1e-4,
+                        check_dtypes=False)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_method={}".format(method), "method": method}
+      for method in ["hutchinson", "hutch++"]))
+  def test_logdet_estimate(self, method):
+    rng = np.random.RandomState(0)
+    n = 100
+    Q, _ = np.linalg.qr(rng.randn(n, n))
+    eigenvalues = np.linspace(1, 100, n)
+    A = (Q * eigenvalues) @ Q.T
+    estimate = jit(partial(jax.scipy.sparse.linalg.logdet_estimate,
+                           num_samples=30, method=method))(
+        A.astype(np.float32), jnp.zeros(n), jax.random.PRNGKey(0))
+    self.assertAllClose(np.sum(np.log(eigenvalues)), estimate, rtol=0.05,
+                        check_dtypes=False)
+
+  def test_estimator_errors(self):
+    trace_estimate = jax.scipy.sparse.linalg.trace_estimate
+    key = jax.random.PRNGKey(0)
+    with self.assertRaisesRegex(ValueError, "invalid method"):
+      trace_estimate(jnp.eye(3), jnp.zeros(3), key, method="exact")
+    with self.assertRaisesRegex(ValueError, "requires num_samples >= 3"):
+      trace_estimate(jnp.eye(3), jnp.zeros(3), key, num_samples=2)
+
 
 if __name__ == "__main__":
   absltest.main(testLoader=jtu.JaxTestLoader())
@@ -30,6 +30,7 @@ from jax import lax
 from jax import numpy as jnp
 from jax import scipy as jsp
 from jax._src import test_util as jtu
+from jax._src.lax import linalg as lax_linalg
 
 from jax.config import config
 config.parse_flags_with_absl()
@@ -456,6 +457,30 @@ class NumpyLinalgTest(jtu.JaxTestCase):
     self.assertTrue(np.all(np.linalg.norm(
         np.matmul(args, vs) - ws[..., None, :] * vs) < 1e-3))
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_shape={}".format(
+           jtu.format_shape_dtype_string(shape, dtype)),
+       "shape": shape, "dtype": dtype}
+      for shape in [(1000, 2, 2), (1000, 3, 3), (10, 100, 4, 4), (1000, 8, 8)]
+      for dtype in float_types))
+  def testEighJacobi(self, shape, dtype):
+    rng = jtu.rand_default(self.rng())
+    a = rng(shape, dtype)
+    a = (a + T(a)) / 2
+    w, v = jnp.linalg.eigh(a)
+    tol = {np.float32: 1e-4, np.float64: 1e-12}[dtype]
+    self.assertAllClose(np.linalg.eigvalsh(a), w, atol=tol, rtol=tol)
+    self.assertAllClose(np.matmul(a, v), w[..., None, :] * v, atol=tol,
+                        rtol=tol)
+    self.assertLess(np.abs(np.matmul(T(v), v) - np.eye(shape[-1])).max(), tol)
+
+  def testEighJacobiNaN(self):
+    a = np.array([[[2., 1.], [1., 2.]], [[np.nan, 1.], [1., 2.]]], np.float32)
+    w, v = jnp.linalg.eigh(a)
+    self.assertAllClose(np.linalg.eigvalsh(a[0]), w[0])
+    self.assertTrue(np.all(np.isnan(w[1])))
+    self.assertTrue(np.all(np.isnan(v[1])))
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name":
        "_shape={}".format(jtu.format_shape_dtype_string(shape, dtype)),
@@ -607,6 +632,31 @@ class NumpyLinalgTest(jtu.JaxTestCase):
         atol = 5e-4
       self.assertArraysAllClose(t_out, b.real, atol=atol)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_shape={}_fullmatrices={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), full_matrices),
+       "shape": shape, "dtype": dtype, "full_matrices": full_matrices}
+      for shape in [(1000, 3, 3), (1000, 4, 2), (1000, 2, 5), (1000, 8, 8)]
+      for dtype in float_types
+      for full_matrices in [False, True]))
+  def testSVDJacobi(self, shape, dtype, full_matrices):
+    rng = jtu.rand_default(self.rng())
+    a = rng(shape, dtype)
+    # Make some of the matrices rank deficient.
+    a[::2, :, 0] = a[::2, :, -1]
+    u, s, vt = jnp.linalg.svd(a, full_matrices=full_matrices)
+    k = min(shape[-2:])
+    tol = {np.float32: 1e-4, np.float64: 1e-12}[dtype]
+    self.assertAllClose(np.linalg.svd(a, compute_uv=False), s, atol=tol,
+                        rtol=tol)
+    self.assertAllClose(
+        a, np.matmul(u[..., :k] * s[..., None, :], vt[..., :k, :]),
+        atol=tol, rtol=tol)
+    self.assertLess(
+        np.abs(np.matmul(T(u), u) - np.eye(u.shape[-1])).max(), tol)
+    self.assertLess(
+        np.abs(np.matmul(vt, T(vt)) - np.eye(vt.shape[-2])).max(), tol)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_shape={}_fullmatrices={}".format(
           jtu.format_shape_dtype_string(shape, dtype), full_matrices),
@@ -1440,6 +1490,87 @@ class LaxLinalgTest(jtu.JaxTestCase):
     A[[0, 1], [1, 2]] = du[:-1]
     np.testing.assert_allclose(A @ X, B, rtol=1e-6, atol=1e-6)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_shape={}_block_size={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), block_size),
+       "shape": shape, "dtype": dtype, "block_size": block_size}
+      for shape in [(0, 0), (1, 1), (4, 5), (40, 20), (20, 40), (3, 70, 70)]
+      for dtype in float_types + complex_types
+      for block_size in [8, 48]))
+  def testLuPython(self, shape, dtype, block_size):
+    rng = jtu.rand_default(self.rng())
+    x = rng(shape, dtype)
+    lu, pivots, perm = jit(partial(lax_linalg._lu_python,
+                                   block_size=block_size))(x)
+    m, n = shape[-2:]
+    k = min(m, n)
+    l = np.tril(lu, -1)[..., :k] + np.eye(m, k, dtype=dtype)
+    u = np.triu(lu)[..., :k, :]
+    self.assertAllClose(np.take_along_axis(x, perm[..., None], axis=-2),
+                        np.matmul(l, u),
+                        rtol={np.float32: 1e-3, np.float64: 1e-12,
+                              np.complex64: 1e-3, np.complex128: 1e-12})
+    self.assertArraysEqual(
+        lax.linalg.lu_pivots_to_permutation(pivots, m), perm)
+
+  def testLuPythonLarge(self):
+    n = 2 * lax_linalg._LU_UNROLL_MAX_SIZE
+    x = self.rng().randn(n, n).astype(np.float32)
+    lu, _, perm = jit(lax_linalg._lu_python)(x)
+    l = np.tril(lu, -1) + np.eye(n, dtype=np.float32)
+    self.assertAllClose(x[perm], np.matmul(l, np.triu(lu)), rtol=1e-3,
+                        atol=1e-3)
+
+    # The leaves of large decompositions are rolled loops, so that the HLO does
+    # not grow with the number of columns of each leaf.
+    def hlo_size(f):
+      return len(jax.xla_computation(f)(x).as_hlo_text().splitlines())
+    rolled = hlo_size(lax_linalg._lu_python)
+    unrolled = hlo_size(partial(lax_linalg._lu_recursive, unroll=True))
+    self.assertLess(3 * rolled, unrolled)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_shape={}_block_size={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), block_size),
+       "shape": shape, "dtype": dtype, "block_size": block_size}
+      for shape in [(0, 0), (1, 1), (5, 5), (40, 40), (3, 70, 70)]
+      for dtype in float_types + complex_types
+      for block_size in [8, 48]))
+  def testCholeskyPython(self, shape, dtype, block_size):
+    rng = jtu.rand_default(self.rng())
+    x = rng(shape, dtype)
+    a = np.matmul(x, np.conj(T(x))) + shape[-1] * np.eye(shape[-1], dtype=dtype)
+    # Only the lower triangle is read.
+    a_lower = np.tril(a) + np.triu(rng(shape, dtype), 1)
+    l = jit(partial(lax_linalg._cholesky_python, block_size=block_size))(
+        a_lower)
+    self.assertAllClose(np.linalg.cholesky(a), l,
+                        rtol={np.float32: 1e-3, np.float64: 1e-12,
+                              np.complex64: 1e-3, np.complex128: 1e-12})
+
+  def testCholeskyPythonNotPositiveDefinite(self):
+    a = np.array([[[2., 1.], [1., 2.]], [[1., 2.], [2., 1.]]], np.float32)
+    l = lax_linalg._cholesky_python(a)
+    self.assertAllClose(np.linalg.cholesky(a[0]), l[0])
+    self.assertTrue(np.all(np.isnan(l[1])))
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_n={}_lower={}_unit_diagonal={}".format(
+          n, lower, unit_diagonal),
+       "n": n, "lower": lower, "unit_diagonal": unit_diagonal}
+      for n in [1, 5, 70]
+      for lower in [False, True]
+      for unit_diagonal in [False, True]))
+  def testTriangularSolvePython(self, n, lower, unit_diagonal):
+    rng = jtu.rand_default(self.rng())
+    a = rng((n, n), np.float32) / n + np.eye(n, dtype=np.float32)
+    b = rng((n, 3), np.float32)
+    x = jit(partial(lax_linalg._triangular_solve_python, lower=lower,
+                    unit_diagonal=unit_diagonal, block_size=16))(a, b)
+    expected = scipy.linalg.solve_triangular(
+        a, b, lower=lower, unit_diagonal=unit_diagonal)
+    self.assertAllClose(expected, x, rtol=1e-3, atol=1e-3)
+
   @parameterized.named_parameters(
         jtu.cases_from_list({
             "testcase_name":
@@ -15,12 +15,13 @@
 from functools import partial
 
 from absl.testing import absltest
+from absl.testing import parameterized
 import numpy as np
 
 import jax
 from jax._src import test_util as jtu
 import jax.numpy as jnp
-from jax.experimental.ode import odeint
+from jax.experimental.ode import odeint, odeint_batched
 from jax.tree_util import tree_map
 
 import scipy.integrate as osp_integrate
@@ -31,14 +32,15 @@ config.parse_flags_with_absl()
 
 class ODETest(jtu.JaxTestCase):
 
-  def check_against_scipy(self, fun, y0, tspace, *args, tol=1e-1):
+  def check_against_scipy(self, fun, y0, tspace, *args, tol=1e-1,
+                          method='dopri5'):
     y0, tspace = np.array(y0), np.array(tspace)
     np_fun = partial(fun, np)
     scipy_result = jnp.asarray(osp_integrate.odeint(np_fun, y0, tspace, args))
 
     y0, tspace = jnp.array(y0), jnp.array(tspace)
     jax_fun = partial(fun, jnp)
-    jax_result = odeint(jax_fun, y0, tspace, *args)
+    jax_result = odeint(jax_fun, y0, tspace, *args, method=method)
 
     self.assertAllClose(jax_result, scipy_result, check_dtypes=False, atol=tol, rtol=tol)
 
@@ -250,5 +252,164 @@ class ODETest(jtu.JaxTestCase):
     jtu.check_grads(f, (y0, ts, alpha), modes=["rev"], order=2, atol=tol, rtol=tol)
 
 
+  @parameterized.named_parameters(
+      {"testcase_name": f"_{method}", "method": method}
+      for method in ["dopri5", "tsit5", "rosenbrock23"])
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_methods_against_scipy(self, method):
+    def pend(_np, y, _, m, g):
+      theta, omega = y
+      return _np.array([omega, -m * omega - g * _np.sin(theta)])
+
+    y0 = [np.pi - 0.1, 0.0]
+    ts = np.linspace(0., 1., 11)
+    args = (0.25, 9.8)
+    tol = 1e-1 if jtu.num_float_bits(np.float64) == 32 else 1e-3
+
+    self.check_against_scipy(pend, y0, ts, *args, tol=tol, method=method)
+
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_tsit5_grads(self):
+    def decay(y, t, arg1, arg2):
+      return -jnp.sqrt(t) - y + arg1 - jnp.mean((y + arg2)**2)
+
+    rng = np.random.RandomState(0)
+    args = (rng.randn(3), rng.randn(3))
+    y0 = rng.randn(3)
+    ts = np.linspace(0.1, 0.2, 4)
+    tol = 1e-1 if jtu.num_float_bits(np.float64) == 32 else 1e-3
+
+    integrate = partial(odeint, decay, method='tsit5')
+    jtu.check_grads(integrate, (y0, ts, *args), modes=["rev"], order=1,
+                    rtol=tol, atol=tol)
+
+  @jtu.skip_on_flag('jax_enable_x64', False)
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_rosenbrock23_stiff(self):
+    # Robertson's chemical kinetics problem, the classic stiff test case.
+    def robertson(y, t):
+      y1, y2, y3 = y
+      return jnp.array([-0.04 * y1 + 1e4 * y2 * y3,
+                        0.04 * y1 - 1e4 * y2 * y3 - 3e7 * y2 ** 2,
+                        3e7 * y2 ** 2])
+
+    y0 = np.array([1., 0., 0.])
+    ts = np.array([0., 1., 10., 40.])
+    expected = osp_integrate.solve_ivp(
+        lambda t, y: np.asarray(robertson(y, t)), (0., 40.), y0,
+        method="Radau", t_eval=ts, rtol=1e-8, atol=1e-10).y.T
+    tol = 1e-3
+
+    ans = odeint(robertson, y0, ts, rtol=1e-6, atol=1e-10,
+                 method='rosenbrock23')
+    self.assertAllClose(ans, expected, check_dtypes=False, atol=tol, rtol=tol)
+
+  def test_unknown_method(self):
+    with self.assertRaisesRegex(ValueError, "Unknown odeint method"):
+      odeint(lambda y, t: -y, 1., jnp.linspace(0., 1., 3), method='rk4')
+
+  @parameterized.named_parameters(
+      {"testcase_name": f"_{method}", "method": method}
+      for method in ["dopri5", "tsit5", "rosenbrock23"])
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_odeint_batched(self, method):
+    def pend(y, _, m, g):
+      theta, omega = y
+      return jnp.array([omega, -m * omega - g * jnp.sin(theta)])
+
+    rng = np.random.RandomState(0)
+    y0 = np.stack([np.pi - rng.rand(8), rng.randn(8)], axis=1)
+    ms = rng.rand(8)
+    ts = np.linspace(0., 2., 7)
+    tol = 1e-3 if jtu.num_float_bits(np.float64) == 32 else 1e-6
+
+    ans = odeint_batched(pend, y0, ts, ms, 9.8, method=method, in_axes=(0, None))
+    expected = jax.vmap(lambda y0, m: odeint(pend, y0, ts, m, 9.8, method=method)
+                        )(y0, ms)
+    self.assertEqual(ans.shape, (8, 7, 2))
+    self.assertAllClose(ans, expected, check_dtypes=False, atol=tol, rtol=tol)
+
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_odeint_batched_pytree_state(self):
+    def dynamics(y, t, rate):
+      return tree_map(lambda x: -rate * x, y)
+
+    y0 = {"a": np.linspace(1., 2., 4), "b": np.ones((4, 2, 3))}
+    rate = 10. ** np.arange(-2, 2)
+    ts = np.linspace(0., 1., 5)
+    tol = 1e-3 if jtu.num_float_bits(np.float64) == 32 else 1e-6
+
+    ans = odeint_batched(dynamics, y0, ts, rate, in_axes=0)
+    decay = np.exp(-rate[:, None] * ts)
+    expected = {"a": y0["a"][:, None] * decay,
+                "b": y0["b"][:, None] * decay[:, :, None, None]}
+    self.assertAllClose(ans, expected, check_dtypes=False, atol=tol, rtol=tol)
+
+  def test_odeint_batched_in_axes_error(self):
+    with self.assertRaisesRegex(ValueError, "one entry per argument"):
+      odeint_batched(lambda y, t, a: -a * y, jnp.ones(3), jnp.linspace(0., 1., 3),
+                     jnp.ones(3), in_axes=(0, 0))
+
+  def test_non_array_args_error(self):
+    ts = jnp.linspace(0., 1., 3)
+    f = lambda y, t, g: -g(y)
+    with self.assertRaisesRegex(TypeError, "must be arrays or scalars"):
+      odeint(f, jnp.ones(3), ts, jnp.sin)
+    with self.assertRaisesRegex(TypeError, "must be arrays or scalars"):
+      odeint_batched(f, jnp.ones(3), ts, jnp.sin)
+
+  @parameterized.named_parameters(
+      {"testcase_name": f"_{adjoint}_checkpoints={checkpoints}",
+       "adjoint": adjoint, "checkpoints": checkpoints}
+      for adjoint, checkpoints in [("backsolve", 4), ("discrete", 1),
+                                   ("discrete", np.int32(8))])
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_adjoint_grads(self, adjoint, checkpoints):
+    def decay(y, t, arg1, arg2):
+      return -jnp.sqrt(t) - y + arg1 - jnp.mean((y + arg2)**2)
+
+    rng = np.random.RandomState(0)
+    args = (rng.randn(3), rng.randn(3))
+    y0 = rng.randn(3)
+    ts = np.linspace(0.1, 0.2, 4)
+    tol = 1e-1 if jtu.num_float_bits(np.float64) == 32 else 1e-3
+
+    integrate = partial(odeint, decay, mxstep=1000, adjoint=adjoint,
+                        checkpoints=checkpoints)
+    jtu.check_grads(integrate, (y0, ts, *args), modes=["rev"], order=1,
+                    rtol=tol, atol=tol)
+
+  @jtu.skip_on_devices("tpu", "gpu")
+  def test_discrete_adjoint_matches_backsolve(self):
+    def pend(y, _, m, g):
+      theta, omega = y
+      return jnp.array([omega, -m * omega - g * jnp.sin(theta)])
+
+    def loss(y0, m, **kwargs):
+      ys = odeint(pend, y0, jnp.linspace(0., 2., 5), m, 9.8, **kwargs)
+      return jnp.sum(ys ** 2)
+
+    y0 = jnp.array([np.pi - 0.1, 0.0])
+    tol = 1e-2 if jtu.num_float_bits(np.float64) == 32 else 1e-5
+
+    expected = jax.grad(loss, (0, 1))(y0, 0.25)
+    discrete = partial(loss, mxstep=500, adjoint='discrete', checkpoints=10)
+    self.assertAllClose(jax.grad(discrete, (0, 1))(y0, 0.25), expected,
+                        check_dtypes=False, atol=tol, rtol=tol)
+    # Differentiating through the solver steps also supports forward mode.
+    self.assertAllClose(jax.jacfwd(discrete)(y0, 0.25), expected[0],
+                        check_dtypes=False, atol=tol, rtol=tol)
+
+  def test_adjoint_errors(self):
+    ts = jnp.linspace(0., 1., 3)
+    with self.assertRaisesRegex(ValueError, "Unknown odeint adjoint"):
+      odeint(lambda y, t: -y, 1., ts, adjoint='interpolated')
+    with self.assertRaisesRegex(ValueError, "requires a finite mxstep"):
+      odeint(lambda y, t: -y, 1., ts, adjoint='discrete')
+    with self.assertRaisesRegex(ValueError, "positive integer"):
+      odeint(lambda y, t: -y, 1., ts, checkpoints=0)
+    with self.assertRaisesRegex(ValueError, "positive integer"):
+      odeint(lambda y, t: -y, 1., ts, checkpoints=2.)
+
 if __name__ == '__main__':
   absltest.main(testLoader=jtu.JaxTestLoader())
@@ -14,7 +14,7 @@
 
 
 from functools import partial
-from unittest import SkipTest, skipIf
+from unittest import SkipTest, mock, skipIf
 
 from absl.testing import absltest
 from absl.testing import parameterized
@@ -95,6 +95,77 @@ class PrngTest(jtu.JaxTestCase):
         jnp.ones((10, 0,), jnp.uint32))
     np.testing.assert_equal(result, np.zeros((10, 0,), dtype=np.uint32))
 
+  def testPhilox4x32(self):
+    # Known-answer values from the Random123 reference implementation (file
+    # kat_vectors in its test suite).
+    def result_to_hex(result):
+      return tuple([hex(x.copy()).rstrip("L") for x in result])
+
+    key = np.uint32([0, 0])
+    count = np.uint32([0, 0, 0, 0])
+    expected = ("0x6627e8d5", "0xe169c58d", "0xbc57ac4c", "0x9b00dbd8")
+    self.assertEqual(expected, result_to_hex(prng.philox_4x32(key, count)))
+    expected = ("0x5f6fb709", "0xd893f64", "0x4f121f81", "0x4f730a48")
+    self.assertEqual(expected, result_to_hex(prng.philox_4x32(key, count, 7)))
+
+    key = np.uint32([-1, -1])
+    count = np.uint32([-1, -1, -1, -1])
+    expected = ("0x408f276d", "0x41c83b0e", "0xa20bc7c6", "0x6d5451fd")
+    self.assertEqual(expected, result_to_hex(prng.philox_4x32(key, count)))
+
+    key = np.uint32([0xa4093822, 0x299f31d0])
+    count = np.uint32([0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344])
+    expected = ("0xd16cfe09", "0x94fdcceb", "0x5001e420", "0x24126ea1")
+    self.assertEqual(expected, result_to_hex(prng.philox_4x32(key, count)))
+
+  def testPhilox4x32Batched(self):
+    key = np.uint32([0xa4093822, 0x299f31d0])
+    counts = np.arange(40, dtype=np.uint32).reshape(10, 4)
+    expected = np.stack([prng.philox_4x32(key, c) for c in counts])
+    self.assertArraysEqual(expected, prng.philox_4x32(key, counts))
+    keys = np.stack([key, key + 1])
+    actual = vmap(prng.philox_4x32, in_axes=(0, None))(keys, counts)
+    self.assertArraysEqual(expected, actual[0])
+    self.assertArraysEqual(prng.philox_4x32(key + 1, counts), actual[1])
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_impl={}_bit_width={}".format(name, bit_width),
+       "impl": impl, "bit_width": bit_width}
+      for name, impl in [("philox", prng.philox_prng_impl),
+                         ("philox_fast", prng.philox_fast_prng_impl)]
+      for bit_width in [8, 16, 32, 64]))
+  def testPhiloxRandomBits(self, impl, bit_width):
+    key = prng.seed_with_impl(impl, 1701)
+    with jtu.ignore_warning(category=UserWarning,
+                            message="Explicitly requested dtype.*"):
+      bits = jax.jit(lambda key: key._random_bits(bit_width, (3, 7)))(key)
+      bits_flat = key._random_bits(bit_width, (21,))
+    self.assertEqual(bits.shape, (3, 7))
+    self.assertArraysEqual(bits.ravel(), bits_flat)
+    if bit_width == 32:
+      # The first words are the output of the bijection on counter zero.
+      rounds = 10 if impl is prng.philox_prng_impl else 7
+      expected = prng.philox_4x32(key.keys, np.uint32([0, 0, 0, 0]), rounds)
+      self.assertArraysEqual(expected, bits_flat[:4])
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_bit_width={}_size={}_block_size={}".format(
+          bit_width, size, block_size),
+       "bit_width": bit_width, "size": size, "block_size": block_size}
+      for bit_width in [32, 64]
+      for size in [1, 10, 101]
+      for block_size in [1, 4, 128]))
+  def testThreefryRandomBitsBlocked(self, bit_width, size, block_size):
+    if bit_width == 64 and not config.x64_enabled:
+      raise SkipTest("64-bit random bits require x64 mode")
+    key = np.uint32([0x13198a2e, 0x03707344])
+    transform = lambda bits: bits ^ 1
+    expected = transform(
+        jax._src.prng.threefry_random_bits(key, bit_width, (size,)))
+    actual = jax._src.prng.threefry_random_bits_blocked(
+        key, bit_width, size, transform, block_size)
+    self.assertArraysEqual(expected, actual)
+
   def testNoOpByOpUnderHash(self):
     def fail(*args, **kwargs): assert False
     apply_primitive, xla.apply_primitive = xla.apply_primitive, fail
@@ -433,12 +504,79 @@ class LaxRandomTest(jtu.JaxTestCase):
     self.assertFalse(np.all(perm1 == np.arange(100)))  # seems unlikely!
     self.assertAllClose(np.sort(perm1), np.arange(100), check_dtypes=False)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_n={}".format(n), "n": n}
+      for n in [1, 2, 3, 100, 4097]))
+  def testPermutationFeistel(self, n):
+    key = self.seed_prng(0)
+    rand = lambda key: random.permutation(key, n, method='feistel')
+    crand = jax.jit(rand)
+
+    perm1 = rand(key)
+    perm2 = crand(key)
+
+    self.assertAllClose(perm1, perm2)
+    self.assertEqual(perm1.dtype, random.permutation(key, n).dtype)
+    if n > 2:
+      self.assertFalse(np.all(perm1 == np.arange(n)))  # seems unlikely!
+    self.assertAllClose(np.sort(perm1), np.arange(n), check_dtypes=False)
+
+    x = np.arange(2 * n).reshape(n, 2).astype(np.float32)
+    self.assertAllClose(random.permutation(key, x, method='feistel'),
+                        x[perm1])
+
+  def testPermutationFeistelIsUniform(self):
+    keys = random.split(self.seed_prng(0), 10000)
+    perms = jax.vmap(lambda key: random.permutation(
+        key, 1000, method='feistel'))(keys)
+    pmf = lambda x: np.where(x < 1000, 1e-3, 0.)
+    for i in [0, 500]:
+      self._CheckChiSquared(np.asarray(perms[:, i]), pmf=pmf)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_n={}".format(n), "n": n}
+      for n in [1, 2, 7, 1000, 4096]))
+  def testPermutationIndex(self, n):
+    key = self.seed_prng(0)
+    index = np.arange(n, dtype=np.int32)
+    rand = lambda key, index: random.permutation_index(key, index, n)
+    crand = jax.jit(rand)
+
+    perm1 = rand(key, index)
+    perm2 = crand(key, index)
+
+    self.assertAllClose(perm1, perm2)
+    self.assertEqual(perm1.dtype, np.int32)
+    if n > 2:
+      self.assertFalse(np.all(perm1 == index))  # seems unlikely!
+    self.assertAllClose(np.sort(perm1), index)
+
+    # Shards of the indices, and single indices, map the same way.
+    shards = [crand(key, shard) for shard in np.array_split(index, 3)]
+    self.assertAllClose(np.concatenate(shards), perm1)
+    self.assertEqual(int(rand(key, n - 1)), perm1[-1])
+    batched = jax.vmap(rand, in_axes=(None, 0))(key, index.reshape(-1, 1))
+    self.assertAllClose(batched.ravel(), perm1)
+
+  def testPermutationIndexErrors(self):
+    key = self.seed_prng(0)
+    with self.assertRaisesRegex(ValueError, "requires 1 <= n"):
+      random.permutation_index(key, 0, 0)
+    with self.assertRaisesRegex(TypeError, "integer indices"):
+      random.permutation_index(key, 0., 10)
+    with self.assertRaisesRegex(ValueError, "can not represent"):
+      random.permutation_index(key, np.uint8(0), 1000)
+    with self.assertRaises(core.ConcretizationTypeError):
+      jax.jit(random.permutation_index)(key, 0, 10)
+
   def testPermutationErrors(self):
     key = self.seed_prng(0)
     with self.assertRaises(TypeError):
       random.permutation(key, 10.)
     with self.assertRaises(core.ConcretizationTypeError):
       jax.jit(random.permutation)(key, 10)
+    with self.assertRaisesRegex(ValueError, "must be 'sort' or 'feistel'"):
+      random.permutation(key, 10, method='fisher-yates')
 
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_p={}_dtype={}".format(p, np.dtype(dtype).name),
@@ -495,12 +633,132 @@ class LaxRandomTest(jtu.JaxTestCase):
         pmf = lambda x: np.where(x < len(p), p[np.minimum(len(p) - 1, x)], 0.0)
         self._CheckChiSquared(samples, pmf=pmf)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+    {"testcase_name": "_p={}_logits={}".format(p, use_logits),
+     "p": p, "use_logits": use_logits}
+    for p in [[.25] * 4, [.1, .2, .3, .4], [.7, 0., .05, .25], [1.]]
+    for use_logits in [False, True]))
+  def testAliasSample(self, p, use_logits):
+    key = self.seed_prng(0)
+    p = np.array(p, dtype=np.float32)
+    if use_logits:
+      with np.errstate(divide='ignore'):
+        table = random.alias_table(logits=np.log(p) - 42)
+    else:
+      table = random.alias_table(p * 3)  # test unnormalized
+    rand = lambda key, table: random.alias_sample(key, table, (10000,))
+    crand = jax.jit(rand)
+
+    uncompiled_samples = rand(key, table)
+    compiled_samples = crand(key, table)
+
+    pmf = lambda x: np.where(x < len(p), p[np.minimum(len(p) - 1, x)], 0.0)
+    for samples in [uncompiled_samples, compiled_samples]:
+      self.assertEqual(samples.dtype, np.int32)
+      self.assertEqual(samples.shape, (10000,))
+      self.assertTrue(np.all(p[samples] > 0))
+      if len(p) > 1:
+        self._CheckChiSquared(samples, pmf=pmf)
+
+    samples = random.choice(key, 2 * np.arange(len(p)), (100,), p=table)
+    self.assertEqual(samples.shape, (100,))
+    self.assertTrue(np.all(p[samples // 2] > 0))
+
+  def testAliasTableRecoversProbabilities(self):
+    rng = np.random.RandomState(0)
+    for n in [1, 3, 100, 5000]:
+      for p in [rng.rand(n), np.exp(5 * rng.randn(n)), np.eye(n)[n // 2]]:
+        table = random.alias_table(p.astype(np.float32))
+        prob, alias = np.asarray(table.prob), np.asarray(table.alias)
+        scale = (np.iinfo(prob.dtype).max // 2) // n
+        self.assertTrue(np.all((0 <= prob) & (prob <= scale)))
+        self.assertTrue(np.all((0 <= alias) & (alias < n)))
+        # Each bucket gives its threshold to its own outcome and the rest of
+        # its `scale` units to its alias.
+        mass = prob.astype(np.int64)
+        np.add.at(mass, alias, scale - prob.astype(np.int64))
+        self.assertAllClose(mass / (n * scale), p / p.sum(), atol=1e-6,
+                            rtol=1e-4, check_dtypes=False)
+
+  def testAliasTableVmap(self):
+    p = np.random.RandomState(0).rand(3, 50).astype(np.float32)
+    tables = jax.vmap(random.alias_table)(p)
+    for i in range(3):
+      self.assertAllClose(tables.prob[i], random.alias_table(p[i]).prob)
+      self.assertAllClose(tables.alias[i], random.alias_table(p[i]).alias)
+    keys = random.split(self.seed_prng(0), 3)
+    samples = jax.vmap(lambda key, table: random.alias_sample(
+        key, table, (1000,)))(keys, tables)
+    self.assertEqual(samples.shape, (3, 1000))
+    self.assertTrue(np.all((0 <= samples) & (samples < 50)))
+
+  def testAliasTableErrors(self):
+    key = self.seed_prng(0)
+    with self.assertRaisesRegex(ValueError, "exactly one of p and logits"):
+      random.alias_table()
+    with self.assertRaisesRegex(ValueError, "exactly one of p and logits"):
+      random.alias_table(np.ones(3), logits=np.zeros(3))
+    with self.assertRaisesRegex(ValueError, "1-dimensional"):
+      random.alias_table(np.ones((2, 3)))
+    with self.assertRaisesRegex(ValueError, "non-empty"):
+      random.alias_table(np.ones(0))
+    with self.assertRaisesRegex(TypeError, "AliasTable"):
+      random.alias_sample(key, np.ones(3))
+    table = random.alias_table(np.ones(3))
+    with self.assertRaisesRegex(ValueError, "requires replace=True"):
+      random.choice(key, 3, (2,), replace=False, p=table)
+    with self.assertRaisesRegex(ValueError, "match the shape of a"):
+      random.choice(key, 4, (2,), p=table)
+
   def testBernoulliShape(self):
     key = self.seed_prng(0)
     with jax.numpy_rank_promotion('allow'):
       x = random.bernoulli(key, np.array([0.2, 0.3]), shape=(3, 2))
     assert x.shape == (3, 2)
 
+  def testBernoulliPacked(self):
+    key = self.seed_prng(0)
+    for p in [0.1, 0.5, 0.9]:
+      packed = jax.jit(lambda key, p: random.bernoulli_packed(
+          key, p, (2, 5001)))(key, np.float32(p))
+      self.assertEqual(packed.dtype, np.uint8)
+      self.assertEqual(packed.shape, (2, 626))
+      self.assertTrue(np.all(packed[:, -1] >> 1 == 0))
+      samples = np.unpackbits(np.asarray(packed), axis=-1, count=5001,
+                              bitorder='little')
+      self._CheckChiSquared(samples.ravel(), scipy.stats.bernoulli(p).pmf)
+    packed = random.bernoulli_packed(key, 1., (10,))
+    self.assertArraysEqual(packed, np.uint8([0xFF, 0x03]))
+    packed = random.bernoulli_packed(key, 0., (10,))
+    self.assertArraysEqual(packed, np.uint8([0, 0]))
+
+  def testBernoulliPackedErrors(self):
+    key = self.seed_prng(0)
+    with self.assertRaisesRegex(ValueError, "at least one dimension"):
+      random.bernoulli_packed(key, 0.5, ())
+    with self.assertRaisesRegex(ValueError, "requires a scalar p"):
+      random.bernoulli_packed(key, np.float32([0.5, 0.5]), (2,))
+    with self.assertRaisesRegex(ValueError, "precision must be between"):
+      random.bernoulli_packed(key, 0.5, (8,), precision=32)
+
+  def testBlockedSamplingMatchesUnblocked(self):
+    key = self.seed_prng(0)
+    shape = (7, 33)
+    samplers = [
+        lambda key: random.uniform(key, shape),
+        lambda key: random.uniform(key, shape, minval=-2., maxval=3.),
+        lambda key: random.bernoulli(key, 0.3, shape),
+        lambda key: random.normal(key, shape),
+    ]
+    # Tracing is disabled so that the patched thresholds take effect.
+    with jax.disable_jit():
+      expected = [f(key) for f in samplers]
+      with mock.patch.multiple(jax._src.random, _BLOCKED_SAMPLING_MIN_SIZE=1,
+                               _BLOCKED_SAMPLING_BLOCK_SIZE=16):
+        actual = [f(key) for f in samplers]
+    for x, y in zip(expected, actual):
+      self.assertArraysEqual(x, y)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_a={}_b={}_dtype={}".format(a, b, np.dtype(dtype).name),
        "a": a, "b": b, "dtype": dtype}
@@ -1156,6 +1414,39 @@ class LaxRandomWithRBGPRNGTest(LaxRandomTest):
     # TODO(mattjj): enable this test if/when RngBitGenerator supports it
     raise SkipTest('8-bit types not supported with RBG PRNG')
 
+  def testBernoulliPacked(self):
+    raise SkipTest('8-bit types not supported with RBG PRNG')
+
+@skipIf(not config.jax_enable_custom_prng,
+        'custom PRNG tests require config.jax_enable_custom_prng')
+@jtu.with_config(jax_numpy_rank_promotion="raise")
+class LaxRandomWithPhiloxPRNGTest(LaxRandomTest):
+  def seed_prng(self, seed):
+    return prng.seed_with_impl(prng.philox_prng_impl, seed)
+
+  def test_split_shape(self):
+    key = self.seed_prng(73)
+    keys = random.split(key, 10)
+    self.assertEqual(keys.shape, (10,))
+
+  def test_vmap_fold_in_shape(self):
+    key = self.seed_prng(73)
+    keys = vmap(lambda i: random.fold_in(key, i))(jnp.arange(3))
+    self.assertEqual(keys.shape, (3,))
+
+  def test_split_and_fold_in_are_distinct(self):
+    key = self.seed_prng(73)
+    keys = [key] + list(random.split(key, 3)) + [random.fold_in(key, 0)]
+    bits = np.stack([jax._src.random._random_bits(k, 32, (4,)) for k in keys])
+    self.assertEqual(len(np.unique(bits)), bits.size)
+
+@skipIf(not config.jax_enable_custom_prng,
+        'custom PRNG tests require config.jax_enable_custom_prng')
+@jtu.with_config(jax_numpy_rank_promotion="raise")
+class LaxRandomWithFastPhiloxPRNGTest(LaxRandomWithPhiloxPRNGTest):
+  def seed_prng(self, seed):
+    return prng.seed_with_impl(prng.philox_fast_prng_impl, seed)
+
 def _sampler_unimplemented_with_rbg(*args, **kwargs):
   # TODO(mattjj): enable these tests if/when RngBitGenerator supports them
   raise SkipTest('8- and 16-bit types not supported with RBG PRNG')
@@ -1187,6 +1478,10 @@ for test_prefix in [
               _sampler_unimplemented_with_custom_prng)
       setattr(LaxRandomWithRBGPRNGTest, attr,
               _sampler_unimplemented_with_custom_prng)
+      setattr(LaxRandomWithPhiloxPRNGTest, attr,
+              _sampler_unimplemented_with_custom_prng)
+      setattr(LaxRandomWithFastPhiloxPRNGTest, attr,
+              _sampler_unimplemented_with_custom_prng)
 
 
 
@@ -104,11 +104,74 @@ class NdimageTest(jtu.JaxTestCase):
     else:
       self._CheckAgainstNumpy(osp_op, lsp_op, args_maker, tol=0)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_coordinates={}_mode={}_cval={}".format(
+          jtu.format_shape_dtype_string(shape, dtype),
+          jtu.format_shape_dtype_string(coords_shape, dtype), mode, cval),
+       "shape": shape, "coords_shape": coords_shape, "dtype": dtype,
+       "mode": mode, "cval": cval}
+      for shape in [(5,), (3, 4), (3, 4, 5)]
+      for coords_shape in [(7,), (2, 3, 4)]
+      for dtype in float_dtypes
+      for mode in ['wrap', 'constant', 'nearest', 'mirror', 'reflect']
+      for cval in ([0, -1] if mode == 'constant' else [0])))
+  def testMapCoordinatesCubic(self, shape, dtype, coords_shape, mode, cval):
+    rng = jtu.rand_default(self.rng())
+    if mode == 'mirror':
+      # Spline coefficients are computed with mirror boundary conditions, so
+      # the result matches scipy everywhere.
+      coords_rng = jtu.rand_uniform(self.rng(), low=-0.75, high=1.75)
+      coords_fn = lambda size: (size - 1) * coords_rng(coords_shape, dtype)
+    else:
+      # Otherwise, only compare where the nodes are inside the input.
+      coords_rng = jtu.rand_uniform(self.rng(), low=0, high=1)
+      coords_fn = lambda size: 1 + (size - 3) * coords_rng(coords_shape, dtype)
+    args_maker = lambda: [rng(shape, dtype), [coords_fn(size) for size in shape]]
+
+    lsp_op = lambda x, c: lsp_ndimage.map_coordinates(
+        x, c, order=3, mode=mode, cval=cval)
+    osp_op = lambda x, c: osp_ndimage.map_coordinates(
+        osp_ndimage.spline_filter(x, mode='mirror'), c, order=3, mode=mode,
+        cval=cval, prefilter=False)
+    tol = {np.float16: 1e-2, np.float32: 1e-4, np.float64: 1e-10}
+    self._CheckAgainstNumpy(osp_op, lsp_op, args_maker, tol=tol)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_axis={}".format(
+          jtu.format_shape_dtype_string(shape, dtype), axis),
+       "shape": shape, "dtype": dtype, "axis": axis}
+      for shape in [(1,), (2,), (7,), (3, 4), (3, 4, 5)]
+      for dtype in float_dtypes + int_dtypes
+      for axis in [None, 0, -1]))
+  def testSplineFilter(self, shape, dtype, axis):
+    rng = jtu.rand_default(self.rng())
+    args_maker = lambda: [rng(shape, dtype)]
+    if axis is None:
+      lsp_op = lsp_ndimage.spline_filter
+      osp_op = lambda x: osp_ndimage.spline_filter(x, mode='mirror')
+    else:
+      lsp_op = partial(lsp_ndimage.spline_filter1d, axis=axis)
+      osp_op = lambda x: osp_ndimage.spline_filter1d(x, axis=axis, mode='mirror')
+    tol = {np.float16: 1e-2, np.float32: 1e-4, np.float64: 1e-10}
+    self._CheckAgainstNumpy(osp_op, lsp_op, args_maker, check_dtypes=False, tol=tol)
+    self._CompileAndCheck(lsp_op, args_maker)
+
+  def testMapCoordinatesPrefilter(self):
+    rng = jtu.rand_default(self.rng())
+    x = rng((6, 7), np.float32)
+    c = [np.linspace(0, 5, num=4), np.linspace(0, 6, num=4)]
+    coefficients = lsp_ndimage.spline_filter(x)
+    self.assertAllClose(
+        lsp_ndimage.map_coordinates(x, c, order=3),
+        lsp_ndimage.map_coordinates(coefficients, c, order=3, prefilter=False))
+
   def testMapCoordinatesErrors(self):
     x = np.arange(5.0)
     c = [np.linspace(0, 5, num=3)]
     with self.assertRaisesRegex(NotImplementedError, 'requires order<=1'):
       lsp_ndimage.map_coordinates(x, c, order=2)
+    with self.assertRaisesRegex(NotImplementedError, "only supports mode='mirror'"):
+      lsp_ndimage.spline_filter(x, mode='wrap')
     with self.assertRaisesRegex(
         NotImplementedError, 'does not yet support mode'):
       lsp_ndimage.map_coordinates(x, c, order=1, mode='grid-wrap')
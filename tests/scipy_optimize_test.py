@@ -234,5 +234,139 @@ class TestLBFGS(jtu.JaxTestCase):
     self.assertAllClose(jax_res, expect, atol=2e-5)
 
 
+@jtu.with_config(jax_numpy_rank_promotion="raise")
+class TestMinimizeBatched(jtu.JaxTestCase):
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+    {"testcase_name": "_method={}".format(method), "method": method}
+    for method in ['BFGS', 'L-BFGS']))
+  @jtu.skip_on_flag('jax_enable_x64', False)
+  def test_rosenbrock(self, method):
+    x0 = np.array([[0., 0.], [-1.2, 1.], [2., 2.], [1., 1.]])
+
+    @jit
+    def min_op(x0):
+      return jax.scipy.optimize.minimize_batched(
+          rosenbrock(jnp), x0, method=method, options=dict(gtol=1e-6))
+
+    results = min_op(x0)
+    self.assertAllClose(results.x, np.ones_like(x0), atol=1e-4,
+                        check_dtypes=False)
+    self.assertArraysEqual(results.status, np.zeros(4, np.int32),
+                           check_dtypes=False)
+    self.assertTrue(np.all(results.success))
+    # Each problem keeps its own iteration count; the last starts converged.
+    self.assertEqual(results.nit[-1], 0)
+    self.assertGreater(len(set(np.asarray(results.nit).tolist())), 1)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+    {"testcase_name": "_method={}".format(method), "method": method}
+    for method in ['BFGS', 'L-BFGS']))
+  def test_matches_minimize(self, method):
+    rng = np.random.RandomState(0)
+    X = rng.randn(8, 50, 5)
+    y = (rng.rand(8, 50) < 0.5).astype(X.dtype)
+
+    def logistic_loss(w, X, y):
+      z = X @ w
+      return jnp.mean(jnp.logaddexp(0., z) - y * z) + 1e-2 * jnp.sum(w ** 2)
+
+    results = jax.scipy.optimize.minimize_batched(
+        logistic_loss, jnp.zeros((8, 5)), (X, y), method=method,
+        options=dict(gtol=1e-5))
+    expected = jax.vmap(lambda X, y: jax.scipy.optimize.minimize(
+        logistic_loss, jnp.zeros(5), (X, y), method='BFGS',
+        options=dict(gtol=1e-5)).x)(X, y)
+    self.assertAllClose(results.x, expected, atol=1e-3, check_dtypes=False)
+    if method == 'BFGS':
+      self.assertEqual(results.hess_inv.shape, (8, 5, 5))
+    else:
+      self.assertIsNone(results.hess_inv)
+
+  def test_maxiter(self):
+    x0 = np.zeros((3, 2))
+    results = jax.scipy.optimize.minimize_batched(
+        rosenbrock(jnp), x0, method='L-BFGS', options=dict(maxiter=2))
+    self.assertArraysEqual(results.status, np.ones(3, np.int32),
+                           check_dtypes=False)
+    self.assertArraysEqual(results.nit, np.full(3, 2), check_dtypes=False)
+
+  def test_errors(self):
+    f = rosenbrock(jnp)
+    with self.assertRaisesRegex(TypeError, "args .* must be a tuple"):
+      jax.scipy.optimize.minimize_batched(f, jnp.ones((2, 2)), args=45,
+                                          method='BFGS')
+    with self.assertRaisesRegex(ValueError, "must have shape"):
+      jax.scipy.optimize.minimize_batched(f, jnp.ones(2), method='BFGS')
+    with self.assertRaisesRegex(ValueError, "not recognized"):
+      jax.scipy.optimize.minimize_batched(f, jnp.ones((2, 2)), method='CG')
+
+
+@jtu.with_config(jax_numpy_rank_promotion="raise")
+class TestNewtonCG(jtu.JaxTestCase):
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+    {"testcase_name": "_method={}_func={}".format(method, func_and_init[0].__name__),
+     "method": method, "func_and_init": func_and_init}
+    for method in ['Newton-CG', 'trust-ncg']
+    for func_and_init in [(rosenbrock, np.zeros(2)),
+                          (rosenbrock, np.zeros(10)),
+                          (himmelblau, np.zeros(2)),
+                          (matyas, np.ones(2) * 6.)]))
+  def test_minimize(self, method, func_and_init):
+    func, x0 = func_and_init
+
+    @jit
+    def min_op(x0):
+      result = jax.scipy.optimize.minimize(
+          func(jnp),
+          x0,
+          method=method,
+          options=dict(gtol=1e-6),
+      )
+      return result.x
+
+    jax_res = min_op(x0)
+    hessp = lambda x, p: jax.jvp(jax.grad(func(jnp)), (x,), (p,))[1]
+    scipy_res = scipy.optimize.minimize(
+        func(np), x0, jac=jax.grad(func(jnp)), hessp=hessp, method=method).x
+    self.assertAllClose(scipy_res, jax_res, atol=2e-5, check_dtypes=False)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+    {"testcase_name": "_method={}".format(method), "method": method}
+    for method in ['Newton-CG', 'trust-ncg']))
+  def test_quadratic(self, method):
+    rng = np.random.RandomState(0)
+    A = rng.randn(20, 20)
+    A = A @ A.T + 20 * np.eye(20)
+    b = rng.randn(20)
+
+    def f(x):
+      return 0.5 * jnp.dot(x, A @ x) - jnp.dot(b, x)
+
+    results = jax.scipy.optimize.minimize(f, jnp.zeros(20), method=method,
+                                          options=dict(initial_trust_radius=100.)
+                                          if method == 'trust-ncg' else None)
+    self.assertAllClose(results.x, np.linalg.solve(A, b), atol=1e-4,
+                        check_dtypes=False)
+    self.assertTrue(results.success)
+    self.assertLessEqual(results.nit, 10)
+    self.assertGreater(results.nhev, 0)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+    {"testcase_name": "_method={}".format(method), "method": method}
+    for method in ['Newton-CG', 'trust-ncg']))
+  def test_indefinite(self, method):
+    # The Hessian at x0 has negative curvature along the first two axes.
+    def f(x):
+      return jnp.sum(x ** 4 - x ** 2)
+
+    x0 = jnp.array([0.1, 0.2, 1., -0.05])
+    results = jax.scipy.optimize.minimize(f, x0, method=method)
+    self.assertTrue(results.success)
+    self.assertAllClose(jnp.abs(results.x), np.full(4, np.sqrt(0.5)),
+                        atol=1e-4, check_dtypes=False)
+
+
 if __name__ == "__main__":
   absltest.main()
@@ -19,8 +19,10 @@ from absl.testing import absltest, parameterized
 
 import numpy as np
 
+import jax
 from jax import lax
 from jax._src import test_util as jtu
+from jax._src.scipy import signal as jsp_signal_impl
 import jax.scipy.signal as jsp_signal
 import scipy.signal as osp_signal
 
@@ -63,6 +65,59 @@ class LaxBackedScipySignalTests(jtu.JaxTestCase):
     self._CheckAgainstNumpy(osp_fun, jsp_fun, args_maker, check_dtypes=False, tol=tol)
     self._CompileAndCheck(jsp_fun, args_maker, rtol=tol, atol=tol)
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_op={}_xshape={}_yshape={}_mode={}".format(
+          op,
+          jtu.format_shape_dtype_string(xshape, dtype),
+          jtu.format_shape_dtype_string(yshape, dtype),
+          mode),
+       "xshape": xshape, "yshape": yshape, "dtype": dtype, "mode": mode,
+       "jsp_op": jsp_op, "osp_op": osp_op}
+      for mode in ['full', 'same', 'valid']
+      for op, jsp_op, osp_op in [
+          ('fftconvolve', jsp_signal.fftconvolve, osp_signal.fftconvolve),
+          ('oaconvolve', jsp_signal.oaconvolve, osp_signal.fftconvolve),
+          ('convolve_fft', partial(jsp_signal.convolve, method='fft'), osp_signal.convolve),
+          ('correlate_fft', partial(jsp_signal.correlate, method='fft'), osp_signal.correlate)]
+      for dtype in default_dtypes
+      for xshape, yshape in [((1,), (1,)), ((10,), (3,)), ((3,), (10,)), ((200,), (7,)),
+                             ((4, 5), (4, 5)), ((60, 50), (3, 2)), ((40, 3, 5), (3, 2, 2))]))
+  def testFFTConvolutions(self, xshape, yshape, dtype, mode, jsp_op, osp_op):
+    rng = jtu.rand_default(self.rng())
+    args_maker = lambda: [rng(xshape, dtype), rng(yshape, dtype)]
+    osp_fun = partial(osp_op, mode=mode)
+    jsp_fun = partial(jsp_op, mode=mode)
+    tol = {np.float16: 1e-2, np.float32: 1e-2, np.float64: 1e-10, np.complex64: 1e-2, np.complex128: 1e-10}
+    self._CheckAgainstNumpy(osp_fun, jsp_fun, args_maker, check_dtypes=False, tol=tol)
+    self._CompileAndCheck(jsp_fun, args_maker, rtol=tol, atol=tol)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": f"_xshape={xshape}_yshape={yshape}_expected={expected}",
+       "xshape": xshape, "yshape": yshape, "expected": expected}
+      for xshape, yshape, expected in [
+          ((1000,), (5,), 'direct'), ((100000,), (1000,), 'fft'),
+          ((64, 64), (3, 3), 'direct'), ((256, 256), (64, 64), 'fft')]))
+  def testConvolveMethodAuto(self, xshape, yshape, expected):
+    self.assertEqual(
+        jsp_signal_impl._choose_convolve_method(xshape, yshape, 'full', np.dtype('float32')),
+        expected)
+    self.assertEqual(
+        jsp_signal_impl._choose_convolve_method(xshape, yshape, 'full', np.dtype('float16')),
+        'direct')
+    with self.assertRaisesRegex(ValueError, "Acceptable method flags"):
+      jsp_signal.convolve(np.ones(xshape), np.ones(yshape), method='overlap')
+
+  def testConvolveMethodAutoDirect(self):
+    # 'auto' would pick an FFT for these shapes, but falls back to the direct
+    # convolution when a precision is requested or the inputs are integers.
+    x, y = np.ones((256, 256), np.float32), np.ones((64, 64), np.float32)
+    for args, kwargs in [((x, y), {'precision': lax.Precision.HIGHEST}),
+                         ((x.astype(np.int32), y.astype(np.int32)), {})]:
+      for op in [jsp_signal.convolve, jsp_signal.correlate]:
+        jaxpr = str(jax.make_jaxpr(partial(op, **kwargs))(*args))
+        self.assertIn('conv_general_dilated', jaxpr)
+        self.assertNotIn('fft', jaxpr)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "op={}_xshape={}_yshape={}_mode={}".format(
           op,
@@ -16,12 +16,14 @@ from functools import partial
 import itertools
 import operator
 import unittest
+from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
 
 import jax
 from jax import config
+from jax import core
 from jax import dtypes
 from jax.experimental import sparse
 from jax import lax
@@ -141,6 +143,19 @@ class cuSparseTest(jtu.JaxTestCase):
     self.assertAllClose(op(M) @ B, matmat(*args), rtol=MATMUL_TOL)
     self.assertAllClose(op(M) @ B, jit(matmat)(*args), rtol=MATMUL_TOL)
 
+  def test_csr_matmat_empty_rows(self):
+    M = np.zeros((6, 4), np.float32)
+    M[1, 2], M[1, 3], M[4, 0] = 1, 2, 3
+    Msp = scipy.sparse.csr_matrix(M)
+    args = (Msp.data, Msp.indices, Msp.indptr)
+    v = np.arange(4, dtype=np.float32)
+    B = np.arange(8, dtype=np.float32).reshape(4, 2)
+
+    matvec = jit(partial(sparse.csr_matvec, shape=M.shape))
+    matmat = jit(partial(sparse.csr_matmat, shape=M.shape))
+    self.assertAllClose(M @ v, matvec(*args, v))
+    self.assertAllClose(M @ B, matmat(*args, B))
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_{}".format(jtu.format_shape_dtype_string(shape, dtype)),
        "shape": shape, "dtype": dtype}
@@ -774,6 +789,46 @@ class BCOOTest(jtu.JaxTestCase):
       X = sparse.bcoo_todense(data, indices, shape=X.shape)
       self.assertAllClose(f_dense(X, Y), f_sparse(data, indices, Y))
 
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name":
+       "_lhs_shape={}_rhs_shape={}_dimension_numbers={}_n_batch={}_n_dense={}"
+       .format(jtu.format_shape_dtype_string(lhs_shape, dtype),
+               jtu.format_shape_dtype_string(rhs_shape, dtype),
+               dimension_numbers, n_batch, n_dense),
+       "lhs_shape": lhs_shape, "rhs_shape": rhs_shape, "dtype": dtype,
+       "dimension_numbers": dimension_numbers,
+       "n_batch": n_batch, "n_dense": n_dense}
+      for lhs_shape, rhs_shape, dimension_numbers, n_batch, n_dense in [
+          ((5, 3), (3, 4), (([1], [0]), ([], [])), 0, 0),
+          ((5, 3), (5,), (([0], [0]), ([], [])), 0, 0),
+          ((5, 3, 2), (5, 2, 4), (([0], [0]), ([], [])), 0, 1),
+          ((4, 5, 3), (3, 2), (([2], [0]), ([], [])), 1, 0),
+          ((3, 3, 2), (3, 2, 4), (([2], [1]), ([0], [0])), 1, 0),
+          ((3, 3, 2), (2, 3, 4), (([2], [0]), ([0], [1])), 2, 0),
+          ((3, 4, 2, 4), (3, 4, 3, 2), (([2], [3]), ([0, 1], [0, 1])), 2, 1),
+      ]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex))
+  def test_bcoo_dot_general_fused_matches_vmapped(self, lhs_shape, rhs_shape, dtype,
+                                                  dimension_numbers, n_batch, n_dense):
+    rng = jtu.rand_small(self.rng())
+    rng_sparse = rand_sparse(self.rng())
+
+    X = rng_sparse(lhs_shape, dtype)
+    data, indices = sparse.bcoo_fromdense(X, n_batch=n_batch, n_dense=n_dense)
+    Y = rng(rhs_shape, dtype)
+
+    def f_sparse(data, indices, Y):
+      return sparse.bcoo_dot_general(data, indices, Y, lhs_shape=X.shape,
+                                     dimension_numbers=dimension_numbers)
+
+    batch_slices = [slice(None), slice(1)] if n_batch else [slice(None)]
+    for data_slice, indices_slice in itertools.product(batch_slices, batch_slices):
+      args = (data[data_slice], indices[indices_slice], Y)
+      fused = jit(f_sparse)(*args)
+      with mock.patch.object(sparse.bcoo, '_BCOO_DOT_GENERAL_MAX_SEGMENTS', 0):
+        vmapped = jit(f_sparse)(*args)
+      self.assertAllClose(fused, vmapped, rtol=MATMUL_TOL)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name":
        "_lhs_shape={}_rhs_shape={}_dimension_numbers={}_n_batch={}_n_dense={}"
@@ -1002,6 +1057,85 @@ class BCOOTest(jtu.JaxTestCase):
     # self._CompileAndCheck(f_sparse, args_maker)
     self._CheckAgainstNumpy(jit(f_dense), jit(f_sparse), args_maker)
 
+  @unittest.skipIf(jtu.device_under_test() == "tpu", "TPU has insufficient precision")
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_{}".format(
+        jtu.format_shape_dtype_string(lhs_shape, dtype),
+        jtu.format_shape_dtype_string(rhs_shape, dtype)),
+       "lhs_shape": lhs_shape, "rhs_shape": rhs_shape, "dtype": dtype}
+      for lhs_shape, rhs_shape in [[(5, 7), (7, 3)], [(1, 4), (4, 6)],
+                                   [(6, 1), (1, 6)], [(8, 8), (8, 8)]]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex))
+  def test_bcoo_spgemm(self, lhs_shape, rhs_shape, dtype):
+    sprng = rand_sparse(self.rng())
+    x = sprng(lhs_shape, dtype)
+    y = sprng(rhs_shape, dtype)
+    xsp = sparse.BCOO.fromdense(x)
+    ysp = sparse.BCOO.fromdense(y)
+
+    out = xsp @ ysp
+    self.assertIsInstance(out, sparse.BCOO)
+    self.assertTrue(out.indices_sorted)
+    self.assertTrue(out.unique_indices)
+    self.assertAllClose(out.todense(), x @ y, rtol=MATMUL_TOL)
+
+    # The output holds exactly the structural nonzeros of the product.
+    n_products, nse = sparse.bcoo_spgemm_sizes(xsp.indices, ysp.indices,
+                                               lhs_shape=lhs_shape, rhs_shape=rhs_shape)
+    structure = (x != 0).astype(int) @ (y != 0).astype(int)
+    self.assertEqual(n_products, structure.sum())
+    self.assertEqual(nse, (structure != 0).sum())
+    self.assertEqual(out.nse, nse)
+    n_products_bound, nse_bound = sparse.bcoo_spgemm_sizes(
+        xsp.indices, ysp.indices, lhs_shape=lhs_shape, rhs_shape=rhs_shape, exact=False)
+    self.assertEqual(n_products_bound, n_products)
+    self.assertGreaterEqual(nse_bound, nse)
+
+    @partial(jit, static_argnums=(4, 5))
+    def f(xdata, xindices, ydata, yindices, nse, n_products):
+      return sparse.bcoo_spgemm(xdata, xindices, ydata, yindices, lhs_shape=lhs_shape,
+                                rhs_shape=rhs_shape, nse=nse, n_products=n_products)
+    data, indices = f(xsp.data, xsp.indices, ysp.data, ysp.indices, nse + 2, n_products_bound + 3)
+    self.assertAllClose(sparse.bcoo_todense(data, indices, shape=out.shape), x @ y,
+                        rtol=MATMUL_TOL)
+    self.assertAllClose(sparse.sparsify(jnp.matmul)(xsp, ysp).todense(), x @ y,
+                        rtol=MATMUL_TOL)
+
+    # Under jit the output size is bounded from the shapes alone.
+    out_jit = jit(lambda x, y: x @ y)(xsp, ysp)
+    self.assertEqual(out_jit.nse, min(xsp.nse * ysp.nse, lhs_shape[0] * rhs_shape[1]))
+    self.assertAllClose(out_jit.todense(), x @ y, rtol=MATMUL_TOL)
+    self.assertAllClose(jit(sparse.sparsify(jnp.matmul))(xsp, ysp).todense(), x @ y,
+                        rtol=MATMUL_TOL)
+
+  def test_bcoo_spgemm_duplicates(self):
+    rng = self.rng()
+    x_indices = rng.randint(0, 4, size=(20, 2))
+    y_indices = rng.randint(0, 4, size=(15, 2))
+    x_data, y_data = rng.randn(20), rng.randn(15)
+    x = sparse.BCOO((x_data, x_indices), shape=(4, 4))
+    y = sparse.BCOO((y_data, y_indices), shape=(4, 4))
+    out = x @ y
+    self.assertLessEqual(out.nse, 16)
+    self.assertAllClose(out.todense(), x.todense() @ y.todense())
+
+    def f(x_data):
+      data, indices = sparse.bcoo_spgemm(x_data, x_indices, y_data, y_indices,
+                                         lhs_shape=(4, 4), rhs_shape=(4, 4))
+      return sparse.bcoo_todense(data, indices, shape=(4, 4)).sum()
+    def f_dense(x_data):
+      return (sparse.bcoo_todense(x_data, x_indices, shape=(4, 4)) @ y.todense()).sum()
+    self.assertAllClose(jax.grad(f)(x_data), jax.grad(f_dense)(x_data))
+
+  def test_bcoo_spgemm_errors(self):
+    x = sparse.BCOO.fromdense(jnp.ones((3, 4)))
+    with self.assertRaisesRegex(ValueError, "incompatible shapes"):
+      sparse.bcoo_spgemm(x.data, x.indices, x.data, x.indices,
+                         lhs_shape=x.shape, rhs_shape=x.shape)
+    with self.assertRaises(core.ConcretizationTypeError):
+      jit(lambda x: sparse.bcoo_spgemm(x.data, x.indices, x.data, x.indices,
+                                       lhs_shape=x.shape, rhs_shape=x.shape[::-1]))(x)
+
   @unittest.skipIf(jtu.device_under_test() == "tpu", "TPU has insufficient precision")
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_{}[n_batch={}]_{}[n_batch={}]_in_axes={}".format(
@@ -1059,6 +1193,144 @@ class BCOOTest(jtu.JaxTestCase):
     M_dedup = M._dedupe()
     self.assertAllClose(M.todense(), M_dedup.todense())
 
+  def _random_bcoo_with_duplicates(self, shape, dtype, n_batch, n_dense):
+    rng = self.rng()
+    rng_sparse = rand_sparse(self.rng())
+    M = sparse.BCOO.fromdense(rng_sparse(shape, dtype), n_batch=n_batch, n_dense=n_dense)
+    indices = M.indices
+    for i, s in enumerate(shape[n_batch:len(shape) - n_dense]):
+      indices = indices.at[..., i].set(rng.randint(0, s, size=indices.shape[:-1]))
+    return sparse.BCOO((M.data, indices), shape=M.shape)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_nbatch={}_ndense={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), n_batch, n_dense),
+       "shape": shape, "dtype": dtype, "n_batch": n_batch, "n_dense": n_dense}
+      for shape in [(5,), (5, 8), (8, 5), (3, 4, 5), (3, 4, 3, 2)]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex
+      for n_batch in range(len(shape) + 1)
+      for n_dense in range(len(shape) + 1 - n_batch)))
+  def test_bcoo_sort_indices(self, shape, dtype, n_batch, n_dense):
+    M = self._random_bcoo_with_duplicates(shape, dtype, n_batch, n_dense)
+    M_sorted = M.sort_indices()
+    self.assertTrue(M_sorted.indices_sorted)
+    self.assertAllClose(M.todense(), M_sorted.todense())
+
+    if M.n_sparse == 0:
+      return
+    indices = np.asarray(M_sorted.indices).reshape(-1, *M_sorted.indices.shape[-2:])
+    for ind in indices:
+      self.assertArraysEqual(ind, ind[np.lexsort(ind.T[::-1])])
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_nbatch={}_ndense={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), n_batch, n_dense),
+       "shape": shape, "dtype": dtype, "n_batch": n_batch, "n_dense": n_dense}
+      for shape in [(5,), (5, 8), (8, 5), (3, 4, 5), (3, 4, 3, 2)]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex
+      for n_batch in range(len(shape) + 1)
+      for n_dense in range(len(shape) + 1 - n_batch)))
+  def test_bcoo_sum_duplicates(self, shape, dtype, n_batch, n_dense):
+    M = self._random_bcoo_with_duplicates(shape, dtype, n_batch, n_dense)
+    M_summed = M.sum_duplicates()
+    self.assertTrue(M_summed.indices_sorted)
+    self.assertTrue(M_summed.unique_indices)
+    self.assertLessEqual(M_summed.nse, M.nse)
+    self.assertAllClose(M.todense(), M_summed.todense())
+
+    # Extra elements are padded with out-of-bounds indices, which are ignored.
+    M_padded = M.sum_duplicates(nse=M.nse + 2)
+    self.assertEqual(M_padded.nse, M.nse + 2)
+    self.assertAllClose(M.todense(), M_padded.todense())
+    self.assertAllClose(M_summed.data,
+                        np.take(M_padded.data, np.arange(M_summed.nse), axis=n_batch))
+
+    if M.n_sparse == 0:
+      return
+    indices = np.asarray(M_padded.indices).reshape(-1, *M_padded.indices.shape[-2:])
+    sparse_shape = np.array(shape[n_batch:len(shape) - n_dense])
+    for ind in indices:
+      in_bounds = (ind < sparse_shape).all(-1)
+      self.assertEqual(len(np.unique(ind[in_bounds], axis=0)), in_bounds.sum())
+      self.assertArraysEqual(ind, ind[np.lexsort(ind.T[::-1])])
+
+  def test_bcoo_sum_duplicates_out_of_bounds(self):
+    data = jnp.array([1., 2., 3., 4.])
+    indices = jnp.array([[2, 1], [0, 0], [5, 0], [2, 1]])
+    M = sparse.BCOO((data, indices), shape=(3, 2))
+    M_summed = M.sum_duplicates(nse=3)
+    self.assertArraysEqual(M_summed.data, jnp.array([2., 5., 0.]))
+    self.assertArraysEqual(M_summed.indices, jnp.array([[0, 0], [2, 1], [3, 2]]))
+
+    expected = jnp.array([[2., 0.], [0., 0.], [0., 5.]])
+    self.assertArraysEqual(M_summed.todense(), expected)
+    x = jnp.arange(2.)
+    self.assertAllClose(M_summed @ x, expected @ x)
+    self.assertAllClose(x @ M_summed.T, expected @ x)
+    self.assertAllClose((M_summed * expected).todense(), expected * expected)
+    self.assertAllClose(M_summed.sum(1).todense(), expected.sum(1))
+
+  def test_bcoo_index_flags_pytree(self):
+    M = sparse.BCOO.fromdense(jnp.array([[0., 2., 0.], [1., 0., 4.]]))
+    self.assertTrue(M.indices_sorted)
+    self.assertTrue(M.unique_indices)
+
+    leaves, treedef = jax.tree_util.tree_flatten(M)
+    M_out = jax.tree_util.tree_unflatten(treedef, leaves)
+    self.assertTrue(M_out.indices_sorted)
+    self.assertTrue(M_out.unique_indices)
+
+    M_out = jit(lambda M: M)(M)
+    self.assertTrue(M_out.indices_sorted)
+    self.assertTrue(M_out.unique_indices)
+
+    M_out = sparse.sparsify(lambda M: 2 * jnp.sin(M))(M)
+    self.assertTrue(M_out.indices_sorted)
+    self.assertTrue(M_out.unique_indices)
+
+    M_T = M.T
+    self.assertFalse(M_T.indices_sorted)
+    self.assertTrue(M_T.unique_indices)
+
+    M = sparse.BCOO.fromdense(jnp.array([[0., 2., 0.], [1., 0., 4.]]), nse=5)
+    self.assertFalse(M.indices_sorted)
+    self.assertFalse(M.unique_indices)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name":
+       "_lhs_shape={}_rhs_shape={}_dimension_numbers={}_n_batch={}_n_dense={}"
+       .format(jtu.format_shape_dtype_string(lhs_shape, dtype),
+               jtu.format_shape_dtype_string(rhs_shape, dtype),
+               dimension_numbers, n_batch, n_dense),
+       "lhs_shape": lhs_shape, "rhs_shape": rhs_shape, "dtype": dtype,
+       "dimension_numbers": dimension_numbers,
+       "n_batch": n_batch, "n_dense": n_dense}
+      for lhs_shape, rhs_shape, dimension_numbers, n_batch, n_dense in [
+          ((5, 3), (3, 4), (([1], [0]), ([], [])), 0, 0),
+          ((5, 3), (5,), (([0], [0]), ([], [])), 0, 0),
+          ((5, 3, 2), (3, 4), (([1], [0]), ([], [])), 0, 1),
+          ((4, 5, 3), (3, 2), (([2], [0]), ([], [])), 1, 0),
+          ((3, 3, 2), (3, 2, 4), (([2], [1]), ([0], [0])), 1, 0),
+          ((3, 4, 2, 4), (3, 4, 3, 2), (([2], [3]), ([0, 1], [0, 1])), 2, 1),
+      ]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex))
+  def test_bcoo_dot_general_sorted_indices(self, lhs_shape, rhs_shape, dtype,
+                                           dimension_numbers, n_batch, n_dense):
+    rng = jtu.rand_small(self.rng())
+    M = self._random_bcoo_with_duplicates(lhs_shape, dtype, n_batch, n_dense)
+    Y = rng(rhs_shape, dtype)
+    M_summed = M.sum_duplicates(nse=M.nse)
+
+    def f_sparse(M, Y):
+      return sparse.bcoo_dot_general(M.data, M.indices, Y, lhs_shape=M.shape,
+                                     dimension_numbers=dimension_numbers,
+                                     indices_sorted=M.indices_sorted)
+
+    expected = lax.dot_general(M.todense(), Y, dimension_numbers=dimension_numbers)
+    self.assertAllClose(expected, jit(f_sparse)(M_summed, Y), rtol=MATMUL_TOL)
+    with mock.patch.object(sparse.bcoo, '_BCOO_DOT_GENERAL_MAX_SEGMENTS', 0):
+      self.assertAllClose(expected, jit(f_sparse)(M_summed, Y), rtol=MATMUL_TOL)
+
   @parameterized.named_parameters(jtu.cases_from_list(
       {"testcase_name": "_{}_nbatch={}_ndense={}_axes={}".format(
         jtu.format_shape_dtype_string(shape, dtype), n_batch, n_dense, axes),
@@ -1140,6 +1412,116 @@ class BCOOTest(jtu.JaxTestCase):
     self.assertArraysEqual(M1.todense(), M2.todense())
 
 
+def rand_block_sparse(rng, blocksize, density=0.5):
+  def _rand_block_sparse(shape, dtype):
+    M = jtu.rand_default(rng)(shape, dtype)
+    R, C = blocksize
+    mask = rng.uniform(size=(shape[0] // R, shape[1] // C)) < density
+    return M * np.kron(mask, np.ones(blocksize, bool)).astype(dtype)
+  return _rand_block_sparse
+
+
+_BSR_SHAPES = [((4, 6), (2, 3)), ((8, 8), (2, 2)), ((8, 8), (4, 1)),
+               ((6, 4), (1, 1)), ((6, 4), (3, 2))]
+
+
+class BSRTest(jtu.JaxTestCase):
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_blocksize={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), blocksize),
+       "shape": shape, "blocksize": blocksize, "dtype": dtype}
+      for shape, blocksize in _BSR_SHAPES
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex))
+  def test_bsr_dense_round_trip(self, shape, blocksize, dtype):
+    M = rand_block_sparse(self.rng(), blocksize)(shape, dtype)
+    Msp = sparse.BSR.fromdense(M, blocksize=blocksize)
+    n_blocks = (M.reshape(shape[0] // blocksize[0], blocksize[0], -1, blocksize[1]) != 0).any((1, 3)).sum()
+    self.assertEqual(Msp.nse, n_blocks)
+    self.assertEqual(Msp.blocksize, blocksize)
+    self.assertArraysEqual(Msp.todense(), M)
+
+    # Padding blocks are ignored.
+    Msp = sparse.BSR.fromdense(M, blocksize=blocksize, nse=n_blocks + 2)
+    self.assertEqual(Msp.nse, n_blocks + 2)
+    self.assertArraysEqual(Msp.todense(), M)
+    self.assertArraysEqual(Msp.T.todense(), M.T)
+
+    Msp_scipy = sparse.BSR.from_scipy_sparse(scipy.sparse.bsr_matrix(M, blocksize=blocksize))
+    self.assertArraysEqual(Msp_scipy.todense(), M)
+
+    f = jit(partial(sparse.bsr_fromdense, blocksize=blocksize, nse=n_blocks))
+    self.assertArraysEqual(sparse.bsr_todense(*f(M), shape=shape), M)
+
+  @unittest.skipIf(jtu.device_under_test() == "tpu", "TPU has insufficient precision")
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_blocksize={}_bshape={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), blocksize, bshape),
+       "shape": shape, "blocksize": blocksize, "dtype": dtype, "bshape": bshape}
+      for shape, blocksize in _BSR_SHAPES
+      for bshape in [(), (3,)]
+      for dtype in jtu.dtypes.floating + jtu.dtypes.complex))
+  def test_bsr_matmul(self, shape, blocksize, dtype, bshape):
+    rng = jtu.rand_default(self.rng())
+    M = rand_block_sparse(self.rng(), blocksize)(shape, dtype)
+    Msp = sparse.BSR.fromdense(M, blocksize=blocksize, nse=M.size // np.prod(blocksize))
+    x = jnp.asarray(rng((shape[1], *bshape), dtype))
+    y = jnp.asarray(rng((shape[0], *bshape), dtype))
+
+    self.assertAllClose(M @ x, Msp @ x, rtol=MATMUL_TOL)
+    self.assertAllClose(M.T @ y, Msp.T @ y, rtol=MATMUL_TOL)
+    if bshape:
+      matmat = jit(partial(sparse.bsr_matmat, shape=shape, transpose=True))
+      self.assertAllClose(M.T @ y, matmat(Msp.data, Msp.indices, Msp.indptr, y),
+                          rtol=MATMUL_TOL)
+
+  @parameterized.named_parameters(jtu.cases_from_list(
+      {"testcase_name": "_{}_blocksize={}_transpose={}".format(
+        jtu.format_shape_dtype_string(shape, dtype), blocksize, transpose),
+       "shape": shape, "blocksize": blocksize, "dtype": dtype, "transpose": transpose}
+      for shape, blocksize in _BSR_SHAPES
+      for transpose in [False, True]
+      for dtype in jtu.dtypes.floating))
+  def test_bsr_matmat_ad(self, shape, blocksize, dtype, transpose):
+    rng = jtu.rand_default(self.rng())
+    M = rand_block_sparse(self.rng(), blocksize)(shape, dtype)
+    data, indices, indptr = sparse.bsr_fromdense(M, blocksize=blocksize)
+    B = rng((shape[0] if transpose else shape[1], 3), dtype)
+
+    f = partial(sparse.bsr_matmat, indices=indices, indptr=indptr, shape=shape,
+                transpose=transpose)
+    jtu.check_grads(lambda data, B: f(data, B=B), (data, B), order=2, modes=['fwd', 'rev'])
+
+    def f_dense(M):
+      return sparse.BSR.fromdense(M, blocksize=blocksize, nse=len(data)).todense().sum()
+    expected = sparse.bsr_todense(jnp.ones_like(data), indices, indptr, shape=shape)
+    self.assertArraysEqual(jax.grad(f_dense)(M), expected)
+
+  def test_bsr_vmap(self, shape=(4, 6), blocksize=(2, 3), dtype=np.float32):
+    rng = jtu.rand_default(self.rng())
+    rng_sparse = rand_block_sparse(self.rng(), blocksize)
+    M = jnp.stack([rng_sparse(shape, dtype) for _ in range(3)])
+    x = rng((3, shape[1]), dtype)
+
+    make_bsr = partial(sparse.BSR.fromdense, blocksize=blocksize, nse=4)
+    Msp = jax.vmap(make_bsr)(M)
+    self.assertEqual(Msp.data.shape, (3, 4, *blocksize))
+    self.assertAllClose(jax.vmap(lambda M: M.todense())(Msp), M)
+    self.assertAllClose(jax.vmap(operator.matmul)(Msp, x), jax.vmap(operator.matmul)(M, x),
+                        rtol=MATMUL_TOL)
+    self.assertAllClose(jax.vmap(lambda M: M @ x[0])(Msp), M @ x[0], rtol=MATMUL_TOL)
+
+  def test_bsr_sparsify(self, shape=(4, 6), blocksize=(2, 3), dtype=np.float32):
+    rng = jtu.rand_default(self.rng())
+    M = rand_block_sparse(self.rng(), blocksize)(shape, dtype)
+    Msp = sparse.BSR.fromdense(M, blocksize=blocksize, nse=3)
+    v = rng(shape[1], dtype)
+
+    def f(M, v):
+      return -(jnp.sin(M) @ v)
+    self.assertAllClose(sparse.sparsify(f)(Msp, v), f(M, v), rtol=MATMUL_TOL)
+    self.assertAllClose(Msp.to_bcoo().todense(), M)
+
+
 class SparseGradTest(jtu.JaxTestCase):
   def test_sparse_grad(self):
     rng_sparse = rand_sparse(self.rng())
@@ -1275,5 +1657,103 @@ class SparseObjectTest(jtu.JaxTestCase):
     self.assertArraysEqual(M.sum(1), Msp.sum(1).todense())
     self.assertArraysEqual(M.sum(), Msp.sum())
 
+
+def _poisson_2d(n, dtype=np.float32):
+  T = scipy.sparse.diags([-1, 2, -1], [-1, 0, 1], shape=(n, n), dtype=dtype)
+  I = scipy.sparse.identity(n, dtype=dtype)
+  return (scipy.sparse.kron(I, T) + scipy.sparse.kron(T, I)).toarray()
+
+
+class SparsePreconditionerTest(jtu.JaxTestCase):
+
+  @parameterized.named_parameters(
+    {"testcase_name": "_{}".format(Obj.__name__), "Obj": Obj}
+    for Obj in [jnp.asarray, sparse.CSR, sparse.CSC, sparse.COO, sparse.BCOO])
+  def test_jacobi(self, Obj):
+    M = _poisson_2d(4) + np.diag(np.arange(16.))
+    A = M if Obj is jnp.asarray else Obj.fromdense(M)
+    x = jnp.arange(16.)
+    self.assertAllClose(x / np.diag(M), sparse.preconditioners.jacobi(A)(x))
+
+  @parameterized.named_parameters(
+    {"testcase_name": "_{}_block_size={}".format(Obj.__name__, block_size),
+     "Obj": Obj, "block_size": block_size}
+    for Obj in [jnp.asarray, sparse.CSR, sparse.COO, sparse.BCOO]
+    for block_size in [1, 4, 5])
+  def test_block_jacobi(self, Obj, block_size):
+    M = _poisson_2d(4) + np.diag(np.arange(16.))
+    A = M if Obj is jnp.asarray else Obj.fromdense(M)
+    x = jnp.arange(16.)
+    blocks = np.zeros_like(M)
+    for i in range(0, 16, block_size):
+      blocks[i:i + block_size, i:i + block_size] = M[i:i + block_size, i:i + block_size]
+    expected = np.linalg.solve(blocks, x)
+    actual = sparse.preconditioners.block_jacobi(A, block_size)(x)
+    self.assertAllClose(expected, actual, rtol=1e-5, atol=1e-5)
+
+  @parameterized.named_parameters(
+    {"testcase_name": "_{}".format(Obj.__name__), "Obj": Obj}
+    for Obj in [sparse.CSR, sparse.CSC, sparse.COO, sparse.BCOO])
+  def test_ilu0_tridiagonal_is_exact(self, Obj):
+    # ILU(0) of a tridiagonal matrix has no dropped fill-in, so it is exact.
+    M = scipy.sparse.diags([-1, 3, -1], [-1, 0, 1], shape=(10, 10)).toarray()
+    A = Obj.fromdense(M)
+    x = jnp.arange(10.)
+    self.assertAllClose(np.linalg.solve(M, x),
+                        sparse.preconditioners.ilu0(A)(x), rtol=1e-5, atol=1e-5)
+
+  def test_ilu0_matches_pattern(self):
+    M = _poisson_2d(5)
+    A = sparse.BCOO.fromdense(M, nse=M.astype(bool).sum() + 3)  # with padding
+    precond = sparse.preconditioners.ilu0(A)
+    data, indices, indptr, _ = precond.args
+    LU = sparse.CSR((data, indices, indptr), shape=M.shape).todense()
+    L = np.tril(LU, -1) + np.eye(25)
+    U = np.triu(LU)
+    pattern = M != 0
+    self.assertAllClose(M[pattern], (L @ U)[pattern], rtol=1e-5, atol=1e-5)
+
+  @parameterized.named_parameters(
+    {"testcase_name": "_{}".format(name), "name": name, "kwargs": kwargs}
+    for name, kwargs in [("jacobi", {}), ("block_jacobi", {"block_size": 4}),
+                         ("ilu0", {}), ("incomplete_cholesky", {}),
+                         ("chebyshev", {"degree": 4})])
+  def test_cg_iterations(self, name, kwargs):
+    M = _poisson_2d(8)
+    A = sparse.CSR.fromdense(M)
+    b = jnp.ones(64)
+    precond = getattr(sparse.preconditioners, name)(A, **kwargs)
+    cg_batched = jax.scipy.sparse.linalg.cg_batched
+
+    _, info = cg_batched(A.matvec, b[None], tol=1e-5)
+    x, info_precond = jit(partial(cg_batched, A.matvec, tol=1e-5))(
+        b[None], M=precond)
+    self.assertAllClose(np.linalg.solve(M, b), x[0], rtol=1e-3, atol=1e-3)
+    self.assertTrue(info_precond.converged[0])
+    if name == "jacobi":
+      # The diagonal is constant, so this only rescales the problem.
+      self.assertLessEqual(info_precond.num_iters[0], info.num_iters[0])
+    else:
+      self.assertLess(info_precond.num_iters[0], info.num_iters[0])
+
+  def test_chebyshev_polynomial(self):
+    M = np.diag(np.linspace(1., 10., 10))
+    x = jnp.ones(10)
+    precond = sparse.preconditioners.chebyshev(M, degree=20, lambda_min=1.,
+                                               lambda_max=10.)
+    self.assertAllClose(1 / np.diag(M), precond(x), rtol=1e-3, atol=1e-3)
+    precond = sparse.preconditioners.chebyshev(lambda v: M @ v, degree=20,
+                                               lambda_min=1., lambda_max=10.)
+    self.assertAllClose(1 / np.diag(M), precond(x), rtol=1e-3, atol=1e-3)
+
+  def test_errors(self):
+    with self.assertRaisesRegex(TypeError, "ilu0 requires a sparse matrix"):
+      sparse.preconditioners.ilu0(jnp.eye(3))
+    with self.assertRaisesRegex(ValueError, "matrix must be square"):
+      sparse.preconditioners.jacobi(sparse.CSR.fromdense(jnp.ones((2, 3))))
+    with self.assertRaisesRegex(ValueError, "requires lambda_max"):
+      sparse.preconditioners.chebyshev(lambda x: x)
+
+
 if __name__ == "__main__":
   absltest.main(testLoader=jtu.JaxTestLoader())